@@ -66,5 +66,6 @@ def lambda_handler(event, context):
         logger.error(str(e), {"Result": "Failed to authenticate user"})
         policy.deny_all_methods()
 
+    authoriser_service.log_cache_metrics()
     auth_response = policy.build()
     return auth_response
@@ -1,12 +1,14 @@
 import pathlib
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from decimal import Decimal
 from typing import Literal, Optional
 
 from enums.metadata_field_names import DocumentReferenceMetadataFields
 from enums.snomed_codes import SnomedCodes
 from enums.supported_document_types import SupportedDocumentTypes
 from pydantic import BaseModel, ConfigDict, Field, model_validator
-from pydantic.alias_generators import to_camel, to_pascal
+from pydantic.alias_generators import to_camel, to_pascal, to_snake
 
 # Constants
 DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
@@ -170,3 +172,55 @@ class DocumentReference(BaseModel):
 
     def set_uploaded_to_true(self):
         self.uploaded = True
+
+
+@dataclass(frozen=True, slots=True)
+class DocumentReferenceView:
+    """
+    Lightweight read-only view of a projected DocumentReference item.
+
+    Built straight from a dynamo item without pydantic validation, for callers
+    that only request a few DocumentReferenceMetadataFields. Attributes that
+    were not projected are None, and dynamo numbers are returned as int.
+    """
+
+    id: Optional[str] = None
+    content_type: Optional[str] = None
+    created: Optional[str] = None
+    deleted: Optional[str] = None
+    file_name: Optional[str] = None
+    file_location: Optional[str] = None
+    nhs_number: Optional[str] = None
+    ttl: Optional[int] = None
+    virus_scanner_result: Optional[str] = None
+    current_gp_ods: Optional[str] = None
+    uploaded: Optional[bool] = None
+    uploading: Optional[bool] = None
+    last_updated: Optional[int] = None
+    file_size: Optional[int] = None
+    doc_status: Optional[str] = None
+    custodian: Optional[str] = None
+    document_scan_creation: Optional[str] = None
+
+    @classmethod
+    def from_dynamo_item(cls, item: dict) -> "DocumentReferenceView":
+        return cls(
+            **{
+                VIEW_ATTRIBUTE_NAMES[field_name]: (
+                    int(value) if isinstance(value, Decimal) else value
+                )
+                for field_name, value in item.items()
+                if field_name in VIEW_ATTRIBUTE_NAMES
+            }
+        )
+
+    def last_updated_within_three_minutes(self) -> bool:
+        three_minutes_ago = (
+            datetime.now(timezone.utc).timestamp() - THREE_MINUTES_IN_SECONDS
+        )
+        return self.last_updated is not None and self.last_updated >= three_minutes_ago
+
+
+VIEW_ATTRIBUTE_NAMES = {
+    field.value: to_snake(field.value) for field in DocumentReferenceMetadataFields
+}
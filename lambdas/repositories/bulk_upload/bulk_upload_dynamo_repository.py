@@ -5,8 +5,9 @@ from enums.upload_status import UploadStatus
 from models.document_reference import DocumentReference
 from models.report.bulk_upload_report import BulkUploadReport
 from models.staging_metadata import StagingMetadata
-from services.base.dynamo_service import DynamoDBService
+from services.base.dynamo_service import TRANSACT_WRITE_ITEM_LIMIT, DynamoDBService
 from utils.audit_logging_setup import LoggingService
+from utils.batch_utils import batch
 
 _logger = LoggingService(__name__)
 
@@ -17,15 +18,39 @@ class BulkUploadDynamoRepository:
         self.lg_dynamo_table = os.environ["LLOYD_GEORGE_DYNAMODB_NAME"]
         self.lg_bucket_name = os.environ["LLOYD_GEORGE_BUCKET_NAME"]
 
+        self.report_flush_threshold = int(
+            os.environ.get("BULK_UPLOAD_REPORT_FLUSH_THRESHOLD", 100)
+        )
+
         self.dynamo_records_in_transaction: list[DocumentReference] = []
+        self.pending_report_records: list[dict] = []
         self.dynamo_repository = DynamoDBService()
 
-    def create_record_in_lg_dynamo_table(self, document_reference: DocumentReference):
-        self.dynamo_repository.create_item(
-            table_name=self.lg_dynamo_table,
-            item=document_reference.model_dump(by_alias=True, exclude_none=True),
-        )
-        self.dynamo_records_in_transaction.append(document_reference)
+    def create_records_in_lg_dynamo_table(
+        self, document_references: list[DocumentReference]
+    ):
+        """
+        Writes the records in transactions of up to TRANSACT_WRITE_ITEM_LIMIT
+        items, so a patient with more files than that is written in several
+        transactions rather than atomically. Each transaction is tracked once it
+        succeeds, so rollback_transaction removes the records of the earlier
+        transactions when a later one fails.
+        """
+        for references in batch(document_references, TRANSACT_WRITE_ITEM_LIMIT):
+            self.dynamo_repository.transact_write_items(
+                transact_items=[
+                    {
+                        "Put": {
+                            "TableName": self.lg_dynamo_table,
+                            "Item": reference.model_dump(
+                                by_alias=True, exclude_none=True
+                            ),
+                        }
+                    }
+                    for reference in references
+                ]
+            )
+            self.dynamo_records_in_transaction.extend(references)
 
     def write_report_upload_to_dynamo(
         self,
@@ -45,19 +70,42 @@ class BulkUploadDynamoRepository:
                 pds_ods_code=pds_ods_code,
                 uploader_ods_code=file.gp_practice_code,
             )
-            self.dynamo_repository.create_item(
-                table_name=self.bulk_upload_report_dynamo_table,
-                item=dynamo_record.model_dump(by_alias=True, exclude_none=True),
+            self.pending_report_records.append(
+                dynamo_record.model_dump(by_alias=True, exclude_none=True)
+            )
+
+        if len(self.pending_report_records) >= self.report_flush_threshold:
+            self.flush_report_records()
+
+    def flush_report_records(self):
+        """
+        Writes the buffered report rows with BatchWriteItem. If the write fails
+        for any reason the rows stay buffered, so a later flush retries them.
+        """
+        if not self.pending_report_records:
+            return
+
+        report_records = self.pending_report_records
+        self.pending_report_records = []
+        try:
+            self.dynamo_repository.batch_put_items(
+                table_name=self.bulk_upload_report_dynamo_table, items=report_records
             )
+        except Exception as e:
+            _logger.error(f"Failed to write {len(report_records)} report records: {e}")
+            self.pending_report_records = report_records + self.pending_report_records
+            raise e
 
     def init_transaction(self):
         self.dynamo_records_in_transaction = []
 
     def rollback_transaction(self):
-        for document_reference in self.dynamo_records_in_transaction:
-            primary_key_name = DocumentReferenceMetadataFields.ID.value
-            primary_key_value = document_reference.id
-            deletion_key = {primary_key_name: primary_key_value}
-            self.dynamo_repository.delete_item(
-                table_name=self.lg_dynamo_table, key=deletion_key
+        primary_key_name = DocumentReferenceMetadataFields.ID.value
+        deletion_keys = [
+            {primary_key_name: document_reference.id}
+            for document_reference in self.dynamo_records_in_transaction
+        ]
+        if deletion_keys:
+            self.dynamo_repository.batch_delete_items(
+                table_name=self.lg_dynamo_table, keys=deletion_keys
             )
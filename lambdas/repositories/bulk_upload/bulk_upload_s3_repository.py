@@ -1,4 +1,7 @@
 import os
+import posixpath
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from botocore.exceptions import ClientError
 from enums.virus_scan_result import SCAN_RESULT_TAG_KEY, VirusScanResult
@@ -13,15 +16,17 @@ from utils.exceptions import (
     VirusScanFailedException,
     VirusScanNoResultException,
 )
+from utils.request_context import map_in_request_context
 
 _logger = LoggingService(__name__)
 
 
 class BulkUploadS3Repository:
-    def __init__(self):
+    def __init__(self, max_concurrent_files: int = 10):
         self.s3_repository = S3Service()
         self.staging_bucket_name = os.environ["STAGING_STORE_BUCKET_NAME"]
         self.lg_bucket_name: str = os.environ["LLOYD_GEORGE_BUCKET_NAME"]
+        self.max_concurrent_files = max_concurrent_files
 
         self.dynamo_records_in_transaction: list[DocumentReference] = []
         self.source_bucket_files_in_transaction = []
@@ -30,50 +35,93 @@ class BulkUploadS3Repository:
     def check_virus_result(
         self, staging_metadata: StagingMetadata, file_path_cache: dict
     ):
-        for file_metadata in staging_metadata.files:
-            file_path = file_metadata.file_path
-            source_file_key = file_path_cache[file_path]
-            try:
-                scan_result = self.s3_repository.get_tag_value(
-                    self.staging_bucket_name, source_file_key, SCAN_RESULT_TAG_KEY
-                )
-                if scan_result == VirusScanResult.CLEAN:
-                    continue
-                elif scan_result == VirusScanResult.INFECTED:
-                    raise DocumentInfectedException(
-                        f"Found infected document: {file_path}"
-                    )
-                else:
-                    # handle cases other than Clean or Infected e.g. Unscannable, Error
-                    raise VirusScanFailedException(
-                        f"Failed to scan document: {file_path}, scan result was {scan_result}"
-                    )
-            except TagNotFoundException:
-                raise VirusScanNoResultException(
-                    f"Virus scan result not found for document: {file_path}"
-                )
-            except ClientError as e:
-                if "AccessDenied" in str(e) or "NoSuchKey" in str(e):
-                    _logger.info(
-                        f"Failed to check object tag for given file_path: {file_path}"
-                    )
-                    _logger.info(
-                        "file_path may be incorrect or contain invalid character"
-                    )
-                    raise S3FileNotFoundException(f"Failed to access file {file_path}")
-                else:
-                    raise e
+        file_paths = [
+            file_metadata.file_path for file_metadata in staging_metadata.files
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_files) as executor:
+            map_in_request_context(
+                executor,
+                self.check_file_virus_result,
+                file_paths,
+                [file_path_cache[file_path] for file_path in file_paths],
+            )
 
         _logger.info(
             f"Verified that all documents for patient {staging_metadata.nhs_number} are clean."
         )
 
-    def copy_to_lg_bucket(self, source_file_key: str, dest_file_key: str):
+    def check_file_virus_result(self, file_path: str, source_file_key: str):
+        try:
+            scan_result = self.s3_repository.get_tag_value(
+                self.staging_bucket_name, source_file_key, SCAN_RESULT_TAG_KEY
+            )
+            if scan_result == VirusScanResult.CLEAN:
+                return
+            elif scan_result == VirusScanResult.INFECTED:
+                raise DocumentInfectedException(f"Found infected document: {file_path}")
+            else:
+                # handle cases other than Clean or Infected e.g. Unscannable, Error
+                raise VirusScanFailedException(
+                    f"Failed to scan document: {file_path}, scan result was {scan_result}"
+                )
+        except TagNotFoundException:
+            raise VirusScanNoResultException(
+                f"Virus scan result not found for document: {file_path}"
+            )
+        except ClientError as e:
+            if "AccessDenied" in str(e) or "NoSuchKey" in str(e):
+                _logger.info(
+                    f"Failed to check object tag for given file_path: {file_path}"
+                )
+                _logger.info("file_path may be incorrect or contain invalid character")
+                raise S3FileNotFoundException(f"Failed to access file {file_path}")
+            else:
+                raise e
+
+    def get_staged_file_sizes(self, source_file_keys: list[str]) -> dict[str, int]:
+        """
+        Reads the sizes of a patient's staged files from one listing of each
+        folder they are in, rather than a HEAD per file. Files that are not in
+        a folder, or not in the first page of its listing, and every file when
+        the listing is not allowed, fall back to a HEAD.
+        """
+        file_sizes = {}
+        keys_by_folder = defaultdict(list)
+        for source_file_key in source_file_keys:
+            keys_by_folder[posixpath.dirname(source_file_key)].append(source_file_key)
+
+        for folder, file_keys in keys_by_folder.items():
+            if not folder:
+                continue
+            try:
+                listed_sizes = self.s3_repository.list_object_sizes(
+                    bucket_name=self.staging_bucket_name,
+                    prefix=f"{folder}/",
+                    start_after=min(file_keys)[:-1],
+                )
+            except ClientError as e:
+                _logger.info(f"Unable to list staged files in {folder}: {e}")
+                continue
+            file_sizes.update(
+                {key: listed_sizes[key] for key in file_keys if key in listed_sizes}
+            )
+
+        for source_file_key in source_file_keys:
+            if source_file_key not in file_sizes:
+                file_sizes[source_file_key] = self.s3_repository.get_file_size(
+                    s3_bucket_name=self.staging_bucket_name, object_key=source_file_key
+                )
+        return file_sizes
+
+    def copy_to_lg_bucket(
+        self, source_file_key: str, dest_file_key: str, file_size: int
+    ):
         self.s3_repository.copy_across_bucket(
             source_bucket=self.staging_bucket_name,
             source_file_key=source_file_key,
             dest_bucket=self.lg_bucket_name,
             dest_file_key=dest_file_key,
+            file_size=file_size,
         )
         self.source_bucket_files_in_transaction.append(source_file_key)
         self.dest_bucket_files_in_transaction.append(dest_file_key)
@@ -2,6 +2,7 @@ import importlib
 import logging
 import sys
 from datetime import datetime
+from typing import Iterator
 
 from enums.metadata_field_names import DocumentReferenceMetadataFields
 from services.base.dynamo_service import DynamoDBService
@@ -13,8 +14,12 @@ class BatchUpdate:
     def __init__(
         self,
         table_name: str,
+        total_segments: int = 1,
+        max_read_capacity_per_second: float = 0,
     ):
         self.table_name = table_name
+        self.total_segments = total_segments
+        self.max_read_capacity_per_second = max_read_capacity_per_second
         self.dynamo_service = DynamoDBService()
         self.logger = logging.getLogger("Database migration")
 
@@ -29,21 +34,23 @@ class BatchUpdate:
             raise e
 
     def run_update(self):
-        all_entries = self.list_all_entries()
-        total_count = len(all_entries)
+        current_count = 0
+        for page in self.list_all_entries():
+            for entry in page:
+                current_count += 1
+                self.logger.info(f"Updating record ({current_count})")
+                self.update_single_row(entry)
 
-        for current_count, entry in enumerate(all_entries):
-            self.logger.info(f"Updating record ({current_count} of {total_count})")
-            self.update_single_row(entry)
+        self.logger.info(f"Finished updating all {current_count} records")
 
-        self.logger.info("Finished updating all records")
-
-    def list_all_entries(self) -> list[dict]:
+    def list_all_entries(self) -> Iterator[list[dict]]:
         self.logger.info("Fetching all records from dynamodb table...")
 
-        scan_results = DynamoDBService().scan_whole_table(table_name=self.table_name)
-
-        return scan_results
+        return self.dynamo_service.iter_scan_pages(
+            table_name=self.table_name,
+            total_segments=self.total_segments,
+            max_read_capacity_per_second=self.max_read_capacity_per_second,
+        )
 
     def update_single_row(self, entry: dict):
         doc_ref_id = entry[Fields.ID.value]
@@ -101,6 +108,22 @@ if __name__ == "__main__":
         description="A utility script to update the missing columns for in a dynamoDB doc reference table",
     )
     parser.add_argument("table_name", type=str, help="The name of dynamodb table")
+    parser.add_argument(
+        "--total-segments",
+        type=int,
+        default=1,
+        help="The number of segments to scan the table in parallel",
+    )
+    parser.add_argument(
+        "--max-read-capacity",
+        type=float,
+        default=0,
+        help="The maximum read capacity units per second the scan may consume",
+    )
     args = parser.parse_args()
 
-    BatchUpdate(table_name=args.table_name).main()
+    BatchUpdate(
+        table_name=args.table_name,
+        total_segments=args.total_segments,
+        max_read_capacity_per_second=args.max_read_capacity,
+    ).main()
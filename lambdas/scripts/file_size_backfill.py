@@ -0,0 +1,47 @@
+import importlib
+import logging
+import sys
+
+from services.file_size_backfill_service import FileSizeBackfillService
+
+
+def setup_logging_for_local_script():
+    importlib.reload(logging)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(asctime)s] %(levelname)s [%(name)s.%(funcName)s:%(lineno)d] %(message)s",
+        datefmt="%d/%b/%Y %H:%M:%S",
+        stream=sys.stdout,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    setup_logging_for_local_script()
+
+    parser = argparse.ArgumentParser(
+        prog="file_size_backfill.py",
+        description="A utility script to backfill the missing FileSize of document references in dynamoDB tables",
+    )
+    parser.add_argument(
+        "table_names", type=str, nargs="+", help="The names of the dynamodb tables"
+    )
+    parser.add_argument(
+        "--checkpoint-file",
+        type=str,
+        default="file_size_backfill_checkpoint.json",
+        help="The file used to record progress, an interrupted run resumes from it",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=10,
+        help="The number of concurrent S3 and dynamodb requests",
+    )
+    args = parser.parse_args()
+
+    FileSizeBackfillService(
+        checkpoint_file=args.checkpoint_file, max_workers=args.max_workers
+    ).backfill_tables(args.table_names)
@@ -1,8 +1,9 @@
 import time
+from dataclasses import asdict
 
 from enums.repository_role import RepositoryRole
-from services.manage_user_session_access import ManageUserSessionAccess
-from services.token_service import TokenService
+from services.manage_user_session_access import ManageUserSessionAccess, session_cache
+from services.token_service import TokenService, public_key_cache
 from utils.audit_logging_setup import LoggingService
 from utils.exceptions import AuthorisationException
 from utils.request_context import request_context
@@ -37,18 +38,15 @@ class AuthoriserService:
             user_role = decoded_token.get("repository_role")
 
             current_session = self.manage_user_session_service.find_login_session(
-                ndr_session_id
-            )
-            self.allowed_nhs_numbers = (
-                current_session.get("AllowedNHSNumbers", "").split(",")
-                if current_session.get("AllowedNHSNumbers")
-                else []
-            )
-            self.deceased_nhs_numbers = (
-                current_session.get("DeceasedNHSNumbers", "").split(",")
-                if current_session.get("DeceasedNHSNumbers")
-                else []
+                ndr_session_id, use_cache=True
             )
+            self.set_session_nhs_numbers(current_session)
+            if nhs_number and not self.session_includes_patient(nhs_number):
+                # the patient may have been searched for since the session was cached
+                current_session = self.manage_user_session_service.find_login_session(
+                    ndr_session_id
+                )
+                self.set_session_nhs_numbers(current_session)
 
             self.validate_login_session(float(current_session["TimeToExist"]))
 
@@ -65,6 +63,43 @@ class AuthoriserService:
         except (KeyError, IndexError) as e:
             raise AuthorisationException(e)
 
+    @staticmethod
+    def log_cache_metrics():
+        session_metrics = session_cache.metrics
+        public_key_metrics = public_key_cache.metrics
+        logger.info(
+            f"Authoriser cache hit rates: sessions {session_metrics.hit_rate:.0%}, "
+            f"public key {public_key_metrics.hit_rate:.0%}",
+            {
+                "SessionCacheMetrics": {
+                    **asdict(session_metrics),
+                    "hit_rate": session_metrics.hit_rate,
+                },
+                "PublicKeyCacheMetrics": {
+                    **asdict(public_key_metrics),
+                    "hit_rate": public_key_metrics.hit_rate,
+                },
+            },
+        )
+
+    def set_session_nhs_numbers(self, current_session: dict):
+        self.allowed_nhs_numbers = (
+            current_session.get("AllowedNHSNumbers", "").split(",")
+            if current_session.get("AllowedNHSNumbers")
+            else []
+        )
+        self.deceased_nhs_numbers = (
+            current_session.get("DeceasedNHSNumbers", "").split(",")
+            if current_session.get("DeceasedNHSNumbers")
+            else []
+        )
+
+    def session_includes_patient(self, nhs_number: str) -> bool:
+        return (
+            nhs_number in self.allowed_nhs_numbers
+            or nhs_number in self.deceased_nhs_numbers
+        )
+
     def deny_access_policy(self, path, user_role, nhs_number: str = None):
         logger.info(f"Path: {path}")
 
@@ -5,6 +5,7 @@ from botocore.exceptions import ClientError
 from oauthlib.oauth2 import WebApplicationClient
 from services.base.dynamo_service import DynamoDBService
 from services.base.ssm_service import SSMService
+from services.manage_user_session_access import session_cache
 from services.oidc_service import OidcService
 from utils.audit_logging_setup import LoggingService
 from utils.exceptions import AuthorisationException, LogoutFailureException
@@ -52,6 +53,7 @@ class BackChannelLogoutService:
         self.dynamodb_service.delete_item(
             key={"NDRSessionId": ndr_session_id}, table_name=self.dynamodb_name
         )
+        session_cache.invalidate(ndr_session_id)
 
         logger.info(
             f"Session removed for NDRSessionId {ndr_session_id}",
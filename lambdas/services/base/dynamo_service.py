@@ -1,5 +1,12 @@
+import os
+import queue
+import random
+import threading
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import partial
+from typing import Callable, Iterator, Optional
 
 import boto3
 from boto3.dynamodb.conditions import Attr, ConditionBase, Key
@@ -10,11 +17,47 @@ from utils.dynamo_utils import (
     create_expression_attribute_values,
     create_expressions,
     create_update_expression,
+    iter_paginated_items,
 )
 from utils.exceptions import DynamoServiceException
+from utils.rate_limiter import TokenBucketRateLimiter
+from utils.batch_utils import batch
 
 logger = LoggingService(__name__)
 
+BATCH_GET_ITEM_LIMIT = 100
+BATCH_WRITE_ITEM_LIMIT = 25
+TRANSACT_WRITE_ITEM_LIMIT = 100
+MAX_BATCH_RETRIES = 8
+BACKOFF_BASE_SECONDS = 0.05
+BACKOFF_CAP_SECONDS = 5.0
+THROTTLING_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+    "ThrottlingException",
+}
+RETRYABLE_CANCELLATION_CODES = {"ThrottlingError", "TransactionConflict"}
+SCAN_QUEUE_POLL_SECONDS = 0.1
+SCAN_SEGMENT_COMPLETE = object()
+
+
+@dataclass
+class BatchOperationStats:
+    operation: str
+    table_name: str = ""
+    items: int = 0
+    requests: int = 0
+    retries: int = 0
+    throttles: int = 0
+    consumed_capacity: float = 0.0
+
+    def add(self, other: "BatchOperationStats"):
+        self.items += other.items
+        self.requests += other.requests
+        self.retries += other.retries
+        self.throttles += other.throttles
+        self.consumed_capacity += other.consumed_capacity
+
 
 class DynamoDBService:
     _instance = None
@@ -28,11 +71,29 @@ class DynamoDBService:
     def __init__(self):
         if not self.initialised:
             self.dynamodb = boto3.resource("dynamodb", region_name="eu-west-2")
+            self.thread_resources = threading.local()
             self.initialised = True
 
+    def get_resource(self):
+        """
+        boto3 resources are not thread safe, so the shared resource is only used
+        on the main thread. Other threads, e.g. the pools that query several
+        tables at once or prefetch the next page, each get a resource of their
+        own, built from a session of their own.
+        """
+        if threading.current_thread() is threading.main_thread():
+            return self.dynamodb
+        resource = getattr(self.thread_resources, "dynamodb", None)
+        if resource is None:
+            resource = boto3.session.Session().resource(
+                "dynamodb", region_name="eu-west-2"
+            )
+            self.thread_resources.dynamodb = resource
+        return resource
+
     def get_table(self, table_name):
         try:
-            return self.dynamodb.Table(table_name)
+            return self.get_resource().Table(table_name)
         except ClientError as e:
             logger.error(str(e), {"Result": "Unable to connect to DB"})
             raise e
@@ -77,33 +138,48 @@ class DynamoDBService:
             logger.error(str(e), {"Result": f"Unable to query table: {table_name}"})
             raise e
 
+    def iter_query(
+        self,
+        table_name: str,
+        search_key: str,
+        search_condition: str,
+        index_name: Optional[str] = None,
+        requested_fields: Optional[list[str]] = None,
+        query_filter: Attr | ConditionBase = None,
+        max_items: Optional[int] = None,
+        prefetch: bool = False,
+    ) -> Iterator[dict]:
+        """
+        Yields the items matching a query, fetching further pages only as the
+        caller iterates. See utils.dynamo_utils.iter_paginated_items for max_items
+        and prefetch.
+        """
+        pages = iter_paginated_items(
+            lambda exclusive_start_key: self.query_table_by_index(
+                table_name=table_name,
+                index_name=index_name,
+                search_key=search_key,
+                search_condition=search_condition,
+                requested_fields=requested_fields,
+                query_filter=query_filter,
+                exclusive_start_key=exclusive_start_key,
+            ),
+            max_items=max_items,
+            prefetch=prefetch,
+        )
+        for page in pages:
+            yield from page
+
     def query_with_pagination(
         self, table_name: str, search_key: str, search_condition: str
     ):
-
-        try:
-            table = self.get_table(table_name)
-            results = table.query(
-                KeyConditionExpression=Key(search_key).eq(search_condition)
+        return list(
+            self.iter_query(
+                table_name=table_name,
+                search_key=search_key,
+                search_condition=search_condition,
             )
-            if results is None or "Items" not in results:
-                logger.error(f"Unusable results in DynamoDB: {results!r}")
-                raise DynamoServiceException("Unrecognised response from DynamoDB")
-
-            dynamodb_scan_result = results["Items"]
-
-            while "LastEvaluatedKey" in results:
-                start_key_for_next_page = results["LastEvaluatedKey"]
-                results = table.query(
-                    KeyConditionExpression=Key(search_key).eq(search_condition),
-                    ExclusiveStartKey=start_key_for_next_page,
-                )
-                dynamodb_scan_result.extend(results["Items"])
-            return dynamodb_scan_result
-
-        except ClientError as e:
-            logger.error(str(e), {"Result": f"Unable to query table: {table_name}"})
-            raise e
+        )
 
     def query_all_fields(self, table_name: str, search_key: str, search_condition: str):
         """
@@ -166,6 +242,48 @@ class DynamoDBService:
 
         return table.update_item(**update_item_args)
 
+    def increment_counter(
+        self,
+        table_name: str,
+        key_pair: dict[str, str],
+        counter_name: str,
+        limit: int = None,
+        updated_fields: dict = None,
+    ) -> int:
+        """
+        Atomically adds one to counter_name and returns the new value. When a
+        limit is given the update only succeeds while the counter is below it,
+        otherwise a ConditionalCheckFailedException is raised.
+        """
+        table = self.get_table(table_name)
+        updated_fields = updated_fields or {}
+        expression_attribute_names = {"#counter": counter_name}
+        expression_attribute_values = {":increment": 1}
+        update_expression = "ADD #counter :increment"
+        if updated_fields:
+            field_names = list(updated_fields.keys())
+            update_expression += " " + create_update_expression(field_names)
+            expression_attribute_names.update(create_expressions(field_names)[1])
+            expression_attribute_values.update(
+                create_expression_attribute_values(updated_fields)
+            )
+
+        update_item_args = {
+            "Key": key_pair,
+            "UpdateExpression": update_expression,
+            "ExpressionAttributeNames": expression_attribute_names,
+            "ExpressionAttributeValues": expression_attribute_values,
+            "ReturnValues": "UPDATED_NEW",
+        }
+        if limit is not None:
+            update_item_args["ConditionExpression"] = (
+                "attribute_not_exists(#counter) OR #counter < :limit"
+            )
+            expression_attribute_values[":limit"] = limit
+
+        response = table.update_item(**update_item_args)
+        return int(response["Attributes"][counter_name])
+
     def delete_item(self, table_name: str, key: dict):
         try:
             table = self.get_table(table_name)
@@ -204,76 +322,375 @@ class DynamoDBService:
         table_name: str,
         project_expression: Optional[str] = None,
         filter_expression: Optional[str] = None,
+        total_segments: Optional[int] = None,
+        max_read_capacity_per_second: Optional[float] = None,
     ) -> list[dict]:
+        dynamodb_scan_result = []
+        for page in self.iter_scan_pages(
+            table_name=table_name,
+            project_expression=project_expression,
+            filter_expression=filter_expression,
+            total_segments=total_segments,
+            max_read_capacity_per_second=max_read_capacity_per_second,
+        ):
+            dynamodb_scan_result += page
+        return dynamodb_scan_result
+
+    def iter_scan_pages(
+        self,
+        table_name: str,
+        project_expression: Optional[str] = None,
+        filter_expression: Optional[str] = None,
+        total_segments: Optional[int] = None,
+        max_read_capacity_per_second: Optional[float] = None,
+    ) -> Iterator[list[dict]]:
+        """
+        Yields the items of a full table scan one page at a time.
+
+        With total_segments > 1 the table is scanned as a parallel scan, one
+        segment per worker thread, and pages are yielded in the order they
+        arrive. max_read_capacity_per_second caps the read capacity consumed
+        across all segments. Both default to the DYNAMODB_SCAN_TOTAL_SEGMENTS and
+        DYNAMODB_SCAN_MAX_READ_CAPACITY environment variables.
+        """
+        if total_segments is None:
+            total_segments = int(os.environ.get("DYNAMODB_SCAN_TOTAL_SEGMENTS", 1))
+        if max_read_capacity_per_second is None:
+            max_read_capacity_per_second = float(
+                os.environ.get("DYNAMODB_SCAN_MAX_READ_CAPACITY", 0)
+            )
+
+        scan_arguments = {}
+        if project_expression:
+            scan_arguments["ProjectionExpression"] = project_expression
+        if filter_expression:
+            scan_arguments["FilterExpression"] = filter_expression
+
+        rate_limiter = None
+        if max_read_capacity_per_second:
+            rate_limiter = TokenBucketRateLimiter(max_read_capacity_per_second)
+            scan_arguments["ReturnConsumedCapacity"] = "TOTAL"
+
         try:
-            table = self.get_table(table_name)
-            scan_arguments = {}
-            if project_expression:
-                scan_arguments["ProjectionExpression"] = project_expression
-            if filter_expression:
-                scan_arguments["FilterExpression"] = filter_expression
-
-            paginated_result = table.scan(**scan_arguments)
-            dynamodb_scan_result = paginated_result.get("Items", [])
-            while "LastEvaluatedKey" in paginated_result:
-                start_key_for_next_page = paginated_result["LastEvaluatedKey"]
-                paginated_result = table.scan(
-                    **scan_arguments,
-                    ExclusiveStartKey=start_key_for_next_page,
+            if total_segments <= 1:
+                table = self.get_table(table_name)
+                yield from self._scan_segment_pages(
+                    table.scan, scan_arguments, rate_limiter
+                )
+            else:
+                yield from self._scan_segments_in_parallel(
+                    table_name, scan_arguments, total_segments, rate_limiter
                 )
-                dynamodb_scan_result += paginated_result["Items"]
-            return dynamodb_scan_result
-
         except ClientError as e:
             logger.error(str(e), {"Result": f"Unable to scan table: {table_name}"})
             raise e
 
+    def _scan_segments_in_parallel(
+        self,
+        table_name: str,
+        scan_arguments: dict,
+        total_segments: int,
+        rate_limiter: Optional[TokenBucketRateLimiter],
+    ) -> Iterator[list[dict]]:
+        # boto3 resources are not thread safe, so the segments share the
+        # resource's low-level client rather than a Table
+        scan = partial(self.dynamodb.meta.client.scan, TableName=table_name)
+        page_queue = queue.Queue(maxsize=total_segments * 2)
+        stop_scanning = threading.Event()
+
+        def put_on_queue(result) -> bool:
+            while not stop_scanning.is_set():
+                try:
+                    page_queue.put(result, timeout=SCAN_QUEUE_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def scan_segment(segment: int):
+            segment_arguments = {
+                **scan_arguments,
+                "Segment": segment,
+                "TotalSegments": total_segments,
+            }
+            try:
+                for page in self._scan_segment_pages(
+                    scan, segment_arguments, rate_limiter
+                ):
+                    if not put_on_queue(page):
+                        return
+            except Exception as e:
+                put_on_queue(e)
+                return
+            put_on_queue(SCAN_SEGMENT_COMPLETE)
+
+        logger.info(f"Scanning table: {table_name} in {total_segments} segments")
+        executor = ThreadPoolExecutor(max_workers=total_segments)
+        try:
+            for segment in range(total_segments):
+                executor.submit(scan_segment, segment)
+
+            segments_remaining = total_segments
+            while segments_remaining:
+                result = page_queue.get()
+                if result is SCAN_SEGMENT_COMPLETE:
+                    segments_remaining -= 1
+                elif isinstance(result, Exception):
+                    raise result
+                else:
+                    yield result
+        finally:
+            stop_scanning.set()
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def _scan_segment_pages(
+        scan: Callable[..., dict],
+        scan_arguments: dict,
+        rate_limiter: Optional[TokenBucketRateLimiter],
+    ) -> Iterator[list[dict]]:
+        exclusive_start_key = None
+        while True:
+            if rate_limiter:
+                rate_limiter.acquire(0)
+            if exclusive_start_key:
+                paginated_result = scan(
+                    **scan_arguments, ExclusiveStartKey=exclusive_start_key
+                )
+            else:
+                paginated_result = scan(**scan_arguments)
+            if rate_limiter:
+                rate_limiter.consume(
+                    paginated_result.get("ConsumedCapacity", {}).get("CapacityUnits", 0)
+                )
+
+            yield paginated_result.get("Items", [])
+
+            if "LastEvaluatedKey" not in paginated_result:
+                return
+            exclusive_start_key = paginated_result["LastEvaluatedKey"]
+
     def batch_writing(self, table_name: str, item_list: list[dict]):
+        return self.batch_put_items(table_name=table_name, items=item_list)
+
+    def batch_put_items(
+        self, table_name: str, items: list[dict], max_workers: int = 1
+    ) -> BatchOperationStats:
+        write_requests = [{"PutRequest": {"Item": item}} for item in items]
+        stats, _ = self._run_in_chunks(
+            table_name=table_name,
+            requests=write_requests,
+            chunk_size=BATCH_WRITE_ITEM_LIMIT,
+            chunk_handler=self._batch_write_chunk,
+            max_workers=max_workers,
+        )
+        return stats
+
+    def batch_delete_items(
+        self, table_name: str, keys: list[dict], max_workers: int = 1
+    ) -> BatchOperationStats:
+        write_requests = [{"DeleteRequest": {"Key": key}} for key in keys]
+        stats, _ = self._run_in_chunks(
+            table_name=table_name,
+            requests=write_requests,
+            chunk_size=BATCH_WRITE_ITEM_LIMIT,
+            chunk_handler=self._batch_write_chunk,
+            max_workers=max_workers,
+        )
+        return stats
+
+    def batch_get(
+        self,
+        table_name: str,
+        keys: list[dict],
+        projection_expression: str = None,
+        max_workers: int = 1,
+    ) -> list[dict]:
+        def get_chunk(chunk_table_name: str, chunk: list[dict]):
+            return self._batch_get_chunk(chunk_table_name, chunk, projection_expression)
+
+        _, items = self._run_in_chunks(
+            table_name=table_name,
+            requests=keys,
+            chunk_size=BATCH_GET_ITEM_LIMIT,
+            chunk_handler=get_chunk,
+            max_workers=max_workers,
+        )
+        return items
+
+    def batch_get_items(self, table_name: str, key_list: list[str]):
+        return self.batch_get(
+            table_name=table_name, keys=[{"ID": item_id} for item_id in key_list]
+        )
+
+    def transact_write_items(self, transact_items: list[dict]) -> BatchOperationStats:
+        """
+        Perform the given Put, Delete, Update and ConditionCheck actions as a
+        single all-or-nothing transaction. Transactions are never split, so
+        callers must group actions into transactions of at most
+        TRANSACT_WRITE_ITEM_LIMIT items.
+        """
+        if len(transact_items) > TRANSACT_WRITE_ITEM_LIMIT:
+            raise DynamoServiceException(
+                f"Cannot write more than {TRANSACT_WRITE_ITEM_LIMIT} items in a transaction"
+            )
+        stats = BatchOperationStats(
+            operation="TransactWriteItems", items=len(transact_items)
+        )
         try:
-            table = self.get_table(table_name)
-            logger.info(f"Writing item to table: {table_name}")
-            with table.batch_writer() as batch:
-                for item in item_list:
-                    batch.put_item(Item=item)
+            logger.info(f"Writing transaction of {len(transact_items)} items")
+            self._send_batch_request(
+                stats,
+                self.dynamodb.meta.client.transact_write_items,
+                TransactItems=transact_items,
+            )
+        except ClientError as e:
+            logger.error(str(e), {"Result": "Unable to write transaction"})
+            raise e
+
+        self._log_batch_stats(stats)
+        return stats
+
+    def _run_in_chunks(
+        self,
+        table_name: str,
+        requests: list[dict],
+        chunk_size: int,
+        chunk_handler: Callable[[str, list[dict]], tuple[BatchOperationStats, list]],
+        max_workers: int,
+    ) -> tuple[BatchOperationStats, list[dict]]:
+        chunks = list(batch(requests, chunk_size))
+        try:
+            # chunk handlers may run on a thread pool, so they send their requests
+            # through the resource's low-level client, which is thread safe
+            if max_workers > 1 and len(chunks) > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    chunk_results = list(
+                        executor.map(
+                            lambda chunk: chunk_handler(table_name, chunk), chunks
+                        )
+                    )
+            else:
+                chunk_results = [chunk_handler(table_name, chunk) for chunk in chunks]
         except ClientError as e:
             logger.error(
-                str(e), {"Result": f"Unable to write item to table: {table_name}"}
+                str(e), {"Result": f"Unable to batch process table: {table_name}"}
             )
             raise e
 
-    def batch_get_items(self, table_name: str, key_list: list[str]):
-        if len(key_list) > 100:
-            return DynamoServiceException("Cannot fetch more than 100 items at a time")
-
-        keys_to_get = [{"ID": item_id} for item_id in key_list]
-        request_items = {table_name: {"Keys": keys_to_get}}
+        stats = None
+        items = []
+        for chunk_stats, chunk_items in chunk_results:
+            stats = stats or BatchOperationStats(
+                operation=chunk_stats.operation, table_name=table_name
+            )
+            stats.add(chunk_stats)
+            items.extend(chunk_items)
+
+        if stats:
+            self._log_batch_stats(stats)
+        return stats or BatchOperationStats(operation="", table_name=table_name), items
+
+    def _batch_write_chunk(
+        self, table_name: str, write_requests: list[dict]
+    ) -> tuple[BatchOperationStats, list]:
+        stats = BatchOperationStats(
+            operation="BatchWriteItem", table_name=table_name, items=len(write_requests)
+        )
+        request_items = {table_name: write_requests}
+        while request_items:
+            response = self._send_batch_request(
+                stats,
+                self.dynamodb.meta.client.batch_write_item,
+                RequestItems=request_items,
+            )
+            request_items = response.get("UnprocessedItems") or {}
+            if request_items:
+                self._wait_before_retry(
+                    stats, f"{len(request_items[table_name])} unprocessed items"
+                )
+        return stats, []
 
-        all_fetched_items = []
-        retries = 0
-        max_retries = 3
+    def _batch_get_chunk(
+        self, table_name: str, keys: list[dict], projection_expression: str = None
+    ) -> tuple[BatchOperationStats, list[dict]]:
+        stats = BatchOperationStats(
+            operation="BatchGetItem", table_name=table_name, items=len(keys)
+        )
+        keys_and_attributes = {"Keys": keys}
+        if projection_expression:
+            keys_and_attributes["ProjectionExpression"] = projection_expression
+
+        fetched_items = []
+        request_items = {table_name: keys_and_attributes}
+        while request_items:
+            response = self._send_batch_request(
+                stats,
+                self.dynamodb.meta.client.batch_get_item,
+                RequestItems=request_items,
+            )
+            fetched_items.extend(response.get("Responses", {}).get(table_name, []))
+            request_items = response.get("UnprocessedKeys") or {}
+            if request_items:
+                self._wait_before_retry(
+                    stats,
+                    f"{len(request_items[table_name]['Keys'])} unprocessed keys",
+                )
+        return stats, fetched_items
 
-        while request_items[table_name]["Keys"] and retries < max_retries:
+    def _send_batch_request(
+        self, stats: BatchOperationStats, send_request: Callable, **kwargs
+    ) -> dict:
+        while True:
             try:
-                response = self.dynamodb.batch_get_item(RequestItems=request_items)
-
-                table_responses = response.get("Responses", {}).get(table_name, [])
-                all_fetched_items.extend(table_responses)
-
-                unprocessed_keys = response.get("UnprocessedKeys", {})
-                if table_name in unprocessed_keys:
-                    logger.info(
-                        f"Retrying {len(unprocessed_keys[table_name]['Keys'])} unprocessed keys..."
-                    )
-                    request_items = unprocessed_keys
-                    retries += 1
-                    time.sleep((2**retries) * 0.1)
-                else:
-                    break
+                response = send_request(ReturnConsumedCapacity="TOTAL", **kwargs)
+            except ClientError as e:
+                if not self._is_throttling_error(e):
+                    raise e
+                stats.throttles += 1
+                self._wait_before_retry(stats, "throttled request")
+                continue
+
+            stats.requests += 1
+            stats.consumed_capacity += sum(
+                consumed.get("CapacityUnits", 0)
+                for consumed in response.get("ConsumedCapacity", [])
+            )
+            return response
+
+    @staticmethod
+    def _is_throttling_error(error: ClientError) -> bool:
+        error_code = error.response.get("Error", {}).get("Code")
+        if error_code in THROTTLING_ERROR_CODES:
+            return True
+        if error_code == "TransactionCanceledException":
+            cancellation_codes = {
+                reason.get("Code")
+                for reason in error.response.get("CancellationReasons", [])
+            }
+            return bool(cancellation_codes & RETRYABLE_CANCELLATION_CODES)
+        return False
+
+    @staticmethod
+    def _wait_before_retry(stats: BatchOperationStats, reason: str):
+        if stats.retries >= MAX_BATCH_RETRIES:
+            raise DynamoServiceException(
+                f"Unable to complete {stats.operation} on table: {stats.table_name} "
+                f"after {stats.retries} retries, {reason} remaining"
+            )
+        stats.retries += 1
+        logger.info(f"Retrying {reason}...")
+        backoff_ceiling = min(
+            BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * (2**stats.retries)
+        )
+        time.sleep(random.uniform(0, backoff_ceiling))
 
-            except Exception as e:
-                print(f"An error occurred during batch_get_item: {e}")
-                raise e
-        return all_fetched_items
+    @staticmethod
+    def _log_batch_stats(stats: BatchOperationStats):
+        logger.info(
+            f"Completed {stats.operation} of {stats.items} items",
+            {"BatchOperationStats": asdict(stats)},
+        )
 
     def get_item(self, table_name: str, key: dict):
         try:
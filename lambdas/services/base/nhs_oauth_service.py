@@ -1,36 +1,70 @@
 import json
+import os
 import time
 import uuid
 
 import jwt
 import requests
+from botocore.exceptions import ClientError
 from enums.pds_ssm_parameters import SSMParameter
 from requests.exceptions import HTTPError
+from utils.access_token_manager import AccessToken, AccessTokenManager
 from utils.audit_logging_setup import LoggingService
 from utils.exceptions import OAuthErrorException
 
 logger = LoggingService(__name__)
 
+access_token_manager = AccessTokenManager(
+    refresh_margin_seconds=int(
+        os.environ.get("NHS_OAUTH_TOKEN_REFRESH_MARGIN_SECONDS", 10)
+    )
+)
+
 
 class NhsOauthService:
     def __init__(self, ssm_service):
         self.ssm_service = ssm_service
 
     def get_active_access_token(self):
-        access_token_response = self.get_current_access_token()
-        access_token_response = json.loads(access_token_response)
-        access_token = access_token_response["access_token"]
-        access_token_expiration = (
-            int(access_token_response["expires_in"])
-            + int(access_token_response["issued_at"]) / 1000
+        return access_token_manager.get_access_token(
+            fetch_token=self.fetch_new_access_token,
+            load_token=self.load_current_access_token,
+            store_token=self.store_access_token,
         )
 
-        time_safety_margin_seconds = 10
-        remaining_time_before_expiration = access_token_expiration - time.time()
-        if remaining_time_before_expiration < time_safety_margin_seconds:
-            access_token = self.get_new_access_token_response().get("access_token", "")
+    @staticmethod
+    def invalidate_access_token(access_token: str):
+        access_token_manager.invalidate(access_token)
+
+    def load_current_access_token(self) -> AccessToken:
+        access_token_response = json.loads(self.get_current_access_token())
+        return self.to_access_token(access_token_response)
+
+    def fetch_new_access_token(self) -> AccessToken:
+        return self.to_access_token(self.get_new_access_token_response())
+
+    def store_access_token(self, access_token: AccessToken):
+        if not access_token.response:
+            return
+        try:
+            self.update_access_token_ssm(json.dumps(access_token.response))
+        except ClientError as e:
+            logger.warning(f"Failed to store new NHS OAuth token on SSM: {e}")
 
-        return access_token
+    @staticmethod
+    def to_access_token(access_token_response: dict) -> AccessToken:
+        try:
+            expires_at = (
+                int(access_token_response["expires_in"])
+                + int(access_token_response["issued_at"]) / 1000
+            )
+        except (KeyError, TypeError, ValueError):
+            expires_at = 0
+        return AccessToken(
+            value=access_token_response.get("access_token", ""),
+            expires_at=expires_at,
+            response=access_token_response,
+        )
 
     def get_new_access_token_response(self):
         logger.info("Getting new OAuth access token")
@@ -79,7 +113,7 @@ class NhsOauthService:
         parameter = SSMParameter.PDS_API_ACCESS_TOKEN.value
 
         ssm_response = self.ssm_service.get_ssm_parameter(
-            parameter, with_decryption=True
+            parameter, with_decryption=True, use_cache=False
         )
         return ssm_response
 
@@ -0,0 +1,161 @@
+import io
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from io import BytesIO
+from typing import Any, Mapping
+
+from services.base.s3_service import S3Service
+from utils.audit_logging_setup import LoggingService
+
+logger = LoggingService(__name__)
+
+MIN_PART_SIZE_BYTES = 5 * 1024 * 1024
+
+
+class S3MultipartUploadStream(io.RawIOBase):
+    """
+    Write-only file object that uploads to S3 as data is written to it.
+
+    Data is buffered until a full part is available, and each part is sent with
+    upload_part. With max_in_flight_parts > 1 parts are uploaded on background
+    threads so the upload overlaps with whatever is producing the data; write()
+    only blocks once that many parts are in flight, so at most
+    part_size * (max_in_flight_parts + 1) bytes are held in memory. Output smaller
+    than a single part is sent with a plain upload instead of a multipart upload.
+
+    example usage:
+        with S3MultipartUploadStream(s3_service, bucket, key) as upload_stream:
+            pdf.save(upload_stream)
+        file_size = upload_stream.bytes_written
+    """
+
+    def __init__(
+        self,
+        s3_service: S3Service,
+        s3_bucket_name: str,
+        file_key: str,
+        part_size: int = MIN_PART_SIZE_BYTES,
+        extra_args: Mapping[str, Any] = None,
+        max_in_flight_parts: int = 1,
+    ):
+        super().__init__()
+        self.s3_service = s3_service
+        self.s3_bucket_name = s3_bucket_name
+        self.file_key = file_key
+        self.part_size = max(part_size, MIN_PART_SIZE_BYTES)
+        self.extra_args = extra_args or {}
+        self.upload_id = None
+        self.parts: list[dict] = []
+        self.buffer = bytearray()
+        self.bytes_written = 0
+        self.max_in_flight_parts = max_in_flight_parts
+        self.in_flight_parts: deque[Future] = deque()
+        self.executor = (
+            ThreadPoolExecutor(max_workers=max_in_flight_parts)
+            if max_in_flight_parts > 1
+            else None
+        )
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.bytes_written
+
+    def write(self, data) -> int:
+        self.buffer.extend(data)
+        self.bytes_written += len(data)
+
+        while len(self.buffer) >= self.part_size:
+            self._upload_part(bytes(self.buffer[: self.part_size]))
+            del self.buffer[: self.part_size]
+
+        return len(data)
+
+    def _upload_part(self, body: bytes):
+        if self.upload_id is None:
+            self.upload_id = self.s3_service.create_multipart_upload(
+                s3_bucket_name=self.s3_bucket_name,
+                file_key=self.file_key,
+                extra_args=self.extra_args,
+            )
+
+        part_number = len(self.parts) + len(self.in_flight_parts) + 1
+        if self.executor is None:
+            self.parts.append(self._send_part(part_number, body))
+            return
+
+        while len(self.in_flight_parts) >= self.max_in_flight_parts:
+            self.parts.append(self.in_flight_parts.popleft().result())
+        self.in_flight_parts.append(
+            self.executor.submit(self._send_part, part_number, body)
+        )
+
+    def _send_part(self, part_number: int, body: bytes) -> dict:
+        etag = self.s3_service.upload_part(
+            s3_bucket_name=self.s3_bucket_name,
+            file_key=self.file_key,
+            upload_id=self.upload_id,
+            part_number=part_number,
+            body=body,
+        )
+        return {"ETag": etag, "PartNumber": part_number}
+
+    def _wait_for_in_flight_parts(self):
+        while self.in_flight_parts:
+            self.parts.append(self.in_flight_parts.popleft().result())
+
+    def complete(self):
+        if self.upload_id is None:
+            self.s3_service.upload_file_obj(
+                file_obj=BytesIO(bytes(self.buffer)),
+                s3_bucket_name=self.s3_bucket_name,
+                file_key=self.file_key,
+                extra_args=self.extra_args,
+            )
+        else:
+            if self.buffer:
+                self._upload_part(bytes(self.buffer))
+            self._wait_for_in_flight_parts()
+            self.s3_service.complete_multipart_upload(
+                s3_bucket_name=self.s3_bucket_name,
+                file_key=self.file_key,
+                upload_id=self.upload_id,
+                parts=self.parts,
+            )
+            logger.info(
+                f"Completed multipart upload of {len(self.parts)} parts to "
+                f"s3://{self.s3_bucket_name}/{self.file_key}"
+            )
+        self.buffer.clear()
+
+    def abort(self):
+        self.buffer.clear()
+        wait(self.in_flight_parts)
+        self.in_flight_parts.clear()
+        if self.upload_id is None:
+            return
+
+        logger.info(
+            f"Aborting multipart upload to s3://{self.s3_bucket_name}/{self.file_key}"
+        )
+        self.s3_service.abort_multipart_upload(
+            s3_bucket_name=self.s3_bucket_name,
+            file_key=self.file_key,
+            upload_id=self.upload_id,
+        )
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is not None:
+                self.abort()
+                return
+            try:
+                self.complete()
+            except Exception:
+                self.abort()
+                raise
+        finally:
+            if self.executor:
+                self.executor.shutdown(wait=True)
+            self.close()
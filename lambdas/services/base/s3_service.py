@@ -1,17 +1,28 @@
 import io
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from io import BytesIO
+from math import ceil
 from typing import Any, Mapping
+from urllib.parse import urlencode
 
 import boto3
 from botocore.client import Config as BotoConfig
 from botocore.exceptions import ClientError
 from services.base.iam_service import IAMService
 from utils.audit_logging_setup import LoggingService
+from utils.batch_utils import batch
 from utils.exceptions import TagNotFoundException
 
 logger = LoggingService(__name__)
 
+MULTIPART_COPY_THRESHOLD = 128 * 1024 * 1024
+MULTIPART_COPY_PART_SIZE = 64 * 1024 * 1024
+MULTIPART_COPY_MAX_CONCURRENT_PARTS = 10
+MULTIPART_UPLOAD_MAX_PARTS = 10_000
+DELETE_OBJECTS_MAX_KEYS = 1000
+MAX_POOL_CONNECTIONS = 50
+
 
 class S3Service:
     _instance = None
@@ -29,7 +40,7 @@ class S3Service:
                 retries={"max_attempts": 3, "mode": "standard"},
                 s3={"addressing_style": "virtual"},
                 signature_version="s3v4",
-                max_pool_connections=20,
+                max_pool_connections=MAX_POOL_CONNECTIONS,
             )
             self.presigned_url_expiry = 1800
             self.client = boto3.client("s3", config=self.config)
@@ -116,17 +127,146 @@ class S3Service:
         source_file_key: str,
         dest_bucket: str,
         dest_file_key: str,
+        file_size: int = None,
+        metadata: dict[str, str] = None,
+        tags: dict[str, str] = None,
     ):
+        """
+        Copies an object server-side. When the source size is known and above
+        MULTIPART_COPY_THRESHOLD, the object is copied as parallel upload_part_copy
+        ranges, which is faster for large files and not limited to 5 GB.
+
+        metadata and tags replace those of the source object when given, so no
+        follow-up call is needed to set them; otherwise they are copied across.
+        """
+        if file_size is not None and file_size > MULTIPART_COPY_THRESHOLD:
+            return self.multipart_copy_across_bucket(
+                source_bucket=source_bucket,
+                source_file_key=source_file_key,
+                dest_bucket=dest_bucket,
+                dest_file_key=dest_file_key,
+                file_size=file_size,
+                metadata=metadata,
+                tags=tags,
+            )
+
+        extra_args = {}
+        if metadata is not None:
+            # replacing the metadata also replaces the system metadata, so the
+            # content type has to be carried across, as the multipart copy does
+            source_object = self.client.head_object(
+                Bucket=source_bucket, Key=source_file_key
+            )
+            extra_args.update(Metadata=metadata, MetadataDirective="REPLACE")
+            if source_object.get("ContentType"):
+                extra_args["ContentType"] = source_object["ContentType"]
+        if tags is not None:
+            extra_args.update(Tagging=urlencode(tags), TaggingDirective="REPLACE")
         return self.client.copy_object(
             Bucket=dest_bucket,
             Key=dest_file_key,
             CopySource={"Bucket": source_bucket, "Key": source_file_key},
             StorageClass="INTELLIGENT_TIERING",
+            **extra_args,
+        )
+
+    def multipart_copy_across_bucket(
+        self,
+        source_bucket: str,
+        source_file_key: str,
+        dest_bucket: str,
+        dest_file_key: str,
+        file_size: int,
+        metadata: dict[str, str] = None,
+        tags: dict[str, str] = None,
+    ):
+        copy_source = {"Bucket": source_bucket, "Key": source_file_key}
+        source_object = self.client.head_object(
+            Bucket=source_bucket, Key=source_file_key
+        )
+        if metadata is None:
+            metadata = source_object.get("Metadata", {})
+        if tags is None:
+            tag_set = self.client.get_object_tagging(
+                Bucket=source_bucket, Key=source_file_key
+            )["TagSet"]
+            tags = {tag["Key"]: tag["Value"] for tag in tag_set}
+
+        extra_args = {"StorageClass": "INTELLIGENT_TIERING", "Metadata": metadata}
+        if source_object.get("ContentType"):
+            extra_args["ContentType"] = source_object["ContentType"]
+        if tags:
+            extra_args["Tagging"] = urlencode(tags)
+        upload_id = self.create_multipart_upload(
+            s3_bucket_name=dest_bucket, file_key=dest_file_key, extra_args=extra_args
+        )
+
+        part_size = max(
+            MULTIPART_COPY_PART_SIZE, ceil(file_size / MULTIPART_UPLOAD_MAX_PARTS)
+        )
+        part_ranges = [
+            f"bytes={start}-{min(start + part_size, file_size) - 1}"
+            for start in range(0, file_size, part_size)
+        ]
+        logger.info(
+            f"Copying {file_size} bytes to {dest_file_key} in {len(part_ranges)} parts"
         )
 
+        def copy_part(part_number: int, copy_source_range: str) -> dict:
+            response = self.client.upload_part_copy(
+                Bucket=dest_bucket,
+                Key=dest_file_key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                CopySource=copy_source,
+                CopySourceRange=copy_source_range,
+            )
+            return {
+                "ETag": response["CopyPartResult"]["ETag"],
+                "PartNumber": part_number,
+            }
+
+        try:
+            with ThreadPoolExecutor(
+                max_workers=MULTIPART_COPY_MAX_CONCURRENT_PARTS
+            ) as executor:
+                parts = list(
+                    executor.map(copy_part, range(1, len(part_ranges) + 1), part_ranges)
+                )
+            return self.complete_multipart_upload(
+                s3_bucket_name=dest_bucket,
+                file_key=dest_file_key,
+                upload_id=upload_id,
+                parts=parts,
+            )
+        except Exception as e:
+            logger.error(f"Failed to copy {source_file_key} to {dest_file_key}: {e}")
+            self.abort_multipart_upload(
+                s3_bucket_name=dest_bucket, file_key=dest_file_key, upload_id=upload_id
+            )
+            raise e
+
     def delete_object(self, s3_bucket_name: str, file_key: str):
         return self.client.delete_object(Bucket=s3_bucket_name, Key=file_key)
 
+    def delete_objects(self, s3_bucket_name: str, file_keys: list[str]) -> list[dict]:
+        """
+        Delete the given keys with DeleteObjects, DELETE_OBJECTS_MAX_KEYS at a time.
+        Returns the Errors entries (Key, Code, Message) for keys that could not
+        be deleted; keys that do not exist count as deleted.
+        """
+        errors = []
+        for file_keys_batch in batch(file_keys, DELETE_OBJECTS_MAX_KEYS):
+            response = self.client.delete_objects(
+                Bucket=s3_bucket_name,
+                Delete={
+                    "Objects": [{"Key": file_key} for file_key in file_keys_batch],
+                    "Quiet": True,
+                },
+            )
+            errors.extend(response.get("Errors", []))
+        return errors
+
     def create_object_tag(
         self, s3_bucket_name: str, file_key: str, tag_key: str, tag_value: str
     ):
@@ -172,13 +312,31 @@ class S3Service:
             logger.error(str(e), {"Result": "Failed to check if file exists on s3"})
             raise e
 
-    def list_all_objects(self, bucket_name: str) -> list[dict]:
+    def list_all_objects(self, bucket_name: str, prefix: str = None) -> list[dict]:
         s3_paginator = self.client.get_paginator("list_objects_v2")
         s3_list_objects_result = []
-        for paginated_result in s3_paginator.paginate(Bucket=bucket_name):
+        paginate_arguments = {"Bucket": bucket_name}
+        if prefix:
+            paginate_arguments["Prefix"] = prefix
+        for paginated_result in s3_paginator.paginate(**paginate_arguments):
             s3_list_objects_result += paginated_result.get("Contents", [])
         return s3_list_objects_result
 
+    def list_object_sizes(
+        self, bucket_name: str, prefix: str, start_after: str = ""
+    ) -> dict[str, int]:
+        """
+        Returns the size of each object in a single ListObjectsV2 page (up to
+        1000 keys) under prefix, starting after start_after.
+        """
+        response = self.client.list_objects_v2(
+            Bucket=bucket_name, Prefix=prefix, StartAfter=start_after
+        )
+        return {
+            listed_object["Key"]: listed_object["Size"]
+            for listed_object in response.get("Contents", [])
+        }
+
     def get_file_size(self, s3_bucket_name: str, object_key: str) -> int:
         response = self.client.head_object(Bucket=s3_bucket_name, Key=object_key)
         return response.get("ContentLength", 0)
@@ -216,6 +374,48 @@ class S3Service:
             )
             raise e
 
+    def create_multipart_upload(
+        self, s3_bucket_name: str, file_key: str, extra_args: Mapping[str, Any] = None
+    ) -> str:
+        response = self.client.create_multipart_upload(
+            Bucket=s3_bucket_name, Key=file_key, **(extra_args or {})
+        )
+        return response["UploadId"]
+
+    def upload_part(
+        self,
+        s3_bucket_name: str,
+        file_key: str,
+        upload_id: str,
+        part_number: int,
+        body: bytes,
+    ) -> str:
+        response = self.client.upload_part(
+            Bucket=s3_bucket_name,
+            Key=file_key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        return response["ETag"]
+
+    def complete_multipart_upload(
+        self, s3_bucket_name: str, file_key: str, upload_id: str, parts: list[dict]
+    ):
+        return self.client.complete_multipart_upload(
+            Bucket=s3_bucket_name,
+            Key=file_key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+
+    def abort_multipart_upload(
+        self, s3_bucket_name: str, file_key: str, upload_id: str
+    ):
+        return self.client.abort_multipart_upload(
+            Bucket=s3_bucket_name, Key=file_key, UploadId=upload_id
+        )
+
     def save_or_create_file(self, source_bucket: str, file_key: str, body: bytes):
         return self.client.put_object(
             Bucket=source_bucket, Key=file_key, Body=BytesIO(body)
@@ -1,7 +1,17 @@
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
 
 import boto3
 from botocore.client import Config as BotoConfig
+from utils.audit_logging_setup import LoggingService
+
+logger = LoggingService(__name__)
+
+SQS_BATCH_MAX_ENTRIES = 10
+SQS_BATCH_MAX_BYTES = 256 * 1024
+SQS_BATCH_MAX_ATTEMPTS = 3
 
 
 class SQSService:
@@ -57,3 +67,75 @@ class SQSService:
             MessageBody=message_body,
             MessageGroupId=group_id,
         )
+
+    def send_message_batch_fifo(
+        self, queue_url: str, entries: list[dict], max_concurrent_batches: int = 1
+    ) -> list[dict]:
+        """
+        Sends SendMessageBatch entries (MessageBody, MessageGroupId and optionally
+        MessageDeduplicationId and MessageAttributes, without an Id) in batches of
+        up to 10 entries and 256 KB. Entries that fail on the SQS side are retried;
+        any that still fail, or that were rejected as sender faults, are returned.
+
+        Batches are sent max_concurrent_batches at a time, so the order within a
+        message group is only preserved when that is 1.
+        """
+        batches = list(self._split_into_batches(entries))
+        with ThreadPoolExecutor(max_workers=max_concurrent_batches) as executor:
+            failed_batches = executor.map(
+                lambda entry_batch: self._send_fifo_batch(queue_url, entry_batch),
+                batches,
+            )
+            return [entry for failed in failed_batches for entry in failed]
+
+    def _send_fifo_batch(self, queue_url: str, entries: list[dict]) -> list[dict]:
+        pending = {str(index): entry for index, entry in enumerate(entries)}
+        failed = []
+        for attempt in range(1, SQS_BATCH_MAX_ATTEMPTS + 1):
+            response = self.client.send_message_batch(
+                QueueUrl=queue_url,
+                Entries=[
+                    {"Id": entry_id, **entry} for entry_id, entry in pending.items()
+                ],
+            )
+            retryable = {}
+            for failure in response.get("Failed", []):
+                logger.warning(
+                    f"Failed to send message to {queue_url}: {failure.get('Code')}"
+                )
+                if failure.get("SenderFault"):
+                    failed.append(pending[failure["Id"]])
+                else:
+                    retryable[failure["Id"]] = pending[failure["Id"]]
+
+            pending = retryable
+            if not pending:
+                break
+            if attempt < SQS_BATCH_MAX_ATTEMPTS:
+                time.sleep(0.1 * 2**attempt)
+
+        return failed + list(pending.values())
+
+    @staticmethod
+    def _split_into_batches(entries: list[dict]) -> Iterator[list[dict]]:
+        entry_batch = []
+        batch_size = 0
+        for entry in entries:
+            entry_size = len(entry["MessageBody"].encode("utf-8")) + sum(
+                len(name)
+                + len(attribute.get("DataType", ""))
+                + len(attribute.get("StringValue", ""))
+                for name, attribute in entry.get("MessageAttributes", {}).items()
+            )
+            if entry_batch and (
+                len(entry_batch) == SQS_BATCH_MAX_ENTRIES
+                or batch_size + entry_size > SQS_BATCH_MAX_BYTES
+            ):
+                yield entry_batch
+                entry_batch = []
+                batch_size = 0
+            entry_batch.append(entry)
+            batch_size += entry_size
+
+        if entry_batch:
+            yield entry_batch
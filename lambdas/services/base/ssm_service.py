@@ -1,24 +1,100 @@
+import os
+
 import boto3
+from enums.pds_ssm_parameters import SSMParameter
+from utils.batch_utils import batch
+from utils.ttl_cache import TtlCache
+
+GET_PARAMETERS_MAX_NAMES = 10
+
+# Access tokens are rotated by other lambdas, so they are only reused briefly
+PARAMETER_CACHE_TTL_SECONDS = {
+    SSMParameter.PDS_API_ACCESS_TOKEN.value: 60,
+    SSMParameter.VIRUS_API_ACCESS_TOKEN.value: 60,
+}
+
+# Parameters that are always read together, so a miss on one fetches them all
+PARAMETER_GROUPS = [
+    [
+        SSMParameter.PDS_API_ENDPOINT.value,
+        SSMParameter.PDS_API_ACCESS_TOKEN.value,
+    ],
+    [
+        SSMParameter.NHS_OAUTH_ENDPOINT.value,
+        SSMParameter.PDS_KID.value,
+        SSMParameter.NHS_OAUTH_KEY.value,
+        SSMParameter.PDS_API_KEY.value,
+    ],
+    [
+        SSMParameter.VIRUS_API_USER.value,
+        SSMParameter.VIRUS_API_PASSWORD.value,
+        SSMParameter.VIRUS_API_BASE_URL.value,
+        SSMParameter.VIRUS_API_ACCESS_TOKEN.value,
+    ],
+]
+
+parameter_cache = TtlCache(
+    ttl_seconds=int(os.environ.get("SSM_PARAMETER_CACHE_TTL_SECONDS", 300))
+)
 
 
 class SSMService:
+    """
+    Parameters are cached for the life of a warm container, shared by every
+    SSMService in the process, for SSM_PARAMETER_CACHE_TTL_SECONDS unless
+    PARAMETER_CACHE_TTL_SECONDS sets a shorter time for the parameter. Pass
+    use_cache=False for a value that must be read from SSM; it still refreshes
+    the cache. Setting SSM_PARAMETER_CACHE_TTL_SECONDS to 0 disables the cache.
+    """
+
     def __init__(self):
         self.client = boto3.client("ssm", region_name="eu-west-2")
 
-    def get_ssm_parameter(self, parameter_key: str, with_decryption=False):
+    def get_ssm_parameter(
+        self, parameter_key: str, with_decryption=False, use_cache: bool = True
+    ):
+        if use_cache:
+            cached_value = parameter_cache.get((parameter_key, with_decryption))
+            if cached_value is not None:
+                return cached_value
+
+            parameter_group = self.get_parameter_group(parameter_key)
+            if parameter_group and parameter_cache.enabled:
+                parameters = self.get_ssm_parameters(parameter_group, with_decryption)
+                if parameter_key in parameters:
+                    return parameters[parameter_key]
+
         ssm_response = self.client.get_parameter(
             Name=parameter_key, WithDecryption=with_decryption
         )
-        return ssm_response["Parameter"]["Value"]
+        parameter_value = ssm_response["Parameter"]["Value"]
+        self.cache_parameter(parameter_key, with_decryption, parameter_value)
+        return parameter_value
 
-    def get_ssm_parameters(self, parameters_keys: list[str], with_decryption=False):
-        ssm_response = self.client.get_parameters(
-            Names=parameters_keys, WithDecryption=with_decryption
-        )
-        return {
-            parameter["Name"]: parameter["Value"]
-            for parameter in ssm_response["Parameters"]
-        }
+    def get_ssm_parameters(
+        self,
+        parameters_keys: list[str],
+        with_decryption=False,
+        use_cache: bool = True,
+    ):
+        parameters = {}
+        if use_cache:
+            for parameter_key in parameters_keys:
+                cached_value = parameter_cache.get((parameter_key, with_decryption))
+                if cached_value is not None:
+                    parameters[parameter_key] = cached_value
+
+        missing_keys = [key for key in parameters_keys if key not in parameters]
+        for keys in batch(missing_keys, GET_PARAMETERS_MAX_NAMES):
+            ssm_response = self.client.get_parameters(
+                Names=keys, WithDecryption=with_decryption
+            )
+            for parameter in ssm_response["Parameters"]:
+                parameters[parameter["Name"]] = parameter["Value"]
+                self.cache_parameter(
+                    parameter["Name"], with_decryption, parameter["Value"]
+                )
+        return parameters
 
     def update_ssm_parameter(
         self, parameter_key: str, parameter_value: str, parameter_type: str
@@ -29,3 +105,20 @@ class SSMService:
             Type=parameter_type,
             Overwrite=True,
         )
+        parameter_cache.invalidate((parameter_key, True))
+        parameter_cache.invalidate((parameter_key, False))
+
+    @staticmethod
+    def cache_parameter(parameter_key: str, with_decryption: bool, value: str):
+        parameter_cache.put(
+            (parameter_key, with_decryption),
+            value,
+            ttl_seconds=PARAMETER_CACHE_TTL_SECONDS.get(parameter_key),
+        )
+
+    @staticmethod
+    def get_parameter_group(parameter_key: str) -> list[str]:
+        for parameter_group in PARAMETER_GROUPS:
+            if parameter_key in parameter_group:
+                return parameter_group
+        return []
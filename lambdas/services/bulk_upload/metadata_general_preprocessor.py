@@ -1,3 +1,5 @@
+from typing import Optional
+
 from services.bulk_upload_metadata_preprocessor_service import (
     MetadataPreprocessorService,
 )
@@ -12,12 +14,24 @@ from utils.filename_utils import (
     extract_lloyd_george_record_from_bulk_upload_file_name,
     extract_nhs_number_from_bulk_upload_file_name,
     extract_patient_name_from_bulk_upload_file_name,
+    match_lg_valid_file_name_full_path,
 )
 
 logger = LoggingService(__name__)
 
 
 class MetadataGeneralPreprocessor(MetadataPreprocessorService):
+    def validate_metadata_row(
+        self, metadata_row: dict
+    ) -> tuple[Optional[str], Optional[str]]:
+        original_filename = metadata_row.get("FILEPATH")
+        if original_filename:
+            validated_filename = match_lg_valid_file_name_full_path(original_filename)
+            if validated_filename is not None:
+                return validated_filename, None
+
+        return super().validate_metadata_row(metadata_row)
+
     def validate_record_filename(self, file_name: str, *args, **kwargs) -> str:
         try:
             file_path_prefix, current_file_name = (
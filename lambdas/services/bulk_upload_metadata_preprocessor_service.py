@@ -1,19 +1,31 @@
-import csv
+import json
 import os
+import random
+import time
 from abc import ABC, abstractmethod
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Optional
 
 from botocore.exceptions import ClientError
 from models.staging_metadata import METADATA_FILENAME, NHS_NUMBER_FIELD_NAME
-from services.base.s3_service import S3Service
+from services.base.s3_service import DELETE_OBJECTS_MAX_KEYS, S3Service
 from utils.audit_logging_setup import LoggingService
+from utils.batch_utils import batch
 from utils.exceptions import InvalidFileNameException, MetadataPreprocessingException
-from utils.file_utils import convert_csv_dictionary_to_bytes
+from utils.file_utils import convert_csv_dictionary_to_bytes, stream_csv_rows
+from utils.rate_limiter import AdaptiveConcurrencyLimiter
 
 logger = LoggingService(__name__)
 
+RENAME_CHECKPOINT_FILENAME = "rename_checkpoint.json"
+RENAME_MAX_ATTEMPTS = 5
+RENAME_BACKOFF_BASE_SECONDS = 0.1
+RENAME_BACKOFF_CAP_SECONDS = 5.0
+# S3 returns AccessDenied rather than NoSuchKey for a missing key when the role
+# does not have s3:ListBucket
+MISSING_CHECKPOINT_ERROR_CODES = ("NoSuchKey", "404", "AccessDenied", "403")
+
 
 class MetadataPreprocessorService(ABC):
     def __init__(self, practice_directory: str):
@@ -22,6 +34,16 @@ class MetadataPreprocessorService(ABC):
         self.processed_folder_name = "processed"
         self.practice_directory = practice_directory
         self.processed_date = datetime.now().strftime("%Y-%m-%d %H:%M")
+        self.rename_checkpoint_key = f"{practice_directory}/{self.processed_folder_name}/{RENAME_CHECKPOINT_FILENAME}"
+        self.has_rename_checkpoint = False
+        self.metadata_etag: Optional[str] = None
+        max_rename_concurrency = int(
+            os.environ.get("METADATA_PREPROCESSOR_MAX_RENAME_CONCURRENCY", 50)
+        )
+        self.rename_limiter = AdaptiveConcurrencyLimiter(
+            initial_concurrency=min(20, max_rename_concurrency),
+            max_concurrency=max_rename_concurrency,
+        )
 
     def process_metadata(self):
         file_key = f"{self.practice_directory}/{METADATA_FILENAME}"
@@ -56,6 +78,8 @@ class MetadataPreprocessorService(ABC):
                 csv_dict=rejected_reasons, file_key=file_key
             )
 
+        self.clear_rename_checkpoint()
+
     def generate_and_save_csv_file(
         self,
         csv_dict: list[dict],
@@ -78,11 +102,13 @@ class MetadataPreprocessorService(ABC):
             raise MetadataPreprocessingException("Failed to retrieve metadata")
 
         response = self.s3_service.client.get_object(Bucket=bucket_name, Key=file_key)
+        self.metadata_etag = response.get("ETag")
 
         logger.info(f"Reading {file_key}")
-        data = csv.DictReader(response["Body"].read().decode("utf-8-sig").splitlines())
         metadata_rows = [
-            row for row in data if any(field.strip() for field in row.values())
+            row
+            for row in stream_csv_rows(response["Body"])
+            if any(field.strip() for field in row.values())
         ]
         return metadata_rows
 
@@ -91,77 +117,270 @@ class MetadataPreprocessorService(ABC):
         renaming_map: list[tuple[dict, dict]],
         rejected_rows: list[dict],
         rejected_reasons: list[dict],
-        max_workers=20,
+        max_workers: int = None,
     ):
+        """
+        Renames the files DELETE_OBJECTS_MAX_KEYS at a time: the copies of a batch
+        run concurrently under the adaptive rename limit, then the originals of
+        the batch are removed with a single DeleteObjects call. The checkpoint is
+        saved after every batch, so a rerun after a timeout does not repeat the
+        batches that already finished.
+        """
         logger.info("Standardizing filenames")
 
+        checkpoint = self.load_rename_checkpoint(total_renames=len(renaming_map))
+        checkpoint_rejections = {
+            rejected_reason["FILEPATH"]: rejected_reason
+            for rejected_reason in checkpoint["rejected_reasons"]
+        }
         updated_rows = []
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(self.update_record_filename, original_row, updated_row)
-                for original_row, updated_row in renaming_map
-            ]
-
-            for future in as_completed(futures):
-                updated_row, rejected_row, rejected_reason = future.result()
-                if updated_row:
-                    updated_rows.append(updated_row)
-                if rejected_row:
-                    rejected_rows.append(rejected_row)
-                if rejected_reason:
-                    rejected_reasons.append(rejected_reason)
-
-        logger.info("Finished updating and standardizing filenames")
+        with ThreadPoolExecutor(
+            max_workers=max_workers or self.rename_limiter.max_concurrency
+        ) as executor:
+            for batch_number, renames in enumerate(
+                batch(renaming_map, DELETE_OBJECTS_MAX_KEYS)
+            ):
+                if batch_number < checkpoint["completed_batches"]:
+                    results = self.restore_completed_renames(
+                        renames, checkpoint_rejections
+                    )
+                else:
+                    results = self.rename_files(executor, renames)
+                    checkpoint["rejected_reasons"].extend(
+                        rejected_reason
+                        for _, _, rejected_reason in results
+                        if rejected_reason
+                    )
+                    checkpoint["completed_batches"] = batch_number + 1
+                    self.save_rename_checkpoint(checkpoint)
+
+                for updated_row, rejected_row, rejected_reason in results:
+                    if updated_row:
+                        updated_rows.append(updated_row)
+                    if rejected_row:
+                        rejected_rows.append(rejected_row)
+                    if rejected_reason:
+                        rejected_reasons.append(rejected_reason)
+
+        logger.info(
+            "Finished updating and standardizing filenames",
+            {
+                "RenameConcurrency": self.rename_limiter.concurrency,
+                "RenameThrottles": self.rename_limiter.throttles,
+            },
+        )
         return updated_rows
 
+    def rename_files(
+        self, executor: ThreadPoolExecutor, renames: list[tuple[dict, dict]]
+    ) -> list[tuple[Optional[dict], Optional[dict], Optional[dict]]]:
+        results = list(
+            executor.map(lambda rename: self.update_record_filename(*rename), renames)
+        )
+
+        copied_file_keys = {}
+        for index, ((original_row, _), (updated_row, _, _)) in enumerate(
+            zip(renames, results)
+        ):
+            original_file_key = self.get_original_file_key(original_row)
+            if updated_row and original_file_key != self.get_new_file_key(updated_row):
+                copied_file_keys[original_file_key] = index
+
+        failed_file_keys = self.delete_original_files(list(copied_file_keys))
+        for failed_file_key in failed_file_keys:
+            original_row, _ = renames[copied_file_keys[failed_file_key]]
+            results[copied_file_keys[failed_file_key]] = (
+                None,
+                original_row,
+                {
+                    "FILEPATH": original_row.get("FILEPATH"),
+                    "REASON": "Failed to remove old S3 filepath",
+                },
+            )
+        return results
+
+    def delete_original_files(self, file_keys: list[str]) -> set[str]:
+        if not file_keys:
+            return set()
+        try:
+            errors = self.s3_service.delete_objects(
+                s3_bucket_name=self.staging_store_bucket, file_keys=file_keys
+            )
+        except ClientError as e:
+            logger.error(f"Failed to remove {len(file_keys)} old S3 filepaths: {e}")
+            return set(file_keys)
+
+        for error in errors:
+            logger.error(
+                f"Failed to remove old S3 filepath `{error.get('Key')}`: "
+                f"{error.get('Code')} {error.get('Message')}"
+            )
+        return {error.get("Key") for error in errors}
+
+    @staticmethod
+    def restore_completed_renames(
+        renames: list[tuple[dict, dict]], checkpoint_rejections: dict[str, dict]
+    ) -> list[tuple[Optional[dict], Optional[dict], Optional[dict]]]:
+        results = []
+        for original_row, updated_row in renames:
+            rejected_reason = checkpoint_rejections.get(original_row.get("FILEPATH"))
+            if rejected_reason:
+                results.append((None, original_row, rejected_reason))
+            else:
+                results.append((updated_row, None, None))
+        return results
+
+    def load_rename_checkpoint(self, total_renames: int) -> dict:
+        """
+        A checkpoint is only resumed when it was saved for the same metadata.csv,
+        identified by the ETag of the object, so that a checkpoint left behind by
+        a failed run is never applied to a new metadata file.
+        """
+        checkpoint = {
+            "metadata_etag": self.metadata_etag,
+            "total_renames": total_renames,
+            "completed_batches": 0,
+            "rejected_reasons": [],
+        }
+        try:
+            stored_checkpoint = json.load(
+                self.s3_service.get_object_stream(
+                    bucket=self.staging_store_bucket, key=self.rename_checkpoint_key
+                )
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in MISSING_CHECKPOINT_ERROR_CODES:
+                raise e
+            return checkpoint
+
+        self.has_rename_checkpoint = True
+        if (
+            self.metadata_etag is None
+            or stored_checkpoint.get("metadata_etag") != self.metadata_etag
+            or stored_checkpoint.get("total_renames") != total_renames
+        ):
+            logger.warning(
+                "Ignoring rename checkpoint as it does not match the current metadata"
+            )
+            return checkpoint
+
+        logger.info(
+            f"Resuming renaming after {stored_checkpoint['completed_batches']} completed batches"
+        )
+        return stored_checkpoint
+
+    def save_rename_checkpoint(self, checkpoint: dict):
+        self.s3_service.save_or_create_file(
+            source_bucket=self.staging_store_bucket,
+            file_key=self.rename_checkpoint_key,
+            body=json.dumps(checkpoint).encode("utf-8"),
+        )
+        self.has_rename_checkpoint = True
+
+    def clear_rename_checkpoint(self):
+        if not self.has_rename_checkpoint:
+            return
+        self.s3_service.delete_object(
+            s3_bucket_name=self.staging_store_bucket,
+            file_key=self.rename_checkpoint_key,
+        )
+        self.has_rename_checkpoint = False
+
     @abstractmethod
     def validate_record_filename(
         self, file_path: str, metadata_nhs_number: str = None, *args, **kwargs
     ):
         pass
 
+    def validate_record_filenames(
+        self, metadata_rows: list[dict]
+    ) -> tuple[list[Optional[str]], list[Optional[str]]]:
+        validated_filenames = []
+        rejected_reasons = []
+
+        for metadata_row in metadata_rows:
+            validated_filename, rejected_reason = self.validate_metadata_row(
+                metadata_row
+            )
+            validated_filenames.append(validated_filename)
+            rejected_reasons.append(rejected_reason)
+
+        logger.info(
+            f"Validated {len(metadata_rows)} filenames, "
+            f"{sum(reason is not None for reason in rejected_reasons)} rejected"
+        )
+        return validated_filenames, rejected_reasons
+
+    def validate_metadata_row(
+        self, metadata_row: dict
+    ) -> tuple[Optional[str], Optional[str]]:
+        original_filename = metadata_row.get("FILEPATH")
+        try:
+            if not original_filename:
+                raise InvalidFileNameException("Filepath is missing")
+            validated_filename = self.validate_record_filename(
+                original_filename,
+                metadata_nhs_number=metadata_row.get(NHS_NUMBER_FIELD_NAME),
+            )
+            return validated_filename, None
+        except InvalidFileNameException as error:
+            return None, str(error)
+
+    @staticmethod
+    def flag_duplicate_filenames(
+        validated_filenames: list[Optional[str]],
+    ) -> list[bool]:
+        seen_filenames = set()
+        duplicate_flags = []
+
+        for validated_filename in validated_filenames:
+            is_duplicate = validated_filename in seen_filenames
+            if validated_filename is not None:
+                seen_filenames.add(validated_filename)
+            duplicate_flags.append(is_duplicate)
+
+        return duplicate_flags
+
     def generate_renaming_map(self, metadata_rows: list[dict]):
-        duplicate_counts = defaultdict(int)
         renaming_map = []
         rejected_rows = []
         rejected_reasons = []
 
-        for original_row in metadata_rows:
-            renamed_row = original_row.copy()
+        validated_filenames, validation_errors = self.validate_record_filenames(
+            metadata_rows
+        )
+        duplicate_flags = self.flag_duplicate_filenames(validated_filenames)
+
+        for original_row, validated_filename, validation_error, is_duplicate in zip(
+            metadata_rows, validated_filenames, validation_errors, duplicate_flags
+        ):
             original_filename = original_row.get("FILEPATH")
 
-            try:
-                if not original_filename:
-                    raise InvalidFileNameException("Filepath is missing")
-                metadata_nhs_number = original_row.get(NHS_NUMBER_FIELD_NAME)
-                validated_filename = self.validate_record_filename(
-                    original_filename, metadata_nhs_number=metadata_nhs_number
+            if validation_error is not None:
+                rejected_rows.append(original_row)
+                rejected_reasons.append(
+                    {
+                        "FILEPATH": original_filename or "N/A",
+                        "REASON": validation_error,
+                    }
+                )
+            elif is_duplicate:
+                rejected_rows.append(original_row)
+                rejected_reasons.append(
+                    {
+                        "FILEPATH": original_filename,
+                        "REASON": "Duplicate filename after renaming",
+                    }
                 )
+            else:
+                renamed_row = original_row.copy()
                 stripped_file_path = validated_filename.lstrip("/")
                 renamed_row["FILEPATH"] = (
                     f"{self.practice_directory}/{stripped_file_path}"
                 )
-                count = duplicate_counts[validated_filename]
-                renamed_row = self.update_date_in_row(renamed_row)
-
-                if count == 0:
-                    renaming_map.append((original_row, renamed_row))
-                else:
-                    rejected_rows.append(original_row)
-                    rejected_reasons.append(
-                        {
-                            "FILEPATH": original_filename,
-                            "REASON": "Duplicate filename after renaming",
-                        }
-                    )
-
-                duplicate_counts[validated_filename] += 1
-            except InvalidFileNameException as error:
-                rejected_rows.append(original_row)
-                rejected_filepath = original_filename if original_filename else "N/A"
-                rejected_reasons.append(
-                    {"FILEPATH": rejected_filepath, "REASON": str(error)}
+                renaming_map.append(
+                    (original_row, self.update_date_in_row(renamed_row))
                 )
 
         return renaming_map, rejected_rows, rejected_reasons
@@ -172,13 +391,43 @@ class MetadataPreprocessorService(ABC):
 
         return metadata_row
 
-    def update_record_filename(self, original_row: dict, updated_row: dict):
+    def get_original_file_key(self, original_row: dict) -> str:
         stripped_file_path = original_row.get("FILEPATH").lstrip("/")
-        original_file_key = self.practice_directory + "/" + stripped_file_path
-        new_file_key = updated_row.get("FILEPATH").lstrip("/")
+        return self.practice_directory + "/" + stripped_file_path
+
+    @staticmethod
+    def get_new_file_key(updated_row: dict) -> str:
+        return updated_row.get("FILEPATH").lstrip("/")
+
+    def update_record_filename(self, original_row: dict, updated_row: dict):
+        original_file_key = self.get_original_file_key(original_row)
+        new_file_key = self.get_new_file_key(updated_row)
 
-        logger.info(f"Renaming file `{original_file_key}` to `{new_file_key}`")
-        if original_file_key != new_file_key:
+        if original_file_key == new_file_key:
+            return updated_row, None, None
+
+        logger.info(f"Copying file `{original_file_key}` to `{new_file_key}`")
+        try:
+            self.copy_with_adaptive_concurrency(original_file_key, new_file_key)
+        except ClientError as e:
+            error_code = e.response["Error"]["Code"]
+            if error_code == "NoSuchKey":
+                error_message = "File doesn't exist on S3"
+                logger.info(f"{error_message} for `{original_file_key}`")
+            else:
+                error_message = "Failed to create updated S3 filepath"
+                logger.error(f"{error_message} for `{original_file_key}`: {e}")
+            rejected_reason = {
+                "FILEPATH": original_row.get("FILEPATH"),
+                "REASON": error_message,
+            }
+            return None, original_row, rejected_reason
+
+        return updated_row, None, None
+
+    def copy_with_adaptive_concurrency(self, original_file_key: str, new_file_key: str):
+        for attempt in range(1, RENAME_MAX_ATTEMPTS + 1):
+            self.rename_limiter.acquire()
             try:
                 self.s3_service.client.copy_object(
                     Bucket=self.staging_store_bucket,
@@ -189,37 +438,26 @@ class MetadataPreprocessorService(ABC):
                     Key=new_file_key,
                 )
             except ClientError as e:
-                error_code = e.response["Error"]["Code"]
-                if error_code == "NoSuchKey":
-                    error_message = "File doesn't exist on S3"
-                    logger.info(f"{error_message} for `{original_file_key}`")
-                    rejected_reason = {
-                        "FILEPATH": original_row.get("FILEPATH"),
-                        "REASON": error_message,
-                    }
-                    return None, original_row, rejected_reason
-                else:
-                    error_message = "Failed to create updated S3 filepath"
-                    logger.error(f"{error_message} for `{original_file_key}`: {e}")
-                    rejected_reason = {
-                        "FILEPATH": original_row.get("FILEPATH"),
-                        "REASON": error_message,
-                    }
-                    return None, original_row, rejected_reason
-            try:
-                self.s3_service.client.delete_object(
-                    Bucket=self.staging_store_bucket, Key=original_file_key
+                throttled = self.is_slow_down_error(e)
+                self.rename_limiter.release(throttled=throttled)
+                if not throttled or attempt == RENAME_MAX_ATTEMPTS:
+                    raise e
+                backoff_ceiling = min(
+                    RENAME_BACKOFF_CAP_SECONDS,
+                    RENAME_BACKOFF_BASE_SECONDS * (2**attempt),
                 )
-            except ClientError as e:
-                error_message = "Failed to remove old S3 filepath"
-                logger.error(f"error_message for `{original_file_key}`: {e}")
-                rejected_reason = {
-                    "FILEPATH": original_row.get("FILEPATH"),
-                    "REASON": error_message,
-                }
-                return None, original_row, rejected_reason
+                time.sleep(random.uniform(0, backoff_ceiling))
+                continue
 
-        return updated_row, None, None
+            self.rename_limiter.release()
+            return
+
+    @staticmethod
+    def is_slow_down_error(error: ClientError) -> bool:
+        return (
+            error.response.get("Error", {}).get("Code") == "SlowDown"
+            or error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 503
+        )
 
     def move_original_metadata_file(self, file_key: str):
         destination_key = f"{self.practice_directory}/{self.processed_folder_name}/{self.processed_date}/{METADATA_FILENAME}"
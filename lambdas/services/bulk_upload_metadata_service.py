@@ -1,10 +1,7 @@
-import csv
 import os
-import shutil
-import tempfile
 import uuid
 from datetime import datetime
-from typing import Iterable
+from typing import Iterable, Iterator
 
 import pydantic
 from botocore.exceptions import ClientError
@@ -15,9 +12,11 @@ from models.staging_metadata import (
     StagingMetadata,
 )
 from services.base.s3_service import S3Service
-from services.base.sqs_service import SQSService
+from services.base.sqs_service import SQS_BATCH_MAX_ENTRIES, SQSService
 from utils.audit_logging_setup import LoggingService
+from utils.batch_utils import batch
 from utils.exceptions import BulkUploadMetadataException
+from utils.file_utils import stream_csv_rows
 
 logger = LoggingService(__name__)
 unsuccessful = "Unsuccessful bulk upload"
@@ -30,23 +29,25 @@ class BulkUploadMetadataService:
 
         self.staging_bucket_name = os.environ["STAGING_STORE_BUCKET_NAME"]
         self.metadata_queue_url = os.environ["METADATA_SQS_QUEUE_URL"]
-
-        self.temp_download_dir = tempfile.mkdtemp()
+        self.max_concurrent_sqs_batches = int(
+            os.environ.get("METADATA_SQS_MAX_CONCURRENT_BATCHES", 5)
+        )
+        self.metadata_sorted_by_patient = (
+            os.environ.get("METADATA_CSV_SORTED_BY_PATIENT", "false").lower() == "true"
+        )
 
     def process_metadata(self, metadata_filename: str):
         try:
-            metadata_file = self.download_metadata_from_s3(metadata_filename)
-
-            staging_metadata_list = self.csv_to_staging_metadata(metadata_file)
-            logger.info("Finished parsing metadata")
+            metadata_rows = self.stream_metadata_rows_from_s3(metadata_filename)
+            staging_metadata = self.csv_to_staging_metadata(
+                metadata_rows, sorted_by_patient=self.metadata_sorted_by_patient
+            )
 
-            self.send_metadata_to_fifo_sqs(staging_metadata_list)
+            self.send_metadata_to_fifo_sqs(staging_metadata)
             logger.info("Sent bulk upload metadata to sqs queue")
 
             self.copy_metadata_to_dated_folder(metadata_filename)
 
-            self.clear_temp_storage()
-
         except pydantic.ValidationError as e:
             failure_msg = f"Failed to parse {metadata_filename}: {str(e)}"
             logger.error(failure_msg, {"Result": unsuccessful})
@@ -56,65 +57,96 @@ class BulkUploadMetadataService:
             logger.error(failure_msg, {"Result": unsuccessful})
             raise BulkUploadMetadataException(failure_msg)
         except ClientError as e:
-            if "HeadObject" in str(e):
+            # S3 responds with AccessDenied rather than NoSuchKey when the
+            # lambda cannot list the bucket
+            if e.response["Error"]["Code"] in ["NoSuchKey", "AccessDenied"]:
                 failure_msg = f'No metadata file could be found with the name "{metadata_filename}"'
             else:
                 failure_msg = str(e)
             logger.error(failure_msg, {"Result": unsuccessful})
             raise BulkUploadMetadataException(failure_msg)
 
-    def download_metadata_from_s3(self, metadata_filename: str) -> str:
-        logger.info(f"Fetching {metadata_filename} from bucket")
+    def stream_metadata_rows_from_s3(self, metadata_filename: str) -> Iterator[dict]:
+        logger.info(f"Streaming {metadata_filename} from bucket")
 
-        local_file_path = os.path.join(self.temp_download_dir, metadata_filename)
-        self.s3_service.download_file(
-            s3_bucket_name=self.staging_bucket_name,
-            file_key=metadata_filename,
-            download_path=local_file_path,
+        metadata_stream = self.s3_service.get_object_stream(
+            bucket=self.staging_bucket_name, key=metadata_filename
         )
-        return local_file_path
+        yield from stream_csv_rows(metadata_stream, errors="replace")
 
     @staticmethod
-    def csv_to_staging_metadata(csv_file_path: str) -> list[StagingMetadata]:
+    def csv_to_staging_metadata(
+        metadata_rows: Iterable[dict], sorted_by_patient: bool = False
+    ) -> Iterator[StagingMetadata]:
+        """
+        Validates the metadata rows and groups them per patient and ODS code.
+
+        A group is only complete once no more of its rows can follow, so by
+        default every group is held until the whole CSV has been validated. When
+        the CSV is known to be sorted by patient, each group is emitted as soon
+        as the next one starts, so only one group is held at a time; a later
+        invalid row will then fail the run after earlier patients were emitted.
+        """
         logger.info("Parsing bulk upload metadata")
 
-        patients = {}
-        with open(
-            csv_file_path, mode="r", encoding="utf-8-sig", errors="replace"
-        ) as csv_file_handler:
-            csv_reader: Iterable[dict] = csv.DictReader(csv_file_handler)
-            for row in csv_reader:
-                file_metadata = MetadataFile.model_validate(row)
-                nhs_number = row[NHS_NUMBER_FIELD_NAME]
-                ods_code = row[ODS_CODE]
-                key = (nhs_number, ods_code)
-                if key not in patients:
-                    patients[key] = [file_metadata]
-                else:
-                    patients[key].append(file_metadata)
-
-        return [
-            StagingMetadata(
-                nhs_number=nhs_number,
-                files=patients[nhs_number, ods_code],
-            )
-            for (nhs_number, ods_code) in patients
-        ]
+        patients: dict[tuple[str, str], list[MetadataFile]] = {}
+        for row in metadata_rows:
+            file_metadata = MetadataFile.model_validate(row)
+            key = (row[NHS_NUMBER_FIELD_NAME], row[ODS_CODE])
+            if sorted_by_patient and key not in patients:
+                yield from BulkUploadMetadataService.build_staging_metadata(patients)
+                patients.clear()
+            patients.setdefault(key, []).append(file_metadata)
+
+        yield from BulkUploadMetadataService.build_staging_metadata(patients)
+        logger.info("Finished parsing metadata")
+
+    @staticmethod
+    def build_staging_metadata(
+        patients: dict[tuple[str, str], list[MetadataFile]],
+    ) -> Iterator[StagingMetadata]:
+        for (nhs_number, _ods_code), files in patients.items():
+            yield StagingMetadata(nhs_number=nhs_number, files=files)
 
     def send_metadata_to_fifo_sqs(
-        self, staging_metadata_list: list[StagingMetadata]
+        self, staging_metadata: Iterable[StagingMetadata]
     ) -> None:
         sqs_group_id = f"bulk_upload_{uuid.uuid4()}"
-
-        for staging_metadata in staging_metadata_list:
-            nhs_number = staging_metadata.nhs_number
-            logger.info(f"Sending metadata for patientId: {nhs_number}")
-
-            self.sqs_service.send_message_with_nhs_number_attr_fifo(
+        entries_per_send = SQS_BATCH_MAX_ENTRIES * self.max_concurrent_sqs_batches
+
+        failed_nhs_numbers = []
+        for staging_metadata_batch in batch(staging_metadata, entries_per_send):
+            entries = []
+            for patient_metadata in staging_metadata_batch:
+                nhs_number = patient_metadata.nhs_number
+                logger.info(f"Sending metadata for patientId: {nhs_number}")
+
+                entries.append(
+                    {
+                        "MessageBody": patient_metadata.model_dump_json(by_alias=True),
+                        "MessageGroupId": sqs_group_id,
+                        "MessageAttributes": {
+                            "NhsNumber": {
+                                "DataType": "String",
+                                "StringValue": nhs_number,
+                            }
+                        },
+                    }
+                )
+
+            failed_entries = self.sqs_service.send_message_batch_fifo(
                 queue_url=self.metadata_queue_url,
-                message_body=staging_metadata.model_dump_json(by_alias=True),
-                nhs_number=nhs_number,
-                group_id=sqs_group_id,
+                entries=entries,
+                max_concurrent_batches=self.max_concurrent_sqs_batches,
+            )
+            failed_nhs_numbers.extend(
+                entry["MessageAttributes"]["NhsNumber"]["StringValue"]
+                for entry in failed_entries
+            )
+
+        if failed_nhs_numbers:
+            raise BulkUploadMetadataException(
+                f"Failed to send metadata to sqs queue for patients: {failed_nhs_numbers}"
             )
 
     def copy_metadata_to_dated_folder(self, metadata_filename: str):
@@ -130,7 +162,3 @@ class BulkUploadMetadataService:
         )
 
         self.s3_service.delete_object(self.staging_bucket_name, metadata_filename)
-
-    def clear_temp_storage(self):
-        logger.info("Clearing temp storage directory")
-        shutil.rmtree(self.temp_download_dir)
@@ -1,7 +1,12 @@
+import copy
 import json
 import os
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from datetime import datetime
+from queue import Queue
 
 import pydantic
 from botocore.exceptions import ClientError
@@ -17,10 +22,13 @@ from repositories.bulk_upload.bulk_upload_dynamo_repository import (
 )
 from repositories.bulk_upload.bulk_upload_s3_repository import BulkUploadS3Repository
 from repositories.bulk_upload.bulk_upload_sqs_repository import BulkUploadSqsRepository
+from services.pds_rate_limiter import PdsRateLimiter
+from services.pds_response_cache import PdsResponseCache
 from utils.audit_logging_setup import LoggingService
 from utils.exceptions import (
     BulkUploadException,
     DocumentInfectedException,
+    DynamoServiceException,
     InvalidMessageException,
     InvalidNhsNumberException,
     PatientRecordAlreadyExistException,
@@ -39,7 +47,7 @@ from utils.lloyd_george_validator import (
     validate_lg_file_names,
 )
 from utils.ods_utils import PCSE_ODS_CODE
-from utils.request_context import request_context
+from utils.request_context import map_in_request_context, request_context
 from utils.unicode_utils import (
     contains_accent_char,
     convert_to_nfc_form,
@@ -51,41 +59,42 @@ logger = LoggingService(__name__)
 
 
 class BulkUploadService:
-    def __init__(self, strict_mode, bypass_pds=False):
+    def __init__(self, strict_mode, bypass_pds=False, max_workers: int = None):
         self.dynamo_repository = BulkUploadDynamoRepository()
         self.sqs_repository = BulkUploadSqsRepository()
-        self.bulk_upload_s3_repository = BulkUploadS3Repository()
         self.strict_mode = strict_mode
         self.pdf_content_type = "application/pdf"
         self.unhandled_messages = []
         self.file_path_cache = {}
         self.pdf_stitching_queue_url = os.environ["PDF_STITCHING_SQS_URL"]
         self.bypass_pds = bypass_pds
+        self.max_workers = max_workers or int(
+            os.environ.get("BULK_UPLOAD_MAX_CONCURRENT_PATIENTS", 1)
+        )
+        self.max_concurrent_files = int(
+            os.environ.get("BULK_UPLOAD_MAX_CONCURRENT_FILES", 10)
+        )
+        self.bulk_upload_s3_repository = BulkUploadS3Repository(
+            max_concurrent_files=self.max_concurrent_files
+        )
 
     def process_message_queue(self, records: list):
+        try:
+            if self.max_workers > 1:
+                self.process_message_queue_concurrently(records)
+            else:
+                self.process_message_queue_sequentially(records)
+        finally:
+            self.flush_report_records([self.dynamo_repository])
+
+    def process_message_queue_sequentially(self, records: list):
         for index, message in enumerate(records, start=1):
             try:
                 logger.info(f"Processing message {index} of {len(records)}")
                 self.handle_sqs_message(message)
             except (PdsTooManyRequestsException, PdsErrorException) as error:
                 logger.error(error)
-
-                logger.info(
-                    "Cannot validate patient due to PDS responded with Too Many Requests"
-                )
-                logger.info("Cannot process for now due to PDS rate limit reached.")
-                logger.info(
-                    "All remaining messages in this batch will be returned to sqs queue to retry later."
-                )
-
-                all_unprocessed_message = records[index - 1 :]
-                for unprocessed_message in all_unprocessed_message:
-                    self.sqs_repository.put_sqs_message_back_to_queue(
-                        unprocessed_message
-                    )
-                raise BulkUploadException(
-                    "Bulk upload process paused due to PDS rate limit reached"
-                )
+                self.pause_processing(records[index - 1 :])
             except (
                 ClientError,
                 InvalidMessageException,
@@ -96,9 +105,125 @@ class BulkUploadService:
                 logger.info(f"Failed to process current message due to error: {error}")
                 logger.info("Continue on next message")
 
+        self.log_processing_summary(records)
+
+    def process_message_queue_concurrently(self, records: list):
+        """
+        Processes the messages on a pool of workers, one patient per worker at a
+        time. Each worker is a copy of this service with its own S3 and DynamoDB
+        repositories, so the files and records in one patient's transaction are
+        never rolled back or removed by another worker.
+
+        Once any worker hits the PDS rate limit, the messages that have not
+        started are skipped, and every message that did not finish is returned
+        to the queue before the batch is paused. The report rows buffered by
+        each worker are flushed once the pool is done.
+        """
+        logger.info(
+            f"Processing {len(records)} messages with {self.max_workers} workers"
+        )
+        pds_rate_limit_reached = threading.Event()
+        worker_pool = [
+            self.create_worker() for _ in range(min(self.max_workers, len(records)))
+        ]
+        workers = Queue()
+        for worker in worker_pool:
+            workers.put(worker)
+
+        def process_message(index: int, message: dict) -> bool:
+            if pds_rate_limit_reached.is_set():
+                return False
+            worker = workers.get()
+            try:
+                logger.info(f"Processing message {index} of {len(records)}")
+                worker.handle_sqs_message(message)
+            except (PdsTooManyRequestsException, PdsErrorException) as error:
+                logger.error(error)
+                pds_rate_limit_reached.set()
+                return False
+            except Exception as error:
+                self.unhandled_messages.append(message)
+                logger.info(f"Failed to process current message due to error: {error}")
+            finally:
+                workers.put(worker)
+            return True
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(copy_context().run, process_message, index, message)
+                    for index, message in enumerate(records, start=1)
+                ]
+                processed = [future.result() for future in futures]
+
+            if pds_rate_limit_reached.is_set():
+                self.pause_processing(
+                    [
+                        message
+                        for message, is_processed in zip(records, processed)
+                        if not is_processed
+                    ]
+                )
+        finally:
+            self.flush_report_records(
+                [worker.dynamo_repository for worker in worker_pool]
+            )
+
+        self.log_processing_summary(records)
+
+    @staticmethod
+    def flush_report_records(repositories: list[BulkUploadDynamoRepository]):
+        """
+        Flushes each repository on its own, so that one failing write does not
+        stop the other repositories from flushing. Once they have all been tried,
+        the first failure is raised, so the invocation fails rather than reporting
+        success after losing report rows; the exception or pause that ended the
+        batch, if any, is kept as its context.
+        """
+        flush_errors = []
+        for repository in repositories:
+            try:
+                repository.flush_report_records()
+            except Exception as error:
+                logger.error(
+                    f"Failed to write buffered report records: {error}",
+                    {"Result": "Bulk upload report records not written"},
+                )
+                flush_errors.append(error)
+
+        if flush_errors:
+            raise flush_errors[0]
+
+    def create_worker(self) -> "BulkUploadService":
+        worker = copy.copy(self)
+        worker.dynamo_repository = BulkUploadDynamoRepository()
+        worker.bulk_upload_s3_repository = BulkUploadS3Repository(
+            max_concurrent_files=self.max_concurrent_files
+        )
+        worker.file_path_cache = {}
+        return worker
+
+    def pause_processing(self, unprocessed_messages: list):
+        logger.info(
+            "Cannot validate patient due to PDS responded with Too Many Requests"
+        )
+        logger.info("Cannot process for now due to PDS rate limit reached.")
+        logger.info(
+            "All remaining messages in this batch will be returned to sqs queue to retry later."
+        )
+
+        for unprocessed_message in unprocessed_messages:
+            self.sqs_repository.put_sqs_message_back_to_queue(unprocessed_message)
+        raise BulkUploadException(
+            "Bulk upload process paused due to PDS rate limit reached"
+        )
+
+    def log_processing_summary(self, records: list):
         logger.info(
             f"Finish Processing successfully {len(records) - len(self.unhandled_messages)} of {len(records)} messages"
         )
+        PdsResponseCache().log_metrics()
+        PdsRateLimiter().log_stats()
         if self.unhandled_messages:
             logger.info("Unable to process the following messages:")
             for message in self.unhandled_messages:
@@ -262,7 +387,7 @@ class BulkUploadService:
                 f"Successfully uploaded the Lloyd George records for patient: {staging_metadata.nhs_number}",
                 {"Result": "Successful upload"},
             )
-        except ClientError as e:
+        except (ClientError, DynamoServiceException) as e:
             logger.info(
                 f"Got unexpected error during file transfer: {str(e)}",
                 {"Result": "Unsuccessful upload"},
@@ -278,22 +403,24 @@ class BulkUploadService:
             )
             return
 
-        logger.info(
-            "File transfer complete. Removing uploaded files from staging bucket"
+        logger.info("File transfer complete. Reporting transaction successful")
+        self.dynamo_repository.write_report_upload_to_dynamo(
+            staging_metadata,
+            UploadStatus.COMPLETE,
+            accepted_reason,
+            patient_ods_code,
         )
+        # The report rows must be written before the staging files are removed,
+        # so that files are never removed without a record of their upload
+        self.dynamo_repository.flush_report_records()
+
+        logger.info("Removing uploaded files from staging bucket")
         self.bulk_upload_s3_repository.remove_ingested_file_from_source_bucket()
 
         logger.info(
             f"Completed file ingestion for patient {staging_metadata.nhs_number}",
             {"Result": "Successful upload"},
         )
-        logger.info("Reporting transaction successful")
-        self.dynamo_repository.write_report_upload_to_dynamo(
-            staging_metadata,
-            UploadStatus.COMPLETE,
-            accepted_reason,
-            patient_ods_code,
-        )
 
         pdf_stitching_sqs_message = PdfStitchingSqsMessage(
             nhs_number=staging_metadata.nhs_number,
@@ -353,27 +480,46 @@ class BulkUploadService:
         self, staging_metadata: StagingMetadata, current_gp_ods: str
     ):
         nhs_number = staging_metadata.nhs_number
-        for file_metadata in staging_metadata.files:
-            document_reference = self.convert_to_document_reference(
+        document_references = [
+            self.convert_to_document_reference(
                 file_metadata, nhs_number, current_gp_ods
             )
+            for file_metadata in staging_metadata.files
+        ]
+        file_sizes = self.bulk_upload_s3_repository.get_staged_file_sizes(
+            [
+                self.file_path_cache[file_metadata.file_path]
+                for file_metadata in staging_metadata.files
+            ]
+        )
 
-            source_file_key = self.file_path_cache[file_metadata.file_path]
-            dest_file_key = document_reference.s3_file_key
-
-            self.bulk_upload_s3_repository.copy_to_lg_bucket(
-                source_file_key=source_file_key, dest_file_key=dest_file_key
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_files) as executor:
+            map_in_request_context(
+                executor,
+                lambda file_metadata, document_reference: self.copy_file_to_lg_bucket(
+                    file_metadata, document_reference, file_sizes
+                ),
+                staging_metadata.files,
+                document_references,
             )
-            s3_bucket_name = self.bulk_upload_s3_repository.lg_bucket_name
 
-            document_reference.file_size = (
-                self.bulk_upload_s3_repository.s3_repository.get_file_size(
-                    s3_bucket_name=s3_bucket_name, object_key=dest_file_key
-                )
-            )
-            document_reference.set_uploaded_to_true()
-            document_reference.doc_status = "final"
-            self.dynamo_repository.create_record_in_lg_dynamo_table(document_reference)
+        self.dynamo_repository.create_records_in_lg_dynamo_table(document_references)
+
+    def copy_file_to_lg_bucket(
+        self,
+        file_metadata: MetadataFile,
+        document_reference: DocumentReference,
+        file_sizes: dict[str, int],
+    ):
+        source_file_key = self.file_path_cache[file_metadata.file_path]
+        self.bulk_upload_s3_repository.copy_to_lg_bucket(
+            source_file_key=source_file_key,
+            dest_file_key=document_reference.s3_file_key,
+            file_size=file_sizes[source_file_key],
+        )
+        document_reference.file_size = file_sizes[source_file_key]
+        document_reference.set_uploaded_to_true()
+        document_reference.doc_status = "final"
 
     def rollback_transaction(self):
         try:
@@ -1,6 +1,8 @@
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from json import JSONDecodeError
+from typing import Callable
 
 from botocore.exceptions import ClientError
 from enums.dynamo_filter import AttributeOperator
@@ -22,6 +24,12 @@ logger = LoggingService(__name__)
 
 
 class DocumentReferenceSearchService(DocumentService):
+    def __init__(self):
+        super().__init__()
+        self.max_concurrent_requests = int(
+            os.environ.get("DOCUMENT_SEARCH_MAX_CONCURRENT_REQUESTS", 10)
+        )
+
     def get_document_references(
         self,
         nhs_number: str,
@@ -76,22 +84,23 @@ class DocumentReferenceSearchService(DocumentService):
         check_upload_completed=False,
     ):
         document_resources = []
+        filter_expression = self._get_filter_expression(
+            filters, upload_completed=check_upload_completed
+        )
 
-        for table_name in table_names:
-            logger.info(f"Searching for results in {table_name}")
-            filter_expression = self._get_filter_expression(
-                filters, upload_completed=check_upload_completed
-            )
-
-            documents = self.fetch_documents_from_table_with_nhs_number(
-                nhs_number, table_name, query_filter=filter_expression
-            )
+        documents_by_table = self._run_concurrently(
+            lambda table_name: self._fetch_documents_from_table(
+                nhs_number, table_name, filter_expression
+            ),
+            table_names,
+        )
 
+        for table_name, documents in zip(table_names, documents_by_table):
             if check_upload_completed:
                 self._validate_upload_status(documents)
 
             processed_documents = self._process_documents(
-                documents, return_fhir=return_fhir
+                documents, return_fhir=return_fhir, table_name=table_name
             )
             document_resources.extend(processed_documents)
 
@@ -136,17 +145,32 @@ class DocumentReferenceSearchService(DocumentService):
             )
             raise DocumentRefSearchException(423, LambdaError.UploadInProgressError)
 
+    def _fetch_documents_from_table(
+        self, nhs_number: str, table_name: str, filter_expression
+    ) -> list[DocumentReference]:
+        logger.info(f"Searching for results in {table_name}")
+        return self.fetch_documents_from_table_with_nhs_number(
+            nhs_number, table_name, query_filter=filter_expression
+        )
+
     def _process_documents(
-        self, documents: list[DocumentReference], return_fhir: bool
+        self,
+        documents: list[DocumentReference],
+        return_fhir: bool,
+        table_name: str = None,
     ) -> list[dict]:
+        documents_missing_file_size = [
+            document
+            for document in documents
+            if not document.file_size and not self.is_upload_in_process(document)
+        ]
+        self._run_concurrently(
+            lambda document: self._backfill_file_size(document, table_name),
+            documents_missing_file_size,
+        )
+
         results = []
         for document in documents:
-            if not document.file_size and not self.is_upload_in_process(document):
-                document.file_size = self.s3_service.get_file_size(
-                    s3_bucket_name=document.s3_bucket_name,
-                    object_key=document.s3_file_key,
-                )
-
             if return_fhir:
                 fhir_response = self.create_document_reference_fhir_response(document)
                 results.append(fhir_response)
@@ -155,6 +179,37 @@ class DocumentReferenceSearchService(DocumentService):
                 results.append(document_model)
         return results
 
+    def _backfill_file_size(self, document: DocumentReference, table_name: str = None):
+        document.file_size = self.s3_service.get_file_size(
+            s3_bucket_name=document.s3_bucket_name,
+            object_key=document.s3_file_key,
+        )
+        if not table_name:
+            return
+
+        primary_key_name = DocumentReferenceMetadataFields.ID.value
+        try:
+            self.dynamo_service.update_item(
+                table_name=table_name,
+                key_pair={primary_key_name: document.id},
+                updated_fields={
+                    DocumentReferenceMetadataFields.FILE_SIZE.value: document.file_size
+                },
+                condition_expression=f"attribute_exists({primary_key_name})",
+            )
+        except ClientError as e:
+            logger.warning(
+                f"Unable to store file size for document {document.id}: {str(e)}"
+            )
+
+    def _run_concurrently(self, function: Callable, items: list) -> list:
+        if len(items) <= 1:
+            return [function(item) for item in items]
+
+        max_workers = min(len(items), self.max_concurrent_requests)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(function, items))
+
     def _build_document_model(self, document: DocumentReference) -> dict:
         document_formatted = document.model_dump_camel_case(
             exclude_none=True,
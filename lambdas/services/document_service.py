@@ -1,16 +1,20 @@
 import os
 from datetime import datetime, timezone
+from typing import Iterator
 
 from boto3.dynamodb.conditions import Attr, ConditionBase
 from enums.metadata_field_names import DocumentReferenceMetadataFields
 from enums.supported_document_types import SupportedDocumentTypes
-from models.document_reference import DocumentReference
+from models.document_reference import DocumentReference, DocumentReferenceView
 from pydantic import ValidationError
 from services.base.dynamo_service import DynamoDBService
 from services.base.s3_service import S3Service
 from utils.audit_logging_setup import LoggingService
 from utils.common_query_filters import NotDeleted
-from utils.dynamo_utils import filter_uploaded_docs_and_recently_uploading_docs
+from utils.dynamo_utils import (
+    filter_uploaded_docs_and_recently_uploading_docs,
+    iter_paginated_items,
+)
 from utils.exceptions import (
     DocumentServiceException,
     FileUploadInProgress,
@@ -57,41 +61,97 @@ class DocumentService:
         search_key: str,
         index_name: str = None,
         query_filter: Attr | ConditionBase = None,
+        max_items: int = None,
     ) -> list[DocumentReference]:
-        documents = []
-        exclusive_start_key = None
+        return list(
+            self.iter_documents(
+                table=table,
+                search_condition=search_condition,
+                search_key=search_key,
+                index_name=index_name,
+                query_filter=query_filter,
+                max_items=max_items,
+            )
+        )
 
-        while True:
-            response = self.dynamo_service.query_table_by_index(
+    def iter_documents(
+        self,
+        table: str,
+        search_condition: str,
+        search_key: str,
+        index_name: str = None,
+        query_filter: Attr | ConditionBase = None,
+        max_items: int = None,
+        prefetch: bool = False,
+    ) -> Iterator[DocumentReference]:
+        """
+        Yields validated document references page by page, so callers can process
+        large result sets in constant memory or stop after the first match.
+        Items that fail validation are logged and skipped, and do not count
+        towards max_items.
+        """
+        pages = iter_paginated_items(
+            lambda exclusive_start_key: self.dynamo_service.query_table_by_index(
                 table_name=table,
                 index_name=index_name,
                 search_key=search_key,
                 search_condition=search_condition,
                 query_filter=query_filter,
                 exclusive_start_key=exclusive_start_key,
-            )
-
-            for item in response["Items"]:
+            ),
+            prefetch=prefetch,
+        )
+        documents_yielded = 0
+        for page in pages:
+            for item in page:
                 try:
                     document = DocumentReference.model_validate(item)
-                    documents.append(document)
                 except ValidationError as e:
                     logger.error(f"Validation error on document: {item}")
                     logger.error(f"{e}")
                     continue
-            if "LastEvaluatedKey" in response:
-                exclusive_start_key = response["LastEvaluatedKey"]
-            else:
-                break
-        return documents
+                yield document
+                documents_yielded += 1
+                if max_items and documents_yielded >= max_items:
+                    return
+
+    def iter_document_views(
+        self,
+        table: str,
+        search_condition: str,
+        search_key: str,
+        requested_fields: list[DocumentReferenceMetadataFields],
+        index_name: str = None,
+        query_filter: Attr | ConditionBase = None,
+        max_items: int = None,
+        prefetch: bool = False,
+    ) -> Iterator[DocumentReferenceView]:
+        """
+        Like iter_documents, but only the requested fields are read from dynamo and
+        each item is returned as a DocumentReferenceView without model validation.
+        """
+        items = self.dynamo_service.iter_query(
+            table_name=table,
+            index_name=index_name,
+            search_key=search_key,
+            search_condition=search_condition,
+            requested_fields=[field.value for field in requested_fields],
+            query_filter=query_filter,
+            max_items=max_items,
+            prefetch=prefetch,
+        )
+        for item in items:
+            yield DocumentReferenceView.from_dynamo_item(item)
 
     def get_nhs_numbers_based_on_ods_code(self, ods_code: str) -> list[str]:
-        documents = self.fetch_documents_from_table(
+        documents = self.iter_document_views(
             table=os.environ["LLOYD_GEORGE_DYNAMODB_NAME"],
             index_name="OdsCodeIndex",
             search_key=DocumentReferenceMetadataFields.CURRENT_GP_ODS.value,
             search_condition=ods_code,
+            requested_fields=[DocumentReferenceMetadataFields.NHS_NUMBER],
             query_filter=NotDeleted,
+            prefetch=True,
         )
         nhs_numbers = list({document.nhs_number for document in documents})
         return nhs_numbers
@@ -164,13 +224,13 @@ class DocumentService:
     ):
         logger.info(f"Deleting items in table: {table_name} (HARD DELETE)")
         primary_key_name = DocumentReferenceMetadataFields.ID.value
-        for reference in document_references:
-            primary_key_value = reference.id
-            deletion_key = {primary_key_name: primary_key_value}
-            self.dynamo_service.delete_item(table_name, deletion_key)
+        deletion_keys = [
+            {primary_key_name: reference.id} for reference in document_references
+        ]
+        self.dynamo_service.batch_delete_items(table_name, deletion_keys)
 
     @staticmethod
-    def is_upload_in_process(record: DocumentReference):
+    def is_upload_in_process(record: DocumentReference | DocumentReferenceView):
         return (
             not record.uploaded
             and record.uploading
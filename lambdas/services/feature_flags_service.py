@@ -1,19 +1,45 @@
 import os
+from typing import Optional
 
 import requests
 from enums.feature_flags import FeatureFlags
 from enums.lambda_error import LambdaError
 from models.feature_flags import FeatureFlag
 from pydantic import ValidationError
-from requests.exceptions import JSONDecodeError
+from requests.exceptions import JSONDecodeError, RequestException
 from services.base.ssm_service import SSMService
 from utils.audit_logging_setup import LoggingService
 from utils.constants.ssm import UPLOAD_PILOT_ODS_ALLOWED_LIST
 from utils.lambda_exceptions import FeatureFlagsException
+from utils.refresh_ahead_cache import RefreshAheadCache
 from utils.request_context import request_context
+from utils.ttl_cache import TtlCache
 
 logger = LoggingService(__name__)
 
+UPLOAD_PILOT_FLAGS = [
+    FeatureFlags.UPLOAD_LLOYD_GEORGE_WORKFLOW_ENABLED,
+    FeatureFlags.UPLOAD_LAMBDA_ENABLED,
+]
+
+# The AppConfig extension answers from memory, so a slow call means it is stuck;
+# time out well before the lambda does, as a refresh holds the cache's lock
+APP_CONFIG_TIMEOUT_SECONDS = float(
+    os.environ.get("FEATURE_FLAGS_REQUEST_TIMEOUT_SECONDS", 2)
+)
+# The AppConfig extension polls for new versions every 45 seconds by default
+feature_flags_cache = RefreshAheadCache(
+    refresh_interval_seconds=int(
+        os.environ.get("FEATURE_FLAGS_REFRESH_INTERVAL_SECONDS", 45)
+    ),
+    max_staleness_seconds=int(
+        os.environ.get("FEATURE_FLAGS_MAX_STALENESS_SECONDS", 300)
+    ),
+)
+pilot_ods_codes_cache = TtlCache(
+    ttl_seconds=int(os.environ.get("UPLOAD_PILOT_ODS_CACHE_TTL_SECONDS", 300))
+)
+
 
 class FeatureFlagService:
     def __init__(self):
@@ -28,7 +54,20 @@ class FeatureFlagService:
 
     @staticmethod
     def request_app_config_data(url: str):
-        config_data = requests.get(url)
+        return FeatureFlagService.request_app_config(url)[0]
+
+    @staticmethod
+    def request_app_config(url: str) -> tuple[dict, Optional[str]]:
+        try:
+            config_data = requests.get(url, timeout=APP_CONFIG_TIMEOUT_SECONDS)
+        except RequestException as e:
+            logger.error(
+                str(e),
+                {"Result": "Error when retrieving feature flag from AppConfig profile"},
+            )
+            raise FeatureFlagsException(
+                error=LambdaError.FeatureFlagFailure, status_code=500
+            )
         try:
             data = config_data.json()
         except JSONDecodeError as e:
@@ -42,7 +81,7 @@ class FeatureFlagService:
             )
 
         if config_data.status_code == 200:
-            return data
+            return data, config_data.headers.get("Configuration-Version")
         if config_data.status_code == 400:
             logger.error(
                 str(data),
@@ -65,55 +104,47 @@ class FeatureFlagService:
     def get_feature_flags(self) -> dict:
         logger.info("Retrieving all feature flags")
 
-        url = self.app_config_url
-        response = self.request_app_config_data(url)
+        formatted_flags = dict(self.get_cached_feature_flags())
 
-        try:
-            feature_flags = FeatureFlag(feature_flags=response)
-            formatted_flags = feature_flags.format_flags()
-
-            if not self.check_if_ods_code_is_in_pilot():
-                for flag in formatted_flags:
-                    if flag in [
-                        FeatureFlags.UPLOAD_LLOYD_GEORGE_WORKFLOW_ENABLED,
-                        FeatureFlags.UPLOAD_LAMBDA_ENABLED,
-                    ]:
-                        formatted_flags[flag] = False
-
-            return formatted_flags
-        except ValidationError as e:
+        if not self.check_if_ods_code_is_in_pilot():
+            for flag in formatted_flags:
+                if flag in UPLOAD_PILOT_FLAGS:
+                    formatted_flags[flag] = False
+
+        return formatted_flags
+
+    def get_feature_flags_by_flag(self, flag: str):
+        logger.info(f"Retrieving feature flag: {flag}")
+
+        feature_flags = self.get_cached_feature_flags()
+        if flag not in feature_flags:
             logger.error(
-                str(e),
+                f"Feature flag {flag} not found in AppConfig profile",
                 {"Result": "Error when retrieving feature flag from AppConfig profile"},
             )
             raise FeatureFlagsException(
-                error=LambdaError.FeatureFlagParseError,
-                status_code=500,
+                error=LambdaError.FeatureFlagNotFound,
+                status_code=404,
             )
 
-    def get_feature_flags_by_flag(self, flag: str):
-        logger.info(f"Retrieving feature flag: {flag}")
+        formatted_feature_flag = {flag: feature_flags[flag]}
+        if flag in UPLOAD_PILOT_FLAGS and not self.check_if_ods_code_is_in_pilot():
+            formatted_feature_flag[flag] = False
 
-        config_url = self.app_config_url
-        url = config_url + f"?flag={flag}"
+        return formatted_feature_flag
 
-        response = self.request_app_config_data(url)
+    def get_cached_feature_flags(self) -> dict[str, bool]:
+        return feature_flags_cache.get(self.fetch_feature_flags)
+
+    def fetch_feature_flags(
+        self, current_version: Optional[str] = None
+    ) -> Optional[tuple[dict[str, bool], Optional[str]]]:
+        response, version = self.request_app_config(self.app_config_url)
+        if version is not None and version == current_version:
+            return None
 
         try:
-            feature_flag = FeatureFlag(feature_flags={flag: response})
-            formatted_feature_flag = feature_flag.format_flags()
-
-            if (
-                flag
-                in [
-                    FeatureFlags.UPLOAD_LLOYD_GEORGE_WORKFLOW_ENABLED,
-                    FeatureFlags.UPLOAD_LAMBDA_ENABLED,
-                ]
-                and not self.check_if_ods_code_is_in_pilot()
-            ):
-                formatted_feature_flag[flag] = False
-
-            return formatted_feature_flag
+            feature_flags = FeatureFlag(feature_flags=response).format_flags()
         except ValidationError as e:
             logger.error(
                 str(e),
@@ -124,6 +155,12 @@ class FeatureFlagService:
                 status_code=500,
             )
 
+        logger.info(
+            "Loaded feature flags from AppConfig profile",
+            {"Configuration version": version},
+        )
+        return feature_flags, version
+
     def get_allowed_list_of_ods_codes_for_upload_pilot(self) -> list[str]:
         logger.info(
             "Starting ssm request to retrieve allowed list of ODS codes for Upload Pilot"
@@ -144,6 +181,13 @@ class FeatureFlagService:
 
         if not ods_code:
             return False
-        pilot_ods_codes = self.get_allowed_list_of_ods_codes_for_upload_pilot()
+        return ods_code in self.get_pilot_ods_codes()
 
-        return ods_code in pilot_ods_codes
+    def get_pilot_ods_codes(self) -> frozenset[str]:
+        pilot_ods_codes = pilot_ods_codes_cache.get(UPLOAD_PILOT_ODS_ALLOWED_LIST)
+        if pilot_ods_codes is None:
+            pilot_ods_codes = frozenset(
+                self.get_allowed_list_of_ods_codes_for_upload_pilot()
+            )
+            pilot_ods_codes_cache.put(UPLOAD_PILOT_ODS_ALLOWED_LIST, pilot_ods_codes)
+        return pilot_ods_codes
@@ -0,0 +1,179 @@
+import json
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlparse
+
+from botocore.exceptions import ClientError
+from enums.metadata_field_names import DocumentReferenceMetadataFields
+from services.base.dynamo_service import DynamoDBService
+from services.base.s3_service import S3Service
+from utils.audit_logging_setup import LoggingService
+from utils.common_query_filters import MissingFileSize
+
+logger = LoggingService(__name__)
+
+Fields = DocumentReferenceMetadataFields
+
+PREFIX_LISTING_THRESHOLD = 2
+
+
+class FileSizeBackfillService:
+    """
+    Writes the S3 object size back to every uploaded document reference that has
+    no FileSize, so that request paths no longer need to HEAD the object.
+
+    Each table is scanned page by page. For each page, the sizes are resolved
+    concurrently: a single list_objects_v2 call per key prefix when several
+    documents share that prefix (e.g. one patient's LG record), otherwise a HEAD
+    per object. The updates are conditional on the item still existing without
+    a FileSize, so the job is safe to rerun. Progress is saved to the checkpoint
+    file after every page, so an interrupted run resumes where it left off.
+    """
+
+    def __init__(self, checkpoint_file: str = None, max_workers: int = None):
+        self.dynamo_service = DynamoDBService()
+        self.s3_service = S3Service()
+        self.checkpoint_file = checkpoint_file
+        self.max_workers = max_workers or int(
+            os.environ.get("FILE_SIZE_BACKFILL_MAX_WORKERS", 10)
+        )
+        self.checkpoint = self.load_checkpoint()
+
+    def backfill_tables(self, table_names: list[str]) -> dict[str, Counter]:
+        return {
+            table_name: self.backfill_table(table_name) for table_name in table_names
+        }
+
+    def backfill_table(self, table_name: str) -> Counter:
+        progress = self.checkpoint.setdefault(
+            table_name, {"exclusive_start_key": None, "completed": False}
+        )
+        stats = Counter()
+        if progress["completed"]:
+            logger.info(f"File sizes already backfilled for table: {table_name}")
+            return stats
+
+        logger.info(f"Backfilling file sizes for table: {table_name}")
+        while True:
+            response = self.dynamo_service.scan_table(
+                table_name=table_name,
+                exclusive_start_key=progress["exclusive_start_key"],
+                filter_expression=MissingFileSize,
+            )
+            stats.update(self.backfill_items(table_name, response.get("Items", [])))
+
+            progress["exclusive_start_key"] = response.get("LastEvaluatedKey")
+            progress["completed"] = progress["exclusive_start_key"] is None
+            self.save_checkpoint()
+            if progress["completed"]:
+                break
+
+        logger.info(
+            f"Finished backfilling file sizes for table: {table_name}",
+            {"FileSizeBackfillStats": dict(stats)},
+        )
+        return stats
+
+    def backfill_items(self, table_name: str, items: list[dict]) -> Counter:
+        stats = Counter(scanned=len(items))
+        locations = {
+            item[Fields.ID.value]: self.parse_file_location(
+                item[Fields.FILE_LOCATION.value]
+            )
+            for item in items
+            if item.get(Fields.FILE_LOCATION.value)
+        }
+        file_sizes = self.get_file_sizes(set(locations.values()))
+
+        updates = []
+        for document_id, location in locations.items():
+            if location in file_sizes:
+                updates.append((document_id, file_sizes[location]))
+            else:
+                stats["missing_object"] += 1
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(
+                lambda update: self.update_file_size(table_name, *update), updates
+            )
+            stats.update("updated" if updated else "skipped" for updated in results)
+        return stats
+
+    def get_file_sizes(
+        self, locations: set[tuple[str, str]]
+    ) -> dict[tuple[str, str], int]:
+        keys_by_prefix = defaultdict(set)
+        for bucket, key in locations:
+            prefix = key.rpartition("/")[0]
+            keys_by_prefix[(bucket, prefix)].add(key)
+
+        lookups = []
+        for (bucket, prefix), keys in keys_by_prefix.items():
+            if prefix and len(keys) >= PREFIX_LISTING_THRESHOLD:
+                lookups.append(partial(self.list_file_sizes, bucket, prefix, keys))
+            else:
+                lookups.extend(
+                    partial(self.head_file_size, bucket, key) for key in keys
+                )
+
+        file_sizes = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for result in executor.map(lambda lookup: lookup(), lookups):
+                file_sizes.update(result)
+        return file_sizes
+
+    def list_file_sizes(
+        self, bucket: str, prefix: str, keys: set[str]
+    ) -> dict[tuple[str, str], int]:
+        objects = self.s3_service.list_all_objects(bucket, prefix=f"{prefix}/")
+        return {
+            (bucket, s3_object["Key"]): s3_object["Size"]
+            for s3_object in objects
+            if s3_object["Key"] in keys
+        }
+
+    def head_file_size(self, bucket: str, key: str) -> dict[tuple[str, str], int]:
+        try:
+            return {(bucket, key): self.s3_service.get_file_size(bucket, key)}
+        except ClientError as e:
+            logger.warning(f"Unable to get file size for s3://{bucket}/{key}: {e}")
+            return {}
+
+    def update_file_size(self, table_name: str, document_id: str, file_size: int):
+        try:
+            self.dynamo_service.update_item(
+                table_name=table_name,
+                key_pair={Fields.ID.value: document_id},
+                updated_fields={Fields.FILE_SIZE.value: file_size},
+                condition_expression=(
+                    f"attribute_exists({Fields.ID.value}) AND "
+                    f"attribute_not_exists({Fields.FILE_SIZE.value})"
+                ),
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise e
+            return False
+
+    @staticmethod
+    def parse_file_location(file_location: str) -> tuple[str, str]:
+        parsed_location = urlparse(file_location)
+        return parsed_location.netloc, parsed_location.path.lstrip("/")
+
+    def load_checkpoint(self) -> dict:
+        if not self.checkpoint_file or not os.path.exists(self.checkpoint_file):
+            return {}
+        with open(self.checkpoint_file) as checkpoint_file:
+            logger.info(f"Resuming from checkpoint: {self.checkpoint_file}")
+            return json.load(checkpoint_file)
+
+    def save_checkpoint(self):
+        if not self.checkpoint_file:
+            return
+        temp_file = f"{self.checkpoint_file}.tmp"
+        with open(temp_file, "w") as checkpoint_file:
+            json.dump(self.checkpoint, checkpoint_file, default=str)
+        os.replace(temp_file, self.checkpoint_file)
@@ -1,18 +1,20 @@
 import os
 import shutil
+import tempfile
 import zipfile
-from contextlib import closing
-from io import BytesIO
+from typing import Iterator
 
 from botocore.exceptions import ClientError
 from enums.lambda_error import LambdaError
 from enums.trace_status import TraceStatus
 from models.zip_trace import DocumentManifestZipTrace
 from services.base.dynamo_service import DynamoDBService
+from services.base.s3_multipart_upload_stream import S3MultipartUploadStream
 from services.base.s3_service import S3Service
 from utils.audit_logging_setup import LoggingService
 from utils.exceptions import InvalidDocumentReferenceException
 from utils.lambda_exceptions import GenerateManifestZipException
+from utils.prefetch import prefetch_in_order
 
 logger = LoggingService(__name__)
 
@@ -25,64 +27,52 @@ class DocumentManifestZipService:
         self.zip_output_bucket = os.environ["ZIPPED_STORE_BUCKET_NAME"]
         self.zip_trace_table = os.environ["ZIPPED_STORE_DYNAMODB_NAME"]
         self.zip_file_name = f"patient-record-{zip_trace.job_id}.zip"
+        self.max_concurrent_downloads = int(
+            os.environ.get("ZIP_MAX_CONCURRENT_DOWNLOADS", 5)
+        )
+        self.max_in_flight_parts = int(
+            os.environ.get("ZIP_UPLOAD_MAX_IN_FLIGHT_PARTS", 4)
+        )
 
     def handle_zip_request(self):
         self.update_status(TraceStatus.PROCESSING)
-        zip_buffer = self.stream_zip_documents()
-        self.upload_zip_file(zip_buffer)
+        self.stream_zip_documents()
         self.update_dynamo_with_fields({"job_status", "zip_file_location"})
 
-    def stream_zip_documents(self) -> BytesIO:
-        logger.info("Streaming and zipping documents in-memory")
-        documents = self.zip_trace_object.files_to_download
-
-        zip_buffer = BytesIO()
-
-        with zipfile.ZipFile(zip_buffer, "w", compression=zipfile.ZIP_DEFLATED) as zipf:
-            for document_location, document_name in documents.items():
-                file_bucket, file_key = self.get_file_bucket_and_key(document_location)
-                try:
-                    with closing(
-                        self.s3_service.get_object_stream(file_bucket, file_key)
-                    ) as s3_object_stream:
-                        with zipf.open(document_name, mode="w") as zip_member:
-                            shutil.copyfileobj(
-                                s3_object_stream, zip_member, length=64 * 1024
-                            )
-                except ClientError as e:
-                    self.update_status(TraceStatus.FAILED)
-                    msg = f"Failed to fetch S3 object {file_bucket}/{file_key}: {e}"
-                    logger.error(f"{LambdaError.ZipServiceClientError.to_str()} {msg}")
-                    raise GenerateManifestZipException(
-                        status_code=500, error=LambdaError.ZipServiceClientError
-                    )
-        zip_buffer.seek(0)
-        return zip_buffer
+    def stream_zip_documents(self):
+        """
+        Zips the documents straight into a multipart upload of the zip file.
 
-    def get_file_bucket_and_key(self, file_location: str):
-        try:
-            file_bucket, file_key = file_location.replace("s3://", "").split("/", 1)
-            return file_bucket, file_key
-        except ValueError:
-            self.update_status(TraceStatus.FAILED)
-            raise InvalidDocumentReferenceException(
-                "Failed to parse bucket from file location string"
-            )
-
-    def upload_zip_file(self, zip_buffer: BytesIO):
-        logger.info("Uploading zip file to s3")
+        Documents are downloaded to local disk with up to max_concurrent_downloads
+        in flight ahead of the one being compressed, and the compressed output is
+        uploaded in parts on background threads as it is produced, so memory use
+        depends on the part size rather than the size of the patient record.
+        """
+        logger.info("Streaming and zipping documents to s3")
         zip_file_key = f"{self.zip_file_name}"
         self.zip_trace_object.zip_file_location = (
             f"s3://{self.zip_output_bucket}/{zip_file_key}"
         )
+        documents = self.zip_trace_object.files_to_download
+
         try:
-            self.s3_service.upload_file_obj(
-                zip_buffer, self.zip_output_bucket, zip_file_key
-            )
+            with tempfile.TemporaryDirectory() as spill_directory:
+                with S3MultipartUploadStream(
+                    s3_service=self.s3_service,
+                    s3_bucket_name=self.zip_output_bucket,
+                    file_key=zip_file_key,
+                    max_in_flight_parts=self.max_in_flight_parts,
+                ) as upload_stream:
+                    with zipfile.ZipFile(
+                        upload_stream, "w", compression=zipfile.ZIP_DEFLATED
+                    ) as zipf:
+                        for document_name, document_path in self.prefetch_documents(
+                            documents, spill_directory
+                        ):
+                            self.add_document_to_zip(zipf, document_name, document_path)
             logger.info(
                 f"Successfully uploaded ZIP file to S3: s3://{self.zip_output_bucket}/{zip_file_key}"
             )
-
         except ClientError as e:
             self.update_status(TraceStatus.FAILED)
             logger.error(e, {"Result": "Failed to create document manifest"})
@@ -92,6 +82,62 @@ class DocumentManifestZipService:
 
         self.zip_trace_object.job_status = TraceStatus.COMPLETED
 
+    def prefetch_documents(
+        self, documents: dict[str, str], spill_directory: str
+    ) -> Iterator[tuple[str, str]]:
+        """
+        Yields the name and local path of each document in order, while keeping up
+        to max_concurrent_downloads downloads in flight ahead of the document
+        being zipped.
+        """
+        document_names = list(documents.values())
+        document_paths = prefetch_in_order(
+            self.download_document,
+            (
+                (document_location, os.path.join(spill_directory, str(index)))
+                for index, document_location in enumerate(documents)
+            ),
+            self.max_concurrent_downloads,
+        )
+        return zip(document_names, document_paths)
+
+    def download_document(self, document_location: str, document_path: str) -> str:
+        file_bucket, file_key = self.get_file_bucket_and_key(document_location)
+        try:
+            self.s3_service.download_file(
+                s3_bucket_name=file_bucket,
+                file_key=file_key,
+                download_path=document_path,
+            )
+        except ClientError as e:
+            self.update_status(TraceStatus.FAILED)
+            msg = f"Failed to fetch S3 object {file_bucket}/{file_key}: {e}"
+            logger.error(f"{LambdaError.ZipServiceClientError.to_str()} {msg}")
+            raise GenerateManifestZipException(
+                status_code=500, error=LambdaError.ZipServiceClientError
+            )
+        return document_path
+
+    @staticmethod
+    def add_document_to_zip(
+        zipf: zipfile.ZipFile, document_name: str, document_path: str
+    ):
+        with open(document_path, "rb") as document, zipf.open(
+            document_name, mode="w"
+        ) as zip_member:
+            shutil.copyfileobj(document, zip_member, length=64 * 1024)
+        os.remove(document_path)
+
+    def get_file_bucket_and_key(self, file_location: str):
+        try:
+            file_bucket, file_key = file_location.replace("s3://", "").split("/", 1)
+            return file_bucket, file_key
+        except ValueError:
+            self.update_status(TraceStatus.FAILED)
+            raise InvalidDocumentReferenceException(
+                "Failed to parse bucket from file location string"
+            )
+
     def update_dynamo_with_fields(self, fields: set):
         logger.info("Writing zip trace to db")
         self.dynamo_service.update_item(
@@ -48,6 +48,7 @@ class GetFhirDocumentReferenceService:
             search_condition=document_id,
             search_key="ID",
             query_filter=CurrentStatusFile,
+            max_items=1,
         )
         if len(documents) > 0:
             logger.info("Document found for given id")
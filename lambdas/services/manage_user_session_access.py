@@ -1,14 +1,21 @@
 import os
+import time
 
 from enums.repository_role import RepositoryRole
 from services.base.dynamo_service import DynamoDBService
 from utils.audit_logging_setup import LoggingService
 from utils.exceptions import AuthorisationException
 from utils.request_context import request_context
+from utils.ttl_cache import TtlCache
 from utils.utilities import redact_id_to_last_4_chars
 
 logger = LoggingService(__name__)
 
+session_cache = TtlCache(
+    ttl_seconds=int(os.environ.get("AUTH_SESSION_CACHE_TTL_SECONDS", 10)),
+    max_entries=int(os.environ.get("AUTH_SESSION_CACHE_MAX_ENTRIES", 1000)),
+)
+
 
 class ManageUserSessionAccess:
     def __init__(self):
@@ -18,7 +25,18 @@ class ManageUserSessionAccess:
         self.permitted_field = "AllowedNHSNumbers"
         self.deceased_field = "DeceasedNHSNumbers"
 
-    def find_login_session(self, ndr_session_id: str):
+    def find_login_session(self, ndr_session_id: str, use_cache: bool = False):
+        """
+        Sessions are cached for a few seconds, and never past their TimeToExist,
+        so that the authoriser does not query the session table on every request.
+        Only callers passing use_cache read from the cache; every lookup of the
+        table refreshes it.
+        """
+        if use_cache:
+            cached_session = session_cache.get(ndr_session_id)
+            if cached_session is not None:
+                return cached_session
+
         logger.info(
             f"Retrieving session for session ID ending in: {redact_id_to_last_4_chars(ndr_session_id)}"
         )
@@ -30,12 +48,20 @@ class ManageUserSessionAccess:
 
         try:
             current_session = query_response["Items"][0]
-            return current_session
         except (KeyError, IndexError):
+            session_cache.invalidate(ndr_session_id)
             raise AuthorisationException(
                 f"Unable to find session for session ID ending in: {redact_id_to_last_4_chars(ndr_session_id)}"
             )
 
+        if current_session.get("TimeToExist"):
+            session_cache.put(
+                ndr_session_id,
+                current_session,
+                ttl_seconds=float(current_session["TimeToExist"]) - time.time(),
+            )
+        return current_session
+
     def update_auth_session_with_permitted_search(
         self,
         nhs_number: str,
@@ -88,6 +114,7 @@ class ManageUserSessionAccess:
             key_pair={"NDRSessionId": ndr_session_id},
             updated_fields=updated_fields,
         )
+        session_cache.invalidate(ndr_session_id)
 
     def create_updated_permitted_search_fields(
         self, field_name, nhs_number: str, existing_nhs_numbers: str
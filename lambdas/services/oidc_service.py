@@ -7,10 +7,13 @@ from models.oidc_models import AccessToken, IdTokenClaimSet
 from requests import Response
 from utils.audit_logging_setup import LoggingService
 from utils.exceptions import AuthorisationException, OidcApiException
+from utils.jwks_client import get_jwks_client
 from utils.request_context import request_context
 
 logger = LoggingService(__name__)
 
+session = requests.Session()
+
 
 class OidcService:
     VERIFY_ALL = {
@@ -35,6 +38,7 @@ class OidcService:
         self.oidc_client = None
         self.environment = ""
         self.ssm_prefix = getattr(request_context, "auth_ssm_prefix", "")
+        self.session = session
 
     def fetch_tokens(self, auth_code: str) -> Tuple[AccessToken, IdTokenClaimSet]:
         url, headers, body = self.oidc_client.prepare_token_request(
@@ -44,7 +48,7 @@ class OidcService:
             client_secret=self._client_secret,
         )
 
-        access_token_response = requests.post(url=url, data=body, headers=headers)
+        access_token_response = self.session.post(url=url, data=body, headers=headers)
         if access_token_response.status_code == 200:
             return self.parse_fetch_tokens_response(access_token_response)
         else:
@@ -87,9 +91,7 @@ class OidcService:
 
     def validate_and_decode_token(self, signed_token: str) -> Dict:
         try:
-            jwks_client = jwt.PyJWKClient(
-                self._oidc_jwks_url, cache_jwk_set=True, lifespan=360
-            )
+            jwks_client = get_jwks_client(self._oidc_jwks_url)
             cis2_signing_key = jwks_client.get_signing_key_from_jwt(signed_token)
 
             decoded_token = jwt.decode(
@@ -197,7 +199,7 @@ class OidcService:
         """
         logger.info(f"Access token for user info request: {access_token}")
 
-        userinfo_response = requests.get(
+        userinfo_response = self.session.get(
             self._oidc_userinfo_url,
             headers={
                 "Authorization": f"Bearer {access_token}",
@@ -1,11 +1,12 @@
 import os
 import re
-import sys
+import tempfile
 import time
 import uuid
+from contextlib import ExitStack
 from datetime import datetime, timezone
-from io import BytesIO
 from math import ceil
+from typing import Iterator, Optional
 
 from botocore.exceptions import ClientError
 from enums.lambda_error import LambdaError
@@ -18,20 +19,26 @@ from models.document_reference import DocumentReference
 from models.fhir.R4.fhir_document_reference import Attachment
 from models.sqs.nrl_sqs_message import NrlSqsMessage
 from models.sqs.pdf_stitching_sqs_message import PdfStitchingSqsMessage
-from pypdf import PdfReader, PdfWriter
-from services.base.dynamo_service import DynamoDBService
+from pikepdf import Pdf
+from services.base.dynamo_service import TRANSACT_WRITE_ITEM_LIMIT, DynamoDBService
+from services.base.s3_multipart_upload_stream import S3MultipartUploadStream
 from services.base.s3_service import S3Service
 from services.base.sqs_service import SQSService
 from services.document_service import DocumentService
 from utils.audit_logging_setup import LoggingService
+from utils.batch_utils import batch
 from utils.common_query_filters import UploadCompleted
 from utils.exceptions import InvalidMessageException
 from utils.lambda_exceptions import PdfStitchingException
-from utils.sqs_utils import batch
+from utils.prefetch import prefetch_in_order
 from utils.utilities import DATE_FORMAT, create_reference_id
 
 logger = LoggingService(__name__)
 
+DEFAULT_UPLOAD_PART_SIZE_MB = 64
+DEFAULT_MEMORY_BUDGET_MB = 256
+DEFAULT_MAX_CONCURRENT_DOWNLOADS = 5
+
 
 class PdfStitchingService:
     def __init__(self):
@@ -40,12 +47,29 @@ class PdfStitchingService:
         self.unstitched_lloyd_george_table_name = os.environ.get(
             "UNSTITCHED_LLOYD_GEORGE_DYNAMODB_NAME"
         )
+        upload_part_size_in_mb = int(
+            os.environ.get(
+                "PDF_STITCHING_UPLOAD_PART_SIZE_MB", DEFAULT_UPLOAD_PART_SIZE_MB
+            )
+        )
+        self.upload_part_size_in_bytes = upload_part_size_in_mb * 1024 * 1024
+        memory_budget_in_mb = int(
+            os.environ.get("PDF_STITCHING_MEMORY_BUDGET_MB", DEFAULT_MEMORY_BUDGET_MB)
+        )
+        self.memory_budget_in_bytes = memory_budget_in_mb * 1024 * 1024
+        self.max_concurrent_downloads = int(
+            os.environ.get(
+                "PDF_STITCHING_MAX_CONCURRENT_DOWNLOADS",
+                DEFAULT_MAX_CONCURRENT_DOWNLOADS,
+            )
+        )
         self.dynamo_service = DynamoDBService()
         self.s3_service = S3Service()
         self.document_service = DocumentService()
         self.sqs_service = SQSService()
         self.multipart_references: list[DocumentReference] = []
         self.stitched_reference: DocumentReference = None
+        self.stitched_file_uploaded = False
 
     def retrieve_multipart_references(
         self, nhs_number: str, doc_type: SupportedDocumentTypes
@@ -81,6 +105,8 @@ class PdfStitchingService:
 
         self.target_dynamo_table = doc_type.get_dynamodb_table_name()
         self.target_bucket = doc_type.get_s3_bucket_name()
+        self.stitched_reference = None
+        self.stitched_file_uploaded = False
 
         self.multipart_references = self.retrieve_multipart_references(
             nhs_number=stitching_message.nhs_number, doc_type=doc_type
@@ -93,14 +119,13 @@ class PdfStitchingService:
         try:
 
             sorted_multipart_keys = self.sort_multipart_object_keys()
-            stitching_data_stream = self.process_stitching(
-                s3_object_keys=sorted_multipart_keys
-            )
             self.create_stitched_reference(
-                document_reference=self.multipart_references[0],
-                stitch_file_size=sys.getsizeof(stitching_data_stream),
+                document_reference=self.multipart_references[0]
+            )
+            self.stitched_reference.file_size = self.process_stitching(
+                s3_object_keys=sorted_multipart_keys
             )
-            self.upload_stitched_file(stitching_data_stream=stitching_data_stream)
+            self.stitched_file_uploaded = True
             self.migrate_multipart_references()
             self.write_stitching_reference()
             self.publish_nrl_message(
@@ -110,9 +135,7 @@ class PdfStitchingService:
             self.rollback_stitching_process()
             raise e
 
-    def create_stitched_reference(
-        self, document_reference: DocumentReference, stitch_file_size: int
-    ):
+    def create_stitched_reference(self, document_reference: DocumentReference):
         date_now = datetime.now(timezone.utc)
         reference_id = create_reference_id()
         stripped_filename = re.sub(r"^\d+of\d+_", "", document_reference.file_name)
@@ -122,76 +145,157 @@ class PdfStitchingService:
                 "created": date_now.strftime(DATE_FORMAT),
                 "file_location": f"s3://{self.target_bucket}/{document_reference.nhs_number}/{reference_id}",
                 "file_name": f"1of1_{stripped_filename}",
-                "file_size": stitch_file_size,
                 "last_updated": int(datetime.now(timezone.utc).timestamp()),
                 "s3_file_key": f"{document_reference.nhs_number}/{reference_id}",
             },
             deep=True,
         )
 
-    def process_stitching(self, s3_object_keys: list[str]) -> BytesIO:
-        pdf_writer = PdfWriter()
-
-        for key in s3_object_keys:
-            try:
-                data_stream = BytesIO()
-                self.s3_service.client.download_fileobj(
-                    Bucket=self.target_bucket, Key=key, Fileobj=data_stream
-                )
-                data_stream.seek(0)
-
-                pdf_reader = PdfReader(stream=data_stream)
-                for page in pdf_reader.pages:
-                    pdf_writer.add_page(page)
-            except ClientError as e:
-                logger.error(f"Failed to retrieve stream data from S3: {e}")
-                raise PdfStitchingException(400, LambdaError.StitchError)
-
-        stitching_data_stream = BytesIO()
-        pdf_writer.write(stream=stitching_data_stream)
-        stitching_data_stream.seek(0)
-
-        return stitching_data_stream
+    def process_stitching(self, s3_object_keys: list[str]) -> int:
+        """
+        Downloads each part to local disk and streams the stitched PDF to S3.
+
+        pikepdf keeps the object structure of every PDF it has open, so the parts
+        are merged in groups of up to PDF_STITCHING_MEMORY_BUDGET_MB of source
+        files: once a group reaches the budget it is merged with the stitched
+        output so far into an intermediate file in /tmp, and the parts and the
+        previous intermediate file are closed and deleted. The last group is
+        merged straight into a multipart upload of PDF_STITCHING_UPLOAD_PART_SIZE_MB
+        parts. Returns the number of bytes uploaded.
+        """
+        with tempfile.TemporaryDirectory() as spill_directory:
+            stitched_path = None
+            group_paths = []
+            group_size = 0
+
+            for part_path in self.prefetch_parts(s3_object_keys, spill_directory):
+                group_paths.append(part_path)
+                group_size += os.path.getsize(part_path)
+                if group_size >= self.memory_budget_in_bytes:
+                    stitched_path = self.merge_parts(
+                        stitched_path, group_paths, spill_directory
+                    )
+                    group_paths, group_size = [], 0
+
+            with ExitStack() as stack:
+                stitched_pdf = self.open_merged_parts(stack, stitched_path, group_paths)
+                return self.upload_stitched_file(stitched_pdf=stitched_pdf)
+
+    def merge_parts(
+        self, stitched_path: Optional[str], part_paths: list[str], spill_directory: str
+    ) -> str:
+        merged_path = os.path.join(spill_directory, f"stitched-{uuid.uuid4()}.pdf")
+        with ExitStack() as stack:
+            merged_pdf = self.open_merged_parts(stack, stitched_path, part_paths)
+            merged_pdf.save(merged_path)
+
+        for merged_file_path in [stitched_path, *part_paths]:
+            if merged_file_path:
+                os.remove(merged_file_path)
+        return merged_path
+
+    @staticmethod
+    def open_merged_parts(
+        stack: ExitStack, stitched_path: Optional[str], part_paths: list[str]
+    ) -> Pdf:
+        stitched_pdf = stack.enter_context(
+            Pdf.open(stitched_path) if stitched_path else Pdf.new()
+        )
+        for part_path in part_paths:
+            part_pdf = stack.enter_context(Pdf.open(part_path))
+            stitched_pdf.pages.extend(part_pdf.pages)
+        return stitched_pdf
+
+    def prefetch_parts(
+        self, s3_object_keys: list[str], spill_directory: str
+    ) -> Iterator[str]:
+        """
+        Yields the local path of each part in the order of s3_object_keys, while
+        keeping up to max_concurrent_downloads downloads in flight ahead of the
+        part being appended.
+
+        This bounds the number of concurrent downloads, not disk use: a part stays
+        on disk in spill_directory until the group it belongs to has been merged.
+        """
+        return prefetch_in_order(
+            self.download_part,
+            (
+                (key, os.path.join(spill_directory, f"{index}.pdf"))
+                for index, key in enumerate(s3_object_keys)
+            ),
+            self.max_concurrent_downloads,
+        )
 
-    def upload_stitched_file(self, stitching_data_stream: BytesIO):
+    def download_part(self, s3_object_key: str, part_path: str) -> str:
         try:
-            self.s3_service.client.upload_fileobj(
-                Fileobj=stitching_data_stream,
-                Bucket=self.target_bucket,
-                Key=self.stitched_reference.s3_file_key,
+            self.s3_service.download_file(
+                s3_bucket_name=self.target_bucket,
+                file_key=s3_object_key,
+                download_path=part_path,
             )
+        except ClientError as e:
+            logger.error(f"Failed to retrieve stream data from S3: {e}")
+            raise PdfStitchingException(400, LambdaError.StitchError)
+        return part_path
+
+    def upload_stitched_file(self, stitched_pdf: Pdf) -> int:
+        try:
+            with S3MultipartUploadStream(
+                s3_service=self.s3_service,
+                s3_bucket_name=self.target_bucket,
+                file_key=self.stitched_reference.s3_file_key,
+                part_size=self.upload_part_size_in_bytes,
+            ) as upload_stream:
+                stitched_pdf.save(upload_stream)
         except ClientError as e:
             logger.error(f"Failed to upload stitched file to S3: {e}")
             raise PdfStitchingException(400, LambdaError.StitchError)
 
+        return upload_stream.bytes_written
+
     def migrate_multipart_references(self):
         logger.info("Migrating multipart references")
+        references_per_transaction = TRANSACT_WRITE_ITEM_LIMIT // 2
         try:
-            for reference in self.multipart_references:
-                migrated_item = reference.model_dump(
-                    by_alias=True,
-                    exclude_none=True,
-                    exclude={
-                        underscore(DocumentReferenceMetadataFields.CURRENT_GP_ODS.value)
-                    },
-                )
-                self.dynamo_service.create_item(
-                    table_name=self.unstitched_lloyd_george_table_name,
-                    item=migrated_item,
+            for references in batch(
+                self.multipart_references, references_per_transaction
+            ):
+                self.dynamo_service.transact_write_items(
+                    transact_items=self.build_migration_transaction(references)
                 )
         except ClientError as e:
             logger.error(f"Failed to migrate multipart references: {e}")
             raise PdfStitchingException(400, LambdaError.MultipartError)
 
-        try:
-            for reference in self.multipart_references:
-                self.dynamo_service.delete_item(
-                    table_name=self.target_dynamo_table,
-                    key={DocumentReferenceMetadataFields.ID.value: reference.id},
-                )
-        except ClientError as e:
-            logger.error(f"Failed to cleanup multipart references: {e}")
-            raise PdfStitchingException(400, LambdaError.MultipartError)
+    def build_migration_transaction(
+        self, references: list[DocumentReference]
+    ) -> list[dict]:
+        transact_items = []
+        for reference in references:
+            migrated_item = reference.model_dump(
+                by_alias=True,
+                exclude_none=True,
+                exclude={
+                    underscore(DocumentReferenceMetadataFields.CURRENT_GP_ODS.value)
+                },
+            )
+            transact_items.append(
+                {
+                    "Put": {
+                        "TableName": self.unstitched_lloyd_george_table_name,
+                        "Item": migrated_item,
+                    }
+                }
+            )
+            transact_items.append(
+                {
+                    "Delete": {
+                        "TableName": self.target_dynamo_table,
+                        "Key": {DocumentReferenceMetadataFields.ID.value: reference.id},
+                    }
+                }
+            )
+        return transact_items
 
     def write_stitching_reference(self):
         try:
@@ -252,7 +356,7 @@ class PdfStitchingService:
         return file_keys
 
     def rollback_stitching_process(self):
-        if self.stitched_reference:
+        if self.stitched_reference and self.stitched_file_uploaded:
             logger.info("Rolling back the following stitched reference and object")
             logger.info(self.stitched_reference.model_dump(by_alias=True))
 
@@ -267,7 +371,7 @@ class PdfStitchingService:
 
     def rollback_stitched_reference(self):
         try:
-            if self.stitched_reference:
+            if self.stitched_reference and self.stitched_file_uploaded:
                 self.dynamo_service.delete_item(
                     table_name=self.target_dynamo_table,
                     key={
@@ -285,36 +389,45 @@ class PdfStitchingService:
 
     def rollback_reference_migration(self):
         try:
-            for document_reference in self.multipart_references:
-                original_references = self.dynamo_service.get_item(
+            reference_ids = [reference.id for reference in self.multipart_references]
+
+            original_reference_ids = {
+                item[DocumentReferenceMetadataFields.ID.value]
+                for item in self.dynamo_service.batch_get_items(
+                    table_name=self.target_dynamo_table, key_list=reference_ids
+                )
+            }
+            deleted_references = [
+                reference
+                for reference in self.multipart_references
+                if reference.id not in original_reference_ids
+            ]
+            if deleted_references:
+                logger.info("Reverting original multipart references deletion")
+                self.dynamo_service.batch_put_items(
                     table_name=self.target_dynamo_table,
-                    key={
-                        DocumentReferenceMetadataFields.ID.value: document_reference.id
-                    },
+                    items=[
+                        reference.model_dump(by_alias=True, exclude_none=True)
+                        for reference in deleted_references
+                    ],
                 )
-                if not original_references.get("Item"):
-                    logger.info("Reverting original multipart references deletion")
-                    self.dynamo_service.create_item(
-                        table_name=self.target_dynamo_table,
-                        item=document_reference.model_dump(
-                            by_alias=True, exclude_none=True
-                        ),
-                    )
 
-                unstitched_references = self.dynamo_service.get_item(
+            unstitched_reference_ids = [
+                item[DocumentReferenceMetadataFields.ID.value]
+                for item in self.dynamo_service.batch_get_items(
                     table_name=self.unstitched_lloyd_george_table_name,
-                    key={
-                        DocumentReferenceMetadataFields.ID.value: document_reference.id
-                    },
+                    key_list=reference_ids,
+                )
+            ]
+            if unstitched_reference_ids:
+                logger.info("Reverting multipart references creation")
+                self.dynamo_service.batch_delete_items(
+                    table_name=self.unstitched_lloyd_george_table_name,
+                    keys=[
+                        {DocumentReferenceMetadataFields.ID.value: reference_id}
+                        for reference_id in unstitched_reference_ids
+                    ],
                 )
-                if unstitched_references.get("Item"):
-                    logger.info("Reverting multipart references creation")
-                    self.dynamo_service.delete_item(
-                        table_name=self.unstitched_lloyd_george_table_name,
-                        key={
-                            DocumentReferenceMetadataFields.ID.value: document_reference.id
-                        },
-                    )
             logger.info("Successfully reverted migrated multipart references")
 
         except Exception as e:
@@ -1,3 +1,5 @@
+import os
+import time
 import uuid
 from json import JSONDecodeError
 
@@ -5,8 +7,9 @@ import requests
 from botocore.exceptions import ClientError
 from enums.pds_ssm_parameters import SSMParameter
 from requests.adapters import HTTPAdapter
-from requests.exceptions import ConnectionError, HTTPError, Timeout
+from requests.exceptions import ConnectionError, HTTPError, RetryError, Timeout
 from services.patient_search_service import PatientSearch
+from services.pds_rate_limiter import PdsRateLimiter
 from urllib3 import Retry
 from utils.audit_logging_setup import LoggingService
 from utils.exceptions import PdsErrorException, PdsTooManyRequestsException
@@ -18,11 +21,18 @@ class PdsApiService(PatientSearch):
     def __init__(self, ssm_service, auth_service):
         self.ssm_service = ssm_service
         self.auth_service = auth_service
+        self.rate_limiter = PdsRateLimiter()
+        # 429s are retried in pds_request, so that every attempt waits for the
+        # rate limiter and every rejection is recorded by it
+        self.too_many_requests_retries = int(
+            os.environ.get("PDS_TOO_MANY_REQUESTS_RETRIES", 3)
+        )
         retry_strategy = Retry(
             total=3,
-            status_forcelist=[429, 500, 502, 503, 504],
+            status_forcelist=[500, 502, 503, 504],
             allowed_methods=["GET"],
             backoff_factor=1,
+            raise_on_status=False,
         )
         adapter = HTTPAdapter(max_retries=retry_strategy)
 
@@ -43,13 +53,10 @@ class PdsApiService(PatientSearch):
 
             url_endpoint = endpoint + "Patient/" + nhs_number
 
-            logger.info("PDS Call Initiated")
-            pds_response = self.session.get(
-                url=url_endpoint, headers=authorization_header
-            )
-            logger.info("PDS Call Completed", {"Event": "NDR-TR1"})
+            pds_response = self.get_with_rate_limit(url_endpoint, authorization_header)
 
             if pds_response.status_code == 401 and retry_on_expired:
+                self.auth_service.invalidate_access_token(access_token)
                 return self.pds_request(nhs_number, retry_on_expired=False)
 
             return pds_response
@@ -58,10 +65,32 @@ class PdsApiService(PatientSearch):
             logger.error(str(e), {"Result": "Error when getting ssm parameters"})
             raise PdsErrorException("Failed to perform patient search")
 
-        except (ConnectionError, Timeout, HTTPError) as e:
+        except (ConnectionError, Timeout, HTTPError, RetryError) as e:
             logger.error(str(e), {"Result": "Error when calling PDS"})
             raise PdsTooManyRequestsException("Failed to perform patient search")
 
+    def get_with_rate_limit(self, url: str, headers: dict) -> requests.Response:
+        for attempt in range(self.too_many_requests_retries + 1):
+            self.rate_limiter.acquire()
+            logger.info("PDS Call Initiated")
+            pds_response = self.session.get(url=url, headers=headers)
+            logger.info("PDS Call Completed", {"Event": "NDR-TR1"})
+
+            if pds_response.status_code != 429:
+                return pds_response
+
+            self.rate_limiter.record_too_many_requests()
+            if attempt < self.too_many_requests_retries:
+                time.sleep(self.get_retry_after_seconds(pds_response, attempt))
+        return pds_response
+
+    @staticmethod
+    def get_retry_after_seconds(pds_response: requests.Response, attempt: int) -> float:
+        retry_after = pds_response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+        return float(2**attempt)
+
     def get_endpoint_for_pds_api_request(self):
         parameter = SSMParameter.PDS_API_ENDPOINT.value
 
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+from botocore.exceptions import ClientError
+from services.base.dynamo_service import DynamoDBService
+from utils.audit_logging_setup import LoggingService
+from utils.exceptions import PdsTooManyRequestsException
+from utils.rate_limiter import TokenBucketRateLimiter
+
+logger = LoggingService(__name__)
+
+WINDOW_KEY_PREFIX = "PDS#"
+WINDOW_EXPIRY_SECONDS = 60
+
+
+@dataclass
+class PdsRateLimiterStats:
+    requests: int = 0
+    wait_seconds: float = 0.0
+    shared_limit_waits: int = 0
+    too_many_requests_responses: int = 0
+    shared_limit_errors: int = 0
+
+
+class PdsRateLimiter:
+    """
+    Client-side rate limit for PDS calls, so that callers wait briefly for budget
+    instead of being rejected with a 429 by PDS.
+
+    Every PdsApiService in the process shares a token bucket refilled at
+    PDS_RATE_LIMIT_PER_SECOND; leaving it unset (or 0) disables the limiter. When
+    PDS_RATE_LIMIT_TABLE_NAME is set, the budget is also shared across lambdas
+    through a counter per one second window in that table (partition key ID, TTL
+    attribute ExpiresAt), capped at PDS_SHARED_RATE_LIMIT_PER_SECOND. A caller
+    that cannot get shared budget within PDS_RATE_LIMIT_MAX_WAIT_SECONDS gets a
+    PdsTooManyRequestsException; failures of the table are logged and only the
+    in-process limit is applied.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.initialised = False
+        return cls._instance
+
+    def __init__(self):
+        if not self.initialised:
+            rate_per_second = float(os.environ.get("PDS_RATE_LIMIT_PER_SECOND", 0))
+            self.local_limiter = (
+                TokenBucketRateLimiter(rate_per_second) if rate_per_second > 0 else None
+            )
+            self.table_name = os.environ.get("PDS_RATE_LIMIT_TABLE_NAME")
+            self.shared_limit = int(
+                os.environ.get("PDS_SHARED_RATE_LIMIT_PER_SECOND", rate_per_second)
+            )
+            self.max_wait_seconds = float(
+                os.environ.get("PDS_RATE_LIMIT_MAX_WAIT_SECONDS", 10)
+            )
+            self.dynamo_service = (
+                DynamoDBService() if self.table_name and self.shared_limit > 0 else None
+            )
+            self.stats = PdsRateLimiterStats()
+            self.lock = threading.Lock()
+            self.initialised = True
+
+    @property
+    def enabled(self) -> bool:
+        return self.local_limiter is not None or self.dynamo_service is not None
+
+    def acquire(self) -> float:
+        if not self.enabled:
+            return 0.0
+
+        waited = self.local_limiter.acquire() if self.local_limiter else 0.0
+        if self.dynamo_service:
+            waited += self._acquire_shared()
+
+        with self.lock:
+            self.stats.requests += 1
+            self.stats.wait_seconds += waited
+        return waited
+
+    def record_too_many_requests(self):
+        """
+        PDS rejected a call, so another client is using the same budget: drain
+        the local bucket so that the next callers back off for about a second.
+        """
+        with self.lock:
+            self.stats.too_many_requests_responses += 1
+        if self.local_limiter:
+            self.local_limiter.consume(self.local_limiter.capacity)
+
+    def log_stats(self):
+        with self.lock:
+            if not self.stats.requests:
+                return
+            logger.info(
+                f"PDS rate limiter waited {self.stats.wait_seconds:.2f}s "
+                f"over {self.stats.requests} requests",
+                {"PdsRateLimiterStats": asdict(self.stats)},
+            )
+
+    def _acquire_shared(self) -> float:
+        waited = 0.0
+        while True:
+            now = time.time()
+            window = int(now)
+            if self._take_shared_budget(window):
+                return waited
+
+            wait_time = window + 1 - now
+            if waited + wait_time > self.max_wait_seconds:
+                logger.warning(
+                    f"No shared PDS budget after waiting {waited:.2f}s",
+                    {"Result": "PDS rate limit reached"},
+                )
+                raise PdsTooManyRequestsException("PDS rate limit reached")
+
+            with self.lock:
+                self.stats.shared_limit_waits += 1
+            time.sleep(wait_time)
+            waited += wait_time
+
+    def _take_shared_budget(self, window: int) -> bool:
+        try:
+            self.dynamo_service.increment_counter(
+                table_name=self.table_name,
+                key_pair={"ID": f"{WINDOW_KEY_PREFIX}{window}"},
+                counter_name="RequestCount",
+                limit=self.shared_limit,
+                updated_fields={"ExpiresAt": window + WINDOW_EXPIRY_SECONDS},
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            logger.warning(f"Failed to update shared PDS rate limit: {e}")
+            with self.lock:
+                self.stats.shared_limit_errors += 1
+            return True
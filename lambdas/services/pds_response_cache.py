@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from botocore.exceptions import ClientError
+from requests import Response
+from services.base.dynamo_service import DynamoDBService
+from services.patient_search_service import PatientSearch
+from utils.audit_logging_setup import LoggingService
+from utils.ttl_cache import TtlCache
+
+logger = LoggingService(__name__)
+
+POSITIVE_STATUS_CODE = 200
+NEGATIVE_STATUS_CODE = 404
+
+
+@dataclass
+class PdsCacheMetrics:
+    memory_hits: int = 0
+    shared_hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.memory_hits + self.shared_hits
+        lookups = hits + self.misses
+        return hits / lookups if lookups else 0.0
+
+
+@dataclass
+class CachedPdsResponse:
+    status_code: int
+    content: bytes
+    expires_at: float
+
+    def is_expired(self, now: float) -> bool:
+        return now >= self.expires_at
+
+    def to_response(self) -> Response:
+        response = Response()
+        response.status_code = self.status_code
+        response._content = self.content
+        return response
+
+
+class PdsResponseCache:
+    """
+    Cache of PDS patient responses keyed by NHS number, so that a patient looked
+    up repeatedly (e.g. a bulk upload message retried while waiting for its virus
+    scan) only costs one PDS call per TTL.
+
+    Found patients are kept for PDS_CACHE_TTL_SECONDS and 404s for
+    PDS_CACHE_NEGATIVE_TTL_SECONDS; any other response is never cached. The
+    in-process tier is a TtlCache bounded by PDS_CACHE_MAX_ENTRIES. When
+    PDS_CACHE_TABLE_NAME is set, responses are also shared through that table
+    (partition key NhsNumber, TTL attribute ExpiresAt); failures of the shared
+    tier are logged and treated as a miss. Setting PDS_CACHE_TTL_SECONDS to 0
+    disables the cache.
+
+    invalidate() only reaches the shared table and the memory of the container
+    that calls it, e.g. when an MNS message changes a patient's GP practice.
+    Other containers keep their copy until it expires, so with a shared table
+    the in-process tier only keeps entries for PDS_CACHE_MEMORY_TTL_SECONDS,
+    which bounds how long they can serve a stale GP ODS code. Without a shared
+    table there is nothing to invalidate across containers, and a patient may be
+    served stale for up to PDS_CACHE_TTL_SECONDS.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.initialised = False
+        return cls._instance
+
+    def __init__(self):
+        if not self.initialised:
+            self.ttl_seconds = int(os.environ.get("PDS_CACHE_TTL_SECONDS", 300))
+            self.negative_ttl_seconds = int(
+                os.environ.get("PDS_CACHE_NEGATIVE_TTL_SECONDS", 60)
+            )
+            self.max_entries = int(os.environ.get("PDS_CACHE_MAX_ENTRIES", 1000))
+            self.table_name = os.environ.get("PDS_CACHE_TABLE_NAME")
+            self.dynamo_service = DynamoDBService() if self.table_name else None
+            memory_ttl_seconds = max(self.ttl_seconds, self.negative_ttl_seconds)
+            if self.table_name:
+                memory_ttl_seconds = min(
+                    memory_ttl_seconds,
+                    int(os.environ.get("PDS_CACHE_MEMORY_TTL_SECONDS", 30)),
+                )
+            self.memory = TtlCache(memory_ttl_seconds, max_entries=self.max_entries)
+            self.shared_hits = 0
+            self.negative_hits = 0
+            self.misses = 0
+            self.lock = threading.Lock()
+            self.initialised = True
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @property
+    def metrics(self) -> PdsCacheMetrics:
+        with self.lock:
+            return PdsCacheMetrics(
+                memory_hits=self.memory.metrics.hits,
+                shared_hits=self.shared_hits,
+                negative_hits=self.negative_hits,
+                misses=self.misses,
+                evictions=self.memory.metrics.evictions,
+            )
+
+    def get(self, nhs_number: str) -> Optional[Response]:
+        cached_response = self.memory.get(nhs_number)
+        if cached_response is None and self.table_name:
+            now = time.time()
+            cached_response = self._get_from_table(nhs_number, now)
+            if cached_response is not None:
+                self.memory.put(
+                    nhs_number,
+                    cached_response,
+                    ttl_seconds=cached_response.expires_at - now,
+                )
+
+        if cached_response is None:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        if cached_response.status_code == NEGATIVE_STATUS_CODE:
+            with self.lock:
+                self.negative_hits += 1
+        return cached_response.to_response()
+
+    def put(self, nhs_number: str, response: Response):
+        if response.status_code == POSITIVE_STATUS_CODE:
+            ttl_seconds = self.ttl_seconds
+        elif response.status_code == NEGATIVE_STATUS_CODE:
+            ttl_seconds = self.negative_ttl_seconds
+        else:
+            return
+        if ttl_seconds <= 0:
+            return
+
+        cached_response = CachedPdsResponse(
+            status_code=response.status_code,
+            content=response.content or b"",
+            expires_at=time.time() + ttl_seconds,
+        )
+        self.memory.put(nhs_number, cached_response, ttl_seconds=ttl_seconds)
+        if self.table_name:
+            self._put_in_table(nhs_number, cached_response)
+
+    def invalidate(self, nhs_number: str):
+        self.memory.invalidate(nhs_number)
+        if self.table_name:
+            try:
+                self.dynamo_service.delete_item(
+                    table_name=self.table_name, key={"NhsNumber": nhs_number}
+                )
+            except ClientError as e:
+                logger.warning(f"Failed to remove PDS response from shared cache: {e}")
+
+    def clear(self):
+        self.memory.clear()
+        with self.lock:
+            self.shared_hits = 0
+            self.negative_hits = 0
+            self.misses = 0
+
+    def log_metrics(self):
+        metrics = self.metrics
+        lookups = metrics.memory_hits + metrics.shared_hits + metrics.misses
+        if not lookups:
+            return
+        logger.info(
+            f"PDS cache hit rate: {metrics.hit_rate:.0%} of {lookups} lookups",
+            {"PdsCacheMetrics": {**asdict(metrics), "hit_rate": metrics.hit_rate}},
+        )
+
+    def _get_from_table(
+        self, nhs_number: str, now: float
+    ) -> Optional[CachedPdsResponse]:
+        try:
+            response = self.dynamo_service.get_item(
+                table_name=self.table_name, key={"NhsNumber": nhs_number}
+            )
+        except ClientError as e:
+            logger.warning(f"Failed to read PDS response from shared cache: {e}")
+            return None
+
+        item = response.get("Item")
+        if not item:
+            return None
+        cached_response = CachedPdsResponse(
+            status_code=int(item["StatusCode"]),
+            content=item.get("Content", "").encode("utf-8"),
+            expires_at=float(item["ExpiresAt"]),
+        )
+        if cached_response.is_expired(now):
+            return None
+
+        with self.lock:
+            self.shared_hits += 1
+        return cached_response
+
+    def _put_in_table(self, nhs_number: str, cached_response: CachedPdsResponse):
+        try:
+            self.dynamo_service.create_item(
+                table_name=self.table_name,
+                item={
+                    "NhsNumber": nhs_number,
+                    "StatusCode": cached_response.status_code,
+                    "Content": cached_response.content.decode("utf-8"),
+                    "ExpiresAt": int(cached_response.expires_at),
+                },
+            )
+        except ClientError as e:
+            logger.warning(f"Failed to write PDS response to shared cache: {e}")
+
+
+class CachedPatientSearch(PatientSearch):
+    def __init__(self, pds_service: PatientSearch, cache: PdsResponseCache):
+        self.pds_service = pds_service
+        self.cache = cache
+
+    def pds_request(self, nhs_number: str, **kwargs) -> Response:
+        cached_response = self.cache.get(nhs_number)
+        if cached_response is not None:
+            logger.info("PDS response served from cache")
+            return cached_response
+
+        response = self.pds_service.pds_request(nhs_number=nhs_number, **kwargs)
+        self.cache.put(nhs_number, response)
+        return response
@@ -9,6 +9,7 @@ from models.document_reference import DocumentReference
 from models.sqs.mns_sqs_message import MNSSQSMessage
 from services.base.sqs_service import SQSService
 from services.document_service import DocumentService
+from services.pds_response_cache import PdsResponseCache
 from utils.audit_logging_setup import LoggingService
 from utils.exceptions import PdsErrorException
 from utils.ods_utils import PCSE_ODS_CODE
@@ -22,6 +23,7 @@ class MNSNotificationService:
         self.document_service = DocumentService()
         self.table = os.getenv("LLOYD_GEORGE_DYNAMODB_NAME")
         self.pds_service = get_pds_service()
+        self.pds_response_cache = PdsResponseCache()
         self.sqs_service = SQSService()
         self.queue = os.getenv("MNS_NOTIFICATION_QUEUE_URL")
         self.DOCUMENT_UPDATE_FIELDS = {"current_gp_ods", "custodian", "last_updated"}
@@ -122,6 +124,7 @@ class MNSNotificationService:
                 )
 
     def get_updated_gp_ods(self, nhs_number: str) -> str:
+        self.pds_response_cache.invalidate(nhs_number)
         patient_details = self.pds_service.fetch_patient_details(nhs_number)
         return patient_details.general_practice_ods
 
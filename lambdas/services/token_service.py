@@ -1,22 +1,80 @@
+import os
+import threading
+import time
+
 import jwt
 from botocore.exceptions import ClientError
+from jwt.algorithms import RSAAlgorithm
 from services.base.ssm_service import SSMService
 from utils.audit_logging_setup import LoggingService
+from utils.ttl_cache import TtlCache
 
 logger = LoggingService(__name__)
 ssm_service = SSMService()
 
+public_key_cache = TtlCache(
+    ttl_seconds=int(os.environ.get("JWT_PUBLIC_KEY_CACHE_TTL_SECONDS", 300))
+)
+# Refetches after a signature mismatch are limited, so that tokens signed with
+# the wrong key cannot make every request read the public key from SSM
+public_key_min_refetch_interval_seconds = int(
+    os.environ.get("JWT_PUBLIC_KEY_MIN_REFETCH_INTERVAL_SECONDS", 30)
+)
+public_key_refetches: dict[str, float] = {}
+public_key_refetch_lock = threading.Lock()
+
 
 class TokenService:
     @staticmethod
     def get_public_key_and_decode_auth_token(auth_token, ssm_public_key_parameter):
         try:
-            public_key = ssm_service.get_ssm_parameter(ssm_public_key_parameter, True)
-            decoded_token = jwt.decode(auth_token, public_key, algorithms=["RS256"])
-            return decoded_token
+            cached_public_key = public_key_cache.get(ssm_public_key_parameter)
+            public_key = cached_public_key or TokenService.fetch_public_key(
+                ssm_public_key_parameter
+            )
+            try:
+                return jwt.decode(auth_token, public_key, algorithms=["RS256"])
+            except jwt.InvalidSignatureError:
+                if (
+                    cached_public_key is None
+                    or not TokenService.can_refetch_public_key(ssm_public_key_parameter)
+                ):
+                    raise
+                logger.info("Auth token signature mismatch, refreshing public key")
+                public_key = TokenService.fetch_public_key(ssm_public_key_parameter)
+                return jwt.decode(auth_token, public_key, algorithms=["RS256"])
         except jwt.PyJWTError as e:
             logger.info(f"Failed to decode auth token: {e}")
             return None
         except ClientError as e:
             logger.info(f"Failed to retrieve auth token: {e}")
             return None
+
+    @staticmethod
+    def can_refetch_public_key(ssm_public_key_parameter) -> bool:
+        now = time.monotonic()
+        with public_key_refetch_lock:
+            last_refetch = public_key_refetches.get(ssm_public_key_parameter)
+            if (
+                last_refetch is not None
+                and now - last_refetch < public_key_min_refetch_interval_seconds
+            ):
+                return False
+            public_key_refetches[ssm_public_key_parameter] = now
+            return True
+
+    @staticmethod
+    def fetch_public_key(ssm_public_key_parameter):
+        """
+        Fetches and parses the public key, then caches it for the life of a warm
+        container so that requests do not fetch and parse it again. A rotated key
+        is picked up when the cache expires, or straight away when a token fails
+        signature verification against the cached key, at most once per
+        JWT_PUBLIC_KEY_MIN_REFETCH_INTERVAL_SECONDS.
+        """
+        public_key_pem = ssm_service.get_ssm_parameter(
+            ssm_public_key_parameter, True, use_cache=False
+        )
+        public_key = RSAAlgorithm(RSAAlgorithm.SHA256).prepare_key(public_key_pem)
+        public_key_cache.put(ssm_public_key_parameter, public_key)
+        return public_key
@@ -90,6 +90,7 @@ class UploadDocumentReferenceService:
         try:
             virus_scan_result = self._perform_virus_scan(document_reference)
             document_reference.virus_scanner_result = virus_scan_result
+            document_reference.file_size = object_size
 
             if virus_scan_result == VirusScanResult.CLEAN:
                 self._process_clean_document(
@@ -98,7 +99,6 @@ class UploadDocumentReferenceService:
                 )
             else:
                 logger.warning(f"Document {document_reference.id} failed virus scan")
-            document_reference.file_size = object_size
             document_reference.uploaded = True
             document_reference.uploading = False
             self.update_dynamo_table(document_reference, virus_scan_result)
@@ -156,6 +156,7 @@ class UploadDocumentReferenceService:
                 source_file_key=source_file_key,
                 dest_bucket=self.lg_bucket_name,
                 dest_file_key=dest_file_key,
+                file_size=document_reference.file_size,
             )
 
             document_reference.s3_file_key = dest_file_key
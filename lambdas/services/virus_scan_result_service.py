@@ -8,6 +8,7 @@ from enums.pds_ssm_parameters import SSMParameter
 from enums.virus_scan_result import VirusScanResult
 from requests.models import HTTPError
 from services.base.ssm_service import SSMService
+from utils.access_token_manager import AccessToken, AccessTokenManager
 from utils.audit_logging_setup import LoggingService
 from utils.lambda_exceptions import VirusScanResultException
 
@@ -17,6 +18,8 @@ FAIL_SCAN = "Virus scan result failed"
 SCAN_ENDPOINT = "/api/Scan/Existing"
 TOKEN_ENDPOINT = "/api/Token"
 
+access_token_manager = AccessTokenManager()
+
 
 class VirusScanService:
     def __init__(self):
@@ -27,6 +30,7 @@ class VirusScanService:
         self.password = ""
         self.base_url = ""
         self.access_token = ""
+        self.session = requests.Session()
 
     def scan_file(self, file_ref: str, *args, **kwargs) -> VirusScanResult:
         try:
@@ -66,7 +70,7 @@ class VirusScanService:
             }
             logger.info(f"Json data request: {json_data_request}")
 
-            response = requests.post(
+            response = self.session.post(
                 url=scan_url, data=json.dumps(json_data_request), headers=headers
             )
             if response.status_code == 401 and retry_on_expired:
@@ -85,23 +89,27 @@ class VirusScanService:
             raise VirusScanResultException(400, LambdaError.VirusScanTokenRequest)
 
     def get_new_access_token(self):
+        access_token_manager.invalidate(self.access_token)
+        self.access_token = access_token_manager.get_access_token(
+            fetch_token=self.request_new_access_token,
+            store_token=self.store_access_token,
+        )
+
+    def request_new_access_token(self) -> AccessToken:
         try:
             json_login = json.dumps(
                 {"username": self.username, "password": self.password}
             )
             token_url = self.base_url + TOKEN_ENDPOINT
 
-            response = requests.post(
+            response = self.session.post(
                 url=token_url,
                 headers={"Content-type": "application/json"},
                 data=json_login,
             )
 
             response.raise_for_status()
-            new_access_token = response.json()["accessToken"]
-
-            self.update_ssm_access_token(new_access_token)
-            self.access_token = new_access_token
+            return AccessToken(value=response.json()["accessToken"])
         except (HTTPError, KeyError, TypeError) as e:
             logger.error(
                 f"{LambdaError.VirusScanNoToken.to_str()}: {str(e)}",
@@ -109,6 +117,9 @@ class VirusScanService:
             )
             raise VirusScanResultException(500, LambdaError.VirusScanTokenRequest)
 
+    def store_access_token(self, access_token: AccessToken):
+        self.update_ssm_access_token(access_token.value)
+
     def update_ssm_access_token(self, access_token):
         parameter_key = SSMParameter.VIRUS_API_ACCESS_TOKEN.value
         self.ssm_service.update_ssm_parameter(
@@ -131,4 +142,9 @@ class VirusScanService:
         self.username = ssm_response[username_key]
         self.password = ssm_response[password_key]
         self.base_url = ssm_response[url_key]
-        self.access_token = ssm_response[access_token_key]
+        stored_access_token = AccessToken(value=ssm_response[access_token_key])
+        self.access_token = access_token_manager.get_access_token(
+            fetch_token=self.request_new_access_token,
+            load_token=lambda: stored_access_token,
+            store_token=self.store_access_token,
+        )
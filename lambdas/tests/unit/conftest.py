@@ -7,6 +7,19 @@ from enum import Enum
 
 import pytest
 from utils.audit_logging_setup import LoggingService
+from services.base.nhs_oauth_service import (
+    access_token_manager as nhs_oauth_token_manager,
+)
+from services.base.ssm_service import parameter_cache
+from services.feature_flags_service import feature_flags_cache, pilot_ods_codes_cache
+from services.manage_user_session_access import session_cache
+from services.pds_rate_limiter import PdsRateLimiter
+from services.token_service import public_key_cache, public_key_refetches
+from utils.jwks_client import jwks_clients
+from services.virus_scan_result_service import (
+    access_token_manager as virus_scan_token_manager,
+)
+from services.pds_response_cache import PdsResponseCache
 from botocore.exceptions import ClientError
 from models.document_reference import DocumentReference
 from models.pds_models import Patient, PatientDetails
@@ -335,6 +348,11 @@ MOCK_CLIENT_ERROR = ClientError(
     {"Error": {"Code": 500, "Message": "Test error message"}}, "TEST"
 )
 
+MOCK_NO_SUCH_KEY_ERROR = ClientError(
+    {"Error": {"Code": "NoSuchKey", "Message": "The specified key does not exist."}},
+    "GetObject",
+)
+
 
 @pytest.fixture
 def mock_temp_folder(mocker):
@@ -372,6 +390,45 @@ def mock_jwt_encode(mocker):
 def reset_logging_singletons():
     LoggingService._instances.clear()
 
+@pytest.fixture(autouse=True)
+def reset_pds_response_cache():
+    yield
+    PdsResponseCache._instance = None
+
+@pytest.fixture(autouse=True)
+def reset_pds_rate_limiter():
+    yield
+    PdsRateLimiter._instance = None
+
+@pytest.fixture(autouse=True)
+def reset_auth_caches():
+    yield
+    session_cache.clear()
+    public_key_cache.clear()
+    public_key_refetches.clear()
+
+@pytest.fixture(autouse=True)
+def reset_ssm_parameter_cache():
+    yield
+    parameter_cache.clear()
+
+@pytest.fixture(autouse=True)
+def reset_access_token_managers():
+    yield
+    nhs_oauth_token_manager.clear()
+    virus_scan_token_manager.clear()
+
+@pytest.fixture(autouse=True)
+def reset_jwks_clients():
+    yield
+    jwks_clients.clear()
+
+@pytest.fixture(autouse=True)
+def reset_feature_flag_caches():
+    yield
+    feature_flags_cache.clear()
+    pilot_ods_codes_cache.clear()
+
 @pytest.fixture(autouse=True)
 def attach_caplog_handler(caplog):
     for instance in LoggingService._instances.values():
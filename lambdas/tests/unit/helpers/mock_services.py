@@ -26,3 +26,6 @@ class FakOAuthService:
 
     def get_active_access_token(self, *arg, **kwargs):
         return "Sr5PGv19wTEHJdDr2wx2f7IGd0cw"
+
+    def invalidate_access_token(self, *arg, **kwargs):
+        pass
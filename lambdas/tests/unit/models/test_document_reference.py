@@ -1,7 +1,8 @@
 from datetime import datetime
+from decimal import Decimal
 
 from freezegun import freeze_time
-from models.document_reference import DocumentReference
+from models.document_reference import DocumentReference, DocumentReferenceView
 from tests.unit.helpers.data.dynamo.dynamo_responses import MOCK_SEARCH_RESPONSE
 
 MOCK_DOCUMENT_REFERENCE = DocumentReference.model_validate(
@@ -49,3 +50,32 @@ def test_last_updated_within_three_minutes_return_false_when_last_updated_is_mor
     expected = False
 
     assert expected == actual
+
+
+def test_document_reference_view_maps_projected_fields_and_ignores_others():
+    item = {
+        "ID": "test-id",
+        "NhsNumber": "9000000009",
+        "FileSize": Decimal("1024"),
+        "UnknownField": "ignored",
+    }
+
+    actual = DocumentReferenceView.from_dynamo_item(item)
+
+    assert actual == DocumentReferenceView(
+        id="test-id", nhs_number="9000000009", file_size=1024
+    )
+    assert isinstance(actual.file_size, int)
+    assert actual.uploaded is None
+
+
+@freeze_time("2023-10-30T10:25:00")
+def test_document_reference_view_last_updated_within_three_minutes():
+    within_three_minutes = int(
+        datetime.fromisoformat("2023-10-30T10:22:01").timestamp()
+    )
+
+    assert DocumentReferenceView(
+        last_updated=within_three_minutes
+    ).last_updated_within_three_minutes()
+    assert not DocumentReferenceView().last_updated_within_three_minutes()
@@ -1,16 +1,21 @@
 import pytest
+from botocore.exceptions import ClientError
 from enums.upload_status import UploadStatus
 from freezegun import freeze_time
 from repositories.bulk_upload.bulk_upload_dynamo_repository import (
     BulkUploadDynamoRepository,
 )
-from tests.unit.conftest import MOCK_BULK_REPORT_TABLE_NAME, MOCK_LG_TABLE_NAME
+from tests.unit.conftest import (
+    MOCK_BULK_REPORT_TABLE_NAME,
+    MOCK_CLIENT_ERROR,
+    MOCK_LG_TABLE_NAME,
+)
 from tests.unit.helpers.data.bulk_upload.test_data import (
-    TEST_DOCUMENT_REFERENCE,
     TEST_DOCUMENT_REFERENCE_LIST,
     TEST_NHS_NUMBER_FOR_BULK_UPLOAD,
     TEST_STAGING_METADATA,
 )
+from utils.exceptions import DynamoServiceException
 
 
 @pytest.fixture
@@ -20,14 +25,43 @@ def repo_under_test(set_env, mocker):
     yield repo
 
 
-def test_create_record_in_dynamodb_table(set_env, repo_under_test):
-    repo_under_test.create_record_in_lg_dynamo_table(TEST_DOCUMENT_REFERENCE)
+def test_create_records_in_lg_dynamo_table_writes_one_transaction(
+    set_env, repo_under_test
+):
+    repo_under_test.create_records_in_lg_dynamo_table(TEST_DOCUMENT_REFERENCE_LIST)
+
+    repo_under_test.dynamo_repository.transact_write_items.assert_called_once_with(
+        transact_items=[
+            {
+                "Put": {
+                    "TableName": MOCK_LG_TABLE_NAME,
+                    "Item": reference.model_dump(by_alias=True, exclude_none=True),
+                }
+            }
+            for reference in TEST_DOCUMENT_REFERENCE_LIST
+        ]
+    )
+    assert repo_under_test.dynamo_records_in_transaction == TEST_DOCUMENT_REFERENCE_LIST
 
-    assert TEST_DOCUMENT_REFERENCE in repo_under_test.dynamo_records_in_transaction
 
-    repo_under_test.dynamo_repository.create_item.assert_called_with(
-        table_name=MOCK_LG_TABLE_NAME,
-        item=TEST_DOCUMENT_REFERENCE.model_dump(by_alias=True, exclude_none=True),
+def test_create_records_in_lg_dynamo_table_tracks_only_written_transactions(
+    set_env, repo_under_test, mocker
+):
+    mocker.patch(
+        "repositories.bulk_upload.bulk_upload_dynamo_repository.TRANSACT_WRITE_ITEM_LIMIT",
+        2,
+    )
+    repo_under_test.dynamo_repository.transact_write_items.side_effect = [
+        None,
+        MOCK_CLIENT_ERROR,
+    ]
+
+    with pytest.raises(ClientError):
+        repo_under_test.create_records_in_lg_dynamo_table(TEST_DOCUMENT_REFERENCE_LIST)
+
+    assert (
+        repo_under_test.dynamo_records_in_transaction
+        == TEST_DOCUMENT_REFERENCE_LIST[:2]
     )
 
 
@@ -38,13 +72,12 @@ def test_report_upload_complete_add_record_to_dynamodb(
     repo_under_test.write_report_upload_to_dynamo(
         TEST_STAGING_METADATA, upload_status=UploadStatus.COMPLETE
     )
+    repo_under_test.dynamo_repository.batch_put_items.assert_not_called()
 
-    assert repo_under_test.dynamo_repository.create_item.call_count == len(
-        TEST_STAGING_METADATA.files
-    )
+    repo_under_test.flush_report_records()
 
-    for file in TEST_STAGING_METADATA.files:
-        expected_dynamo_db_record = {
+    expected_dynamo_db_records = [
+        {
             "Date": "2023-10-01",
             "FilePath": file.file_path,
             "ID": mock_uuid,
@@ -54,9 +87,12 @@ def test_report_upload_complete_add_record_to_dynamodb(
             "UploaderOdsCode": "Y12345",
             "PdsOdsCode": "",
         }
-        repo_under_test.dynamo_repository.create_item.assert_any_call(
-            item=expected_dynamo_db_record, table_name=MOCK_BULK_REPORT_TABLE_NAME
-        )
+        for file in TEST_STAGING_METADATA.files
+    ]
+    repo_under_test.dynamo_repository.batch_put_items.assert_called_once_with(
+        table_name=MOCK_BULK_REPORT_TABLE_NAME, items=expected_dynamo_db_records
+    )
+    assert repo_under_test.pending_report_records == []
 
 
 @freeze_time("2023-10-2 13:00:00")
@@ -69,9 +105,10 @@ def test_report_upload_failure_add_record_to_dynamodb(
         upload_status=UploadStatus.FAILED,
         reason=mock_reason,
     )
+    repo_under_test.flush_report_records()
 
-    for file in TEST_STAGING_METADATA.files:
-        expected_dynamo_db_record = {
+    expected_dynamo_db_records = [
+        {
             "Date": "2023-10-02",
             "FilePath": file.file_path,
             "ID": mock_uuid,
@@ -82,9 +119,55 @@ def test_report_upload_failure_add_record_to_dynamodb(
             "UploaderOdsCode": "Y12345",
             "PdsOdsCode": "",
         }
-        repo_under_test.dynamo_repository.create_item.assert_any_call(
-            item=expected_dynamo_db_record, table_name=MOCK_BULK_REPORT_TABLE_NAME
-        )
+        for file in TEST_STAGING_METADATA.files
+    ]
+    repo_under_test.dynamo_repository.batch_put_items.assert_called_once_with(
+        table_name=MOCK_BULK_REPORT_TABLE_NAME, items=expected_dynamo_db_records
+    )
+
+
+def test_write_report_upload_to_dynamo_flushes_once_threshold_reached(
+    repo_under_test, set_env
+):
+    repo_under_test.report_flush_threshold = len(TEST_STAGING_METADATA.files) * 2
+
+    repo_under_test.write_report_upload_to_dynamo(
+        TEST_STAGING_METADATA, upload_status=UploadStatus.COMPLETE
+    )
+    repo_under_test.dynamo_repository.batch_put_items.assert_not_called()
+
+    repo_under_test.write_report_upload_to_dynamo(
+        TEST_STAGING_METADATA, upload_status=UploadStatus.COMPLETE
+    )
+    repo_under_test.dynamo_repository.batch_put_items.assert_called_once()
+    assert repo_under_test.pending_report_records == []
+
+
+@pytest.mark.parametrize(
+    "error",
+    [MOCK_CLIENT_ERROR, DynamoServiceException("Retries exhausted")],
+)
+def test_flush_report_records_keeps_records_when_write_fails(
+    repo_under_test, set_env, error
+):
+    repo_under_test.write_report_upload_to_dynamo(
+        TEST_STAGING_METADATA, upload_status=UploadStatus.COMPLETE
+    )
+    pending_report_records = list(repo_under_test.pending_report_records)
+    repo_under_test.dynamo_repository.batch_put_items.side_effect = error
+
+    with pytest.raises(type(error)):
+        repo_under_test.flush_report_records()
+
+    assert repo_under_test.pending_report_records == pending_report_records
+
+
+def test_flush_report_records_with_no_records_does_not_call_dynamo(
+    repo_under_test, set_env
+):
+    repo_under_test.flush_report_records()
+
+    repo_under_test.dynamo_repository.batch_put_items.assert_not_called()
 
 
 def test_rollback_transaction(repo_under_test, set_env, mock_uuid):
@@ -96,9 +179,18 @@ def test_rollback_transaction(repo_under_test, set_env, mock_uuid):
 
     repo_under_test.rollback_transaction()
 
-    repo_under_test.dynamo_repository.delete_item.assert_called_with(
-        table_name=MOCK_LG_TABLE_NAME, key={"ID": mock_uuid}
-    )
-    assert repo_under_test.dynamo_repository.delete_item.call_count == len(
-        TEST_DOCUMENT_REFERENCE_LIST
+    repo_under_test.dynamo_repository.batch_delete_items.assert_called_once_with(
+        table_name=MOCK_LG_TABLE_NAME,
+        keys=[{"ID": mock_uuid} for _ in TEST_DOCUMENT_REFERENCE_LIST],
     )
+    repo_under_test.dynamo_repository.delete_item.assert_not_called()
+
+
+def test_rollback_transaction_with_no_records_does_not_call_dynamo(
+    repo_under_test, set_env
+):
+    repo_under_test.init_transaction()
+
+    repo_under_test.rollback_transaction()
+
+    repo_under_test.dynamo_repository.batch_delete_items.assert_not_called()
@@ -157,8 +157,84 @@ def test_create_lg_records_and_copy_files_keep_track_of_successfully_ingested_fi
     expected = [file_path for file_path in mock_file_path_cache]
 
     for file_path in mock_file_path_cache:
-        repo_under_test.copy_to_lg_bucket(file_path, file_path)
+        repo_under_test.copy_to_lg_bucket(file_path, file_path, 100)
 
     actual = repo_under_test.source_bucket_files_in_transaction
 
     assert actual == expected
+
+
+def test_copy_to_lg_bucket_passes_file_size_to_copy(repo_under_test, set_env):
+    repo_under_test.copy_to_lg_bucket("source_key", "dest_key", 100)
+
+    repo_under_test.s3_repository.get_file_size.assert_not_called()
+    repo_under_test.s3_repository.copy_across_bucket.assert_called_once_with(
+        source_bucket=MOCK_STAGING_STORE_BUCKET,
+        source_file_key="source_key",
+        dest_bucket=MOCK_LG_BUCKET,
+        dest_file_key="dest_key",
+        file_size=100,
+    )
+    assert repo_under_test.dest_bucket_files_in_transaction == ["dest_key"]
+
+
+def test_get_staged_file_sizes_lists_each_folder_once(repo_under_test, set_env):
+    source_file_keys = ["9000000009/1of2_file.pdf", "9000000009/2of2_file.pdf"]
+    repo_under_test.s3_repository.list_object_sizes.return_value = {
+        "9000000009/1of2_file.pdf": 100,
+        "9000000009/2of2_file.pdf": 200,
+        "9000000009/other_file.pdf": 300,
+    }
+
+    actual = repo_under_test.get_staged_file_sizes(source_file_keys)
+
+    assert actual == {
+        "9000000009/1of2_file.pdf": 100,
+        "9000000009/2of2_file.pdf": 200,
+    }
+    repo_under_test.s3_repository.list_object_sizes.assert_called_once_with(
+        bucket_name=MOCK_STAGING_STORE_BUCKET,
+        prefix="9000000009/",
+        start_after="9000000009/1of2_file.pd",
+    )
+    repo_under_test.s3_repository.get_file_size.assert_not_called()
+
+
+def test_get_staged_file_sizes_heads_files_missing_from_listing(
+    repo_under_test, set_env
+):
+    source_file_keys = ["9000000009/1of2_file.pdf", "9000000009/2of2_file.pdf"]
+    repo_under_test.s3_repository.list_object_sizes.return_value = {
+        "9000000009/1of2_file.pdf": 100,
+    }
+    repo_under_test.s3_repository.get_file_size.return_value = 200
+
+    actual = repo_under_test.get_staged_file_sizes(source_file_keys)
+
+    assert actual == {
+        "9000000009/1of2_file.pdf": 100,
+        "9000000009/2of2_file.pdf": 200,
+    }
+    repo_under_test.s3_repository.get_file_size.assert_called_once_with(
+        s3_bucket_name=MOCK_STAGING_STORE_BUCKET,
+        object_key="9000000009/2of2_file.pdf",
+    )
+
+
+def test_get_staged_file_sizes_heads_every_file_when_listing_fails(
+    repo_under_test, set_env
+):
+    source_file_keys = ["9000000009/1of2_file.pdf", "9000000009/2of2_file.pdf"]
+    repo_under_test.s3_repository.list_object_sizes.side_effect = ClientError(
+        {"Error": {"Code": "AccessDenied", "Message": "Access Denied"}},
+        "ListObjectsV2",
+    )
+    repo_under_test.s3_repository.get_file_size.return_value = 100
+
+    actual = repo_under_test.get_staged_file_sizes(source_file_keys)
+
+    assert actual == {
+        "9000000009/1of2_file.pdf": 100,
+        "9000000009/2of2_file.pdf": 100,
+    }
+    assert repo_under_test.s3_repository.get_file_size.call_count == 2
@@ -1,4 +1,6 @@
 import copy
+import threading
+import time
 from unittest.mock import call
 
 import pytest
@@ -7,7 +9,11 @@ from botocore.exceptions import ClientError
 
 from enums.dynamo_filter import AttributeOperator
 from enums.metadata_field_names import DocumentReferenceMetadataFields
-from services.base.dynamo_service import DynamoDBService
+from services.base.dynamo_service import (
+    MAX_BATCH_RETRIES,
+    BatchOperationStats,
+    DynamoDBService,
+)
 from tests.unit.conftest import MOCK_CLIENT_ERROR, MOCK_TABLE_NAME, TEST_NHS_NUMBER
 from tests.unit.helpers.data.dynamo.dynamo_responses import MOCK_SEARCH_RESPONSE
 from tests.unit.helpers.data.dynamo.dynamo_scan_response import (
@@ -47,6 +53,11 @@ def mock_scan_method(mock_table):
     yield scan_method
 
 
+@pytest.fixture
+def mock_client_scan_method(mock_dynamo_service):
+    yield mock_dynamo_service.meta.client.scan
+
+
 @pytest.fixture
 def mock_filter_expression():
     filter_builder = DynamoQueryFilterBuilder()
@@ -309,15 +320,15 @@ def test_batch_get_items_success(mock_service, mock_dynamo_service):
             ]
         }
     }
-    mock_dynamo_service.batch_get_item.return_value = mock_response
+    mock_dynamo_service.meta.client.batch_get_item.return_value = mock_response
 
     results = mock_service.batch_get_items(MOCK_TABLE_NAME, key_list)
 
     expected_request_items = {
         MOCK_TABLE_NAME: {"Keys": [{"ID": "id1"}, {"ID": "id2"}, {"ID": "id3"}]}
     }
-    mock_dynamo_service.batch_get_item.assert_called_once_with(
-        RequestItems=expected_request_items
+    mock_dynamo_service.meta.client.batch_get_item.assert_called_once_with(
+        RequestItems=expected_request_items, ReturnConsumedCapacity="TOTAL"
     )
     assert len(results) == 3
     assert results[0]["ID"] == "id1"
@@ -342,28 +353,30 @@ def test_batch_get_items_with_unprocessed_keys(mock_service, mock_dynamo_service
         }
     }
 
-    mock_dynamo_service.batch_get_item.side_effect = [first_response, second_response]
+    mock_dynamo_service.meta.client.batch_get_item.side_effect = [first_response, second_response]
 
     result = mock_service.batch_get_items(MOCK_TABLE_NAME, key_list)
 
-    assert mock_dynamo_service.batch_get_item.call_count == 2
+    assert mock_dynamo_service.meta.client.batch_get_item.call_count == 2
     assert len(result) == 3
     assert [item["ID"] for item in result] == ["id1", "id2", "id3"]
 
 
-def test_batch_get_items_with_too_many_keys(mock_service, mock_dynamo_service):
+def test_batch_get_items_chunks_keys_at_api_limit(mock_service, mock_dynamo_service):
     key_list = [f"id{i}" for i in range(101)]
+    mock_dynamo_service.meta.client.batch_get_item.side_effect = lambda RequestItems, **kwargs: {
+        "Responses": {MOCK_TABLE_NAME: RequestItems[MOCK_TABLE_NAME]["Keys"]}
+    }
 
     result = mock_service.batch_get_items(MOCK_TABLE_NAME, key_list)
 
-    assert isinstance(result, DynamoServiceException)
-    assert str(result) == "Cannot fetch more than 100 items at a time"
-    mock_dynamo_service.batch_get_item.assert_not_called()
+    assert mock_dynamo_service.meta.client.batch_get_item.call_count == 2
+    assert [item["ID"] for item in result] == key_list
 
 
 def test_batch_get_items_with_exception(mock_service, mock_dynamo_service):
     key_list = ["id1", "id2"]
-    mock_dynamo_service.batch_get_item.side_effect = Exception("Test exception")
+    mock_dynamo_service.meta.client.batch_get_item.side_effect = Exception("Test exception")
 
     with pytest.raises(Exception) as excinfo:
         mock_service.batch_get_items(MOCK_TABLE_NAME, key_list)
@@ -371,11 +384,273 @@ def test_batch_get_items_with_exception(mock_service, mock_dynamo_service):
     assert str(excinfo.value) == "Test exception"
 
     expected_request_items = {MOCK_TABLE_NAME: {"Keys": [{"ID": "id1"}, {"ID": "id2"}]}}
-    mock_dynamo_service.batch_get_item.assert_called_once_with(
-        RequestItems=expected_request_items
+    mock_dynamo_service.meta.client.batch_get_item.assert_called_once_with(
+        RequestItems=expected_request_items, ReturnConsumedCapacity="TOTAL"
+    )
+
+
+@pytest.fixture
+def mock_sleep(mocker):
+    yield mocker.patch("services.base.dynamo_service.time.sleep")
+
+
+def test_batch_put_items_chunks_requests_at_api_limit(
+    mock_service, mock_dynamo_service
+):
+    items = [{"ID": f"id{i}"} for i in range(30)]
+    mock_dynamo_service.meta.client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+    mock_service.batch_put_items(MOCK_TABLE_NAME, items)
+
+    mock_dynamo_service.meta.client.batch_write_item.assert_has_calls(
+        [
+            call(
+                RequestItems={
+                    MOCK_TABLE_NAME: [
+                        {"PutRequest": {"Item": item}} for item in items[:25]
+                    ]
+                },
+                ReturnConsumedCapacity="TOTAL",
+            ),
+            call(
+                RequestItems={
+                    MOCK_TABLE_NAME: [
+                        {"PutRequest": {"Item": item}} for item in items[25:]
+                    ]
+                },
+                ReturnConsumedCapacity="TOTAL",
+            ),
+        ]
+    )
+
+
+def test_batch_delete_items_retries_unprocessed_items(
+    mock_service, mock_dynamo_service, mock_sleep
+):
+    keys = [{"ID": "id1"}, {"ID": "id2"}]
+    unprocessed_items = {MOCK_TABLE_NAME: [{"DeleteRequest": {"Key": {"ID": "id2"}}}]}
+    mock_dynamo_service.meta.client.batch_write_item.side_effect = [
+        {"UnprocessedItems": unprocessed_items},
+        {"UnprocessedItems": {}},
+    ]
+
+    mock_service.batch_delete_items(MOCK_TABLE_NAME, keys)
+
+    mock_dynamo_service.meta.client.batch_write_item.assert_has_calls(
+        [
+            call(
+                RequestItems={
+                    MOCK_TABLE_NAME: [{"DeleteRequest": {"Key": key}} for key in keys]
+                },
+                ReturnConsumedCapacity="TOTAL",
+            ),
+            call(RequestItems=unprocessed_items, ReturnConsumedCapacity="TOTAL"),
+        ]
+    )
+    mock_sleep.assert_called_once()
+
+
+def test_batch_write_raises_exception_when_items_remain_unprocessed(
+    mock_service, mock_dynamo_service, mock_sleep
+):
+    unprocessed_items = {MOCK_TABLE_NAME: [{"PutRequest": {"Item": {"ID": "id1"}}}]}
+    mock_dynamo_service.meta.client.batch_write_item.return_value = {
+        "UnprocessedItems": unprocessed_items
+    }
+
+    with pytest.raises(DynamoServiceException):
+        mock_service.batch_put_items(MOCK_TABLE_NAME, [{"ID": "id1"}])
+
+
+def test_batch_write_client_error_raises_exception(mock_service, mock_dynamo_service):
+    mock_dynamo_service.meta.client.batch_write_item.side_effect = MOCK_CLIENT_ERROR
+
+    with pytest.raises(ClientError):
+        mock_service.batch_put_items(MOCK_TABLE_NAME, [{"ID": "id1"}])
+
+
+def test_transact_write_items_is_called_with_correct_parameters(
+    mock_service, mock_dynamo_service
+):
+    transact_items = [
+        {"Put": {"TableName": MOCK_TABLE_NAME, "Item": {"ID": "id1"}}},
+        {"Delete": {"TableName": MOCK_TABLE_NAME, "Key": {"ID": "id2"}}},
+    ]
+
+    mock_service.transact_write_items(transact_items)
+
+    mock_dynamo_service.meta.client.transact_write_items.assert_called_once_with(
+        TransactItems=transact_items, ReturnConsumedCapacity="TOTAL"
+    )
+
+
+def test_transact_write_items_rejects_transactions_over_api_limit(
+    mock_service, mock_dynamo_service
+):
+    transact_items = [
+        {"Delete": {"TableName": MOCK_TABLE_NAME, "Key": {"ID": f"id{i}"}}}
+        for i in range(101)
+    ]
+
+    with pytest.raises(DynamoServiceException):
+        mock_service.transact_write_items(transact_items)
+
+    mock_dynamo_service.meta.client.transact_write_items.assert_not_called()
+
+
+def test_transact_write_items_client_error_raises_exception(
+    mock_service, mock_dynamo_service
+):
+    mock_dynamo_service.meta.client.transact_write_items.side_effect = MOCK_CLIENT_ERROR
+
+    with pytest.raises(ClientError):
+        mock_service.transact_write_items(
+            [{"Put": {"TableName": MOCK_TABLE_NAME, "Item": {"ID": "id1"}}}]
+        )
+
+
+def test_batch_put_items_returns_consumed_capacity_and_request_counts(
+    mock_service, mock_dynamo_service
+):
+    items = [{"ID": f"id{i}"} for i in range(30)]
+    mock_dynamo_service.meta.client.batch_write_item.return_value = {
+        "UnprocessedItems": {},
+        "ConsumedCapacity": [{"TableName": MOCK_TABLE_NAME, "CapacityUnits": 2.5}],
+    }
+
+    actual = mock_service.batch_put_items(MOCK_TABLE_NAME, items)
+
+    assert actual == BatchOperationStats(
+        operation="BatchWriteItem",
+        table_name=MOCK_TABLE_NAME,
+        items=30,
+        requests=2,
+        retries=0,
+        throttles=0,
+        consumed_capacity=5.0,
+    )
+
+
+def test_batch_put_items_runs_chunks_in_parallel(mock_service, mock_dynamo_service):
+    items = [{"ID": f"id{i}"} for i in range(100)]
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def slow_batch_write_item(**kwargs):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return {"UnprocessedItems": {}}
+
+    mock_dynamo_service.meta.client.batch_write_item.side_effect = slow_batch_write_item
+
+    actual = mock_service.batch_put_items(MOCK_TABLE_NAME, items, max_workers=4)
+
+    assert actual.requests == 4
+    assert actual.items == 100
+    assert max_in_flight > 1
+
+
+def test_batch_write_retries_throttled_requests(
+    mock_service, mock_dynamo_service, mock_sleep
+):
+    throttling_error = ClientError(
+        {"Error": {"Code": "ProvisionedThroughputExceededException"}},
+        "BatchWriteItem",
+    )
+    mock_dynamo_service.meta.client.batch_write_item.side_effect = [
+        throttling_error,
+        {"UnprocessedItems": {}},
+    ]
+
+    actual = mock_service.batch_delete_items(MOCK_TABLE_NAME, [{"ID": "id1"}])
+
+    assert actual.throttles == 1
+    assert actual.retries == 1
+    assert actual.requests == 1
+    mock_sleep.assert_called_once()
+
+
+def test_batch_get_passes_projection_expression(mock_service, mock_dynamo_service):
+    mock_dynamo_service.meta.client.batch_get_item.return_value = {
+        "Responses": {MOCK_TABLE_NAME: [{"ID": "id1"}]}
+    }
+
+    actual = mock_service.batch_get(
+        MOCK_TABLE_NAME, [{"ID": "id1"}], projection_expression="ID"
+    )
+
+    assert actual == [{"ID": "id1"}]
+    mock_dynamo_service.meta.client.batch_get_item.assert_called_once_with(
+        RequestItems={
+            MOCK_TABLE_NAME: {"Keys": [{"ID": "id1"}], "ProjectionExpression": "ID"}
+        },
+        ReturnConsumedCapacity="TOTAL",
     )
 
 
+def test_batch_get_raises_exception_when_keys_remain_unprocessed(
+    mock_service, mock_dynamo_service, mock_sleep
+):
+    mock_dynamo_service.meta.client.batch_get_item.return_value = {
+        "Responses": {},
+        "UnprocessedKeys": {MOCK_TABLE_NAME: {"Keys": [{"ID": "id1"}]}},
+    }
+
+    with pytest.raises(DynamoServiceException):
+        mock_service.batch_get(MOCK_TABLE_NAME, [{"ID": "id1"}])
+
+    assert mock_sleep.call_count == MAX_BATCH_RETRIES
+
+
+def test_transact_write_items_retries_throttled_transactions(
+    mock_service, mock_dynamo_service, mock_sleep
+):
+    cancelled_error = ClientError(
+        {
+            "Error": {"Code": "TransactionCanceledException"},
+            "CancellationReasons": [{"Code": "None"}, {"Code": "ThrottlingError"}],
+        },
+        "TransactWriteItems",
+    )
+    mock_dynamo_service.meta.client.transact_write_items.side_effect = [
+        cancelled_error,
+        {},
+    ]
+
+    actual = mock_service.transact_write_items(
+        [{"Delete": {"TableName": MOCK_TABLE_NAME, "Key": {"ID": "id1"}}}]
+    )
+
+    assert actual.throttles == 1
+    assert mock_dynamo_service.meta.client.transact_write_items.call_count == 2
+
+
+def test_transact_write_items_does_not_retry_failed_conditions(
+    mock_service, mock_dynamo_service, mock_sleep
+):
+    cancelled_error = ClientError(
+        {
+            "Error": {"Code": "TransactionCanceledException"},
+            "CancellationReasons": [{"Code": "ConditionalCheckFailed"}],
+        },
+        "TransactWriteItems",
+    )
+    mock_dynamo_service.meta.client.transact_write_items.side_effect = cancelled_error
+
+    with pytest.raises(ClientError):
+        mock_service.transact_write_items(
+            [{"Delete": {"TableName": MOCK_TABLE_NAME, "Key": {"ID": "id1"}}}]
+        )
+
+    mock_sleep.assert_not_called()
+
+
 def test_update_item_is_called_with_correct_parameters(mock_service, mock_table):
     update_key = {"ID": "9000000009"}
     expected_update_expression = (
@@ -409,6 +684,37 @@ def test_update_item_is_called_with_correct_parameters(mock_service, mock_table)
     )
 
 
+def test_increment_counter_adds_one_below_the_limit(mock_service, mock_table):
+    mock_table.return_value.update_item.return_value = {
+        "Attributes": {"RequestCount": 3, "ExpiresAt": 1060}
+    }
+
+    actual = mock_service.increment_counter(
+        table_name=MOCK_TABLE_NAME,
+        key_pair={"ID": "PDS#1000"},
+        counter_name="RequestCount",
+        limit=5,
+        updated_fields={"ExpiresAt": 1060},
+    )
+
+    assert actual == 3
+    mock_table.return_value.update_item.assert_called_once_with(
+        Key={"ID": "PDS#1000"},
+        UpdateExpression="ADD #counter :increment SET #ExpiresAt_attr = :ExpiresAt_val",
+        ExpressionAttributeNames={
+            "#counter": "RequestCount",
+            "#ExpiresAt_attr": "ExpiresAt",
+        },
+        ExpressionAttributeValues={
+            ":increment": 1,
+            ":ExpiresAt_val": 1060,
+            ":limit": 5,
+        },
+        ReturnValues="UPDATED_NEW",
+        ConditionExpression="attribute_not_exists(#counter) OR #counter < :limit",
+    )
+
+
 def test_update_item_client_error_raises_exception(mock_service, mock_table):
     expected_response = MOCK_CLIENT_ERROR
     mock_table.return_value.update_item.side_effect = MOCK_CLIENT_ERROR
@@ -550,6 +856,121 @@ def test_scan_whole_table_omit_expression_arguments_if_not_given(
     mock_scan_method.assert_called_with()
 
 
+def test_scan_whole_table_with_segments_scans_each_segment_and_combines_items(
+    mock_service, mock_client_scan_method
+):
+    def scan_segment(**kwargs):
+        segment = kwargs["Segment"]
+        if not kwargs.get("ExclusiveStartKey"):
+            return {
+                "Items": [{"ID": f"{segment}-1"}],
+                "LastEvaluatedKey": {"ID": f"{segment}-1"},
+            }
+        return {"Items": [{"ID": f"{segment}-2"}]}
+
+    mock_client_scan_method.side_effect = scan_segment
+
+    actual = mock_service.scan_whole_table(
+        table_name=MOCK_TABLE_NAME, total_segments=3
+    )
+
+    assert sorted(item["ID"] for item in actual) == [
+        "0-1",
+        "0-2",
+        "1-1",
+        "1-2",
+        "2-1",
+        "2-2",
+    ]
+    assert mock_client_scan_method.call_count == 6
+    mock_client_scan_method.assert_any_call(
+        TableName=MOCK_TABLE_NAME, Segment=2, TotalSegments=3
+    )
+    mock_client_scan_method.assert_any_call(
+        TableName=MOCK_TABLE_NAME,
+        Segment=2,
+        TotalSegments=3,
+        ExclusiveStartKey={"ID": "2-1"},
+    )
+
+
+def test_scan_whole_table_reads_segment_count_from_environment(
+    mock_service, mock_client_scan_method, monkeypatch
+):
+    monkeypatch.setenv("DYNAMODB_SCAN_TOTAL_SEGMENTS", "2")
+    mock_client_scan_method.return_value = {"Items": [{"ID": "item"}]}
+
+    actual = mock_service.scan_whole_table(table_name=MOCK_TABLE_NAME)
+
+    assert actual == [{"ID": "item"}, {"ID": "item"}]
+    mock_client_scan_method.assert_any_call(
+        TableName=MOCK_TABLE_NAME, Segment=0, TotalSegments=2
+    )
+    mock_client_scan_method.assert_any_call(
+        TableName=MOCK_TABLE_NAME, Segment=1, TotalSegments=2
+    )
+
+
+def test_scan_whole_table_with_segments_raises_client_error_from_segment(
+    mock_service, mock_client_scan_method
+):
+    mock_client_scan_method.side_effect = MOCK_CLIENT_ERROR
+
+    with pytest.raises(ClientError):
+        mock_service.scan_whole_table(table_name=MOCK_TABLE_NAME, total_segments=4)
+
+
+def test_iter_scan_pages_yields_each_page(mock_service, mock_scan_method):
+    mock_scan_method.side_effect = mock_scan_implementation
+
+    pages = list(mock_service.iter_scan_pages(table_name=MOCK_TABLE_NAME))
+
+    assert pages == [
+        MOCK_PAGINATED_RESPONSE_1["Items"],
+        MOCK_PAGINATED_RESPONSE_2["Items"],
+        MOCK_PAGINATED_RESPONSE_3["Items"],
+    ]
+
+
+def test_iter_scan_pages_stops_scanning_when_consumer_stops_early(
+    mock_service, mock_scan_method
+):
+    mock_scan_method.side_effect = mock_scan_implementation
+
+    pages = mock_service.iter_scan_pages(table_name=MOCK_TABLE_NAME)
+    first_page = next(pages)
+    pages.close()
+
+    assert first_page == MOCK_PAGINATED_RESPONSE_1["Items"]
+    mock_scan_method.assert_called_once()
+
+
+def test_iter_scan_pages_with_capacity_limit_waits_for_consumed_capacity(
+    mock_service, mock_scan_method, mocker
+):
+    mock_rate_limiter = mocker.patch(
+        "services.base.dynamo_service.TokenBucketRateLimiter"
+    ).return_value
+    mock_scan_method.side_effect = [
+        {
+            "Items": [{"ID": "1"}],
+            "LastEvaluatedKey": {"ID": "1"},
+            "ConsumedCapacity": {"CapacityUnits": 64.5},
+        },
+        {"Items": [{"ID": "2"}], "ConsumedCapacity": {"CapacityUnits": 12.0}},
+    ]
+
+    list(
+        mock_service.iter_scan_pages(
+            table_name=MOCK_TABLE_NAME, max_read_capacity_per_second=50
+        )
+    )
+
+    mock_scan_method.assert_any_call(ReturnConsumedCapacity="TOTAL")
+    assert mock_rate_limiter.acquire.call_count == 2
+    mock_rate_limiter.consume.assert_has_calls([call(64.5), call(12.0)])
+
+
 def test_get_table_when_table_exists_then_table_is_returned_successfully(
     mock_service, mock_dynamo_service
 ):
@@ -574,6 +995,36 @@ def test_get_table_when_table_does_not_exists_then_exception_is_raised(
     assert expected_response == actual_response.value
 
 
+def test_get_table_off_the_main_thread_uses_a_resource_per_thread(
+    mock_service, mock_dynamo_service, mocker
+):
+    mock_session = mocker.patch("services.base.dynamo_service.boto3.session.Session")
+    mock_session.side_effect = lambda: mocker.MagicMock()
+    resources_by_thread = {}
+
+    def get_resources(name: str):
+        resources_by_thread[name] = [
+            mock_service.get_resource(),
+            mock_service.get_resource(),
+        ]
+        mock_service.get_table(MOCK_TABLE_NAME)
+
+    threads = [
+        threading.Thread(target=get_resources, args=(name,)) for name in ["a", "b"]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    first_resource, second_resource = resources_by_thread["a"]
+    assert first_resource is second_resource
+    assert first_resource is not resources_by_thread["b"][0]
+    assert mock_session.call_count == 2
+    assert mock_service.get_resource() is mock_dynamo_service
+    mock_dynamo_service.Table.assert_not_called()
+
+
 def test_dynamo_service_singleton_instance(mocker):
     mocker.patch("boto3.resource")
 
@@ -610,3 +1061,41 @@ def test_query_with_pagination(mock_service, mock_table):
     assert expected_result == actual
     mock_table.assert_called_with(MOCK_TABLE_NAME)
     mock_table.return_value.query.assert_has_calls(expected_calls)
+
+
+def test_iter_query_yields_items_across_pages_up_to_max_items(
+    mock_service, mock_table
+):
+    mock_table.return_value.query.side_effect = mock_scan_implementation
+
+    actual = list(
+        mock_service.iter_query(
+            table_name=MOCK_TABLE_NAME,
+            index_name="NhsNumberIndex",
+            search_key="NhsNumber",
+            search_condition=TEST_NHS_NUMBER,
+            max_items=5,
+        )
+    )
+
+    assert actual == EXPECTED_ITEMS_FOR_PAGINATED_RESULTS[:5]
+    mock_table.return_value.query.assert_called_with(
+        KeyConditionExpression=Key("NhsNumber").eq(TEST_NHS_NUMBER),
+        IndexName="NhsNumberIndex",
+        ExclusiveStartKey={"ID": "id_token_for_page_2"},
+    )
+
+
+def test_iter_query_only_queries_first_page_when_caller_stops_early(
+    mock_service, mock_table
+):
+    mock_table.return_value.query.side_effect = mock_scan_implementation
+
+    items = mock_service.iter_query(
+        table_name=MOCK_TABLE_NAME,
+        search_key="NhsNumber",
+        search_condition=TEST_NHS_NUMBER,
+    )
+
+    assert any(items)
+    mock_table.return_value.query.assert_called_once()
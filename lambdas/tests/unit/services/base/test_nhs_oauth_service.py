@@ -280,3 +280,68 @@ def test_pds_request_expired_token(mocker):
     assert actual == expected
     mock_get_parameters.assert_called_once()
     mock_new_access_token.assert_called_once()
+
+
+def test_get_active_access_token_keeps_token_in_memory(mocker):
+    time_now = 1600000000
+    mocker.patch("time.time", return_value=time_now)
+    mock_get_parameters = mocker.patch(
+        "services.base.nhs_oauth_service.NhsOauthService.get_current_access_token",
+        return_value=json.dumps(mock_pds_token_response_issued_at(time_now)),
+    )
+
+    for _ in range(3):
+        actual = nhs_oauth_service.get_active_access_token()
+
+    assert actual == "Sr5PGv19wTEHJdDr2wx2f7IGd0cw"
+    mock_get_parameters.assert_called_once()
+
+
+def test_get_active_access_token_stores_new_token_once(mocker):
+    time_now = 1700000000
+    mocker.patch("time.time", return_value=time_now)
+    new_mock_access_token_response = {
+        **mock_pds_token_response_issued_at(time_now),
+        "access_token": "mock_access_token",
+    }
+    mocker.patch(
+        "services.base.nhs_oauth_service.NhsOauthService.get_current_access_token",
+        return_value=json.dumps(RESPONSE_TOKEN),
+    )
+    mock_new_access_token = mocker.patch(
+        "services.base.nhs_oauth_service.NhsOauthService.get_new_access_token_response",
+        return_value=new_mock_access_token_response,
+    )
+    mock_update_ssm = mocker.patch(
+        "services.base.nhs_oauth_service.NhsOauthService.update_access_token_ssm"
+    )
+
+    nhs_oauth_service.get_active_access_token()
+    actual = nhs_oauth_service.get_active_access_token()
+
+    assert actual == "mock_access_token"
+    mock_new_access_token.assert_called_once()
+    mock_update_ssm.assert_called_once_with(json.dumps(new_mock_access_token_response))
+
+
+def test_invalidate_access_token_reloads_rotated_token_from_ssm(mocker):
+    time_now = 1600000000
+    mocker.patch("time.time", return_value=time_now)
+    rotated_token_response = {
+        **mock_pds_token_response_issued_at(time_now),
+        "access_token": "rotated_access_token",
+    }
+    mock_get_parameters = mocker.patch(
+        "services.base.nhs_oauth_service.NhsOauthService.get_current_access_token",
+        side_effect=[
+            json.dumps(mock_pds_token_response_issued_at(time_now)),
+            json.dumps(rotated_token_response),
+        ],
+    )
+
+    rejected_token = nhs_oauth_service.get_active_access_token()
+    nhs_oauth_service.invalidate_access_token(rejected_token)
+    actual = nhs_oauth_service.get_active_access_token()
+
+    assert actual == "rotated_access_token"
+    assert mock_get_parameters.call_count == 2
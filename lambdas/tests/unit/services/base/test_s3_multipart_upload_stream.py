@@ -0,0 +1,151 @@
+import pytest
+from services.base.s3_multipart_upload_stream import (
+    MIN_PART_SIZE_BYTES,
+    S3MultipartUploadStream,
+)
+from tests.unit.conftest import MOCK_BUCKET, MOCK_CLIENT_ERROR, TEST_FILE_KEY
+
+TEST_UPLOAD_ID = "test-upload-id"
+
+
+@pytest.fixture
+def mock_s3_service(mocker):
+    service = mocker.MagicMock()
+    service.create_multipart_upload.return_value = TEST_UPLOAD_ID
+    service.upload_part.side_effect = (
+        lambda part_number, **kwargs: f"etag-{part_number}"
+    )
+    return service
+
+
+@pytest.fixture
+def upload_stream(mock_s3_service):
+    return S3MultipartUploadStream(
+        s3_service=mock_s3_service,
+        s3_bucket_name=MOCK_BUCKET,
+        file_key=TEST_FILE_KEY,
+        extra_args={"ContentType": "application/pdf"},
+    )
+
+
+def test_part_size_is_never_below_s3_minimum(mock_s3_service):
+    stream = S3MultipartUploadStream(
+        mock_s3_service, MOCK_BUCKET, TEST_FILE_KEY, part_size=1
+    )
+
+    assert stream.part_size == MIN_PART_SIZE_BYTES
+
+
+def test_small_output_is_uploaded_without_multipart_upload(
+    upload_stream, mock_s3_service
+):
+    with upload_stream:
+        upload_stream.write(b"small file")
+
+    assert upload_stream.bytes_written == len(b"small file")
+    mock_s3_service.create_multipart_upload.assert_not_called()
+    mock_s3_service.upload_file_obj.assert_called_once()
+    upload_kwargs = mock_s3_service.upload_file_obj.call_args.kwargs
+    assert upload_kwargs["file_obj"].getvalue() == b"small file"
+    assert upload_kwargs["extra_args"] == {"ContentType": "application/pdf"}
+
+
+def test_full_parts_are_uploaded_as_they_are_written(upload_stream, mock_s3_service):
+    with upload_stream:
+        upload_stream.write(b"a" * (MIN_PART_SIZE_BYTES - 1))
+        mock_s3_service.upload_part.assert_not_called()
+
+        upload_stream.write(b"b" * (MIN_PART_SIZE_BYTES + 1))
+        assert mock_s3_service.upload_part.call_count == 2
+        assert len(upload_stream.buffer) == 0
+
+        upload_stream.write(b"c")
+
+    assert upload_stream.bytes_written == 2 * MIN_PART_SIZE_BYTES + 1
+    assert mock_s3_service.upload_part.call_count == 3
+    mock_s3_service.create_multipart_upload.assert_called_once_with(
+        s3_bucket_name=MOCK_BUCKET,
+        file_key=TEST_FILE_KEY,
+        extra_args={"ContentType": "application/pdf"},
+    )
+    mock_s3_service.complete_multipart_upload.assert_called_once_with(
+        s3_bucket_name=MOCK_BUCKET,
+        file_key=TEST_FILE_KEY,
+        upload_id=TEST_UPLOAD_ID,
+        parts=[
+            {"ETag": "etag-1", "PartNumber": 1},
+            {"ETag": "etag-2", "PartNumber": 2},
+            {"ETag": "etag-3", "PartNumber": 3},
+        ],
+    )
+    mock_s3_service.upload_file_obj.assert_not_called()
+
+
+def test_upload_is_aborted_when_writing_fails(upload_stream, mock_s3_service):
+    with pytest.raises(ValueError):
+        with upload_stream:
+            upload_stream.write(b"a" * MIN_PART_SIZE_BYTES)
+            raise ValueError("failed to produce output")
+
+    mock_s3_service.abort_multipart_upload.assert_called_once_with(
+        s3_bucket_name=MOCK_BUCKET, file_key=TEST_FILE_KEY, upload_id=TEST_UPLOAD_ID
+    )
+    mock_s3_service.complete_multipart_upload.assert_not_called()
+    assert upload_stream.closed
+
+
+def test_upload_is_aborted_when_completing_fails(upload_stream, mock_s3_service):
+    mock_s3_service.complete_multipart_upload.side_effect = MOCK_CLIENT_ERROR
+
+    with pytest.raises(type(MOCK_CLIENT_ERROR)):
+        with upload_stream:
+            upload_stream.write(b"a" * MIN_PART_SIZE_BYTES)
+
+    mock_s3_service.abort_multipart_upload.assert_called_once()
+
+
+def test_abort_without_started_upload_does_not_call_s3(upload_stream, mock_s3_service):
+    with pytest.raises(ValueError):
+        with upload_stream:
+            upload_stream.write(b"small")
+            raise ValueError("failed to produce output")
+
+    mock_s3_service.abort_multipart_upload.assert_not_called()
+    mock_s3_service.upload_file_obj.assert_not_called()
+
+
+def test_in_flight_parts_are_uploaded_in_background_and_completed_in_order(
+    mock_s3_service,
+):
+    upload_stream = S3MultipartUploadStream(
+        mock_s3_service, MOCK_BUCKET, TEST_FILE_KEY, max_in_flight_parts=3
+    )
+
+    with upload_stream:
+        for _ in range(5):
+            upload_stream.write(b"a" * MIN_PART_SIZE_BYTES)
+        assert len(upload_stream.in_flight_parts) <= 3
+
+    assert mock_s3_service.upload_part.call_count == 5
+    complete_kwargs = mock_s3_service.complete_multipart_upload.call_args.kwargs
+    assert complete_kwargs["parts"] == [
+        {"ETag": f"etag-{part_number}", "PartNumber": part_number}
+        for part_number in range(1, 6)
+    ]
+
+
+def test_failed_in_flight_part_aborts_upload(mock_s3_service):
+    mock_s3_service.upload_part.side_effect = MOCK_CLIENT_ERROR
+    upload_stream = S3MultipartUploadStream(
+        mock_s3_service, MOCK_BUCKET, TEST_FILE_KEY, max_in_flight_parts=2
+    )
+
+    with pytest.raises(type(MOCK_CLIENT_ERROR)):
+        with upload_stream:
+            for _ in range(3):
+                upload_stream.write(b"a" * MIN_PART_SIZE_BYTES)
+
+    mock_s3_service.complete_multipart_upload.assert_not_called()
+    mock_s3_service.abort_multipart_upload.assert_called_once_with(
+        s3_bucket_name=MOCK_BUCKET, file_key=TEST_FILE_KEY, upload_id=TEST_UPLOAD_ID
+    )
@@ -2,9 +2,14 @@ import datetime
 from io import BytesIO
 
 import pytest
-from botocore.exceptions import ClientError
+from botocore.exceptions import ClientError, EndpointConnectionError, ReadTimeoutError
 from freezegun import freeze_time
-from services.base.s3_service import S3Service
+from services.base.s3_service import (
+    DELETE_OBJECTS_MAX_KEYS,
+    MULTIPART_COPY_PART_SIZE,
+    MULTIPART_COPY_THRESHOLD,
+    S3Service,
+)
 from tests.unit.conftest import (
     MOCK_BUCKET,
     MOCK_CLIENT_ERROR,
@@ -119,6 +124,24 @@ def test_upload_file_with_extra_args(mock_service, mock_client):
     )
 
 
+def test_delete_objects_deletes_keys_in_batches_and_returns_errors(
+    mock_service, mock_client
+):
+    file_keys = [f"{TEST_NHS_NUMBER}/{index}" for index in range(1500)]
+    error = {"Key": file_keys[0], "Code": "AccessDenied", "Message": "Access Denied"}
+    mock_client.delete_objects.side_effect = [{"Errors": [error]}, {"Deleted": []}]
+
+    actual = mock_service.delete_objects(MOCK_BUCKET, file_keys)
+
+    assert actual == [error]
+    assert mock_client.delete_objects.call_count == 2
+    first_call, second_call = mock_client.delete_objects.call_args_list
+    assert first_call.kwargs["Bucket"] == MOCK_BUCKET
+    assert first_call.kwargs["Delete"]["Quiet"] is True
+    assert len(first_call.kwargs["Delete"]["Objects"]) == DELETE_OBJECTS_MAX_KEYS
+    assert second_call.kwargs["Delete"]["Objects"][-1] == {"Key": file_keys[-1]}
+
+
 def test_copy_across_bucket(mock_service, mock_client):
     mock_service.copy_across_bucket(
         source_bucket="bucket_to_copy_from",
@@ -135,6 +158,132 @@ def test_copy_across_bucket(mock_service, mock_client):
     )
 
 
+def test_copy_across_bucket_replaces_metadata_and_tags_in_same_request(
+    mock_service, mock_client
+):
+    mock_client.head_object.return_value = {"ContentType": "application/pdf"}
+
+    mock_service.copy_across_bucket(
+        source_bucket="bucket_to_copy_from",
+        source_file_key=TEST_FILE_KEY,
+        dest_bucket="bucket_to_copy_to",
+        dest_file_key=TEST_FILE_KEY,
+        file_size=MULTIPART_COPY_THRESHOLD,
+        metadata={"nhs-number": TEST_NHS_NUMBER},
+        tags={"scan-result": "Clean"},
+    )
+
+    mock_client.copy_object.assert_called_once_with(
+        Bucket="bucket_to_copy_to",
+        Key=TEST_FILE_KEY,
+        CopySource={"Bucket": "bucket_to_copy_from", "Key": TEST_FILE_KEY},
+        StorageClass="INTELLIGENT_TIERING",
+        Metadata={"nhs-number": TEST_NHS_NUMBER},
+        MetadataDirective="REPLACE",
+        ContentType="application/pdf",
+        Tagging="scan-result=Clean",
+        TaggingDirective="REPLACE",
+    )
+    mock_client.upload_part_copy.assert_not_called()
+
+
+def test_copy_across_bucket_keeps_content_type_when_metadata_is_not_replaced(
+    mock_service, mock_client
+):
+    mock_service.copy_across_bucket(
+        source_bucket="bucket_to_copy_from",
+        source_file_key=TEST_FILE_KEY,
+        dest_bucket="bucket_to_copy_to",
+        dest_file_key=TEST_FILE_KEY,
+    )
+
+    mock_client.head_object.assert_not_called()
+    assert "ContentType" not in mock_client.copy_object.call_args.kwargs
+
+
+def test_copy_across_bucket_copies_large_files_in_parts(mock_service, mock_client):
+    file_size = MULTIPART_COPY_THRESHOLD + 1
+    mock_client.head_object.return_value = {
+        "ContentType": "application/pdf",
+        "Metadata": {"nhs-number": TEST_NHS_NUMBER},
+    }
+    mock_client.get_object_tagging.return_value = {
+        "TagSet": [{"Key": "scan-result", "Value": "Clean"}]
+    }
+    mock_client.create_multipart_upload.return_value = {"UploadId": "upload_id"}
+    mock_client.upload_part_copy.side_effect = lambda **kwargs: {
+        "CopyPartResult": {"ETag": f"etag-{kwargs['PartNumber']}"}
+    }
+
+    mock_service.copy_across_bucket(
+        source_bucket="bucket_to_copy_from",
+        source_file_key=TEST_FILE_KEY,
+        dest_bucket="bucket_to_copy_to",
+        dest_file_key=TEST_FILE_KEY,
+        file_size=file_size,
+    )
+
+    mock_client.copy_object.assert_not_called()
+    mock_client.create_multipart_upload.assert_called_once_with(
+        Bucket="bucket_to_copy_to",
+        Key=TEST_FILE_KEY,
+        StorageClass="INTELLIGENT_TIERING",
+        Metadata={"nhs-number": TEST_NHS_NUMBER},
+        ContentType="application/pdf",
+        Tagging="scan-result=Clean",
+    )
+    expected_ranges = [
+        f"bytes={start}-{min(start + MULTIPART_COPY_PART_SIZE, file_size) - 1}"
+        for start in range(0, file_size, MULTIPART_COPY_PART_SIZE)
+    ]
+    assert [
+        call.kwargs["CopySourceRange"]
+        for call in mock_client.upload_part_copy.call_args_list
+    ] == expected_ranges
+    mock_client.complete_multipart_upload.assert_called_once_with(
+        Bucket="bucket_to_copy_to",
+        Key=TEST_FILE_KEY,
+        UploadId="upload_id",
+        MultipartUpload={
+            "Parts": [
+                {"ETag": f"etag-{part_number}", "PartNumber": part_number}
+                for part_number in range(1, len(expected_ranges) + 1)
+            ]
+        },
+    )
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        MOCK_CLIENT_ERROR,
+        EndpointConnectionError(endpoint_url="https://s3.amazonaws.com"),
+        ReadTimeoutError(endpoint_url="https://s3.amazonaws.com"),
+    ],
+)
+def test_copy_across_bucket_aborts_multipart_copy_on_failure(
+    mock_service, mock_client, error
+):
+    mock_client.create_multipart_upload.return_value = {"UploadId": "upload_id"}
+    mock_client.upload_part_copy.side_effect = error
+
+    with pytest.raises(type(error)):
+        mock_service.copy_across_bucket(
+            source_bucket="bucket_to_copy_from",
+            source_file_key=TEST_FILE_KEY,
+            dest_bucket="bucket_to_copy_to",
+            dest_file_key=TEST_FILE_KEY,
+            file_size=MULTIPART_COPY_THRESHOLD + 1,
+            metadata={},
+            tags={},
+        )
+
+    mock_client.abort_multipart_upload.assert_called_once_with(
+        Bucket="bucket_to_copy_to", Key=TEST_FILE_KEY, UploadId="upload_id"
+    )
+    mock_client.complete_multipart_upload.assert_not_called()
+
+
 def test_delete_object(mock_service, mock_client):
     mock_service.delete_object(s3_bucket_name=MOCK_BUCKET, file_key=TEST_FILE_NAME)
 
@@ -344,6 +493,18 @@ def test_list_all_objects_return_a_list_of_file_details(
     mock_list_objects_paginate.assert_called_with(Bucket=MOCK_BUCKET)
 
 
+def test_list_all_objects_with_prefix_only_lists_objects_under_prefix(
+    mock_service, mock_client, mock_list_objects_paginate
+):
+    mock_list_objects_paginate.return_value = [MOCK_LIST_OBJECTS_RESPONSE]
+
+    mock_service.list_all_objects(MOCK_BUCKET, prefix="9000000009/")
+
+    mock_list_objects_paginate.assert_called_with(
+        Bucket=MOCK_BUCKET, Prefix="9000000009/"
+    )
+
+
 def test_list_all_objects_handles_paginated_responses(
     mock_service, mock_client, mock_list_objects_paginate
 ):
@@ -372,6 +533,25 @@ def test_list_all_objects_raises_client_error_if_unexpected_response(
         mock_service.list_all_objects(MOCK_BUCKET)
 
 
+def test_list_object_sizes_returns_size_of_each_listed_object(
+    mock_service, mock_client
+):
+    mock_client.list_objects_v2.return_value = MOCK_LIST_OBJECTS_RESPONSE
+    expected = {
+        listed_object["Key"]: listed_object["Size"]
+        for listed_object in MOCK_LIST_OBJECTS_RESPONSE["Contents"]
+    }
+
+    actual = mock_service.list_object_sizes(
+        MOCK_BUCKET, prefix="9000000009/", start_after="9000000009/1"
+    )
+
+    assert actual == expected
+    mock_client.list_objects_v2.assert_called_once_with(
+        Bucket=MOCK_BUCKET, Prefix="9000000009/", StartAfter="9000000009/1"
+    )
+
+
 def test_file_size_return_int(mock_service, mock_client):
     mock_response = {
         "ResponseMetadata": {
@@ -485,3 +665,60 @@ def test_stream_s3_object_to_memory(mock_service, mock_client, mocker):
     result = mock_service.stream_s3_object_to_memory(MOCK_BUCKET, TEST_FILE_KEY)
 
     assert result.getvalue() == b"first-chunksecond-chunk"
+
+
+def test_create_multipart_upload_returns_upload_id(mock_service, mock_client):
+    mock_client.create_multipart_upload.return_value = {"UploadId": "test-upload-id"}
+
+    actual = mock_service.create_multipart_upload(
+        MOCK_BUCKET, TEST_FILE_KEY, extra_args={"ContentType": "application/pdf"}
+    )
+
+    assert actual == "test-upload-id"
+    mock_client.create_multipart_upload.assert_called_once_with(
+        Bucket=MOCK_BUCKET, Key=TEST_FILE_KEY, ContentType="application/pdf"
+    )
+
+
+def test_upload_part_returns_etag(mock_service, mock_client):
+    mock_client.upload_part.return_value = {"ETag": '"test-etag"'}
+
+    actual = mock_service.upload_part(
+        s3_bucket_name=MOCK_BUCKET,
+        file_key=TEST_FILE_KEY,
+        upload_id="test-upload-id",
+        part_number=1,
+        body=b"test",
+    )
+
+    assert actual == '"test-etag"'
+    mock_client.upload_part.assert_called_once_with(
+        Bucket=MOCK_BUCKET,
+        Key=TEST_FILE_KEY,
+        UploadId="test-upload-id",
+        PartNumber=1,
+        Body=b"test",
+    )
+
+
+def test_complete_multipart_upload(mock_service, mock_client):
+    parts = [{"ETag": '"test-etag"', "PartNumber": 1}]
+
+    mock_service.complete_multipart_upload(
+        MOCK_BUCKET, TEST_FILE_KEY, "test-upload-id", parts
+    )
+
+    mock_client.complete_multipart_upload.assert_called_once_with(
+        Bucket=MOCK_BUCKET,
+        Key=TEST_FILE_KEY,
+        UploadId="test-upload-id",
+        MultipartUpload={"Parts": parts},
+    )
+
+
+def test_abort_multipart_upload(mock_service, mock_client):
+    mock_service.abort_multipart_upload(MOCK_BUCKET, TEST_FILE_KEY, "test-upload-id")
+
+    mock_client.abort_multipart_upload.assert_called_once_with(
+        Bucket=MOCK_BUCKET, Key=TEST_FILE_KEY, UploadId="test-upload-id"
+    )
@@ -79,3 +79,94 @@ def test_send_message_batch_standard_success(set_env, mocked_sqs_client, service
     args = mocked_sqs_client.send_message_batch.call_args[1]
     assert args["QueueUrl"] == queue_url
     assert len(args["Entries"]) == 2
+
+
+def build_fifo_entry(message_body: str) -> dict:
+    return {
+        "MessageBody": message_body,
+        "MessageGroupId": "test_group_id",
+        "MessageDeduplicationId": f"dedup_{message_body}",
+        "MessageAttributes": {
+            "NhsNumber": {"DataType": "String", "StringValue": TEST_NHS_NUMBER}
+        },
+    }
+
+
+def test_send_message_batch_fifo_sends_at_most_ten_entries_per_batch(
+    set_env, mocked_sqs_client, service
+):
+    mocked_sqs_client.send_message_batch.return_value = {"Successful": []}
+    entries = [build_fifo_entry(str(index)) for index in range(25)]
+
+    failed = service.send_message_batch_fifo(
+        queue_url=MOCK_LG_METADATA_SQS_QUEUE, entries=entries, max_concurrent_batches=3
+    )
+
+    assert failed == []
+    sent_entries = [
+        call.kwargs["Entries"]
+        for call in mocked_sqs_client.send_message_batch.call_args_list
+    ]
+    assert sorted(len(batch) for batch in sent_entries) == [5, 10, 10]
+    assert sorted(
+        (entry for batch in sent_entries for entry in batch),
+        key=lambda entry: int(entry["MessageBody"]),
+    ) == [{"Id": str(index % 10), **entry} for index, entry in enumerate(entries)]
+
+
+def test_send_message_batch_fifo_splits_batches_by_payload_size(
+    set_env, mocked_sqs_client, service
+):
+    mocked_sqs_client.send_message_batch.return_value = {"Successful": []}
+    entries = [build_fifo_entry("a" * 100 * 1024) for _ in range(3)]
+
+    service.send_message_batch_fifo(
+        queue_url=MOCK_LG_METADATA_SQS_QUEUE, entries=entries
+    )
+
+    assert [
+        len(call.kwargs["Entries"])
+        for call in mocked_sqs_client.send_message_batch.call_args_list
+    ] == [2, 1]
+
+
+def test_send_message_batch_fifo_retries_failed_entries(
+    set_env, mocker, mocked_sqs_client, service
+):
+    mocker.patch("services.base.sqs_service.time.sleep")
+    mocked_sqs_client.send_message_batch.side_effect = [
+        {
+            "Failed": [
+                {"Id": "1", "SenderFault": False, "Code": "InternalError"},
+                {"Id": "2", "SenderFault": True, "Code": "InvalidParameterValue"},
+            ]
+        },
+        {"Successful": [{"Id": "1"}]},
+    ]
+    entries = [build_fifo_entry(str(index)) for index in range(3)]
+
+    failed = service.send_message_batch_fifo(
+        queue_url=MOCK_LG_METADATA_SQS_QUEUE, entries=entries
+    )
+
+    assert failed == [entries[2]]
+    mocked_sqs_client.send_message_batch.assert_called_with(
+        QueueUrl=MOCK_LG_METADATA_SQS_QUEUE, Entries=[{"Id": "1", **entries[1]}]
+    )
+
+
+def test_send_message_batch_fifo_returns_entries_that_keep_failing(
+    set_env, mocker, mocked_sqs_client, service
+):
+    mocker.patch("services.base.sqs_service.time.sleep")
+    mocked_sqs_client.send_message_batch.return_value = {
+        "Failed": [{"Id": "0", "SenderFault": False, "Code": "InternalError"}]
+    }
+    entries = [build_fifo_entry("0")]
+
+    failed = service.send_message_batch_fifo(
+        queue_url=MOCK_LG_METADATA_SQS_QUEUE, entries=entries
+    )
+
+    assert failed == entries
+    assert mocked_sqs_client.send_message_batch.call_count == 3
@@ -1,5 +1,7 @@
 from datetime import datetime
 
+import pytest
+from enums.pds_ssm_parameters import SSMParameter
 from services.base.ssm_service import SSMService
 
 MOCK_SSM_PARAMETERS_RESPONSE = {
@@ -89,3 +91,123 @@ def test_update_ssm_parameter(mocker):
         Type="SecureString",
         Overwrite=True,
     )
+
+
+def build_parameters_response(parameters: dict) -> dict:
+    return {
+        "Parameters": [
+            {"Name": name, "Value": value} for name, value in parameters.items()
+        ]
+    }
+
+
+@pytest.fixture
+def mock_service(mocker):
+    mocker.patch("boto3.client")
+    service = SSMService()
+    mocker.patch.object(service, "client")
+    service.client.get_parameter.return_value = MOCK_SSM_PARAMETER_RESPONSE
+    yield service
+
+
+@pytest.fixture
+def mock_clock(mocker):
+    clock = {"now": 1000.0}
+    mocker.patch("utils.ttl_cache.time.monotonic", side_effect=lambda: clock["now"])
+    yield clock
+
+
+def test_get_ssm_parameter_is_cached_across_instances(mock_service, mocker):
+    first = mock_service.get_ssm_parameter("ssm_parameter_key")
+    second = SSMService().get_ssm_parameter("ssm_parameter_key")
+
+    assert first == second == "string"
+    mock_service.client.get_parameter.assert_called_once()
+
+
+def test_get_ssm_parameter_without_cache_always_calls_ssm(mock_service):
+    mock_service.get_ssm_parameter("ssm_parameter_key")
+    mock_service.get_ssm_parameter("ssm_parameter_key", use_cache=False)
+
+    assert mock_service.client.get_parameter.call_count == 2
+
+
+def test_get_ssm_parameter_caches_decrypted_values_separately(mock_service):
+    mock_service.get_ssm_parameter("ssm_parameter_key")
+    mock_service.get_ssm_parameter("ssm_parameter_key", with_decryption=True)
+
+    assert mock_service.client.get_parameter.call_count == 2
+
+
+def test_get_ssm_parameter_expires_access_tokens_sooner(mock_service, mock_clock):
+    access_token_key = SSMParameter.VIRUS_API_ACCESS_TOKEN.value
+    mock_service.client.get_parameters.return_value = build_parameters_response(
+        {
+            SSMParameter.VIRUS_API_USER.value: "user",
+            SSMParameter.VIRUS_API_PASSWORD.value: "password",
+            SSMParameter.VIRUS_API_BASE_URL.value: "url",
+            access_token_key: "token",
+        }
+    )
+    mock_service.get_ssm_parameter(access_token_key)
+
+    mock_clock["now"] += 61
+    mock_service.get_ssm_parameter(SSMParameter.VIRUS_API_USER.value)
+    mock_service.get_ssm_parameter(access_token_key)
+
+    assert mock_service.client.get_parameters.call_count == 2
+    assert mock_service.client.get_parameters.call_args.kwargs["Names"] == [
+        access_token_key
+    ]
+
+
+def test_get_ssm_parameter_fetches_its_group_in_one_call(mock_service):
+    endpoint_key = SSMParameter.PDS_API_ENDPOINT.value
+    access_token_key = SSMParameter.PDS_API_ACCESS_TOKEN.value
+    mock_service.client.get_parameters.return_value = build_parameters_response(
+        {endpoint_key: "endpoint", access_token_key: "token"}
+    )
+
+    assert mock_service.get_ssm_parameter(endpoint_key, True) == "endpoint"
+    assert mock_service.get_ssm_parameter(access_token_key, True) == "token"
+
+    mock_service.client.get_parameters.assert_called_once_with(
+        Names=[endpoint_key, access_token_key], WithDecryption=True
+    )
+    mock_service.client.get_parameter.assert_not_called()
+
+
+def test_get_ssm_parameter_falls_back_when_group_fetch_misses_the_key(mock_service):
+    mock_service.client.get_parameters.return_value = {"Parameters": []}
+
+    actual = mock_service.get_ssm_parameter(SSMParameter.PDS_API_ENDPOINT.value)
+
+    assert actual == "string"
+    mock_service.client.get_parameter.assert_called_once_with(
+        Name=SSMParameter.PDS_API_ENDPOINT.value, WithDecryption=False
+    )
+
+
+def test_get_ssm_parameters_only_fetches_uncached_keys_in_batches(mock_service):
+    parameters = {f"key_{index}": f"value_{index}" for index in range(12)}
+    mock_service.client.get_parameters.side_effect = lambda Names, **_: (
+        build_parameters_response({name: parameters[name] for name in Names})
+    )
+    mock_service.get_ssm_parameters(["key_0", "key_1"])
+
+    actual = mock_service.get_ssm_parameters(list(parameters))
+
+    assert actual == parameters
+    assert [
+        len(call.kwargs["Names"])
+        for call in mock_service.client.get_parameters.call_args_list[1:]
+    ] == [10]
+
+
+def test_update_ssm_parameter_invalidates_cached_value(mock_service):
+    mock_service.get_ssm_parameter("ssm_parameter_key")
+
+    mock_service.update_ssm_parameter("ssm_parameter_key", "new_value", "String")
+    mock_service.get_ssm_parameter("ssm_parameter_key")
+
+    assert mock_service.client.get_parameter.call_count == 2
@@ -9,7 +9,7 @@ from models.staging_metadata import METADATA_FILENAME
 from services.bulk_upload.metadata_general_preprocessor import (
     MetadataGeneralPreprocessor,
 )
-from tests.unit.conftest import TEST_BASE_DIRECTORY
+from tests.unit.conftest import MOCK_NO_SUCH_KEY_ERROR, TEST_BASE_DIRECTORY
 from utils.exceptions import InvalidFileNameException
 
 
@@ -221,6 +221,51 @@ def test_validate_record_filename_invalid_digit_count(mocker, test_service, capl
     assert str(exc_info.value) == "Incorrect NHS number or date format"
 
 
+def test_validate_metadata_row_uses_combined_expression_for_valid_file_names(
+    mocker, test_service
+):
+    mock_validate_record_filename = mocker.patch.object(
+        test_service, "validate_record_filename"
+    )
+    metadata_row = {
+        "FILEPATH": "/9000000009/01of02_Lloyd_George_Record_[Joe Bloggs]_[9000000009]_[25-12-2019].pdf",
+        "NHS-NO": "9000000009",
+    }
+
+    result = test_service.validate_metadata_row(metadata_row)
+
+    assert result == (
+        "/9000000009/1of2_Lloyd_George_Record_[Joe Bloggs]_[9000000009]_[25-12-2019].pdf",
+        None,
+    )
+    mock_validate_record_filename.assert_not_called()
+
+
+def test_validate_metadata_row_falls_back_to_validate_record_filename(test_service):
+    metadata_row = {
+        "FILEPATH": "folder/01 of 02_Lloyd_George_Record_Joe Bloggs_9000000009_25.12.2019.pdf",
+        "NHS-NO": "9000000009",
+    }
+
+    result = test_service.validate_metadata_row(metadata_row)
+
+    assert result == (
+        "folder/1of2_Lloyd_George_Record_[Joe Bloggs]_[9000000009]_[25-12-2019].pdf",
+        None,
+    )
+
+
+def test_validate_metadata_row_returns_rejection_reason(test_service):
+    metadata_row = {
+        "FILEPATH": "01 of 02_Lloyd_George_Record_[John Doe]_[12345]_[01-01-2000].pdf",
+        "NHS-NO": "9000000009",
+    }
+
+    result = test_service.validate_metadata_row(metadata_row)
+
+    assert result == (None, "Incorrect NHS number or date format")
+
+
 @freeze_time("2025-01-01T12:00:00")
 def test_process_metadata_file_exists(
     test_service,
@@ -255,6 +300,8 @@ def test_process_metadata_file_exists(
     )
 
     mock_s3_service.file_exist_on_s3.return_value = True
+    mock_s3_service.get_object_stream.side_effect = MOCK_NO_SUCH_KEY_ERROR
+    mock_s3_service.delete_objects.return_value = []
     mock_s3_service.client.get_object.side_effect = (
         lambda Bucket, Key: mock_metadata_file_get_object(
             test_preprocessed_metadata_file, Bucket, Key
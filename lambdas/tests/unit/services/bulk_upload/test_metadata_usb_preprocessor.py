@@ -8,7 +8,7 @@ from models.staging_metadata import NHS_NUMBER_FIELD_NAME
 from services.bulk_upload.metadata_usb_preprocessor import (
     MetadataUsbPreprocessorService,
 )
-from tests.unit.conftest import TEST_BASE_DIRECTORY
+from tests.unit.conftest import MOCK_NO_SUCH_KEY_ERROR, TEST_BASE_DIRECTORY
 from utils.exceptions import InvalidFileNameException
 
 
@@ -269,6 +269,10 @@ def test_process_metadata_file_e2e(
     )
 
     mock_s3_client.file_exist_on_s3.return_value = True
+    usb_preprocessor_service.s3_service.get_object_stream.side_effect = (
+        MOCK_NO_SUCH_KEY_ERROR
+    )
+    usb_preprocessor_service.s3_service.delete_objects.return_value = []
     mock_s3_client.get_object.side_effect = (
         lambda Bucket, Key: mock_metadata_file_get_object(
             test_preprocessed_metadata_file, Bucket, Key
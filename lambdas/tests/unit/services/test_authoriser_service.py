@@ -1,6 +1,7 @@
 import pytest
 from enums.repository_role import RepositoryRole
 from services.authoriser_service import AuthoriserService
+from services.manage_user_session_access import session_cache
 from utils.exceptions import AuthorisationException
 
 MOCK_METHOD_ARN_PREFIX = "arn:aws:execute-api:eu-west-2:74747474747474:<<restApiId>/dev"
@@ -394,3 +395,55 @@ def test_validate_login_session(mocker, mock_auth_service: AuthoriserService):
         mock_auth_service.validate_login_session(session_expiry_time=3400000)
     except AuthorisationException:
         assert False, "test"
+
+
+def test_auth_request_reads_session_from_table_when_patient_not_in_cached_session(
+    mocker, mock_jwt_decode, mock_auth_service: AuthoriserService
+):
+    find_login_session = (
+        mock_auth_service.manage_user_session_service.find_login_session
+    )
+    find_login_session.side_effect = [
+        MOCK_CURRENT_SESSION,
+        {**MOCK_CURRENT_SESSION, "AllowedNHSNumbers": "12,34,12,534,9000000009"},
+    ]
+    mocker.patch("services.authoriser_service.AuthoriserService.validate_login_session")
+
+    response = mock_auth_service.auth_request(
+        "/DocumentManifest", "test public key", "valid_gp_admin_token", "9000000009"
+    )
+
+    assert response
+    find_login_session.assert_has_calls(
+        [
+            mocker.call(MOCK_SESSION_ID, use_cache=True),
+            mocker.call(MOCK_SESSION_ID),
+        ]
+    )
+
+
+def test_auth_request_uses_cached_session_when_patient_is_allowed(
+    mocker, mock_jwt_decode, mock_auth_service: AuthoriserService
+):
+    find_login_session = (
+        mock_auth_service.manage_user_session_service.find_login_session
+    )
+    find_login_session.return_value = MOCK_CURRENT_SESSION
+    mocker.patch("services.authoriser_service.AuthoriserService.validate_login_session")
+
+    response = mock_auth_service.auth_request(
+        "/DocumentManifest", "test public key", "valid_gp_admin_token", "34"
+    )
+
+    assert response
+    find_login_session.assert_called_once_with(MOCK_SESSION_ID, use_cache=True)
+
+
+def test_log_cache_metrics_logs_session_and_public_key_hit_rates(caplog):
+    session_cache.put(MOCK_SESSION_ID, MOCK_CURRENT_SESSION)
+    session_cache.get(MOCK_SESSION_ID)
+    session_cache.get("unknown_session_id")
+
+    AuthoriserService.log_cache_metrics()
+
+    assert "Authoriser cache hit rates: sessions 50%, public key 0%" in caplog.text
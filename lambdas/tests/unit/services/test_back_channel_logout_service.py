@@ -2,6 +2,7 @@ import pytest
 from boto3.dynamodb.conditions import Attr
 from botocore.exceptions import ClientError
 from services.back_channel_logout_service import BackChannelLogoutService
+from services.manage_user_session_access import session_cache
 from utils.exceptions import AuthorisationException, LogoutFailureException
 
 
@@ -45,6 +46,16 @@ def test_remove_session_from_dynamo_db(mock_back_channel_logout_service, mock_dy
     )
 
 
+def test_remove_session_from_dynamo_db_invalidates_cached_session(
+    mock_back_channel_logout_service, mock_dynamo
+):
+    session_cache.put("session_id_test", {"NDRSessionId": "session_id_test"})
+
+    mock_back_channel_logout_service.remove_session_from_dynamo_db("session_id_test")
+
+    assert session_cache.get("session_id_test") is None
+
+
 def test_finding_session_id_by_sid_return_session(
     mock_back_channel_logout_service, mock_dynamo
 ):
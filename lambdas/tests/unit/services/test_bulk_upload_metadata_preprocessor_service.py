@@ -1,15 +1,17 @@
+import json
 import os
+from io import BytesIO
 
 import pytest
 from botocore.exceptions import ClientError
 from freezegun import freeze_time
 from models.staging_metadata import METADATA_FILENAME
-from msgpack.fallback import BytesIO
 from services.bulk_upload_metadata_preprocessor_service import (
     MetadataPreprocessorService,
 )
 from tests.unit.conftest import (
     MOCK_CLIENT_ERROR,
+    MOCK_NO_SUCH_KEY_ERROR,
     MOCK_STAGING_STORE_BUCKET,
     TEST_BASE_DIRECTORY,
 )
@@ -46,6 +48,35 @@ def mock_s3_client(mocker, test_service):
     return mocker.patch.object(test_service.s3_service, "client")
 
 
+@pytest.fixture
+def mock_no_rename_checkpoint(test_service):
+    test_service.s3_service.get_object_stream.side_effect = MOCK_NO_SUCH_KEY_ERROR
+    test_service.s3_service.delete_objects.return_value = []
+
+
+@pytest.fixture
+def mock_sleep(mocker):
+    return mocker.patch("services.bulk_upload_metadata_preprocessor_service.time.sleep")
+
+
+MOCK_METADATA_ETAG = '"metadata-etag"'
+
+MOCK_SLOW_DOWN_ERROR = ClientError(
+    {
+        "Error": {"Code": "SlowDown", "Message": "Please reduce your request rate."},
+        "ResponseMetadata": {"HTTPStatusCode": 503},
+    },
+    "CopyObject",
+)
+
+
+def build_renaming_map(count: int) -> list[tuple[dict, dict]]:
+    return [
+        ({"FILEPATH": f"/old/file{index}.pdf"}, {"FILEPATH": f"/new/file{index}.pdf"})
+        for index in range(count)
+    ]
+
+
 @pytest.fixture
 def sample_metadata_row():
     return {
@@ -267,11 +298,7 @@ def test_update_record_filename_successful_update(test_service, mock_s3_client):
         },
         Key=f"{test_service.practice_directory}/new/path/file1.pdf",
     )
-
-    mock_s3_client.delete_object.assert_called_once_with(
-        Bucket=MOCK_STAGING_STORE_BUCKET,
-        Key=f"{test_service.practice_directory}/old/path/file1.pdf",
-    )
+    mock_s3_client.delete_object.assert_not_called()
 
     assert actual_updated_row == updated_row
     assert not actual_rejected_row
@@ -327,16 +354,32 @@ def test_update_record_filename_exception_on_copy(test_service, mock_s3_client):
     mock_s3_client.delete_object.assert_not_called()
 
 
-def test_update_record_filename_exception_on_delete(test_service, mock_s3_client):
+def test_update_record_filename_retries_slow_down_and_lowers_concurrency(
+    test_service, mock_s3_client, mock_sleep
+):
     original_row = {"FILEPATH": "/old/path/file1.pdf"}
     updated_row = {"FILEPATH": "/test_practice_directory/new/path/file1.pdf"}
+    mock_s3_client.copy_object.side_effect = [MOCK_SLOW_DOWN_ERROR, {}]
+    initial_concurrency = test_service.rename_limiter.concurrency
 
-    expected_rejection = {
-        "FILEPATH": "/old/path/file1.pdf",
-        "REASON": "Failed to remove old S3 filepath",
-    }
+    actual_updated_row, actual_rejected_row, actual_rejected_reason = (
+        test_service.update_record_filename(original_row, updated_row)
+    )
+
+    assert actual_updated_row == updated_row
+    assert not actual_rejected_row
+    assert mock_s3_client.copy_object.call_count == 2
+    mock_sleep.assert_called_once()
+    assert test_service.rename_limiter.throttles == 1
+    assert test_service.rename_limiter.concurrency == initial_concurrency // 2
 
-    mock_s3_client.delete_object.side_effect = MOCK_CLIENT_ERROR
+
+def test_update_record_filename_rejects_after_repeated_slow_down(
+    test_service, mock_s3_client, mock_sleep
+):
+    original_row = {"FILEPATH": "/old/path/file1.pdf"}
+    updated_row = {"FILEPATH": "/test_practice_directory/new/path/file1.pdf"}
+    mock_s3_client.copy_object.side_effect = MOCK_SLOW_DOWN_ERROR
 
     actual_updated_row, actual_rejected_row, actual_rejected_reason = (
         test_service.update_record_filename(original_row, updated_row)
@@ -344,13 +387,227 @@ def test_update_record_filename_exception_on_delete(test_service, mock_s3_client
 
     assert actual_updated_row is None
     assert actual_rejected_row == original_row
-    assert actual_rejected_reason == expected_rejection
+    assert actual_rejected_reason == {
+        "FILEPATH": "/old/path/file1.pdf",
+        "REASON": "Failed to create updated S3 filepath",
+    }
+    assert mock_s3_client.copy_object.call_count == 5
 
-    mock_s3_client.copy_object.assert_called_once()
-    mock_s3_client.delete_object.assert_called_once()
+
+def test_standardize_filenames_deletes_originals_in_one_batch(
+    test_service, mock_s3_client, mock_no_rename_checkpoint
+):
+    renaming_map = build_renaming_map(3)
+
+    result = test_service.standardize_filenames(
+        renaming_map=renaming_map, rejected_rows=[], rejected_reasons=[]
+    )
+
+    assert result == [updated_row for _, updated_row in renaming_map]
+    assert mock_s3_client.copy_object.call_count == 3
+    mock_s3_client.delete_object.assert_not_called()
+    test_service.s3_service.delete_objects.assert_called_once_with(
+        s3_bucket_name=MOCK_STAGING_STORE_BUCKET,
+        file_keys=[
+            "test_practice_directory/old/file0.pdf",
+            "test_practice_directory/old/file1.pdf",
+            "test_practice_directory/old/file2.pdf",
+        ],
+    )
 
 
-def test_update_and_standardize_filenames_success(test_service, mocker):
+def test_standardize_filenames_rejects_rows_whose_original_was_not_deleted(
+    test_service, mock_s3_client, mock_no_rename_checkpoint
+):
+    renaming_map = build_renaming_map(2)
+    test_service.s3_service.delete_objects.return_value = [
+        {
+            "Key": "test_practice_directory/old/file1.pdf",
+            "Code": "AccessDenied",
+            "Message": "Access Denied",
+        }
+    ]
+    rejected_rows = []
+    rejected_reasons = []
+
+    result = test_service.standardize_filenames(
+        renaming_map=renaming_map,
+        rejected_rows=rejected_rows,
+        rejected_reasons=rejected_reasons,
+    )
+
+    assert result == [renaming_map[0][1]]
+    assert rejected_rows == [renaming_map[1][0]]
+    assert rejected_reasons == [
+        {"FILEPATH": "/old/file1.pdf", "REASON": "Failed to remove old S3 filepath"}
+    ]
+
+
+def test_standardize_filenames_saves_checkpoint_after_each_batch(
+    test_service, mock_s3_client, mock_no_rename_checkpoint, mocker
+):
+    mocker.patch(
+        "services.bulk_upload_metadata_preprocessor_service.DELETE_OBJECTS_MAX_KEYS",
+        2,
+    )
+    mock_s3_client.copy_object.side_effect = [{}, {}, MOCK_CLIENT_ERROR]
+
+    test_service.standardize_filenames(
+        renaming_map=build_renaming_map(3), rejected_rows=[], rejected_reasons=[]
+    )
+
+    test_service.s3_service.delete_objects.assert_called_once()
+    saved_checkpoints = [
+        json.loads(call.kwargs["body"])
+        for call in test_service.s3_service.save_or_create_file.call_args_list
+    ]
+    assert saved_checkpoints == [
+        {
+            "metadata_etag": None,
+            "total_renames": 3,
+            "completed_batches": 1,
+            "rejected_reasons": [],
+        },
+        {
+            "metadata_etag": None,
+            "total_renames": 3,
+            "completed_batches": 2,
+            "rejected_reasons": [
+                {
+                    "FILEPATH": "/old/file2.pdf",
+                    "REASON": "Failed to create updated S3 filepath",
+                }
+            ],
+        },
+    ]
+    assert all(
+        call.kwargs["file_key"]
+        == "test_practice_directory/processed/rename_checkpoint.json"
+        for call in test_service.s3_service.save_or_create_file.call_args_list
+    )
+
+
+def test_standardize_filenames_skips_batches_completed_before_a_rerun(
+    test_service, mock_s3_client, mocker
+):
+    mocker.patch(
+        "services.bulk_upload_metadata_preprocessor_service.DELETE_OBJECTS_MAX_KEYS",
+        2,
+    )
+    renaming_map = build_renaming_map(3)
+    rejected_reason = {
+        "FILEPATH": "/old/file1.pdf",
+        "REASON": "File doesn't exist on S3",
+    }
+    test_service.metadata_etag = MOCK_METADATA_ETAG
+    test_service.s3_service.get_object_stream.return_value = BytesIO(
+        json.dumps(
+            {
+                "metadata_etag": MOCK_METADATA_ETAG,
+                "total_renames": 3,
+                "completed_batches": 1,
+                "rejected_reasons": [rejected_reason],
+            }
+        ).encode()
+    )
+    test_service.s3_service.delete_objects.return_value = []
+    rejected_rows = []
+    rejected_reasons = []
+
+    result = test_service.standardize_filenames(
+        renaming_map=renaming_map,
+        rejected_rows=rejected_rows,
+        rejected_reasons=rejected_reasons,
+    )
+
+    assert result == [renaming_map[0][1], renaming_map[2][1]]
+    assert rejected_rows == [renaming_map[1][0]]
+    assert rejected_reasons == [rejected_reason]
+    mock_s3_client.copy_object.assert_called_once_with(
+        Bucket=MOCK_STAGING_STORE_BUCKET,
+        CopySource={
+            "Bucket": MOCK_STAGING_STORE_BUCKET,
+            "Key": "test_practice_directory/old/file2.pdf",
+        },
+        Key="new/file2.pdf",
+    )
+    test_service.s3_service.delete_objects.assert_called_once_with(
+        s3_bucket_name=MOCK_STAGING_STORE_BUCKET,
+        file_keys=["test_practice_directory/old/file2.pdf"],
+    )
+
+
+@pytest.mark.parametrize(
+    "stored_checkpoint",
+    [
+        {"metadata_etag": MOCK_METADATA_ETAG, "total_renames": 5},
+        {"metadata_etag": '"previous-metadata-etag"', "total_renames": 2},
+        {"total_renames": 2},
+    ],
+)
+def test_standardize_filenames_ignores_checkpoint_for_different_metadata(
+    test_service, mock_s3_client, stored_checkpoint
+):
+    test_service.metadata_etag = MOCK_METADATA_ETAG
+    test_service.s3_service.get_object_stream.return_value = BytesIO(
+        json.dumps(
+            {**stored_checkpoint, "completed_batches": 1, "rejected_reasons": []}
+        ).encode()
+    )
+    test_service.s3_service.delete_objects.return_value = []
+
+    result = test_service.standardize_filenames(
+        renaming_map=build_renaming_map(2), rejected_rows=[], rejected_reasons=[]
+    )
+
+    assert len(result) == 2
+    assert mock_s3_client.copy_object.call_count == 2
+
+
+@pytest.mark.parametrize("error_code", ["NoSuchKey", "AccessDenied"])
+def test_load_rename_checkpoint_treats_missing_checkpoint_as_new_run(
+    test_service, error_code
+):
+    test_service.s3_service.get_object_stream.side_effect = ClientError(
+        {"Error": {"Code": error_code, "Message": "Missing checkpoint"}}, "GetObject"
+    )
+
+    checkpoint = test_service.load_rename_checkpoint(total_renames=2)
+
+    assert checkpoint["completed_batches"] == 0
+    assert test_service.has_rename_checkpoint is False
+
+
+def test_get_metadata_rows_from_file_records_metadata_etag(test_service):
+    test_service.s3_service.file_exist_on_s3.return_value = True
+    test_service.s3_service.client.get_object.return_value = {
+        "Body": BytesIO(b"FILEPATH\n/path/file.pdf\n"),
+        "ETag": MOCK_METADATA_ETAG,
+    }
+
+    test_service.get_metadata_rows_from_file("metadata.csv", MOCK_STAGING_STORE_BUCKET)
+
+    assert test_service.metadata_etag == MOCK_METADATA_ETAG
+
+
+def test_clear_rename_checkpoint_deletes_checkpoint_once_saved(test_service):
+    test_service.clear_rename_checkpoint()
+    test_service.s3_service.delete_object.assert_not_called()
+
+    test_service.save_rename_checkpoint(
+        {"total_renames": 1, "completed_batches": 1, "rejected_reasons": []}
+    )
+    test_service.clear_rename_checkpoint()
+
+    test_service.s3_service.delete_object.assert_called_once_with(
+        s3_bucket_name=MOCK_STAGING_STORE_BUCKET,
+        file_key="test_practice_directory/processed/rename_checkpoint.json",
+    )
+
+
+def test_update_and_standardize_filenames_success(
+    test_service, mocker, mock_no_rename_checkpoint
+):
     original_row1 = {"FILEPATH": "/path/original1.pdf"}
     updated_row1 = {"FILEPATH": "/path/updated1.pdf"}
 
@@ -375,7 +632,9 @@ def test_update_and_standardize_filenames_success(test_service, mocker):
     mock_update.assert_any_call(original_row2, updated_row2)
 
 
-def test_update_and_standardize_filenames_with_rejections(test_service, mocker):
+def test_update_and_standardize_filenames_with_rejections(
+    test_service, mocker, mock_no_rename_checkpoint
+):
     original_row1 = {"FILEPATH": "/path/original1.pdf"}
     updated_row1 = {"FILEPATH": "/path/updated1.pdf"}
     original_row2 = {"FILEPATH": "/path/original2.pdf"}
@@ -516,6 +775,36 @@ def test_generate_renaming_map_handles_empty_filename(
     ]
 
 
+def test_validate_record_filenames_returns_filename_and_reason_columns(
+    mocker, test_service
+):
+    mocker.patch.object(
+        test_service,
+        "validate_record_filename",
+        side_effect=["valid.pdf", InvalidFileNameException("Bad format")],
+    )
+    metadata_rows = [
+        {"FILEPATH": "valid.pdf"},
+        {"FILEPATH": "invalid.pdf"},
+        {"FILEPATH": ""},
+    ]
+
+    validated_filenames, rejected_reasons = test_service.validate_record_filenames(
+        metadata_rows
+    )
+
+    assert validated_filenames == ["valid.pdf", None, None]
+    assert rejected_reasons == [None, "Bad format", "Filepath is missing"]
+
+
+def test_flag_duplicate_filenames_ignores_rejected_rows(test_service):
+    validated_filenames = ["a.pdf", None, "b.pdf", "a.pdf", None]
+
+    result = test_service.flag_duplicate_filenames(validated_filenames)
+
+    assert result == [False, False, False, True, False]
+
+
 def test_update_date_in_row(test_service):
     metadata_row = {"SCAN-DATE": "2025.01.01", "UPLOAD": "2025.01.01"}
 
@@ -1,5 +1,4 @@
-import tempfile
-from unittest.mock import call
+from io import BytesIO
 
 import pytest
 from botocore.exceptions import ClientError
@@ -17,6 +16,7 @@ from tests.unit.helpers.data.bulk_upload.test_data import (
     MOCK_METADATA,
 )
 from utils.exceptions import BulkUploadMetadataException
+from utils.file_utils import stream_csv_rows
 
 METADATA_FILE_DIR = "tests/unit/helpers/data/bulk_upload"
 MOCK_METADATA_CSV = f"{METADATA_FILE_DIR}/metadata.csv"
@@ -28,7 +28,16 @@ MOCK_INVALID_METADATA_CSV_FILES = [
     f"{METADATA_FILE_DIR}/metadata_invalid_empty_nhs_number.csv",
     f"{METADATA_FILE_DIR}/metadata_invalid_unexpected_comma.csv",
 ]
-MOCK_TEMP_FOLDER = "tests/unit/helpers/data/bulk_upload"
+
+
+def build_expected_sqs_entry(message_body: str, nhs_number: str) -> dict:
+    return {
+        "MessageBody": message_body,
+        "MessageGroupId": "bulk_upload_123412342",
+        "MessageAttributes": {
+            "NhsNumber": {"DataType": "String", "StringValue": nhs_number}
+        },
+    }
 
 
 def test_process_metadata_send_metadata_to_sqs_queue(
@@ -37,40 +46,26 @@ def test_process_metadata_send_metadata_to_sqs_queue(
     metadata_filename,
     mock_sqs_service,
     mock_s3_service,
-    mock_download_metadata_from_s3,
+    mock_metadata_stream,
     metadata_service,
 ):
-    mock_download_metadata_from_s3.return_value = MOCK_METADATA_CSV
+    mock_metadata_stream(MOCK_METADATA_CSV)
     mocker.patch("uuid.uuid4", return_value="123412342")
 
     mock_s3_service.copy_across_bucket.return_value = None
 
-    expected_calls = [
-        call(
-            queue_url=MOCK_LG_METADATA_SQS_QUEUE,
-            message_body=EXPECTED_SQS_MSG_FOR_PATIENT_1234567890,
-            nhs_number="1234567890",
-            group_id="bulk_upload_123412342",
-        ),
-        call(
-            queue_url=MOCK_LG_METADATA_SQS_QUEUE,
-            message_body=EXPECTED_SQS_MSG_FOR_PATIENT_123456789,
-            nhs_number="123456789",
-            group_id="bulk_upload_123412342",
-        ),
-        call(
-            queue_url=MOCK_LG_METADATA_SQS_QUEUE,
-            message_body=EXPECTED_SQS_MSG_FOR_PATIENT_0000000000,
-            nhs_number="0000000000",
-            group_id="bulk_upload_123412342",
-        ),
+    expected_entries = [
+        build_expected_sqs_entry(EXPECTED_SQS_MSG_FOR_PATIENT_1234567890, "1234567890"),
+        build_expected_sqs_entry(EXPECTED_SQS_MSG_FOR_PATIENT_123456789, "123456789"),
+        build_expected_sqs_entry(EXPECTED_SQS_MSG_FOR_PATIENT_0000000000, "0000000000"),
     ]
 
     metadata_service.process_metadata(metadata_filename)
 
-    assert mock_sqs_service.send_message_with_nhs_number_attr_fifo.call_count == 3
-    mock_sqs_service.send_message_with_nhs_number_attr_fifo.assert_has_calls(
-        expected_calls
+    mock_sqs_service.send_message_batch_fifo.assert_called_once_with(
+        queue_url=MOCK_LG_METADATA_SQS_QUEUE,
+        entries=expected_entries,
+        max_concurrent_batches=5,
     )
 
 
@@ -82,9 +77,9 @@ def test_process_metadata_catch_and_log_error_when_fail_to_get_metadata_csv_from
     mock_sqs_service,
     metadata_service,
 ):
-    mock_s3_service.download_file.side_effect = ClientError(
-        {"Error": {"Code": "403", "Message": "Forbidden"}},
-        "S3:HeadObject",
+    mock_s3_service.get_object_stream.side_effect = ClientError(
+        {"Error": {"Code": "AccessDenied", "Message": "Access Denied"}},
+        "GetObject",
     )
     expected_err_msg = 'No metadata file could be found with the name "metadata.csv"'
 
@@ -95,7 +90,7 @@ def test_process_metadata_catch_and_log_error_when_fail_to_get_metadata_csv_from
     assert caplog.records[-1].msg == expected_err_msg
     assert caplog.records[-1].levelname == "ERROR"
 
-    mock_sqs_service.send_message_with_nhs_number_attr_fifo.assert_not_called()
+    mock_sqs_service.send_message_batch_fifo.assert_not_called()
 
 
 def test_process_metadata_raise_validation_error_when_metadata_csv_is_invalid(
@@ -103,11 +98,11 @@ def test_process_metadata_raise_validation_error_when_metadata_csv_is_invalid(
     caplog,
     metadata_filename,
     mock_sqs_service,
-    mock_download_metadata_from_s3,
+    mock_metadata_stream,
     metadata_service,
 ):
     for invalid_csv_file in MOCK_INVALID_METADATA_CSV_FILES:
-        mock_download_metadata_from_s3.return_value = invalid_csv_file
+        mock_metadata_stream(invalid_csv_file)
 
         with pytest.raises(BulkUploadMetadataException) as e:
             metadata_service.process_metadata(metadata_filename)
@@ -116,7 +111,7 @@ def test_process_metadata_raise_validation_error_when_metadata_csv_is_invalid(
         assert "validation error" in caplog.records[-1].msg
         assert caplog.records[-1].levelname == "ERROR"
 
-        mock_sqs_service.send_message_with_nhs_number_attr_fifo.assert_not_called()
+        mock_sqs_service.send_message_batch_fifo.assert_not_called()
 
 
 def test_process_metadata_raise_validation_error_when_gp_practice_code_is_missing(
@@ -124,10 +119,10 @@ def test_process_metadata_raise_validation_error_when_gp_practice_code_is_missin
     caplog,
     metadata_filename,
     mock_sqs_service,
-    mock_download_metadata_from_s3,
+    mock_metadata_stream,
     metadata_service,
 ):
-    mock_download_metadata_from_s3.return_value = (
+    mock_metadata_stream(
         f"{METADATA_FILE_DIR}/metadata_invalid_empty_gp_practice_code.csv"
     )
     expected_error_log = (
@@ -142,18 +137,18 @@ def test_process_metadata_raise_validation_error_when_gp_practice_code_is_missin
     assert expected_error_log in caplog.records[-1].msg
     assert caplog.records[-1].levelname == "ERROR"
 
-    mock_sqs_service.send_message_with_nhs_number_attr_fifo.assert_not_called()
+    mock_sqs_service.send_message_batch_fifo.assert_not_called()
 
 
 def test_process_metadata_raise_client_error_when_failed_to_send_message_to_sqs(
     set_env,
     caplog,
     metadata_filename,
-    mock_s3_service,
     mock_sqs_service,
-    mock_tempfile,
+    mock_metadata_stream,
     metadata_service,
 ):
+    mock_metadata_stream(MOCK_METADATA_CSV)
     mock_client_error = ClientError(
         {
             "Error": {
@@ -161,13 +156,11 @@ def test_process_metadata_raise_client_error_when_failed_to_send_message_to_sqs(
                 "Message": "The specified queue does not exist",
             }
         },
-        "SendMessage",
-    )
-    mock_sqs_service.send_message_with_nhs_number_attr_fifo.side_effect = (
-        mock_client_error
+        "SendMessageBatch",
     )
+    mock_sqs_service.send_message_batch_fifo.side_effect = mock_client_error
     expected_err_msg = (
-        "An error occurred (AWS.SimpleQueueService.NonExistentQueue) when calling the SendMessage operation:"
+        "An error occurred (AWS.SimpleQueueService.NonExistentQueue) when calling the SendMessageBatch operation:"
         " The specified queue does not exist"
     )
 
@@ -179,81 +172,115 @@ def test_process_metadata_raise_client_error_when_failed_to_send_message_to_sqs(
     assert caplog.records[-1].levelname == "ERROR"
 
 
-def test_download_metadata_from_s3(
-    set_env, metadata_filename, mock_s3_service, mock_tempfile, metadata_service
+def test_stream_metadata_rows_from_s3(
+    set_env, metadata_filename, mock_s3_service, metadata_service
 ):
-    actual = metadata_service.download_metadata_from_s3(metadata_filename)
-    expected = MOCK_METADATA_CSV
-
-    mock_s3_service.download_file.assert_called_with(
-        s3_bucket_name=MOCK_STAGING_STORE_BUCKET,
-        file_key=metadata_filename,
-        download_path=f"{MOCK_TEMP_FOLDER}/{metadata_filename}",
+    mock_s3_service.get_object_stream.return_value = BytesIO(
+        "\ufeffNHS-NO,FILEPATH\r\n1234567890,/1234567890/1of1_Lloyd_George.pdf\r\n".encode()
     )
-    assert actual == expected
 
+    actual = list(metadata_service.stream_metadata_rows_from_s3(metadata_filename))
 
-def test_download_metadata_from_s3_raise_error_when_failed_to_download(
-    set_env, metadata_filename, mock_s3_service, mock_tempfile, metadata_service
-):
-    mock_s3_service.download_file.side_effect = ClientError(
-        {"Error": {"Code": "500", "Message": "file not exist in bucket"}},
-        "s3_get_object",
+    mock_s3_service.get_object_stream.assert_called_once_with(
+        bucket=MOCK_STAGING_STORE_BUCKET, key=metadata_filename
     )
+    assert actual == [
+        {"NHS-NO": "1234567890", "FILEPATH": "/1234567890/1of1_Lloyd_George.pdf"}
+    ]
 
-    with pytest.raises(ClientError):
-        metadata_service.download_metadata_from_s3(metadata_filename)
+
+def read_metadata_rows(csv_file_path: str) -> list[dict]:
+    with open(csv_file_path, "rb") as csv_file:
+        return list(stream_csv_rows(csv_file, errors="replace"))
 
 
 def test_csv_to_staging_metadata(set_env, metadata_service):
-    actual = metadata_service.csv_to_staging_metadata(MOCK_METADATA_CSV)
+    actual = list(
+        metadata_service.csv_to_staging_metadata(read_metadata_rows(MOCK_METADATA_CSV))
+    )
     expected = EXPECTED_PARSED_METADATA
     assert actual == expected
 
 
 def test_duplicates_csv_to_staging_metadata(set_env, metadata_service):
-    actual = metadata_service.csv_to_staging_metadata(MOCK_DUPLICATE_ODS_METADATA_CSV)
+    actual = list(
+        metadata_service.csv_to_staging_metadata(
+            read_metadata_rows(MOCK_DUPLICATE_ODS_METADATA_CSV)
+        )
+    )
     expected = EXPECTED_PARSED_METADATA_2
     assert actual == expected
 
 
+def test_csv_to_staging_metadata_emits_groups_eagerly_when_sorted(
+    set_env, metadata_service
+):
+    metadata_rows = read_metadata_rows(MOCK_METADATA_CSV)
+    staging_metadata = metadata_service.csv_to_staging_metadata(
+        iter(metadata_rows), sorted_by_patient=True
+    )
+
+    first_patient = next(staging_metadata)
+
+    assert first_patient == EXPECTED_PARSED_METADATA[0]
+    assert list(staging_metadata) == EXPECTED_PARSED_METADATA[1:]
+
+
+def test_csv_to_staging_metadata_holds_groups_until_all_rows_are_valid(
+    set_env, metadata_service
+):
+    metadata_rows = read_metadata_rows(MOCK_METADATA_CSV) + [{"NHS-NO": "1234567890"}]
+
+    with pytest.raises(ValidationError):
+        next(metadata_service.csv_to_staging_metadata(metadata_rows))
+
+
 def test_csv_to_staging_metadata_raise_error_when_metadata_invalid(
     set_env, metadata_service
 ):
     for invalid_csv_file in MOCK_INVALID_METADATA_CSV_FILES:
         with pytest.raises(ValidationError):
-            metadata_service.csv_to_staging_metadata(invalid_csv_file)
+            list(
+                metadata_service.csv_to_staging_metadata(
+                    read_metadata_rows(invalid_csv_file)
+                )
+            )
 
 
 def test_send_metadata_to_sqs(set_env, mocker, mock_sqs_service, metadata_service):
     mocker.patch("uuid.uuid4", return_value="123412342")
-    expected_calls = [
-        call(
-            queue_url=MOCK_LG_METADATA_SQS_QUEUE,
-            message_body=EXPECTED_SQS_MSG_FOR_PATIENT_1234567890,
-            nhs_number="1234567890",
-            group_id="bulk_upload_123412342",
-        ),
-        call(
-            queue_url=MOCK_LG_METADATA_SQS_QUEUE,
-            message_body=EXPECTED_SQS_MSG_FOR_PATIENT_123456789,
-            nhs_number="123456789",
-            group_id="bulk_upload_123412342",
-        ),
+    expected_entries = [
+        build_expected_sqs_entry(EXPECTED_SQS_MSG_FOR_PATIENT_1234567890, "1234567890"),
+        build_expected_sqs_entry(EXPECTED_SQS_MSG_FOR_PATIENT_123456789, "123456789"),
     ]
 
     metadata_service.send_metadata_to_fifo_sqs(MOCK_METADATA)
 
-    mock_sqs_service.send_message_with_nhs_number_attr_fifo.assert_has_calls(
-        expected_calls
+    mock_sqs_service.send_message_batch_fifo.assert_called_once_with(
+        queue_url=MOCK_LG_METADATA_SQS_QUEUE,
+        entries=expected_entries,
+        max_concurrent_batches=5,
     )
-    assert mock_sqs_service.send_message_with_nhs_number_attr_fifo.call_count == 2
+
+
+def test_send_metadata_to_sqs_raise_error_when_messages_are_not_sent(
+    set_env, mocker, mock_sqs_service, metadata_service
+):
+    mocker.patch("uuid.uuid4", return_value="123412342")
+    mock_sqs_service.send_message_batch_fifo.return_value = [
+        build_expected_sqs_entry(EXPECTED_SQS_MSG_FOR_PATIENT_123456789, "123456789")
+    ]
+
+    with pytest.raises(BulkUploadMetadataException) as e:
+        metadata_service.send_metadata_to_fifo_sqs(MOCK_METADATA)
+
+    assert "123456789" in str(e.value)
 
 
 def test_send_metadata_to_sqs_raise_error_when_fail_to_send_message(
     set_env, mock_sqs_service, metadata_service
 ):
-    mock_sqs_service.send_message_with_nhs_number_attr_fifo.side_effect = ClientError(
+    mock_sqs_service.send_message_batch_fifo.side_effect = ClientError(
         {
             "Error": {
                 "Code": "AWS.SimpleQueueService.NonExistentQueue",
@@ -286,14 +313,6 @@ def test_copy_metadata_to_dated_folder(
     )
 
 
-def test_clear_temp_storage(set_env, mocker, mock_tempfile, metadata_service):
-    mocked_rm = mocker.patch("shutil.rmtree")
-
-    metadata_service.clear_temp_storage()
-
-    mocked_rm.assert_called_once_with(metadata_service.temp_download_dir)
-
-
 @pytest.fixture
 def metadata_service():
     yield BulkUploadMetadataService()
@@ -305,8 +324,11 @@ def metadata_filename():
 
 
 @pytest.fixture
-def mock_download_metadata_from_s3(mocker):
-    yield mocker.patch.object(BulkUploadMetadataService, "download_metadata_from_s3")
+def mock_metadata_stream(mock_s3_service):
+    def open_metadata_file(csv_file_path: str):
+        mock_s3_service.get_object_stream.return_value = open(csv_file_path, "rb")
+
+    yield open_metadata_file
 
 
 @pytest.fixture
@@ -317,16 +339,10 @@ def mock_s3_service(mocker):
     yield patched_instance
 
 
-@pytest.fixture
-def mock_tempfile(mocker):
-    mocker.patch.object(tempfile, "mkdtemp", return_value=MOCK_TEMP_FOLDER)
-    mocker.patch("shutil.rmtree")
-    yield
-
-
 @pytest.fixture
 def mock_sqs_service(mocker):
     patched_instance = mocker.patch(
         "services.bulk_upload_metadata_service.SQSService"
     ).return_value
+    patched_instance.send_message_batch_fifo.return_value = []
     yield patched_instance
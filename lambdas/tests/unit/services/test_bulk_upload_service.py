@@ -1,4 +1,7 @@
 import json
+import logging
+import threading
+from collections import defaultdict
 from copy import copy
 
 import pytest
@@ -8,10 +11,14 @@ from enums.upload_status import UploadStatus
 from enums.virus_scan_result import SCAN_RESULT_TAG_KEY, VirusScanResult
 from freezegun import freeze_time
 from models.pds_models import Patient
+from repositories.bulk_upload.bulk_upload_dynamo_repository import (
+    BulkUploadDynamoRepository,
+)
 from repositories.bulk_upload.bulk_upload_s3_repository import BulkUploadS3Repository
 from repositories.bulk_upload.bulk_upload_sqs_repository import BulkUploadSqsRepository
 from services.bulk_upload_service import BulkUploadService
 from tests.unit.conftest import (
+    MOCK_CLIENT_ERROR,
     MOCK_LG_BUCKET,
     MOCK_STAGING_STORE_BUCKET,
     TEST_CURRENT_GP_ODS,
@@ -28,6 +35,7 @@ from tests.unit.helpers.data.bulk_upload.test_data import (
     TEST_STAGING_METADATA_SINGLE_FILE,
     TEST_STAGING_METADATA_WITH_INVALID_FILENAME,
     build_test_sqs_message,
+    build_test_sqs_message_from_nhs_number,
     build_test_staging_metadata_from_patient_name,
     make_s3_file_paths,
     make_valid_lg_file_names,
@@ -45,13 +53,16 @@ from tests.unit.utils.test_unicode_utils import (
 from utils.exceptions import (
     BulkUploadException,
     DocumentInfectedException,
+    DynamoServiceException,
     InvalidMessageException,
+    InvalidNhsNumberException,
     PatientRecordAlreadyExistException,
     PdsTooManyRequestsException,
     S3FileNotFoundException,
     VirusScanNoResultException,
 )
 from utils.lloyd_george_validator import LGInvalidFilesException
+from utils.logging_formatter import LoggingFormatter
 
 
 @pytest.fixture
@@ -200,6 +211,166 @@ def test_lambda_handler_handle_pds_too_many_requests_exception(
         mock_back_to_queue.assert_any_call(message)
 
 
+def test_process_message_queue_concurrently_processes_every_message(
+    set_env, mock_handle_sqs_message
+):
+    mock_handle_sqs_message.side_effect = [None, InvalidMessageException, None]
+    service = BulkUploadService(True, max_workers=3)
+
+    service.process_message_queue(TEST_SQS_MESSAGES_AS_LIST)
+
+    assert mock_handle_sqs_message.call_count == len(TEST_SQS_MESSAGES_AS_LIST)
+    for message in TEST_SQS_MESSAGES_AS_LIST:
+        mock_handle_sqs_message.assert_any_call(message)
+    assert len(service.unhandled_messages) == 1
+
+
+def test_process_message_queue_concurrently_isolates_transaction_state(set_env, mocker):
+    service = BulkUploadService(True, max_workers=2)
+    workers = []
+
+    def handle_sqs_message(worker, message):
+        workers.append(worker)
+        worker.dynamo_repository.dynamo_records_in_transaction.append(message)
+
+    mocker.patch.object(
+        BulkUploadService, "handle_sqs_message", autospec=True
+    ).side_effect = handle_sqs_message
+
+    service.process_message_queue(TEST_SQS_MESSAGES_AS_LIST)
+
+    assert service not in workers
+    assert service.dynamo_repository.dynamo_records_in_transaction == []
+    assert len({id(worker) for worker in workers}) <= 2
+    for worker in workers:
+        assert worker.sqs_repository is service.sqs_repository
+        assert worker.dynamo_repository is not service.dynamo_repository
+        assert worker.bulk_upload_s3_repository is not service.bulk_upload_s3_repository
+
+
+def test_process_message_queue_concurrently_pauses_on_pds_too_many_requests(
+    set_env, mock_handle_sqs_message, mock_back_to_queue
+):
+    failed_message = TEST_SQS_10_MESSAGES_AS_LIST[6]
+
+    def handle_sqs_message(message):
+        if message == failed_message:
+            raise PdsTooManyRequestsException
+
+    mock_handle_sqs_message.side_effect = handle_sqs_message
+    service = BulkUploadService(True, max_workers=2)
+
+    with pytest.raises(BulkUploadException):
+        service.process_message_queue(TEST_SQS_10_MESSAGES_AS_LIST)
+
+    handled_messages = [call.args[0] for call in mock_handle_sqs_message.call_args_list]
+    returned_messages = [call.args[0] for call in mock_back_to_queue.call_args_list]
+    assert failed_message in returned_messages
+    assert sorted(handled_messages + returned_messages, key=json.dumps) == sorted(
+        TEST_SQS_10_MESSAGES_AS_LIST + [failed_message], key=json.dumps
+    )
+
+
+def test_process_message_queue_flushes_report_records_when_paused(
+    repo_under_test, mock_handle_sqs_message
+):
+    mock_handle_sqs_message.side_effect = PdsTooManyRequestsException
+
+    with pytest.raises(BulkUploadException):
+        repo_under_test.process_message_queue(TEST_SQS_MESSAGES_AS_LIST)
+
+    repo_under_test.dynamo_repository.flush_report_records.assert_called_once()
+
+
+def test_process_message_queue_concurrently_flushes_every_worker(
+    set_env, mocker, mock_handle_sqs_message
+):
+    mock_flush = mocker.patch.object(
+        BulkUploadDynamoRepository, "flush_report_records", autospec=True
+    )
+    service = BulkUploadService(True, max_workers=2)
+
+    service.process_message_queue(TEST_SQS_MESSAGES_AS_LIST)
+
+    flushed_repositories = [call.args[0] for call in mock_flush.call_args_list]
+    assert len(flushed_repositories) == 3
+    assert service.dynamo_repository in flushed_repositories
+
+
+def test_process_message_queue_concurrently_logs_each_patient_nhs_number(
+    set_env, mocker
+):
+    nhs_numbers = ["9000000009", "9000000025"]
+    both_patients_started = threading.Barrier(len(nhs_numbers))
+    mocker.patch.object(BulkUploadDynamoRepository, "write_report_upload_to_dynamo")
+    mocker.patch.object(BulkUploadDynamoRepository, "flush_report_records")
+
+    def validate_nhs_number(nhs_number):
+        both_patients_started.wait(timeout=5)
+        raise InvalidNhsNumberException(f"Invalid NHS number: {nhs_number}")
+
+    mocker.patch(
+        "services.bulk_upload_service.validate_nhs_number",
+        side_effect=validate_nhs_number,
+    )
+
+    log_lines = []
+
+    class FormatOnEmitHandler(logging.Handler):
+        def emit(self, record):
+            log_lines.append(json.loads(LoggingFormatter().format(record)))
+
+    handler = FormatOnEmitHandler()
+    service_logger = logging.getLogger("services.bulk_upload_service")
+    service_logger.addHandler(handler)
+    try:
+        BulkUploadService(True, max_workers=2).process_message_queue(
+            [build_test_sqs_message_from_nhs_number(nhs) for nhs in nhs_numbers]
+        )
+    finally:
+        service_logger.removeHandler(handler)
+
+    patient_lines = [
+        line
+        for line in log_lines
+        if line["Message"].startswith("Detected issue related to patient number")
+    ]
+    assert len(patient_lines) == 2
+    for line in patient_lines:
+        assert line["Message"].endswith(line["Patient NHS number"])
+
+
+def test_process_message_queue_concurrently_flushes_every_worker_when_one_fails(
+    set_env, mocker, mock_handle_sqs_message, mock_back_to_queue
+):
+    mock_handle_sqs_message.side_effect = PdsTooManyRequestsException
+    mock_flush = mocker.patch.object(
+        BulkUploadDynamoRepository, "flush_report_records", autospec=True
+    )
+    mock_flush.side_effect = [MOCK_CLIENT_ERROR, None, None]
+    service = BulkUploadService(True, max_workers=2)
+
+    with pytest.raises(ClientError) as e:
+        service.process_message_queue(TEST_SQS_MESSAGES_AS_LIST)
+
+    assert mock_flush.call_count == 3
+    assert isinstance(e.value.__context__, BulkUploadException)
+    assert mock_back_to_queue.call_count == len(TEST_SQS_MESSAGES_AS_LIST)
+
+
+def test_process_message_queue_raises_when_final_flush_fails(
+    repo_under_test, mock_handle_sqs_message
+):
+    repo_under_test.dynamo_repository.flush_report_records.side_effect = (
+        MOCK_CLIENT_ERROR
+    )
+
+    with pytest.raises(ClientError):
+        repo_under_test.process_message_queue(TEST_SQS_MESSAGES_AS_LIST)
+
+    assert mock_handle_sqs_message.call_count == len(TEST_SQS_MESSAGES_AS_LIST)
+
+
 def test_handle_sqs_message_happy_path(
     set_env,
     mocker,
@@ -234,6 +405,33 @@ def test_handle_sqs_message_happy_path(
     repo_under_test.sqs_repository.send_message_to_pdf_stitching_queue.assert_called()
 
 
+def test_handle_sqs_message_writes_report_before_removing_staging_files(
+    set_env,
+    mocker,
+    mock_uuid,
+    repo_under_test,
+    mock_validate_files,
+    mock_pds_service,
+    mock_pds_validation_strict,
+    mock_ods_validation,
+):
+    TEST_STAGING_METADATA.retries = 0
+    mocker.patch.object(BulkUploadService, "create_lg_records_and_copy_files")
+    calls = mocker.MagicMock()
+    calls.attach_mock(
+        repo_under_test.dynamo_repository.write_report_upload_to_dynamo, "write"
+    )
+    calls.attach_mock(repo_under_test.dynamo_repository.flush_report_records, "flush")
+    calls.attach_mock(
+        repo_under_test.bulk_upload_s3_repository.remove_ingested_file_from_source_bucket,
+        "remove",
+    )
+
+    repo_under_test.handle_sqs_message(message=TEST_SQS_MESSAGE)
+
+    assert [call[0] for call in calls.mock_calls] == ["write", "flush", "remove"]
+
+
 def test_handle_sqs_message_happy_path_single_file(
     set_env,
     mocker,
@@ -726,11 +924,45 @@ def test_handle_sqs_message_rollback_transaction_when_validation_pass_but_file_t
         "Y12345",
     )
     mock_remove_ingested_file_from_source_bucket.assert_not_called()
-    assert (
-        repo_under_test.dynamo_repository.create_record_in_lg_dynamo_table.call_count
-        == 2
+    assert repo_under_test.bulk_upload_s3_repository.copy_to_lg_bucket.call_count == 3
+    repo_under_test.dynamo_repository.create_records_in_lg_dynamo_table.assert_not_called()
+
+
+def test_handle_sqs_message_rollback_transaction_when_dynamo_write_retries_run_out(
+    repo_under_test,
+    set_env,
+    mocker,
+    mock_uuid,
+    mock_check_virus_result,
+    mock_validate_files,
+    mock_pds_service,
+    mock_pds_validation_strict,
+    mock_ods_validation,
+):
+    repo_under_test.bulk_upload_s3_repository.lg_bucket_name = MOCK_LG_BUCKET
+    TEST_STAGING_METADATA.retries = 0
+    mock_rollback_transaction = mocker.patch.object(
+        repo_under_test, "rollback_transaction"
+    )
+    repo_under_test.bulk_upload_s3_repository.get_staged_file_sizes.return_value = (
+        defaultdict(lambda: 100)
+    )
+    repo_under_test.dynamo_repository.create_records_in_lg_dynamo_table.side_effect = (
+        DynamoServiceException("Unable to complete TransactWriteItems")
     )
 
+    repo_under_test.handle_sqs_message(message=TEST_SQS_MESSAGE)
+
+    assert repo_under_test.bulk_upload_s3_repository.copy_to_lg_bucket.call_count == 3
+    mock_rollback_transaction.assert_called_once()
+    repo_under_test.dynamo_repository.write_report_upload_to_dynamo.assert_called_with(
+        TEST_STAGING_METADATA,
+        UploadStatus.FAILED,
+        "Validation passed but error occurred during file transfer",
+        "Y12345",
+    )
+    repo_under_test.bulk_upload_s3_repository.remove_ingested_file_from_source_bucket.assert_not_called()
+
 
 def test_handle_sqs_message_raise_InvalidMessageException_when_failed_to_extract_data_from_message(
     repo_under_test, set_env, mocker
@@ -847,6 +1079,10 @@ def test_create_lg_records_and_copy_files(set_env, mocker, mock_uuid, repo_under
     )
     TEST_STAGING_METADATA.retries = 0
     repo_under_test.resolve_source_file_path(TEST_STAGING_METADATA)
+    repo_under_test.bulk_upload_s3_repository.get_staged_file_sizes.return_value = {
+        BulkUploadService.strip_leading_slash(file.file_path): 100
+        for file in TEST_STAGING_METADATA.files
+    }
 
     repo_under_test.create_lg_records_and_copy_files(
         TEST_STAGING_METADATA, TEST_CURRENT_GP_ODS
@@ -860,15 +1096,20 @@ def test_create_lg_records_and_copy_files(set_env, mocker, mock_uuid, repo_under
         repo_under_test.bulk_upload_s3_repository.copy_to_lg_bucket.assert_any_call(
             source_file_key=expected_source_file_key,
             dest_file_key=expected_dest_file_key,
+            file_size=100,
         )
         assert test_document_reference.uploaded.__eq__(True)
     assert repo_under_test.bulk_upload_s3_repository.copy_to_lg_bucket.call_count == 3
-    repo_under_test.dynamo_repository.create_record_in_lg_dynamo_table.assert_any_call(
-        test_document_reference
-    )
-    assert (
-        repo_under_test.dynamo_repository.create_record_in_lg_dynamo_table.call_count
-        == 3
+    assert test_document_reference.file_size == 100
+    repo_under_test.bulk_upload_s3_repository.get_staged_file_sizes.assert_called_once_with(
+        [
+            BulkUploadService.strip_leading_slash(file.file_path)
+            for file in TEST_STAGING_METADATA.files
+        ]
+    )
+    assert test_document_reference.doc_status == "final"
+    repo_under_test.dynamo_repository.create_records_in_lg_dynamo_table.assert_called_once_with(
+        [test_document_reference] * 3
     )
 
 
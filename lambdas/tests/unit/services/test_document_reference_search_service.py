@@ -160,6 +160,78 @@ def test_get_document_references_dynamo_return_successful_response_multiple_tabl
     assert actual == expected_results
 
 
+def test_search_tables_for_documents_preserves_table_order_when_run_concurrently(
+    mock_document_service, mocker
+):
+    documents_by_table = {
+        "table1": [MagicMock(name="table1_document")],
+        "table2": [MagicMock(name="table2_document")],
+        "table3": [MagicMock(name="table3_document")],
+    }
+    mock_document_service.fetch_documents_from_table_with_nhs_number.side_effect = (
+        lambda nhs_number, table_name, query_filter: documents_by_table[table_name]
+    )
+    mock_document_service._process_documents = mocker.MagicMock(
+        side_effect=lambda documents, return_fhir, table_name: [table_name]
+    )
+
+    actual = mock_document_service._search_tables_for_documents(
+        "1111111111", ["table3", "table1", "table2"], False
+    )
+
+    assert actual == ["table3", "table1", "table2"]
+
+
+def test_process_documents_stores_backfilled_file_size(mock_document_service):
+    document = DocumentReference.model_validate(MOCK_SEARCH_RESPONSE["Items"][0])
+
+    mock_document_service._process_documents([document], False, table_name="table1")
+
+    assert document.file_size == MOCK_FILE_SIZE
+    mock_document_service.dynamo_service.update_item.assert_called_once_with(
+        table_name="table1",
+        key_pair={"ID": document.id},
+        updated_fields={"FileSize": MOCK_FILE_SIZE},
+        condition_expression="attribute_exists(ID)",
+    )
+
+
+def test_process_documents_heads_each_missing_file_size_once(mock_document_service):
+    documents = [
+        DocumentReference.model_validate(item) for item in MOCK_SEARCH_RESPONSE["Items"]
+    ]
+    documents[0].file_size = 100
+
+    actual = mock_document_service._process_documents(
+        documents, False, table_name="table1"
+    )
+
+    assert [result["fileSize"] for result in actual] == [
+        100,
+        MOCK_FILE_SIZE,
+        MOCK_FILE_SIZE,
+    ]
+    assert mock_document_service.s3_service.get_file_size.call_count == 2
+    assert mock_document_service.dynamo_service.update_item.call_count == 2
+
+
+def test_process_documents_returns_results_when_storing_file_size_fails(
+    mock_document_service,
+):
+    mock_document_service.dynamo_service.update_item.side_effect = ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "test"}},
+        "UpdateItem",
+    )
+
+    actual = mock_document_service._process_documents(
+        [DocumentReference.model_validate(MOCK_SEARCH_RESPONSE["Items"][0])],
+        False,
+        table_name="table1",
+    )
+
+    assert actual == [EXPECTED_RESPONSE]
+
+
 def test_get_document_references_raise_error_when_upload_is_in_process(
     mock_document_service,
 ):
@@ -219,8 +291,8 @@ def test_search_tables_for_documents_non_fhir(mock_document_service, mocker):
 
     mock_process_document_non_fhir.assert_has_calls(
         [
-            call(MOCK_DOCUMENT_REFERENCE, return_fhir=False),
-            call(MOCK_DOCUMENT_REFERENCE, return_fhir=False),
+            call(MOCK_DOCUMENT_REFERENCE, return_fhir=False, table_name="table1"),
+            call(MOCK_DOCUMENT_REFERENCE, return_fhir=False, table_name="table2"),
         ]
     )
     assert mock_fetch_document_method.call_count == 2
@@ -265,8 +337,8 @@ def test_search_tables_for_documents_fhir(mock_document_service, mocker):
     )
     mock_process_document_fhir.assert_has_calls(
         [
-            call(MOCK_DOCUMENT_REFERENCE, return_fhir=True),
-            call(MOCK_DOCUMENT_REFERENCE, return_fhir=True),
+            call(MOCK_DOCUMENT_REFERENCE, return_fhir=True, table_name="table1"),
+            call(MOCK_DOCUMENT_REFERENCE, return_fhir=True, table_name="table2"),
         ]
     )
 
@@ -8,7 +8,7 @@ from enums.dynamo_filter import AttributeOperator
 from enums.metadata_field_names import DocumentReferenceMetadataFields
 from enums.supported_document_types import SupportedDocumentTypes
 from freezegun import freeze_time
-from models.document_reference import DocumentReference
+from models.document_reference import DocumentReference, DocumentReferenceView
 from services.document_service import DocumentService
 from tests.unit.conftest import (
     MOCK_ARF_TABLE_NAME,
@@ -186,6 +186,72 @@ def test_fetch_documents_from_table_with_filter_returns_empty_list_of_doc_refere
     )
 
 
+def test_iter_documents_fetches_next_page_only_when_iterated(
+    mock_service, mock_dynamo_service
+):
+    first_page = {**MOCK_SEARCH_RESPONSE, "LastEvaluatedKey": {"ID": "page_2"}}
+    mock_dynamo_service.query_table_by_index.side_effect = [
+        first_page,
+        MOCK_SEARCH_RESPONSE,
+    ]
+
+    documents = mock_service.iter_documents(
+        table=MOCK_LG_TABLE_NAME,
+        index_name="NhsNumberIndex",
+        search_key="NhsNumber",
+        search_condition=TEST_NHS_NUMBER,
+    )
+
+    assert isinstance(next(documents), DocumentReference)
+    mock_dynamo_service.query_table_by_index.assert_called_once()
+
+    assert len(list(documents)) == 5
+    mock_dynamo_service.query_table_by_index.assert_called_with(
+        table_name=MOCK_LG_TABLE_NAME,
+        index_name="NhsNumberIndex",
+        search_key="NhsNumber",
+        search_condition=TEST_NHS_NUMBER,
+        query_filter=None,
+        exclusive_start_key={"ID": "page_2"},
+    )
+
+
+def test_iter_documents_stops_at_max_items_without_fetching_more_pages(
+    mock_service, mock_dynamo_service
+):
+    first_page = {**MOCK_SEARCH_RESPONSE, "LastEvaluatedKey": {"ID": "page_2"}}
+    mock_dynamo_service.query_table_by_index.return_value = first_page
+
+    documents = mock_service.fetch_documents_from_table(
+        table=MOCK_LG_TABLE_NAME,
+        search_key="ID",
+        search_condition="mock_id",
+        max_items=1,
+    )
+
+    assert len(documents) == 1
+    mock_dynamo_service.query_table_by_index.assert_called_once()
+
+
+def test_iter_documents_skips_items_that_fail_validation(
+    mock_service, mock_dynamo_service
+):
+    mock_dynamo_service.query_table_by_index.return_value = {
+        "Items": [{"ID": "missing_required_fields"}, MOCK_DOCUMENT]
+    }
+
+    documents = list(
+        mock_service.iter_documents(
+            table=MOCK_LG_TABLE_NAME,
+            search_key="ID",
+            search_condition="mock_id",
+            prefetch=True,
+        )
+    )
+
+    assert documents == [DocumentReference.model_validate(MOCK_DOCUMENT)]
+
+
 @freeze_time("2023-10-1 13:00:00")
 def test_delete_documents_soft_delete(mock_service, mock_dynamo_service):
     test_doc_ref = DocumentReference.model_validate(MOCK_DOCUMENT)
@@ -262,12 +328,10 @@ def test_hard_delete_metadata_records(mock_service, mock_dynamo_service):
 
     mock_service.hard_delete_metadata_records(MOCK_TABLE_NAME, test_doc_refs)
 
-    mock_dynamo_service.delete_item.assert_has_calls(
-        [
-            call(MOCK_TABLE_NAME, expected_deletion_keys[0]),
-            call(MOCK_TABLE_NAME, expected_deletion_keys[1]),
-        ]
+    mock_dynamo_service.batch_delete_items.assert_called_once_with(
+        MOCK_TABLE_NAME, expected_deletion_keys
     )
+    mock_dynamo_service.delete_item.assert_not_called()
 
 
 @freeze_time("2023-10-30T10:25:00")
@@ -345,8 +409,8 @@ def test_get_nhs_numbers_based_on_ods_code(mock_service, mocker):
 
     mock_fetch = mocker.patch.object(
         mock_service,
-        "fetch_documents_from_table",
-        return_value=mock_documents,
+        "iter_document_views",
+        return_value=iter(mock_documents),
     )
 
     result = mock_service.get_nhs_numbers_based_on_ods_code(ods_code)
@@ -358,9 +422,61 @@ def test_get_nhs_numbers_based_on_ods_code(mock_service, mocker):
         index_name="OdsCodeIndex",
         search_key=DocumentReferenceMetadataFields.CURRENT_GP_ODS.value,
         search_condition=ods_code,
+        requested_fields=[DocumentReferenceMetadataFields.NHS_NUMBER],
         query_filter=NotDeleted,
+        prefetch=True,
+    )
+
+
+def test_iter_document_views_requests_projection_and_returns_views(mock_service):
+    mock_service.dynamo_service.iter_query.return_value = iter(
+        [
+            {"NhsNumber": TEST_NHS_NUMBER, "Uploaded": True},
+            {"NhsNumber": "9000000009", "Uploaded": False},
+        ]
     )
 
+    views = list(
+        mock_service.iter_document_views(
+            table=MOCK_LG_TABLE_NAME,
+            index_name="OdsCodeIndex",
+            search_key=DocumentReferenceMetadataFields.CURRENT_GP_ODS.value,
+            search_condition="Y12345",
+            requested_fields=[
+                DocumentReferenceMetadataFields.NHS_NUMBER,
+                DocumentReferenceMetadataFields.UPLOADED,
+            ],
+            max_items=10,
+        )
+    )
+
+    assert views == [
+        DocumentReferenceView(nhs_number=TEST_NHS_NUMBER, uploaded=True),
+        DocumentReferenceView(nhs_number="9000000009", uploaded=False),
+    ]
+    mock_service.dynamo_service.iter_query.assert_called_once_with(
+        table_name=MOCK_LG_TABLE_NAME,
+        index_name="OdsCodeIndex",
+        search_key=DocumentReferenceMetadataFields.CURRENT_GP_ODS.value,
+        search_condition="Y12345",
+        requested_fields=["NhsNumber", "Uploaded"],
+        query_filter=None,
+        max_items=10,
+        prefetch=False,
+    )
+
+
+@freeze_time("2023-10-1 13:00:00")
+def test_is_upload_in_process_accepts_document_reference_view():
+    view = DocumentReferenceView(
+        uploaded=False,
+        uploading=True,
+        last_updated=int(datetime.now().timestamp()),
+        doc_status="preliminary",
+    )
+
+    assert DocumentService.is_upload_in_process(view)
+
 
 def test_get_batch_document_references_by_id_success(mock_service):
     document_ids = ["doc1", "doc2"]
@@ -2,7 +2,12 @@ import pytest
 import requests_mock
 from enums.feature_flags import FeatureFlags
 from enums.lambda_error import LambdaError
-from services.feature_flags_service import FeatureFlagService
+from requests.exceptions import ConnectTimeout
+from services.feature_flags_service import (
+    APP_CONFIG_TIMEOUT_SECONDS,
+    FeatureFlagService,
+    feature_flags_cache,
+)
 from tests.unit.conftest import TEST_UUID
 from utils.constants.ssm import UPLOAD_PILOT_ODS_ALLOWED_LIST
 from utils.lambda_exceptions import FeatureFlagsException, LambdaException
@@ -103,6 +108,27 @@ def test_request_app_config_data_catch_all_raises_failure_exception(
     assert e.value.__dict__ == expected
 
 
+def test_request_app_config_data_sets_timeout(mock_requests, mock_feature_flag_service):
+    mock_requests.get(test_url, json=success_200_all_response, status_code=200)
+
+    mock_feature_flag_service.request_app_config_data(test_url)
+
+    assert mock_requests.last_request.timeout == APP_CONFIG_TIMEOUT_SECONDS
+
+
+def test_request_app_config_data_timeout_raises_failure_exception(
+    mock_requests, mock_feature_flag_service
+):
+    mock_requests.get(test_url, exc=ConnectTimeout)
+
+    expected = LambdaException(500, LambdaError.FeatureFlagFailure).__dict__
+
+    with pytest.raises(FeatureFlagsException) as e:
+        mock_feature_flag_service.request_app_config_data(test_url)
+
+    assert e.value.__dict__ == expected
+
+
 def test_get_feature_flags_returns_all_flags(mock_requests, mock_feature_flag_service):
     mock_requests.get(test_url, json=success_200_all_response, status_code=200)
     mock_feature_flag_service.request_app_config_data.return_value = (
@@ -145,10 +171,7 @@ def test_get_feature_flags_invalid_raises_exception(
 def test_get_feature_flags_by_flag_returns_single_flag(
     mock_requests, mock_feature_flag_service
 ):
-    mock_requests.get(test_url, json=success_200_with_filter_reponse, status_code=200)
-    mock_feature_flag_service.request_app_config_data.return_value = (
-        success_200_with_filter_reponse
-    )
+    mock_requests.get(test_url, json=success_200_all_response, status_code=200)
 
     expected = {"testFeature1": True}
 
@@ -161,9 +184,8 @@ def test_get_feature_flags_by_flag_no_flag_raises_exception(
     mock_requests, mock_feature_flag_service
 ):
     mock_requests.get(test_url, json=empty_response, status_code=200)
-    mock_feature_flag_service.request_app_config_data.return_value = empty_response
 
-    expected = LambdaException(500, LambdaError.FeatureFlagParseError).__dict__
+    expected = LambdaException(404, LambdaError.FeatureFlagNotFound).__dict__
 
     with pytest.raises(FeatureFlagsException) as e:
         mock_feature_flag_service.get_feature_flags_by_flag("testFeature1")
@@ -257,12 +279,15 @@ def test_get_feature_flags_overwrites_upload_flag(
     )
     mocker.patch.object(
         mock_feature_flag_service,
-        "request_app_config_data",
-        return_value={
-            FeatureFlags.UPLOAD_LLOYD_GEORGE_WORKFLOW_ENABLED.value: app_config_response,
-            FeatureFlags.UPLOAD_LAMBDA_ENABLED.value: app_config_response,
-            "some_other_flag": {"enabled": True},
-        },
+        "request_app_config",
+        return_value=(
+            {
+                FeatureFlags.UPLOAD_LLOYD_GEORGE_WORKFLOW_ENABLED.value: app_config_response,
+                FeatureFlags.UPLOAD_LAMBDA_ENABLED.value: app_config_response,
+                "some_other_flag": {"enabled": True},
+            },
+            "1",
+        ),
     )
 
     flags = mock_feature_flag_service.get_feature_flags()
@@ -299,8 +324,8 @@ def test_get_feature_flags_by_flag_overwrites_upload_flag(
     )
     mocker.patch.object(
         mock_feature_flag_service,
-        "request_app_config_data",
-        return_value={"enabled": feature_flag_enabled_value},
+        "request_app_config",
+        return_value=({flag_name: {"enabled": feature_flag_enabled_value}}, "1"),
     )
 
     flags = mock_feature_flag_service.get_feature_flags_by_flag(flag_name)
@@ -315,11 +340,82 @@ def test_get_feature_flags_by_flag_for_non_upload_flag(
     mocker.patch.object(mock_feature_flag_service, "check_if_ods_code_is_in_pilot")
     mocker.patch.object(
         mock_feature_flag_service,
-        "request_app_config_data",
-        return_value={"enabled": True},
+        "request_app_config",
+        return_value=({flag_name: {"enabled": True}}, "1"),
     )
 
     flags = mock_feature_flag_service.get_feature_flags_by_flag(flag_name)
 
     assert flags[flag_name] is True
     mock_feature_flag_service.check_if_ods_code_is_in_pilot.assert_not_called()
+
+
+def test_feature_flags_document_is_fetched_once_while_fresh(
+    mock_requests, mock_feature_flag_service
+):
+    mock_requests.get(test_url, json=success_200_all_response, status_code=200)
+
+    mock_feature_flag_service.get_feature_flags_by_flag("testFeature1")
+    FeatureFlagService().get_feature_flags_by_flag("testFeature3")
+    FeatureFlagService().get_feature_flags()
+
+    assert mock_requests.call_count == 1
+
+
+def test_feature_flags_are_refreshed_in_background_when_version_changes(
+    mocker, mock_requests, mock_feature_flag_service
+):
+    clock = {"now": 1000.0}
+    mocker.patch("time.monotonic", side_effect=lambda: clock["now"])
+    mock_requests.get(
+        test_url,
+        [
+            {
+                "json": success_200_all_response,
+                "headers": {"Configuration-Version": "1"},
+            },
+            {
+                "json": {"testFeature1": {"enabled": False}},
+                "headers": {"Configuration-Version": "2"},
+            },
+        ],
+    )
+    mock_feature_flag_service.get_feature_flags_by_flag("testFeature1")
+
+    clock["now"] += feature_flags_cache.refresh_interval_seconds
+    stale = mock_feature_flag_service.get_feature_flags_by_flag("testFeature1")
+    feature_flags_cache.refresh_thread.join()
+    refreshed = mock_feature_flag_service.get_feature_flags_by_flag("testFeature1")
+
+    assert stale == {"testFeature1": True}
+    assert refreshed == {"testFeature1": False}
+    assert feature_flags_cache.version == "2"
+
+
+def test_fetch_feature_flags_returns_none_when_version_is_unchanged(
+    mock_requests, mock_feature_flag_service
+):
+    mock_requests.get(
+        test_url,
+        json=success_200_all_response,
+        headers={"Configuration-Version": "1"},
+    )
+
+    assert mock_feature_flag_service.fetch_feature_flags("1") is None
+    assert mock_feature_flag_service.fetch_feature_flags("0") == (
+        {"testFeature1": True, "testFeature2": True, "testFeature3": False},
+        "1",
+    )
+
+
+def test_pilot_ods_codes_are_cached_as_frozenset(mock_feature_flag_service):
+    mock_feature_flag_service.ssm_service.get_ssm_parameter.return_value = "ODS1,ODS2"
+
+    assert mock_feature_flag_service.check_if_ods_code_is_in_pilot() is False
+    request_context.authorization["selected_organisation"]["org_ods_code"] = "ODS2"
+    assert mock_feature_flag_service.check_if_ods_code_is_in_pilot() is True
+
+    assert mock_feature_flag_service.get_pilot_ods_codes() == frozenset(
+        ["ODS1", "ODS2"]
+    )
+    mock_feature_flag_service.ssm_service.get_ssm_parameter.assert_called_once()
@@ -0,0 +1,145 @@
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+from services.file_size_backfill_service import FileSizeBackfillService
+from tests.unit.conftest import MOCK_LG_BUCKET, MOCK_LG_TABLE_NAME, TEST_NHS_NUMBER
+from utils.common_query_filters import MissingFileSize
+
+MOCK_CONDITIONAL_CHECK_FAILED = ClientError(
+    {"Error": {"Code": "ConditionalCheckFailedException", "Message": "test"}},
+    "UpdateItem",
+)
+
+
+def build_item(document_id: str, nhs_number: str = TEST_NHS_NUMBER) -> dict:
+    return {
+        "ID": document_id,
+        "FileLocation": f"s3://{MOCK_LG_BUCKET}/{nhs_number}/{document_id}",
+    }
+
+
+@pytest.fixture
+def mock_service(set_env, mocker):
+    mocker.patch("services.file_size_backfill_service.DynamoDBService")
+    mocker.patch("services.file_size_backfill_service.S3Service")
+    service = FileSizeBackfillService(max_workers=2)
+    yield service
+
+
+@pytest.fixture
+def checkpoint_file(tmp_path):
+    yield str(tmp_path / "checkpoint.json")
+
+
+def test_backfill_items_lists_shared_prefix_once_and_heads_single_objects(
+    mock_service,
+):
+    mock_service.s3_service.list_all_objects.return_value = [
+        {"Key": f"{TEST_NHS_NUMBER}/doc-1", "Size": 100},
+        {"Key": f"{TEST_NHS_NUMBER}/doc-2", "Size": 200},
+        {"Key": f"{TEST_NHS_NUMBER}/not-requested", "Size": 300},
+    ]
+    mock_service.s3_service.get_file_size.return_value = 400
+    items = [
+        build_item("doc-1"),
+        build_item("doc-2"),
+        build_item("doc-3", nhs_number="9000000025"),
+    ]
+
+    stats = mock_service.backfill_items(MOCK_LG_TABLE_NAME, items)
+
+    assert stats == {"scanned": 3, "updated": 3}
+    mock_service.s3_service.list_all_objects.assert_called_once_with(
+        MOCK_LG_BUCKET, prefix=f"{TEST_NHS_NUMBER}/"
+    )
+    mock_service.s3_service.get_file_size.assert_called_once_with(
+        MOCK_LG_BUCKET, "9000000025/doc-3"
+    )
+    mock_service.dynamo_service.update_item.assert_any_call(
+        table_name=MOCK_LG_TABLE_NAME,
+        key_pair={"ID": "doc-2"},
+        updated_fields={"FileSize": 200},
+        condition_expression="attribute_exists(ID) AND attribute_not_exists(FileSize)",
+    )
+
+
+def test_backfill_items_counts_missing_objects_and_already_backfilled_items(
+    mock_service,
+):
+    def get_file_size(bucket, key):
+        if key.endswith("doc-1"):
+            raise ClientError(
+                {"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject"
+            )
+        return 100
+
+    mock_service.s3_service.get_file_size.side_effect = get_file_size
+    mock_service.dynamo_service.update_item.side_effect = MOCK_CONDITIONAL_CHECK_FAILED
+
+    stats = mock_service.backfill_items(
+        MOCK_LG_TABLE_NAME,
+        [build_item("doc-1"), build_item("doc-2", nhs_number="9000000025")],
+    )
+
+    assert stats["missing_object"] == 1
+    assert stats["skipped"] == 1
+    assert "updated" not in stats
+
+
+def test_backfill_items_raises_unexpected_dynamo_errors(mock_service):
+    mock_service.s3_service.get_file_size.return_value = 100
+    mock_service.dynamo_service.update_item.side_effect = ClientError(
+        {"Error": {"Code": "InternalServerError", "Message": "test"}}, "UpdateItem"
+    )
+
+    with pytest.raises(ClientError):
+        mock_service.backfill_items(MOCK_LG_TABLE_NAME, [build_item("doc-1")])
+
+
+def test_backfill_table_scans_every_page_and_saves_checkpoint(
+    mock_service, mocker, checkpoint_file
+):
+    mock_service.checkpoint_file = checkpoint_file
+    mock_service.dynamo_service.scan_table.side_effect = [
+        {"Items": [build_item("doc-1")], "LastEvaluatedKey": {"ID": "doc-1"}},
+        {"Items": [build_item("doc-2")]},
+    ]
+    mocker.patch.object(mock_service, "backfill_items", return_value={"updated": 1})
+
+    stats = mock_service.backfill_table(MOCK_LG_TABLE_NAME)
+
+    assert stats == {"updated": 2}
+    mock_service.dynamo_service.scan_table.assert_called_with(
+        table_name=MOCK_LG_TABLE_NAME,
+        exclusive_start_key={"ID": "doc-1"},
+        filter_expression=MissingFileSize,
+    )
+    with open(checkpoint_file) as saved_checkpoint:
+        assert json.load(saved_checkpoint) == {
+            MOCK_LG_TABLE_NAME: {"exclusive_start_key": None, "completed": True}
+        }
+
+
+def test_backfill_table_resumes_from_checkpoint(mock_service, mocker, checkpoint_file):
+    with open(checkpoint_file, "w") as saved_checkpoint:
+        json.dump(
+            {
+                MOCK_LG_TABLE_NAME: {
+                    "exclusive_start_key": {"ID": "doc-1"},
+                    "completed": False,
+                },
+                "completed_table": {"exclusive_start_key": None, "completed": True},
+            },
+            saved_checkpoint,
+        )
+    service = FileSizeBackfillService(checkpoint_file=checkpoint_file)
+    service.dynamo_service.scan_table.return_value = {"Items": []}
+
+    service.backfill_tables([MOCK_LG_TABLE_NAME, "completed_table"])
+
+    service.dynamo_service.scan_table.assert_called_once_with(
+        table_name=MOCK_LG_TABLE_NAME,
+        exclusive_start_key={"ID": "doc-1"},
+        filter_expression=MissingFileSize,
+    )
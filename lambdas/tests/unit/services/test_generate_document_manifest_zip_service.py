@@ -1,5 +1,5 @@
 import io
-import shutil
+import os
 import zipfile
 
 import pytest
@@ -7,6 +7,7 @@ from botocore.exceptions import ClientError
 from enums.lambda_error import LambdaError
 from enums.trace_status import TraceStatus
 from models.zip_trace import DocumentManifestZipTrace
+from services.base.s3_multipart_upload_stream import MIN_PART_SIZE_BYTES
 from services.generate_document_manifest_zip_service import DocumentManifestZipService
 from utils.exceptions import InvalidDocumentReferenceException
 from utils.lambda_exceptions import GenerateManifestZipException
@@ -35,6 +36,7 @@ TEST_DYNAMO_RESPONSE = {
 }
 
 TEST_ZIP_TRACE = DocumentManifestZipTrace.model_validate(TEST_DYNAMO_RESPONSE)
+TEST_FILE_CONTENT = b"Dummy file content"
 
 
 @pytest.fixture
@@ -58,13 +60,17 @@ def mock_dynamo_service(mock_service, mocker):
 
 
 @pytest.fixture
-def mock_stream_context_manager():
-    def _stream_context_manager(file_content: bytes):
-        stream = io.BytesIO(file_content)
-        stream.seek(0)
-        return stream
+def mock_download_file(mock_s3_service):
+    def download_file(s3_bucket_name, file_key, download_path):
+        with open(download_path, "wb") as downloaded_file:
+            downloaded_file.write(TEST_FILE_CONTENT)
 
-    return _stream_context_manager
+    mock_s3_service.download_file.side_effect = download_file
+    yield mock_s3_service.download_file
+
+
+def uploaded_zip_file(mock_s3_service) -> io.BytesIO:
+    return mock_s3_service.upload_file_obj.call_args.kwargs["file_obj"]
 
 
 def test_get_file_bucket_and_key_returns_correct_items(mock_service):
@@ -88,50 +94,6 @@ def test_get_file_bucket_and_key_throws_exception_when_not_passed_incorrect_form
     assert mock_service.zip_trace_object.job_status == TraceStatus.FAILED
 
 
-def test_upload_zip_file(mocker, mock_service, mock_s3_service):
-    zip_buffer = io.BytesIO(b"Fake ZIP content")
-    zip_buffer.seek(0)
-
-    mock_upload = mocker.patch.object(mock_s3_service, "upload_file_obj")
-
-    mock_service.upload_zip_file(zip_buffer)
-
-    expected_key = mock_service.zip_file_name
-    expected_location = f"s3://{mock_service.zip_output_bucket}/{expected_key}"
-
-    mock_upload.assert_called_once_with(
-        zip_buffer, mock_service.zip_output_bucket, expected_key
-    )
-
-    assert mock_service.zip_trace_object.zip_file_location == expected_location
-    assert mock_service.zip_trace_object.job_status == TraceStatus.COMPLETED
-
-
-def test_upload_zip_file_raises_exception(mocker, mock_service, mock_s3_service):
-    zip_buffer = io.BytesIO(b"Fake ZIP content")
-    zip_buffer.seek(0)
-
-    error_response = {"Error": {"Code": "500", "Message": "test error"}}
-    mocker.patch.object(
-        mock_s3_service,
-        "upload_file_obj",
-        side_effect=ClientError(error_response, "UploadObject"),
-    )
-
-    with pytest.raises(GenerateManifestZipException) as exc_info:
-        mock_service.upload_zip_file(zip_buffer)
-
-    expected_key = mock_service.zip_file_name
-    expected_location = f"s3://{mock_service.zip_output_bucket}/{expected_key}"
-
-    assert mock_service.zip_trace_object.zip_file_location == expected_location
-    assert mock_service.zip_trace_object.job_status == TraceStatus.FAILED
-    exception = exc_info.value
-    assert isinstance(exception, GenerateManifestZipException)
-    assert exception.status_code == 500
-    assert exception.error == LambdaError.ZipServiceClientError
-
-
 def test_update_dynamo(mock_service, mock_dynamo_service):
     mock_service.update_dynamo_with_fields({"job_status"})
 
@@ -154,35 +116,74 @@ def test_update_failed_status(mock_service):
     assert mock_service.zip_trace_object.job_status == TraceStatus.FAILED
 
 
-def test_stream_zip_documents(
-    mocker, mock_service, mock_s3_service, mock_stream_context_manager
-):
-    file_content = b"Dummy file content"
-
-    mock_s3_service.get_object_stream.side_effect = (
-        lambda *args, **kwargs: mock_stream_context_manager(file_content)
-    )
-    mock_copyfileobj = mocker.patch("shutil.copyfileobj", wraps=shutil.copyfileobj)
-
-    zip_buffer = mock_service.stream_zip_documents()
+def test_stream_zip_documents(mock_service, mock_s3_service, mock_download_file):
+    mock_service.stream_zip_documents()
 
     expected_files = list(mock_service.zip_trace_object.files_to_download.values())
+    expected_key = mock_service.zip_file_name
+    expected_location = f"s3://{mock_service.zip_output_bucket}/{expected_key}"
 
-    with zipfile.ZipFile(zip_buffer, "r") as zipf:
-        file_list = zipf.namelist()
-        assert sorted(file_list) == sorted(expected_files)
+    with zipfile.ZipFile(uploaded_zip_file(mock_s3_service), "r") as zipf:
+        assert sorted(zipf.namelist()) == sorted(expected_files)
 
         for file_name in expected_files:
             with zipf.open(file_name) as f:
-                assert f.read() == file_content
+                assert f.read() == TEST_FILE_CONTENT
+
+    upload_kwargs = mock_s3_service.upload_file_obj.call_args.kwargs
+    assert upload_kwargs["s3_bucket_name"] == mock_service.zip_output_bucket
+    assert upload_kwargs["file_key"] == expected_key
+    assert mock_service.zip_trace_object.zip_file_location == expected_location
+    assert mock_service.zip_trace_object.job_status == TraceStatus.COMPLETED
+
+
+def test_stream_zip_documents_keeps_document_order_with_bounded_read_ahead(
+    mock_service, mock_s3_service, mock_download_file
+):
+    mock_service.max_concurrent_downloads = 1
+    mock_service.zip_trace_object = DocumentManifestZipTrace.model_validate(
+        {
+            **TEST_DYNAMO_RESPONSE,
+            "FilesToDownload": {
+                f"{TEST_DOCUMENT_LOCATION}{index}": f"file_{index}.pdf"
+                for index in range(5)
+            },
+        }
+    )
+
+    mock_service.stream_zip_documents()
 
-    assert mock_copyfileobj.called
+    with zipfile.ZipFile(uploaded_zip_file(mock_s3_service), "r") as zipf:
+        assert zipf.namelist() == [f"file_{index}.pdf" for index in range(5)]
+
+
+def test_stream_zip_documents_uploads_parts_as_they_fill(mock_service, mock_s3_service):
+    large_content = os.urandom(MIN_PART_SIZE_BYTES + 1024)
+
+    def download_file(s3_bucket_name, file_key, download_path):
+        with open(download_path, "wb") as downloaded_file:
+            downloaded_file.write(large_content)
+
+    mock_s3_service.download_file.side_effect = download_file
+    mock_s3_service.create_multipart_upload.return_value = "test-upload-id"
+    mock_s3_service.upload_part.side_effect = (
+        lambda part_number, **kwargs: f"etag-{part_number}"
+    )
+
+    mock_service.stream_zip_documents()
+
+    mock_s3_service.upload_file_obj.assert_not_called()
+    assert mock_s3_service.upload_part.call_count >= 2
+    complete_kwargs = mock_s3_service.complete_multipart_upload.call_args.kwargs
+    assert [part["PartNumber"] for part in complete_kwargs["parts"]] == list(
+        range(1, mock_s3_service.upload_part.call_count + 1)
+    )
 
 
 def test_stream_zip_documents_raises_client_error(
     mocker, mock_service, mock_s3_service
 ):
-    mock_s3_service.get_object_stream.side_effect = MOCK_CLIENT_ERROR
+    mock_s3_service.download_file.side_effect = MOCK_CLIENT_ERROR
 
     mocker.patch.object(
         mock_service, "get_file_bucket_and_key", return_value=("bucket", "key")
@@ -194,3 +195,24 @@ def test_stream_zip_documents_raises_client_error(
     assert exc_info.value.error == LambdaError.ZipServiceClientError
     assert exc_info.value.status_code == 500
     assert mock_service.zip_trace_object.job_status == TraceStatus.FAILED
+    mock_s3_service.upload_file_obj.assert_not_called()
+
+
+def test_stream_zip_documents_raises_exception_when_upload_fails(
+    mock_service, mock_s3_service, mock_download_file
+):
+    error_response = {"Error": {"Code": "500", "Message": "test error"}}
+    mock_s3_service.upload_file_obj.side_effect = ClientError(
+        error_response, "UploadObject"
+    )
+
+    with pytest.raises(GenerateManifestZipException) as exc_info:
+        mock_service.stream_zip_documents()
+
+    expected_key = mock_service.zip_file_name
+    expected_location = f"s3://{mock_service.zip_output_bucket}/{expected_key}"
+
+    assert mock_service.zip_trace_object.zip_file_location == expected_location
+    assert mock_service.zip_trace_object.job_status == TraceStatus.FAILED
+    assert exc_info.value.status_code == 500
+    assert exc_info.value.error == LambdaError.ZipServiceClientError
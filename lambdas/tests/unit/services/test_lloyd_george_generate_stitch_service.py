@@ -417,6 +417,19 @@ def test_get_total_file_size_in_bytes(stitch_service, mocker, single_mock_doc):
     )
 
 
+def test_get_total_file_size_in_bytes_uses_stored_file_size(
+    stitch_service, mocker, single_mock_doc
+):
+    single_mock_doc.file_size = 4096
+    mock_s3_service = mocker.Mock()
+    stitch_service.s3_service = mock_s3_service
+
+    actual = stitch_service.get_total_file_size_in_bytes(document=single_mock_doc)
+
+    assert actual == 4096
+    mock_s3_service.get_file_size.assert_not_called()
+
+
 def test_fetch_pdf_calls_expected_methods(stitch_service, mocker, single_mock_doc):
     mock_get_file_key = mocker.patch(
         "services.lloyd_george_generate_stitch_service.get_file_key_from_s3_url"
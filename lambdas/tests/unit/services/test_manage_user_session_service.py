@@ -1,7 +1,7 @@
 from unittest.mock import call
 
 import pytest
-from services.manage_user_session_access import ManageUserSessionAccess
+from services.manage_user_session_access import ManageUserSessionAccess, session_cache
 from tests.unit.conftest import AUTH_SESSION_TABLE_NAME, TEST_NHS_NUMBER, TEST_UUID
 from tests.unit.services.test_authoriser_service import (
     MOCK_CURRENT_SESSION,
@@ -253,3 +253,46 @@ def test_find_login_session_raises_auth_exception(mocker, mock_service):
 
     with pytest.raises(AuthorisationException):
         mock_service.find_login_session("test session id")
+
+
+def test_find_login_session_with_cache_only_queries_table_once(mocker, mock_service):
+    mocker.patch("time.time", return_value=12345678900)
+    mock_service.db_service.query_all_fields.return_value = {
+        "Items": [MOCK_CURRENT_SESSION]
+    }
+
+    for _ in range(3):
+        actual = mock_service.find_login_session(MOCK_SESSION_ID, use_cache=True)
+
+    assert actual == MOCK_CURRENT_SESSION
+    mock_service.db_service.query_all_fields.assert_called_once()
+    assert session_cache.metrics.hits == 2
+
+
+def test_find_login_session_does_not_cache_expired_session(mocker, mock_service):
+    mocker.patch("time.time", return_value=12345678960)
+    mock_service.db_service.query_all_fields.return_value = {
+        "Items": [MOCK_CURRENT_SESSION]
+    }
+
+    mock_service.find_login_session(MOCK_SESSION_ID, use_cache=True)
+    mock_service.find_login_session(MOCK_SESSION_ID, use_cache=True)
+
+    assert mock_service.db_service.query_all_fields.call_count == 2
+
+
+def test_update_auth_session_table_invalidates_cached_session(mock_service):
+    session_cache.put(TEST_UUID, MOCK_CURRENT_SESSION)
+
+    mock_service.update_auth_session_table_with_new_nhs_number(
+        field_name="AllowedNHSNumbers",
+        nhs_number=TEST_NHS_NUMBER,
+        existing_nhs_numbers="",
+        ndr_session_id=TEST_UUID,
+    )
+
+    assert session_cache.get(TEST_UUID) is None
+
+
+def test_session_cache_is_bounded():
+    assert session_cache.max_entries
@@ -8,6 +8,7 @@ from freezegun import freeze_time
 from openpyxl.reader.excel import load_workbook
 from pypdf import PdfReader
 from services.ods_report_service import OdsReportService
+from utils.common_query_filters import NotDeleted
 from utils.lambda_exceptions import OdsReportException
 
 
@@ -128,6 +129,37 @@ def test_scan_table_with_filter_no_results(
         ods_report_service.scan_table_with_filter("ODS123")
 
 
+def test_query_table_by_index_streams_results_for_each_ods_code(
+    ods_report_service, mocked_context
+):
+    ods_report_service.dynamo_service.iter_query.return_value = iter(
+        [
+            {DocumentReferenceMetadataFields.NHS_NUMBER.value: "NHS123"},
+            {DocumentReferenceMetadataFields.NHS_NUMBER.value: "NHS456"},
+        ]
+    )
+
+    results = ods_report_service.query_table_by_index("ODS123")
+
+    assert len(results) == 2
+    ods_report_service.dynamo_service.iter_query.assert_called_once_with(
+        table_name=ods_report_service.table_name,
+        index_name="OdsCodeIndex",
+        search_key=DocumentReferenceMetadataFields.CURRENT_GP_ODS.value,
+        search_condition="ODS123",
+        requested_fields=[DocumentReferenceMetadataFields.NHS_NUMBER.value],
+        query_filter=NotDeleted,
+        prefetch=True,
+    )
+
+
+def test_query_table_by_index_no_results(ods_report_service, mocked_context):
+    ods_report_service.dynamo_service.iter_query.return_value = iter([])
+
+    with pytest.raises(OdsReportException):
+        ods_report_service.query_table_by_index("ODS123")
+
+
 @freeze_time("2024-01-01T12:00:00Z")
 def test_create_and_save_ods_report_create_csv(
     ods_report_service,
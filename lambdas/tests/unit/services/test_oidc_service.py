@@ -70,7 +70,7 @@ def test_fetch_tokens_successfully(mocker, oidc_service):
         "acr": "AAL3",
     }
 
-    mocker.patch("requests.post", return_value=mock_cis2_response)
+    mocker.patch.object(oidc_service.session, "post", return_value=mock_cis2_response)
     mocked_id_token_validation = mocker.patch.object(
         oidc_service, "validate_and_decode_token", return_value=mock_decoded_claim_set
     )
@@ -84,8 +84,9 @@ def test_fetch_tokens_successfully(mocker, oidc_service):
 
 
 def test_fetch_tokens_raises_exception_for_invalid_auth_code(mocker, oidc_service):
-    mocker.patch(
-        "requests.post",
+    mocker.patch.object(
+        oidc_service.session,
+        "post",
         return_value=MockResponse(
             400,
             {
@@ -114,7 +115,7 @@ def test_fetch_tokens_raises_AuthorisationException_for_invalid_id_token(
             "expires_in": 3599,
         },
     )
-    mocker.patch("requests.post", return_value=mock_cis2_response)
+    mocker.patch.object(oidc_service.session, "post", return_value=mock_cis2_response)
     mocker.patch.object(
         oidc_service,
         "validate_and_decode_token",
@@ -135,7 +136,7 @@ def test_fetch_user_org_code(mocker, oidc_service, mock_userinfo):
 
     mock_response = MockResponse(status_code=200, json_data=mock_userinfo["user_info"])
 
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch.object(oidc_service.session, "get", return_value=mock_response)
 
     actual = oidc_service.fetch_user_org_code(
         mock_userinfo["user_info"], mock_decoded_claim_set["selected_roleid"]
@@ -154,7 +155,7 @@ def test_fetch_user_org_codes_raises_exception_for_invalid_access_token(
             "error": "invalid_token",
         },
     )
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch.object(oidc_service.session, "get", return_value=mock_response)
 
     with pytest.raises(OidcApiException):
         oidc_service.fetch_userinfo("fake access token")
@@ -342,7 +343,7 @@ def test_fetch_user_role_code_raises_auth_exception_if_no_role_codes_with_specif
 
 def test_fetch_user_info(oidc_service, mocker, mock_userinfo):
     mock_response = MockResponse(status_code=200, json_data=mock_userinfo["user_info"])
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch.object(oidc_service.session, "get", return_value=mock_response)
     mock_token = "access_token"
     actual = oidc_service.fetch_userinfo(mock_token)
 
@@ -351,7 +352,7 @@ def test_fetch_user_info(oidc_service, mocker, mock_userinfo):
 
 def test_fetch_user_info_throws_exception_for_non_200_response(oidc_service, mocker):
     mock_response = MockResponse(status_code=400, json_data="")
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch.object(oidc_service.session, "get", return_value=mock_response)
 
     with pytest.raises(OidcApiException):
         oidc_service.fetch_userinfo("access_token")
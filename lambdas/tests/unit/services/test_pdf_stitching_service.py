@@ -1,7 +1,8 @@
 import copy
 import json
 import os
-import sys
+import shutil
+import time
 from io import BytesIO
 from random import shuffle
 from unittest.mock import call
@@ -15,7 +16,8 @@ from freezegun.api import freeze_time
 from models.fhir.R4.fhir_document_reference import Attachment
 from models.sqs.nrl_sqs_message import NrlSqsMessage
 from models.sqs.pdf_stitching_sqs_message import PdfStitchingSqsMessage
-from pypdf import PdfReader, PdfWriter
+from pikepdf import Pdf
+from pypdf import PdfReader
 from tests.unit.conftest import (
     MOCK_CLIENT_ERROR,
     MOCK_LG_BUCKET,
@@ -66,11 +68,6 @@ def mock_process_stitching(mocker, mock_service):
     return mocker.patch.object(mock_service, "process_stitching")
 
 
-@pytest.fixture
-def mock_upload_stitched_file(mocker, mock_service):
-    return mocker.patch.object(mock_service, "upload_stitched_file")
-
-
 @pytest.fixture
 def mock_migrate_multipart_references(mocker, mock_service):
     return mocker.patch.object(mock_service, "migrate_multipart_references")
@@ -107,15 +104,16 @@ def mock_rollback_reference_migration(mocker, mock_service):
 
 
 @pytest.fixture
-def mock_download_fileobj():
-    def _mock_download_fileobj(
-        s3_object_data: dict[str, BytesIO], Bucket: str, Key: str, Fileobj: BytesIO
+def mock_download_file():
+    def _mock_download_file(
+        s3_object_paths: dict[str, str],
+        s3_bucket_name: str,
+        file_key: str,
+        download_path: str,
     ):
-        if Key in s3_object_data:
-            Fileobj.write(s3_object_data[Key].read())
-        Fileobj.seek(0)
+        shutil.copyfile(s3_object_paths[file_key], download_path)
 
-    return _mock_download_fileobj
+    return _mock_download_file
 
 
 @pytest.mark.parametrize(
@@ -163,21 +161,20 @@ def test_process_message(
     mock_create_stitched_reference,
     mock_sort_multipart_object_keys,
     mock_process_stitching,
-    mock_upload_stitched_file,
     mock_migrate_multipart_references,
     mock_write_stitching_reference,
     mock_publish_nrl_message,
 ):
     test_message_body = json.loads(stitching_queue_message_event["Records"][0]["body"])
     test_message = PdfStitchingSqsMessage.model_validate(test_message_body)
-    test_stream = BytesIO()
     test_sorted_keys = [reference.s3_file_key for reference in TEST_DOCUMENT_REFERENCES]
+    test_file_size = 54321
 
     mock_sort_multipart_object_keys.return_value = test_sorted_keys
-    mock_process_stitching.return_value = test_stream
+    mock_process_stitching.return_value = test_file_size
     mock_retrieve_multipart_references.return_value = TEST_DOCUMENT_REFERENCES
 
-    def set_stitched_reference(document_reference, stitch_file_size, *args, **kwargs):
+    def set_stitched_reference(document_reference, *args, **kwargs):
         copied_ref = copy.deepcopy(document_reference)
         copied_ref.s3_file_key = "stitched/key.pdf"
         mock_service.stitched_reference = copied_ref
@@ -188,23 +185,50 @@ def test_process_message(
 
     mock_create_stitched_reference.assert_called_once_with(
         document_reference=TEST_DOCUMENT_REFERENCES[0],
-        stitch_file_size=sys.getsizeof(test_stream),
     )
     mock_sort_multipart_object_keys.assert_called_once_with()
     mock_process_stitching.assert_called_once_with(s3_object_keys=test_sorted_keys)
-    mock_upload_stitched_file.assert_called_once_with(stitching_data_stream=test_stream)
+    assert mock_service.stitched_reference.file_size == test_file_size
     mock_migrate_multipart_references.assert_called_once()
     mock_write_stitching_reference.assert_called_once()
     mock_publish_nrl_message.assert_called_once()
 
 
+def test_process_message_rolls_back_when_stitching_fails(
+    mock_service,
+    mock_retrieve_multipart_references,
+    mock_sort_multipart_object_keys,
+    mock_process_stitching,
+    mock_migrate_multipart_references,
+    mock_write_stitching_reference,
+    mock_rollback_reference_migration,
+):
+    test_message_body = json.loads(stitching_queue_message_event["Records"][0]["body"])
+    test_message = PdfStitchingSqsMessage.model_validate(test_message_body)
+    mock_retrieve_multipart_references.return_value = TEST_DOCUMENT_REFERENCES
+    mock_process_stitching.side_effect = PdfStitchingException(
+        400, LambdaError.StitchError
+    )
+    mock_service.stitched_file_uploaded = True
+
+    with pytest.raises(PdfStitchingException):
+        mock_service.process_message(test_message)
+
+    assert mock_service.stitched_reference is not None
+    assert not mock_service.stitched_file_uploaded
+    mock_service.dynamo_service.delete_item.assert_not_called()
+    mock_service.s3_service.delete_object.assert_not_called()
+    mock_rollback_reference_migration.assert_called_once()
+    mock_migrate_multipart_references.assert_not_called()
+    mock_write_stitching_reference.assert_not_called()
+
+
 def test_process_message_handles_singular_or_none_references(
     mock_service,
     mock_retrieve_multipart_references,
     mock_create_stitched_reference,
     mock_sort_multipart_object_keys,
     mock_process_stitching,
-    mock_upload_stitched_file,
     mock_migrate_multipart_references,
     mock_write_stitching_reference,
     mock_publish_nrl_message,
@@ -219,7 +243,6 @@ def test_process_message_handles_singular_or_none_references(
     mock_create_stitched_reference.assert_not_called()
     mock_sort_multipart_object_keys.assert_not_called()
     mock_process_stitching.assert_not_called()
-    mock_upload_stitched_file.assert_not_called()
     mock_migrate_multipart_references.assert_not_called()
     mock_write_stitching_reference.assert_not_called()
     mock_publish_nrl_message.assert_not_called()
@@ -236,8 +259,7 @@ def test_process_message_handles_singular_or_none_references(
 )
 def test_create_stitched_reference(mock_service, mock_uuid, document_reference):
     assert not mock_service.stitched_reference
-    file_size = 1000000000
-    mock_service.create_stitched_reference(document_reference, file_size)
+    mock_service.create_stitched_reference(document_reference)
 
     actual = mock_service.stitched_reference
 
@@ -257,155 +279,240 @@ def test_create_stitched_reference(mock_service, mock_uuid, document_reference):
     assert actual.uploaded is True
     assert actual.uploading is False
     assert actual.last_updated == 1735732800
-    assert actual.file_size == file_size
     assert actual.s3_file_key == f"{TEST_NHS_NUMBER}/{TEST_UUID}"
     assert actual.s3_bucket_name == MOCK_LG_BUCKET
 
 
-def test_process_stitching(mock_service, mock_download_fileobj):
-    test_pdf_1 = os.path.join(TEST_BASE_DIRECTORY, "helpers/data/pdf/", "file1.pdf")
-    test_pdf_2 = os.path.join(TEST_BASE_DIRECTORY, "helpers/data/pdf/", "file2.pdf")
-    test_pdf_3 = os.path.join(TEST_BASE_DIRECTORY, "helpers/data/pdf/", "file3.pdf")
-
-    with open(test_pdf_1, "rb") as file:
-        test_pdf_1_bytes = file.read()
+def test_process_stitching(mock_service, mock_download_file, mocker):
+    s3_object_paths = {
+        f"file{number}.pdf": os.path.join(
+            TEST_BASE_DIRECTORY, "helpers/data/pdf/", f"file{number}.pdf"
+        )
+        for number in range(1, 4)
+    }
+    mock_service.s3_service.download_file.side_effect = (
+        lambda s3_bucket_name, file_key, download_path: mock_download_file(
+            s3_object_paths, s3_bucket_name, file_key, download_path
+        )
+    )
+    mock_upload = mocker.patch.object(mock_service, "upload_stitched_file")
+    uploaded = BytesIO()
 
-    with open(test_pdf_2, "rb") as file:
-        test_pdf_2_bytes = file.read()
+    def save_stitched_pdf(stitched_pdf):
+        stitched_pdf.save(uploaded)
+        return uploaded.tell()
 
-    with open(test_pdf_3, "rb") as file:
-        test_pdf_3_bytes = file.read()
+    mock_upload.side_effect = save_stitched_pdf
 
-    s3_object_data = {
-        "file1.pdf": BytesIO(test_pdf_1_bytes),
-        "file2.pdf": BytesIO(test_pdf_2_bytes),
-        "file3.pdf": BytesIO(test_pdf_3_bytes),
-    }
+    actual = mock_service.process_stitching(list(s3_object_paths.keys()))
 
-    expected_writer = PdfWriter()
-    expected_writer.add_page(PdfReader(stream=BytesIO(test_pdf_1_bytes)).pages[0])
-    expected_writer.add_page(PdfReader(stream=BytesIO(test_pdf_2_bytes)).pages[0])
-    expected_writer.add_page(PdfReader(stream=BytesIO(test_pdf_3_bytes)).pages[0])
+    assert actual == len(uploaded.getvalue())
+    assert mock_service.s3_service.download_file.call_count == 3
+    stitched_pages = PdfReader(BytesIO(uploaded.getvalue())).pages
+    assert len(stitched_pages) == 3
+    for stitched_page, path in zip(stitched_pages, s3_object_paths.values()):
+        assert stitched_page.extract_text() == PdfReader(path).pages[0].extract_text()
 
-    expected_stream = BytesIO()
-    expected_writer.write(expected_stream)
-    expected_stream.seek(0)
 
-    mock_service.s3_service.client.download_fileobj.side_effect = (
-        lambda Bucket, Key, Fileobj: mock_download_fileobj(
-            s3_object_data, Bucket, Key, Fileobj
+def test_process_stitching_merges_parts_in_groups_within_memory_budget(
+    mock_service, mock_download_file, mocker
+):
+    s3_object_paths = {
+        f"file{number}.pdf": os.path.join(
+            TEST_BASE_DIRECTORY, "helpers/data/pdf/", f"file{number}.pdf"
+        )
+        for number in range(1, 4)
+    }
+    mock_service.s3_service.download_file.side_effect = (
+        lambda s3_bucket_name, file_key, download_path: mock_download_file(
+            s3_object_paths, s3_bucket_name, file_key, download_path
         )
     )
+    mock_service.memory_budget_in_bytes = os.path.getsize(
+        s3_object_paths["file1.pdf"]
+    ) + os.path.getsize(s3_object_paths["file2.pdf"])
+    merged_files = []
+    merge_parts = mock_service.merge_parts
+
+    def record_merge(stitched_path, part_paths, spill_directory):
+        merged_path = merge_parts(stitched_path, part_paths, spill_directory)
+        merged_files.append([stitched_path, *part_paths])
+        assert not any(os.path.exists(path) for path in part_paths)
+        return merged_path
+
+    mocker.patch.object(mock_service, "merge_parts", side_effect=record_merge)
+    mock_upload = mocker.patch.object(mock_service, "upload_stitched_file")
+    uploaded = BytesIO()
+
+    def save_stitched_pdf(stitched_pdf):
+        stitched_pdf.save(uploaded)
+        return uploaded.tell()
+
+    mock_upload.side_effect = save_stitched_pdf
+
+    mock_service.process_stitching(list(s3_object_paths.keys()))
+
+    assert len(merged_files) == 1
+    assert merged_files[0][0] is None
+    assert [os.path.basename(path) for path in merged_files[0][1:]] == [
+        "0.pdf",
+        "1.pdf",
+    ]
+    stitched_pages = PdfReader(BytesIO(uploaded.getvalue())).pages
+    assert len(stitched_pages) == 3
+    for stitched_page, path in zip(stitched_pages, s3_object_paths.values()):
+        assert stitched_page.extract_text() == PdfReader(path).pages[0].extract_text()
+
+
+def test_merge_parts_deletes_merged_files(mock_service, tmp_path):
+    part_paths = []
+    for index in range(2):
+        part_path = str(tmp_path / f"{index}.pdf")
+        part_pdf = Pdf.new()
+        part_pdf.add_blank_page()
+        part_pdf.save(part_path)
+        part_paths.append(part_path)
+    stitched_path = mock_service.merge_parts(None, part_paths[:1], str(tmp_path))
+
+    actual = mock_service.merge_parts(stitched_path, part_paths[1:], str(tmp_path))
+
+    assert os.listdir(tmp_path) == [os.path.basename(actual)]
+    with Pdf.open(actual) as merged_pdf:
+        assert len(merged_pdf.pages) == 2
+
+
+def test_memory_budget_is_read_from_environment(set_env, monkeypatch):
+    monkeypatch.setenv("PDF_STITCHING_MEMORY_BUDGET_MB", "32")
 
-    actual_stream = mock_service.process_stitching(list(s3_object_data.keys()))
+    service = PdfStitchingService()
+
+    assert service.memory_budget_in_bytes == 32 * 1024 * 1024
+
+
+def test_process_stitching_handles_client_error(mock_service):
+    mock_service.s3_service.download_file.side_effect = MOCK_CLIENT_ERROR
+
+    with pytest.raises(PdfStitchingException) as e:
+        mock_service.process_stitching(["file1.pdf"])
+
+    assert e.value.error is LambdaError.StitchError
+
+
+def test_prefetch_parts_yields_parts_in_order_when_downloads_finish_out_of_order(
+    mock_service, tmp_path
+):
+    test_keys = [f"{TEST_NHS_NUMBER}/test-key-{index}" for index in range(8)]
+    mock_service.max_concurrent_downloads = 4
+
+    def slow_early_parts(s3_bucket_name, file_key, download_path):
+        time.sleep(0.01 * (len(test_keys) - test_keys.index(file_key)))
+
+    mock_service.s3_service.download_file.side_effect = slow_early_parts
+
+    actual = list(mock_service.prefetch_parts(test_keys, str(tmp_path)))
+
+    assert actual == [str(tmp_path / f"{index}.pdf") for index in range(8)]
+
+
+def test_upload_stitched_file_streams_pdf_and_returns_size(mock_service):
+    mock_service.stitched_reference = TEST_1_OF_1_DOCUMENT_REFERENCE
+    test_pdf = Pdf.new()
+    test_pdf.add_blank_page()
+    expected = BytesIO()
+    test_pdf.save(expected)
+
+    actual = mock_service.upload_stitched_file(stitched_pdf=test_pdf)
 
-    assert actual_stream.read() == expected_stream.read()
+    assert actual == len(expected.getvalue())
+    mock_service.s3_service.upload_file_obj.assert_called_once()
+    upload_kwargs = mock_service.s3_service.upload_file_obj.call_args.kwargs
+    assert upload_kwargs["s3_bucket_name"] == MOCK_LG_BUCKET
+    assert upload_kwargs["file_key"] == TEST_1_OF_1_DOCUMENT_REFERENCE.s3_file_key
+    assert len(upload_kwargs["file_obj"].getvalue()) == actual
+
+
+def test_upload_part_size_is_read_from_environment(set_env, monkeypatch):
+    monkeypatch.setenv("PDF_STITCHING_UPLOAD_PART_SIZE_MB", "8")
+
+    service = PdfStitchingService()
+
+    assert service.upload_part_size_in_bytes == 8 * 1024 * 1024
+
+
+def test_upload_stitched_file_handles_client_error(mock_service):
+    mock_service.stitched_reference = TEST_1_OF_1_DOCUMENT_REFERENCE
+    mock_service.s3_service.upload_file_obj.side_effect = MOCK_CLIENT_ERROR
+    test_pdf = Pdf.new()
+    test_pdf.add_blank_page()
+
+    with pytest.raises(PdfStitchingException) as e:
+        mock_service.upload_stitched_file(stitched_pdf=test_pdf)
+
+    assert e.value.error is LambdaError.StitchError
 
 
 def test_migrate_multipart_references(mock_service):
     mock_service.multipart_references = TEST_DOCUMENT_REFERENCES
     mock_service.migrate_multipart_references()
 
-    expected_create_calls = [
-        call(
-            table_name=MOCK_UNSTITCHED_LG_TABLE_NAME,
-            item={
-                "ContentType": "application/pdf",
-                "Created": "2024-01-01T12:00:00.000Z",
-                "DocumentScanCreation": "2024-01-01",
-                "DocStatus": "final",
-                "DocumentSnomedCodeType": "16521000000101",
-                "FileLocation": f"{TEST_DOCUMENT_REFERENCES[0].file_location}",
-                "FileName": f"{TEST_DOCUMENT_REFERENCES[0].file_name}",
-                "ID": f"{TEST_DOCUMENT_REFERENCES[0].id}",
-                "LastUpdated": 1704110400,
-                "NhsNumber": f"{TEST_DOCUMENT_REFERENCES[0].nhs_number}",
-                "Status": "current",
-                "Uploaded": True,
-                "Uploading": False,
-                "Version": "1",
-                "VirusScannerResult": "Clean",
-            },
-        ),
-        call(
-            table_name=MOCK_UNSTITCHED_LG_TABLE_NAME,
-            item={
-                "ContentType": "application/pdf",
-                "Created": "2024-01-01T12:00:00.000Z",
-                "DocStatus": "final",
-                "DocumentScanCreation": "2024-01-01",
-                "DocumentSnomedCodeType": "16521000000101",
-                "FileLocation": f"{TEST_DOCUMENT_REFERENCES[1].file_location}",
-                "FileName": f"{TEST_DOCUMENT_REFERENCES[1].file_name}",
-                "ID": f"{TEST_DOCUMENT_REFERENCES[1].id}",
-                "LastUpdated": 1704110400,
-                "NhsNumber": f"{TEST_DOCUMENT_REFERENCES[1].nhs_number}",
-                "Status": "current",
-                "Version": "1",
-                "Uploaded": True,
-                "Uploading": False,
-                "VirusScannerResult": "Clean",
-            },
-        ),
-        call(
-            table_name=MOCK_UNSTITCHED_LG_TABLE_NAME,
-            item={
-                "ContentType": "application/pdf",
-                "Created": "2024-01-01T12:00:00.000Z",
-                "DocStatus": "final",
-                "DocumentScanCreation": "2024-01-01",
-                "DocumentSnomedCodeType": "16521000000101",
-                "FileLocation": f"{TEST_DOCUMENT_REFERENCES[2].file_location}",
-                "FileName": f"{TEST_DOCUMENT_REFERENCES[2].file_name}",
-                "ID": f"{TEST_DOCUMENT_REFERENCES[2].id}",
-                "LastUpdated": 1704110400,
-                "NhsNumber": f"{TEST_DOCUMENT_REFERENCES[2].nhs_number}",
-                "Status": "current",
-                "Version": "1",
-                "Uploaded": True,
-                "Uploading": False,
-                "VirusScannerResult": "Clean",
-            },
-        ),
-    ]
-
-    expected_delete_calls = []
+    expected_transact_items = []
     for reference in TEST_DOCUMENT_REFERENCES:
-        expected_delete_calls.append(
-            call(table_name=MOCK_LG_TABLE_NAME, key={"ID": reference.id})
+        expected_transact_items.append(
+            {
+                "Put": {
+                    "TableName": MOCK_UNSTITCHED_LG_TABLE_NAME,
+                    "Item": {
+                        "ContentType": "application/pdf",
+                        "Created": "2024-01-01T12:00:00.000Z",
+                        "DocumentScanCreation": "2024-01-01",
+                        "DocStatus": "final",
+                        "DocumentSnomedCodeType": "16521000000101",
+                        "FileLocation": f"{reference.file_location}",
+                        "FileName": f"{reference.file_name}",
+                        "ID": f"{reference.id}",
+                        "LastUpdated": 1704110400,
+                        "NhsNumber": f"{reference.nhs_number}",
+                        "Status": "current",
+                        "Uploaded": True,
+                        "Uploading": False,
+                        "Version": "1",
+                        "VirusScannerResult": "Clean",
+                    },
+                }
+            }
+        )
+        expected_transact_items.append(
+            {"Delete": {"TableName": MOCK_LG_TABLE_NAME, "Key": {"ID": reference.id}}}
         )
 
-    assert mock_service.dynamo_service.create_item.call_count == 3
-    mock_service.dynamo_service.create_item.assert_has_calls(expected_create_calls)
-    assert mock_service.dynamo_service.delete_item.call_count == 3
-    mock_service.dynamo_service.delete_item.assert_has_calls(expected_delete_calls)
+    mock_service.dynamo_service.transact_write_items.assert_called_once_with(
+        transact_items=expected_transact_items
+    )
+    mock_service.dynamo_service.create_item.assert_not_called()
+    mock_service.dynamo_service.delete_item.assert_not_called()
 
 
-def test_migrate_multipart_references_handles_client_error_on_create(
-    mock_service, caplog
-):
-    mock_service.multipart_references = TEST_DOCUMENT_REFERENCES
-    mock_service.dynamo_service.create_item.side_effect = MOCK_CLIENT_ERROR
-    expected_err_msg = (
-        "Failed to migrate multipart references: "
-        "An error occurred (500) when calling the TEST operation: Test error message"
-    )
+def test_migrate_multipart_references_chunks_transactions_at_api_limit(mock_service):
+    test_references = create_test_lloyd_george_doc_store_refs() * 40
+    mock_service.multipart_references = test_references
 
-    with pytest.raises(PdfStitchingException) as e:
-        mock_service.migrate_multipart_references()
+    mock_service.migrate_multipart_references()
 
-    assert caplog.records[-1].msg == expected_err_msg
-    assert caplog.records[-1].levelname == "ERROR"
-    assert e.value.error is LambdaError.MultipartError
+    transactions = [
+        transaction.kwargs["transact_items"]
+        for transaction in mock_service.dynamo_service.transact_write_items.call_args_list
+    ]
+    assert [len(transaction) for transaction in transactions] == [100, 100, 40]
+    for transaction in transactions:
+        for put_item, delete_item in zip(transaction[::2], transaction[1::2]):
+            assert put_item["Put"]["Item"]["ID"] == delete_item["Delete"]["Key"]["ID"]
 
 
-def test_migrate_multipart_references_handles_client_error_on_delete(
-    mock_service, caplog
-):
+def test_migrate_multipart_references_handles_client_error(mock_service, caplog):
     mock_service.multipart_references = TEST_DOCUMENT_REFERENCES
-    mock_service.dynamo_service.delete_item.side_effect = MOCK_CLIENT_ERROR
+    mock_service.dynamo_service.transact_write_items.side_effect = MOCK_CLIENT_ERROR
     expected_err_msg = (
-        "Failed to cleanup multipart references: "
+        "Failed to migrate multipart references: "
         "An error occurred (500) when calling the TEST operation: Test error message"
     )
 
@@ -420,7 +527,8 @@ def test_migrate_multipart_references_handles_client_error_on_delete(
 @freeze_time("2024-01-01T12:00:00Z")
 def test_write_stitching_reference(mock_service, mock_uuid):
     file_size = 8000
-    mock_service.create_stitched_reference(TEST_1_OF_1_DOCUMENT_REFERENCE, file_size)
+    mock_service.create_stitched_reference(TEST_1_OF_1_DOCUMENT_REFERENCE)
+    mock_service.stitched_reference.file_size = file_size
 
     mock_service.write_stitching_reference()
 
@@ -538,6 +646,7 @@ def test_rollback_stitching_process_successfully_rolls_back(
 
 def test_rollback_stitched_reference(mock_service):
     mock_service.stitched_reference = TEST_1_OF_1_DOCUMENT_REFERENCE
+    mock_service.stitched_file_uploaded = True
 
     mock_service.rollback_stitched_reference()
 
@@ -549,8 +658,20 @@ def test_rollback_stitched_reference(mock_service):
     )
 
 
+def test_rollback_stitched_reference_skips_reference_that_was_never_uploaded(
+    mock_service,
+):
+    mock_service.stitched_reference = TEST_1_OF_1_DOCUMENT_REFERENCE
+
+    mock_service.rollback_stitched_reference()
+
+    mock_service.dynamo_service.delete_item.assert_not_called()
+    mock_service.s3_service.delete_object.assert_not_called()
+
+
 def test_rollback_stitched_reference_handles_exception(mock_service):
     mock_service.stitched_reference = TEST_1_OF_1_DOCUMENT_REFERENCE
+    mock_service.stitched_file_uploaded = True
     mock_service.dynamo_service.delete_item.side_effect = MOCK_CLIENT_ERROR
 
     with pytest.raises(PdfStitchingException):
@@ -559,106 +680,74 @@ def test_rollback_stitched_reference_handles_exception(mock_service):
 
 def test_rollback_reference_migration(mock_service):
     mock_service.multipart_references = TEST_DOCUMENT_REFERENCES
-    mock_service.dynamo_service.get_item.side_effect = (
-        {},
-        {"Item": {"ID": "123"}},
-        {},
-        {"Item": {"ID": "234"}},
-        {},
-        {"Item": {"ID": "567"}},
+    mock_service.dynamo_service.batch_get_items.side_effect = (
+        [{"ID": TEST_DOCUMENT_REFERENCES[1].id}],
+        [
+            {"ID": TEST_DOCUMENT_REFERENCES[0].id},
+            {"ID": TEST_DOCUMENT_REFERENCES[2].id},
+        ],
     )
+    reference_ids = [reference.id for reference in TEST_DOCUMENT_REFERENCES]
 
     mock_service.rollback_reference_migration()
 
-    mock_service.dynamo_service.create_item.assert_has_calls(
+    mock_service.dynamo_service.batch_get_items.assert_has_calls(
         [
-            call(
-                table_name=MOCK_LG_TABLE_NAME,
-                item={
-                    "ContentType": "application/pdf",
-                    "Created": TEST_DOCUMENT_REFERENCES[0].created,
-                    "CurrentGpOds": TEST_DOCUMENT_REFERENCES[0].current_gp_ods,
-                    "DocStatus": "final",
-                    "DocumentScanCreation": "2024-01-01",
-                    "DocumentSnomedCodeType": "16521000000101",
-                    "FileLocation": f"{TEST_DOCUMENT_REFERENCES[0].file_location}",
-                    "FileName": f"{TEST_DOCUMENT_REFERENCES[0].file_name}",
-                    "ID": f"{TEST_DOCUMENT_REFERENCES[0].id}",
-                    "LastUpdated": 1704110400,
-                    "NhsNumber": f"{TEST_DOCUMENT_REFERENCES[0].nhs_number}",
-                    "Status": "current",
-                    "Version": "1",
-                    "Uploaded": True,
-                    "Uploading": False,
-                    "VirusScannerResult": "Clean",
-                },
-            ),
-            call(
-                table_name=MOCK_LG_TABLE_NAME,
-                item={
-                    "ContentType": "application/pdf",
-                    "Created": TEST_DOCUMENT_REFERENCES[1].created,
-                    "CurrentGpOds": TEST_DOCUMENT_REFERENCES[1].current_gp_ods,
-                    "DocStatus": "final",
-                    "DocumentScanCreation": "2024-01-01",
-                    "DocumentSnomedCodeType": "16521000000101",
-                    "FileLocation": f"{TEST_DOCUMENT_REFERENCES[1].file_location}",
-                    "FileName": f"{TEST_DOCUMENT_REFERENCES[1].file_name}",
-                    "ID": f"{TEST_DOCUMENT_REFERENCES[1].id}",
-                    "LastUpdated": 1704110400,
-                    "NhsNumber": f"{TEST_DOCUMENT_REFERENCES[1].nhs_number}",
-                    "Status": "current",
-                    "Version": "1",
-                    "Uploaded": True,
-                    "Uploading": False,
-                    "VirusScannerResult": "Clean",
-                },
-            ),
-            call(
-                table_name=MOCK_LG_TABLE_NAME,
-                item={
-                    "ContentType": "application/pdf",
-                    "Created": TEST_DOCUMENT_REFERENCES[2].created,
-                    "CurrentGpOds": TEST_DOCUMENT_REFERENCES[2].current_gp_ods,
-                    "DocStatus": "final",
-                    "DocumentScanCreation": "2024-01-01",
-                    "DocumentSnomedCodeType": "16521000000101",
-                    "FileLocation": f"{TEST_DOCUMENT_REFERENCES[2].file_location}",
-                    "FileName": f"{TEST_DOCUMENT_REFERENCES[2].file_name}",
-                    "ID": f"{TEST_DOCUMENT_REFERENCES[2].id}",
-                    "LastUpdated": 1704110400,
-                    "NhsNumber": f"{TEST_DOCUMENT_REFERENCES[2].nhs_number}",
-                    "Status": "current",
-                    "Version": "1",
-                    "Uploaded": True,
-                    "Uploading": False,
-                    "VirusScannerResult": "Clean",
-                },
-            ),
+            call(table_name=MOCK_LG_TABLE_NAME, key_list=reference_ids),
+            call(table_name=MOCK_UNSTITCHED_LG_TABLE_NAME, key_list=reference_ids),
         ]
     )
+    mock_service.dynamo_service.batch_put_items.assert_called_once_with(
+        table_name=MOCK_LG_TABLE_NAME,
+        items=[
+            {
+                "ContentType": "application/pdf",
+                "Created": reference.created,
+                "CurrentGpOds": reference.current_gp_ods,
+                "DocStatus": "final",
+                "DocumentScanCreation": "2024-01-01",
+                "DocumentSnomedCodeType": "16521000000101",
+                "FileLocation": f"{reference.file_location}",
+                "FileName": f"{reference.file_name}",
+                "ID": f"{reference.id}",
+                "LastUpdated": 1704110400,
+                "NhsNumber": f"{reference.nhs_number}",
+                "Status": "current",
+                "Version": "1",
+                "Uploaded": True,
+                "Uploading": False,
+                "VirusScannerResult": "Clean",
+            }
+            for reference in (TEST_DOCUMENT_REFERENCES[0], TEST_DOCUMENT_REFERENCES[2])
+        ],
+    )
+    mock_service.dynamo_service.batch_delete_items.assert_called_once_with(
+        table_name=MOCK_UNSTITCHED_LG_TABLE_NAME,
+        keys=[
+            {"ID": TEST_DOCUMENT_REFERENCES[0].id},
+            {"ID": TEST_DOCUMENT_REFERENCES[2].id},
+        ],
+    )
 
-    mock_service.dynamo_service.delete_item.assert_has_calls(
-        [
-            call(
-                table_name=MOCK_UNSTITCHED_LG_TABLE_NAME,
-                key={"ID": TEST_DOCUMENT_REFERENCES[0].id},
-            ),
-            call(
-                table_name=MOCK_UNSTITCHED_LG_TABLE_NAME,
-                key={"ID": TEST_DOCUMENT_REFERENCES[1].id},
-            ),
-            call(
-                table_name=MOCK_UNSTITCHED_LG_TABLE_NAME,
-                key={"ID": TEST_DOCUMENT_REFERENCES[2].id},
-            ),
-        ]
+
+def test_rollback_reference_migration_skips_writes_when_nothing_was_migrated(
+    mock_service,
+):
+    mock_service.multipart_references = TEST_DOCUMENT_REFERENCES
+    mock_service.dynamo_service.batch_get_items.side_effect = (
+        [{"ID": reference.id} for reference in TEST_DOCUMENT_REFERENCES],
+        [],
     )
 
+    mock_service.rollback_reference_migration()
+
+    mock_service.dynamo_service.batch_put_items.assert_not_called()
+    mock_service.dynamo_service.batch_delete_items.assert_not_called()
+
 
 def test_rollback_reference_migration_handles_exception(mock_service):
     mock_service.multipart_references = TEST_DOCUMENT_REFERENCES
-    mock_service.dynamo_service.get_item.side_effect = MOCK_CLIENT_ERROR
+    mock_service.dynamo_service.batch_get_items.side_effect = MOCK_CLIENT_ERROR
 
     with pytest.raises(PdfStitchingException):
         mock_service.rollback_reference_migration()
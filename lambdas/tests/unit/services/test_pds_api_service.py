@@ -4,10 +4,11 @@ import pytest
 from botocore.exceptions import ClientError
 from enums.pds_ssm_parameters import SSMParameter
 from requests import Response
+from requests.exceptions import RetryError
 from services.pds_api_service import PdsApiService
 from tests.unit.helpers.data.pds.pds_patient_response import PDS_PATIENT
 from tests.unit.helpers.mock_services import FakeSSMService, FakOAuthService
-from utils.exceptions import PdsErrorException
+from utils.exceptions import PdsErrorException, PdsTooManyRequestsException
 
 ACCESS_TOKEN = "Sr5PGv19wTEHJdDr2wx2f7IGd0cw"
 
@@ -120,11 +121,15 @@ def test_pds_request_valid_token_expired_response(mocker):
 
     mock_session = mocker.patch.object(pds_service, "session")
     mock_session.get.side_effect = [first_response, second_response]
+    mock_invalidate = mocker.patch.object(
+        pds_service.auth_service, "invalidate_access_token"
+    )
 
     actual = pds_service.pds_request(nhs_number="1111111111", retry_on_expired=True)
 
     assert actual == second_response
     assert mock_get_parameters.call_count == 2
+    mock_invalidate.assert_called_once_with(ACCESS_TOKEN)
     mock_session.get.assert_called_with(
         url=mock_url_endpoint, headers=mock_authorization_header
     )
@@ -174,3 +179,74 @@ def test_pds_request_raise_pds_error_exception(mocker):
 
         mock_get_parameters.assert_called_once()
         mock_post.assert_not_called()
+
+
+def build_response(status_code: int, headers: dict = None) -> Response:
+    response = Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return response
+
+
+@pytest.fixture
+def mock_pds_rate_limit(mocker):
+    mocker.patch(
+        "services.pds_api_service.PdsApiService.get_endpoint_for_pds_api_request",
+        return_value="api.test/endpoint/",
+    )
+    mock_sleep = mocker.patch("services.pds_api_service.time.sleep")
+    mock_rate_limiter = mocker.patch.object(pds_service, "rate_limiter")
+    mock_session = mocker.patch.object(pds_service, "session")
+    yield mock_rate_limiter, mock_session, mock_sleep
+
+
+def test_pds_request_retries_too_many_requests_through_rate_limiter(
+    mock_pds_rate_limit,
+):
+    mock_rate_limiter, mock_session, mock_sleep = mock_pds_rate_limit
+    success = build_response(200)
+    mock_session.get.side_effect = [
+        build_response(429, {"Retry-After": "2"}),
+        build_response(429),
+        success,
+    ]
+
+    actual = pds_service.pds_request(nhs_number="1111111111", retry_on_expired=True)
+
+    assert actual == success
+    assert mock_rate_limiter.acquire.call_count == 3
+    assert mock_rate_limiter.record_too_many_requests.call_count == 2
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [2.0, 2.0]
+
+
+def test_pds_request_returns_too_many_requests_once_retries_are_used_up(
+    mock_pds_rate_limit,
+):
+    mock_rate_limiter, mock_session, _ = mock_pds_rate_limit
+    mock_session.get.return_value = build_response(429)
+
+    actual = pds_service.pds_request(nhs_number="1111111111", retry_on_expired=True)
+
+    assert actual.status_code == 429
+    expected_attempts = pds_service.too_many_requests_retries + 1
+    assert mock_rate_limiter.acquire.call_count == expected_attempts
+    assert mock_rate_limiter.record_too_many_requests.call_count == expected_attempts
+
+
+def test_pds_request_raises_too_many_requests_on_retry_error(mock_pds_rate_limit):
+    _, mock_session, _ = mock_pds_rate_limit
+    mock_session.get.side_effect = RetryError("too many 503 error responses")
+
+    with pytest.raises(PdsTooManyRequestsException):
+        pds_service.pds_request(nhs_number="1111111111", retry_on_expired=True)
+
+
+def test_session_does_not_retry_too_many_requests():
+    retry = (
+        PdsApiService(fake_ssm_service, fake_auth_service)
+        .session.get_adapter("https://")
+        .max_retries
+    )
+
+    assert 429 not in retry.status_forcelist
+    assert retry.raise_on_status is False
@@ -0,0 +1,115 @@
+import pytest
+from botocore.exceptions import ClientError
+from services.pds_rate_limiter import PdsRateLimiter
+from tests.unit.conftest import MOCK_CLIENT_ERROR, MOCK_TABLE_NAME
+from utils.exceptions import PdsTooManyRequestsException
+
+MOCK_CONDITIONAL_CHECK_FAILED = ClientError(
+    {"Error": {"Code": "ConditionalCheckFailedException", "Message": "test"}},
+    "UpdateItem",
+)
+
+
+@pytest.fixture
+def mock_clock(mocker):
+    clock = {"now": 1000.25, "sleeps": []}
+
+    def sleep(seconds):
+        clock["sleeps"].append(seconds)
+        clock["now"] += seconds
+
+    mocker.patch("time.time", side_effect=lambda: clock["now"])
+    mocker.patch("time.monotonic", side_effect=lambda: clock["now"])
+    mocker.patch("time.sleep", side_effect=sleep)
+    yield clock
+
+
+@pytest.fixture
+def mock_limiter(monkeypatch, mock_clock):
+    monkeypatch.setenv("PDS_RATE_LIMIT_PER_SECOND", "2")
+    yield PdsRateLimiter()
+
+
+@pytest.fixture
+def mock_shared_limiter(monkeypatch, mocker, mock_clock):
+    monkeypatch.setenv("PDS_RATE_LIMIT_PER_SECOND", "10")
+    monkeypatch.setenv("PDS_RATE_LIMIT_TABLE_NAME", MOCK_TABLE_NAME)
+    monkeypatch.setenv("PDS_SHARED_RATE_LIMIT_PER_SECOND", "5")
+    monkeypatch.setenv("PDS_RATE_LIMIT_MAX_WAIT_SECONDS", "2")
+    mocker.patch("services.pds_rate_limiter.DynamoDBService")
+    yield PdsRateLimiter()
+
+
+def test_limiter_is_disabled_without_a_rate(mock_clock):
+    limiter = PdsRateLimiter()
+
+    assert not limiter.enabled
+    assert limiter.acquire() == 0.0
+    assert mock_clock["sleeps"] == []
+
+
+def test_acquire_blocks_once_the_budget_is_used(mock_limiter, mock_clock):
+    waits = [mock_limiter.acquire() for _ in range(3)]
+
+    assert waits == [0.0, 0.0, 0.5]
+    assert mock_limiter.stats.requests == 3
+    assert mock_limiter.stats.wait_seconds == 0.5
+
+
+def test_record_too_many_requests_drains_the_budget(mock_limiter, mock_clock):
+    mock_limiter.record_too_many_requests()
+
+    assert mock_limiter.acquire() == 0.5
+    assert mock_limiter.stats.too_many_requests_responses == 1
+
+
+def test_acquire_takes_budget_from_the_current_shared_window(mock_shared_limiter):
+    mock_shared_limiter.acquire()
+
+    mock_shared_limiter.dynamo_service.increment_counter.assert_called_once_with(
+        table_name=MOCK_TABLE_NAME,
+        key_pair={"ID": "PDS#1000"},
+        counter_name="RequestCount",
+        limit=5,
+        updated_fields={"ExpiresAt": 1060},
+    )
+
+
+def test_acquire_waits_for_the_next_shared_window(mock_shared_limiter, mock_clock):
+    increment_counter = mock_shared_limiter.dynamo_service.increment_counter
+    increment_counter.side_effect = [MOCK_CONDITIONAL_CHECK_FAILED, 1]
+
+    waited = mock_shared_limiter.acquire()
+
+    assert waited == 0.75
+    assert increment_counter.call_args.kwargs["key_pair"] == {"ID": "PDS#1001"}
+    assert mock_shared_limiter.stats.shared_limit_waits == 1
+
+
+def test_acquire_raises_when_no_shared_budget_within_max_wait(
+    mock_shared_limiter, mock_clock
+):
+    mock_shared_limiter.dynamo_service.increment_counter.side_effect = (
+        MOCK_CONDITIONAL_CHECK_FAILED
+    )
+
+    with pytest.raises(PdsTooManyRequestsException):
+        mock_shared_limiter.acquire()
+
+    assert mock_clock["sleeps"] == [0.75, 1.0]
+
+
+def test_acquire_falls_back_to_local_limit_on_table_errors(mock_shared_limiter):
+    mock_shared_limiter.dynamo_service.increment_counter.side_effect = MOCK_CLIENT_ERROR
+
+    assert mock_shared_limiter.acquire() == 0.0
+    assert mock_shared_limiter.stats.shared_limit_errors == 1
+
+
+def test_log_stats_logs_requests_and_wait_time(mock_limiter, caplog):
+    for _ in range(3):
+        mock_limiter.acquire()
+
+    mock_limiter.log_stats()
+
+    assert "PDS rate limiter waited 0.50s over 3 requests" in caplog.messages
@@ -0,0 +1,175 @@
+import json
+
+import pytest
+from requests import Response
+from services.pds_response_cache import CachedPatientSearch, PdsResponseCache
+from tests.unit.conftest import MOCK_CLIENT_ERROR, MOCK_TABLE_NAME, TEST_NHS_NUMBER
+from tests.unit.helpers.data.pds.pds_patient_response import PDS_PATIENT
+
+
+def build_response(status_code: int, content: bytes = b"") -> Response:
+    response = Response()
+    response.status_code = status_code
+    response._content = content
+    return response
+
+
+@pytest.fixture
+def mock_clock(mocker):
+    clock = {"now": 1000.0}
+    mocker.patch(
+        "services.pds_response_cache.time.time", side_effect=lambda: clock["now"]
+    )
+    mocker.patch("utils.ttl_cache.time.monotonic", side_effect=lambda: clock["now"])
+    yield clock
+
+
+@pytest.fixture
+def mock_cache(monkeypatch, mock_clock):
+    monkeypatch.setenv("PDS_CACHE_TTL_SECONDS", "300")
+    monkeypatch.setenv("PDS_CACHE_NEGATIVE_TTL_SECONDS", "60")
+    monkeypatch.setenv("PDS_CACHE_MAX_ENTRIES", "2")
+    yield PdsResponseCache()
+
+
+@pytest.fixture
+def mock_shared_cache(monkeypatch, mocker, mock_clock):
+    monkeypatch.setenv("PDS_CACHE_TABLE_NAME", MOCK_TABLE_NAME)
+    mocker.patch("services.pds_response_cache.DynamoDBService")
+    yield PdsResponseCache()
+
+
+def test_get_returns_cached_patient_until_ttl_expires(mock_cache, mock_clock):
+    content = json.dumps(PDS_PATIENT).encode()
+    mock_cache.put(TEST_NHS_NUMBER, build_response(200, content))
+
+    cached_response = mock_cache.get(TEST_NHS_NUMBER)
+    assert cached_response.status_code == 200
+    assert cached_response.json() == PDS_PATIENT
+
+    mock_clock["now"] += 300
+    assert mock_cache.get(TEST_NHS_NUMBER) is None
+    assert mock_cache.metrics.memory_hits == 1
+    assert mock_cache.metrics.misses == 1
+    assert mock_cache.metrics.hit_rate == 0.5
+
+
+def test_get_returns_not_found_until_negative_ttl_expires(mock_cache, mock_clock):
+    mock_cache.put(TEST_NHS_NUMBER, build_response(404))
+
+    mock_clock["now"] += 59
+    assert mock_cache.get(TEST_NHS_NUMBER).status_code == 404
+    assert mock_cache.metrics.negative_hits == 1
+
+    mock_clock["now"] += 1
+    assert mock_cache.get(TEST_NHS_NUMBER) is None
+
+
+@pytest.mark.parametrize("status_code", [400, 429, 500])
+def test_put_does_not_cache_other_responses(mock_cache, status_code):
+    mock_cache.put(TEST_NHS_NUMBER, build_response(status_code))
+
+    assert mock_cache.get(TEST_NHS_NUMBER) is None
+
+
+def test_put_evicts_least_recently_used_patient(mock_cache):
+    mock_cache.put("9000000001", build_response(200, b"{}"))
+    mock_cache.put("9000000002", build_response(200, b"{}"))
+    mock_cache.get("9000000001")
+
+    mock_cache.put("9000000003", build_response(200, b"{}"))
+
+    assert list(mock_cache.memory.entries) == ["9000000001", "9000000003"]
+    assert mock_cache.metrics.evictions == 1
+
+
+def test_invalidate_removes_patient(mock_cache):
+    mock_cache.put(TEST_NHS_NUMBER, build_response(200, b"{}"))
+
+    mock_cache.invalidate(TEST_NHS_NUMBER)
+
+    assert mock_cache.get(TEST_NHS_NUMBER) is None
+
+
+def test_shared_tier_hit_is_kept_in_memory(mock_shared_cache):
+    mock_shared_cache.dynamo_service.get_item.return_value = {
+        "Item": {
+            "NhsNumber": TEST_NHS_NUMBER,
+            "StatusCode": 200,
+            "Content": "{}",
+            "ExpiresAt": 1100,
+        }
+    }
+
+    assert mock_shared_cache.get(TEST_NHS_NUMBER).status_code == 200
+    assert mock_shared_cache.get(TEST_NHS_NUMBER).status_code == 200
+
+    mock_shared_cache.dynamo_service.get_item.assert_called_once_with(
+        table_name=MOCK_TABLE_NAME, key={"NhsNumber": TEST_NHS_NUMBER}
+    )
+    assert mock_shared_cache.metrics.shared_hits == 1
+    assert mock_shared_cache.metrics.memory_hits == 1
+
+
+def test_shared_tier_ignores_expired_items(mock_shared_cache):
+    mock_shared_cache.dynamo_service.get_item.return_value = {
+        "Item": {"StatusCode": 200, "Content": "{}", "ExpiresAt": 999}
+    }
+
+    assert mock_shared_cache.get(TEST_NHS_NUMBER) is None
+
+
+def test_shared_tier_errors_are_treated_as_misses(mock_shared_cache):
+    mock_shared_cache.dynamo_service.get_item.side_effect = MOCK_CLIENT_ERROR
+    mock_shared_cache.dynamo_service.create_item.side_effect = MOCK_CLIENT_ERROR
+
+    assert mock_shared_cache.get(TEST_NHS_NUMBER) is None
+    mock_shared_cache.put(TEST_NHS_NUMBER, build_response(200, b"{}"))
+
+    assert mock_shared_cache.get(TEST_NHS_NUMBER).status_code == 200
+
+
+def test_put_writes_to_shared_tier(mock_shared_cache):
+    mock_shared_cache.put(TEST_NHS_NUMBER, build_response(404))
+
+    mock_shared_cache.dynamo_service.create_item.assert_called_once_with(
+        table_name=MOCK_TABLE_NAME,
+        item={
+            "NhsNumber": TEST_NHS_NUMBER,
+            "StatusCode": 404,
+            "Content": "",
+            "ExpiresAt": 1060,
+        },
+    )
+
+
+def test_cached_patient_search_only_calls_pds_on_a_miss(mock_cache, mocker):
+    mock_pds_service = mocker.MagicMock()
+    mock_pds_service.pds_request.return_value = build_response(
+        200, json.dumps(PDS_PATIENT).encode()
+    )
+    cached_pds_service = CachedPatientSearch(mock_pds_service, mock_cache)
+
+    first_patient = cached_pds_service.fetch_patient_details(TEST_NHS_NUMBER)
+    second_patient = cached_pds_service.fetch_patient_details(TEST_NHS_NUMBER)
+
+    assert first_patient == second_patient
+    mock_pds_service.pds_request.assert_called_once_with(
+        nhs_number=TEST_NHS_NUMBER, retry_on_expired=True
+    )
+
+
+def test_shared_tier_limits_how_long_patients_are_kept_in_memory(
+    mock_shared_cache, mock_clock
+):
+    mock_shared_cache.put(TEST_NHS_NUMBER, build_response(200, b"{}"))
+    mock_shared_cache.dynamo_service.get_item.return_value = {}
+
+    mock_clock["now"] += 29
+    assert mock_shared_cache.get(TEST_NHS_NUMBER).status_code == 200
+
+    mock_clock["now"] += 1
+    assert mock_shared_cache.get(TEST_NHS_NUMBER) is None
+    mock_shared_cache.dynamo_service.get_item.assert_called_once_with(
+        table_name=MOCK_TABLE_NAME, key={"NhsNumber": TEST_NHS_NUMBER}
+    )
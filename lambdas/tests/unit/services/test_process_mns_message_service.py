@@ -338,6 +338,14 @@ def test_get_updated_gp_ods(mns_service):
     )
 
 
+def test_get_updated_gp_ods_invalidates_cached_pds_response(mns_service, mocker):
+    mock_invalidate = mocker.patch.object(mns_service.pds_response_cache, "invalidate")
+
+    mns_service.get_updated_gp_ods(TEST_NHS_NUMBER)
+
+    mock_invalidate.assert_called_once_with(TEST_NHS_NUMBER)
+
+
 def test_pds_is_called_death_notification_removed(
     mns_service, mocker, mock_document_references
 ):
@@ -1,18 +1,105 @@
-from services.token_service import TokenService
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from services.token_service import TokenService, public_key_cache
 
+TEST_PAYLOAD = {"ndr_session_id": "test_session_id"}
 
-def test_get_public_key_and_decode_auth_token(mocker):
-    mock_jwt_decode = mocker.patch("jwt.decode", return_value="decoded token")
-    mocker.patch(
+
+def generate_key_pair() -> tuple[rsa.RSAPrivateKey, str]:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_key_pem = (
+        private_key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode("utf-8")
+    )
+    return private_key, public_key_pem
+
+
+@pytest.fixture(scope="module")
+def key_pair():
+    return generate_key_pair()
+
+
+@pytest.fixture(scope="module")
+def rotated_key_pair():
+    return generate_key_pair()
+
+
+@pytest.fixture
+def mock_get_ssm_parameter(mocker, key_pair):
+    yield mocker.patch(
         "services.base.ssm_service.SSMService.get_ssm_parameter",
-        return_value="test_value_param_key",
+        return_value=key_pair[1],
     )
-    token_service = TokenService()
-    response = token_service.get_public_key_and_decode_auth_token(
-        auth_token="token_test", ssm_public_key_parameter="param_key"
+
+
+def test_get_public_key_and_decode_auth_token(mock_get_ssm_parameter, key_pair):
+    auth_token = jwt.encode(TEST_PAYLOAD, key_pair[0], algorithm="RS256")
+
+    response = TokenService().get_public_key_and_decode_auth_token(
+        auth_token=auth_token, ssm_public_key_parameter="param_key"
+    )
+
+    assert response == TEST_PAYLOAD
+    mock_get_ssm_parameter.assert_called_once_with("param_key", True, use_cache=False)
+
+
+def test_public_key_is_fetched_once_while_cached(mock_get_ssm_parameter, key_pair):
+    auth_token = jwt.encode(TEST_PAYLOAD, key_pair[0], algorithm="RS256")
+
+    for _ in range(3):
+        assert (
+            TokenService.get_public_key_and_decode_auth_token(auth_token, "param_key")
+            == TEST_PAYLOAD
+        )
+
+    mock_get_ssm_parameter.assert_called_once()
+    assert public_key_cache.metrics.hits == 2
+
+
+def test_public_key_is_refreshed_when_signature_does_not_match(
+    mock_get_ssm_parameter, key_pair, rotated_key_pair
+):
+    TokenService.fetch_public_key("param_key")
+    mock_get_ssm_parameter.return_value = rotated_key_pair[1]
+    auth_token = jwt.encode(TEST_PAYLOAD, rotated_key_pair[0], algorithm="RS256")
+
+    response = TokenService.get_public_key_and_decode_auth_token(
+        auth_token, "param_key"
     )
 
-    assert response == "decoded token"
-    mock_jwt_decode.assert_called_with(
-        "token_test", "test_value_param_key", algorithms=["RS256"]
+    assert response == TEST_PAYLOAD
+    assert mock_get_ssm_parameter.call_count == 2
+
+
+def test_invalid_signature_with_fresh_key_returns_none(
+    mock_get_ssm_parameter, rotated_key_pair
+):
+    auth_token = jwt.encode(TEST_PAYLOAD, rotated_key_pair[0], algorithm="RS256")
+
+    response = TokenService.get_public_key_and_decode_auth_token(
+        auth_token, "param_key"
     )
+
+    assert response is None
+    mock_get_ssm_parameter.assert_called_once()
+
+
+def test_public_key_is_refetched_at_most_once_per_interval(
+    mock_get_ssm_parameter, rotated_key_pair
+):
+    TokenService.fetch_public_key("param_key")
+    forged_token = jwt.encode(TEST_PAYLOAD, rotated_key_pair[0], algorithm="RS256")
+
+    for _ in range(3):
+        assert (
+            TokenService.get_public_key_and_decode_auth_token(forged_token, "param_key")
+            is None
+        )
+
+    assert mock_get_ssm_parameter.call_count == 2
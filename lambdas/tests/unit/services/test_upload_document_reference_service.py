@@ -268,6 +268,7 @@ def test_copy_files_from_staging_bucket_success(service, mock_document_reference
         source_file_key=source_file_key,
         dest_bucket=MOCK_LG_BUCKET,
         dest_file_key=expected_dest_key,
+        file_size=mock_document_reference.file_size,
     )
 
     assert mock_document_reference.s3_file_key == expected_dest_key
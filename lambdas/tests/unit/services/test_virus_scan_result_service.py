@@ -57,7 +57,9 @@ def test_virus_scan_request_successful(mocker, virus_scanner_service):
     response = Response()
     response.status_code = 200
     response._content = json.dumps(CLEAN_FILE_RESPONSE).encode("utf-8")
-    mock_post = mocker.patch("requests.post", return_value=response)
+    mock_post = mocker.patch.object(
+        virus_scanner_service.session, "post", return_value=response
+    )
     try:
         actual = virus_scanner_service.request_virus_scan(
             MOCK_LG_FILE_REF, retry_on_expired=False
@@ -91,8 +93,10 @@ def test_virus_scan_request_invalid_token(mocker, virus_scanner_service):
     second_response = Response()
     second_response.status_code = 200
     second_response._content = json.dumps(CLEAN_FILE_RESPONSE).encode("utf-8")
-    mock_post = mocker.patch(
-        "requests.post", side_effect=[first_response, second_response]
+    mock_post = mocker.patch.object(
+        virus_scanner_service.session,
+        "post",
+        side_effect=[first_response, second_response],
     )
     virus_scanner_service.get_new_access_token = mocker.MagicMock()
     try:
@@ -127,7 +131,9 @@ def test_virus_scan_request_infected_file(mocker, virus_scanner_service):
     response = Response()
     response.status_code = 200
     response._content = json.dumps(INFECTED_FILE_RESPONSE).encode("utf-8")
-    mock_post = mocker.patch("requests.post", return_value=response)
+    mock_post = mocker.patch.object(
+        virus_scanner_service.session, "post", return_value=response
+    )
     actual = virus_scanner_service.request_virus_scan(
         MOCK_ARF_FILE_REF, retry_on_expired=False
     )
@@ -156,7 +162,9 @@ def test_virus_scan_request_bad_request(mocker, virus_scanner_service):
     response = Response()
     response.status_code = 400
     response._content = json.dumps(BAD_REQUEST_RESPONSE).encode("utf-8")
-    mock_post = mocker.patch("requests.post", return_value=response)
+    mock_post = mocker.patch.object(
+        virus_scanner_service.session, "post", return_value=response
+    )
     with pytest.raises(VirusScanResultException):
         virus_scanner_service.request_virus_scan(
             MOCK_LG_FILE_REF, retry_on_expired=False
@@ -177,7 +185,9 @@ def test_get_new_access_token_return_200(mocker, virus_scanner_service):
     virus_scanner_service.base_url = "test.endpoint"
     virus_scanner_service.username = "test_username"
     virus_scanner_service.password = "test_password"
-    mock_post = mocker.patch("requests.post", return_value=response)
+    mock_post = mocker.patch.object(
+        virus_scanner_service.session, "post", return_value=response
+    )
 
     expected = RESPONSE_TOKEN["accessToken"]
     excepted_token_url = virus_scanner_service.base_url + "/api/Token"
@@ -209,7 +219,9 @@ def test_get_new_access_token_return_400(mocker, virus_scanner_service):
     virus_scanner_service.base_url = "test.endpoint"
     virus_scanner_service.username = "test_username"
     virus_scanner_service.password = "test_password"
-    mock_post = mocker.patch("requests.post", return_value=response)
+    mock_post = mocker.patch.object(
+        virus_scanner_service.session, "post", return_value=response
+    )
 
     excepted_token_url = virus_scanner_service.base_url + "/api/Token"
     excepted_json_data_request = {
@@ -243,7 +255,9 @@ def test_get_new_access_token_return_200_without_access_token(
     virus_scanner_service.base_url = "test.endpoint"
     virus_scanner_service.username = "test_username"
     virus_scanner_service.password = "test_password"
-    mock_post = mocker.patch("requests.post", return_value=response)
+    mock_post = mocker.patch.object(
+        virus_scanner_service.session, "post", return_value=response
+    )
 
     excepted_token_url = virus_scanner_service.base_url + "/api/Token"
     excepted_json_data_request = {
@@ -325,3 +339,26 @@ def test_scan_file_when_parameters_are_set(
 
     virus_scanner_service.get_ssm_parameters_for_request_access_token.assert_not_called()
     mock_request_virus_scan.assert_called_once()
+
+
+def test_get_new_access_token_is_shared_by_callers_holding_the_rejected_token(
+    mocker, virus_scanner_service
+):
+    response = Response()
+    response.status_code = 200
+    response._content = json.dumps(RESPONSE_TOKEN).encode("utf-8")
+    virus_scanner_service.base_url = "test.endpoint"
+    virus_scanner_service.access_token = "rejected_token"
+    mock_post = mocker.patch.object(
+        virus_scanner_service.session, "post", return_value=response
+    )
+    other_service = VirusScanService()
+    other_service.ssm_service = virus_scanner_service.ssm_service
+    other_service.access_token = "rejected_token"
+
+    virus_scanner_service.get_new_access_token()
+    other_service.get_new_access_token()
+
+    assert other_service.access_token == RESPONSE_TOKEN["accessToken"]
+    mock_post.assert_called_once()
+    virus_scanner_service.ssm_service.update_ssm_parameter.assert_called_once()
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+from utils.access_token_manager import AccessToken, AccessTokenManager
+
+
+@pytest.fixture
+def mock_clock(mocker):
+    clock = {"now": 1000.0}
+    mocker.patch(
+        "utils.access_token_manager.time.time", side_effect=lambda: clock["now"]
+    )
+    yield clock
+
+
+def test_get_access_token_reuses_token_until_refresh_margin(mocker, mock_clock):
+    manager = AccessTokenManager(refresh_margin_seconds=10)
+    fetch_token = mocker.MagicMock(
+        side_effect=[AccessToken("first", 1100), AccessToken("second", 1200)]
+    )
+
+    assert manager.get_access_token(fetch_token) == "first"
+    mock_clock["now"] = 1089
+    assert manager.get_access_token(fetch_token) == "first"
+    mock_clock["now"] = 1090
+    assert manager.get_access_token(fetch_token) == "second"
+
+    assert manager.refreshes == 2
+
+
+def test_get_access_token_adopts_stored_token_before_minting(mocker, mock_clock):
+    manager = AccessTokenManager()
+    fetch_token = mocker.MagicMock()
+    store_token = mocker.MagicMock()
+
+    actual = manager.get_access_token(
+        fetch_token,
+        load_token=lambda: AccessToken("stored", 1100),
+        store_token=store_token,
+    )
+
+    assert actual == "stored"
+    fetch_token.assert_not_called()
+    store_token.assert_not_called()
+
+
+def test_get_access_token_only_stores_token_when_it_changes(mocker, mock_clock):
+    manager = AccessTokenManager()
+    store_token = mocker.MagicMock()
+
+    manager.get_access_token(
+        lambda: AccessToken("stored", 1100),
+        load_token=lambda: AccessToken("stored", 1005),
+        store_token=store_token,
+    )
+    manager.invalidate()
+    manager.get_access_token(
+        lambda: AccessToken("new", 1100),
+        load_token=lambda: AccessToken("stored", 1005),
+        store_token=store_token,
+    )
+
+    store_token.assert_called_once_with(AccessToken("new", 1100))
+
+
+def test_invalidate_ignores_token_that_has_already_been_replaced(mock_clock):
+    manager = AccessTokenManager()
+    manager.get_access_token(lambda: AccessToken("current"))
+
+    manager.invalidate("rejected")
+
+    assert manager.get_access_token(lambda: AccessToken("new")) == "current"
+
+
+def test_invalidated_token_is_not_loaded_again(mock_clock):
+    manager = AccessTokenManager()
+    manager.get_access_token(lambda: AccessToken("rejected"))
+
+    manager.invalidate("rejected")
+    actual = manager.get_access_token(
+        lambda: AccessToken("new"), load_token=lambda: AccessToken("rejected")
+    )
+
+    assert actual == "new"
+
+
+def test_concurrent_callers_share_a_single_refresh():
+    manager = AccessTokenManager()
+    fetch_calls = []
+
+    def fetch_token():
+        fetch_calls.append(1)
+        time.sleep(0.05)
+        return AccessToken("token")
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(manager.get_access_token(fetch_token))
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["token"] * 5
+    assert len(fetch_calls) == 1
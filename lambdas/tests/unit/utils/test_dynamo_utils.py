@@ -19,6 +19,7 @@ from utils.dynamo_utils import (
     create_expression_value_placeholder,
     create_expressions,
     create_update_expression,
+    iter_paginated_items,
     parse_dynamo_record,
 )
 
@@ -158,3 +159,50 @@ def test_parse_dynamo_record_raises_value_error(test_json_string):
 
     with pytest.raises(ValueError):
         parse_dynamo_record(test_object)
+
+
+def paginated_response(page: int, last_page: int) -> dict:
+    response = {"Items": [{"ID": f"{page}-1"}, {"ID": f"{page}-2"}]}
+    if page < last_page:
+        response["LastEvaluatedKey"] = {"ID": page + 1}
+    return response
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_iter_paginated_items_yields_every_page(prefetch):
+    start_keys = []
+
+    def fetch_page(start_key):
+        start_keys.append(start_key)
+        return paginated_response(start_key["ID"] if start_key else 1, 3)
+
+    pages = list(iter_paginated_items(fetch_page, prefetch=prefetch))
+
+    assert pages == [paginated_response(page, 3)["Items"] for page in (1, 2, 3)]
+    assert start_keys == [None, {"ID": 2}, {"ID": 3}]
+
+
+def test_iter_paginated_items_truncates_to_max_items_and_stops_fetching():
+    start_keys = []
+
+    def fetch_page(start_key):
+        start_keys.append(start_key)
+        return paginated_response(start_key["ID"] if start_key else 1, 5)
+
+    pages = list(iter_paginated_items(fetch_page, max_items=3))
+
+    assert pages == [[{"ID": "1-1"}, {"ID": "1-2"}], [{"ID": "2-1"}]]
+    assert start_keys == [None, {"ID": 2}]
+
+
+def test_iter_paginated_items_does_not_fetch_next_page_until_iterated():
+    start_keys = []
+
+    def fetch_page(start_key):
+        start_keys.append(start_key)
+        return paginated_response(start_key["ID"] if start_key else 1, 5)
+
+    first_page = next(iter_paginated_items(fetch_page))
+
+    assert first_page == [{"ID": "1-1"}, {"ID": "1-2"}]
+    assert start_keys == [None]
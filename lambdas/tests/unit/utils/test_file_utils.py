@@ -1,4 +1,6 @@
-from utils.file_utils import convert_csv_dictionary_to_bytes
+from io import BytesIO
+
+from utils.file_utils import convert_csv_dictionary_to_bytes, stream_csv_rows
 
 
 def test_convert_csv_dictionary_to_bytes():
@@ -16,3 +18,12 @@ def test_convert_csv_dictionary_to_bytes():
     expected_output = "id,name,age\r\n1,Alice,30\r\n2,Bob,25\r\n"
 
     assert result_str == expected_output
+
+
+def test_stream_csv_rows_decodes_incrementally_and_strips_bom():
+    csv_stream = BytesIO('\ufeffid,name\r\n1,"Ali\r\nce"\r\n2,Zoë\r\n'.encode("utf-8"))
+
+    rows = stream_csv_rows(csv_stream)
+
+    assert next(rows) == {"id": "1", "name": "Ali\r\nce"}
+    assert list(rows) == [{"id": "2", "name": "Zoë"}]
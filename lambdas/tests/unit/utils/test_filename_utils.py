@@ -14,6 +14,7 @@ from utils.filename_utils import (
     extract_page_number,
     extract_patient_name_from_bulk_upload_file_name,
     extract_total_pages,
+    match_lg_valid_file_name_full_path,
 )
 
 
@@ -385,3 +386,36 @@ def test_extract_file_extension_from_bulk_upload_file_name_with_incorrect_file_e
         extract_file_extension_from_bulk_upload_file_name(invalid_data)
 
     assert str(exc_info.value) == "Invalid file extension"
+
+
+@pytest.mark.parametrize(
+    ["input", "expected"],
+    [
+        (
+            "/9000000009/1of3_Lloyd_George_Record_[Joe Bloggs]_[9000000009]_[25-12-2019].pdf",
+            "/9000000009/1of3_Lloyd_George_Record_[Joe Bloggs]_[9000000009]_[25-12-2019].pdf",
+        ),
+        (
+            "01of02_Lloyd_George_Record_[Anne-Marie O'Neil]_[9000000009]_[01-01-2000].pdf",
+            "1of2_Lloyd_George_Record_[Anne-Marie O'Neil]_[9000000009]_[01-01-2000].pdf",
+        ),
+    ],
+)
+def test_match_lg_valid_file_name_full_path(input, expected):
+    actual = match_lg_valid_file_name_full_path(input)
+    assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "input",
+    [
+        "1 of 3_Lloyd_George_Record_[Joe Bloggs]_[9000000009]_[25-12-2019].pdf",
+        "1of3_Lloyd_George_Record_[Joe Bloggs]_[9000000009]_[25-Dec-2019].pdf",
+        "1of3_Lloyd_George_Record_[Joe Bloggs]_[900000000]_[25-12-2019].pdf",
+        "1of3_Lloyd_George_Record_[Joe Bloggs]_[9000000009]_[31-02-2019].pdf",
+        "1of3_Lloyd_George_Record_[J]_[9000000009]_[25-12-2019].pdf",
+        "1of3_Lloyd_George_Record_[Joe Bloggs]_[9000000009]_[25-12-2019]",
+    ],
+)
+def test_match_lg_valid_file_name_full_path_returns_none_for_other_formats(input):
+    assert match_lg_valid_file_name_full_path(input) is None
@@ -0,0 +1,90 @@
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt import PyJWKClientError
+from jwt.algorithms import RSAAlgorithm
+from utils.jwks_client import CachingJWKClient, get_jwks_client
+
+MOCK_JWKS_URL = "https://localhost/mock_jwks_url"
+
+
+def build_signing_key(kid: str) -> tuple[rsa.RSAPrivateKey, dict]:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    return private_key, {**jwk, "kid": kid, "use": "sig"}
+
+
+@pytest.fixture(scope="module")
+def signing_keys():
+    return {kid: build_signing_key(kid) for kid in ["key-1", "key-2"]}
+
+
+@pytest.fixture
+def mock_clock(mocker):
+    clock = {"now": 1000.0}
+    mocker.patch("time.monotonic", side_effect=lambda: clock["now"])
+    yield clock
+
+
+@pytest.fixture
+def jwks_client(mocker, mock_clock, signing_keys):
+    client = CachingJWKClient(
+        MOCK_JWKS_URL, lifespan_seconds=360, min_refetch_interval_seconds=30
+    )
+    mocker.patch.object(
+        client, "fetch_data", return_value={"keys": [signing_keys["key-1"][1]]}
+    )
+    yield client
+
+
+def build_token(signing_keys: dict, kid: str) -> str:
+    return jwt.encode(
+        {"sub": "test"}, signing_keys[kid][0], algorithm="RS256", headers={"kid": kid}
+    )
+
+
+def test_signing_key_is_fetched_once_while_cached(jwks_client, signing_keys):
+    token = build_token(signing_keys, "key-1")
+
+    first = jwks_client.get_signing_key_from_jwt(token)
+    second = jwks_client.get_signing_key_from_jwt(token)
+
+    assert first is second
+    assert jwt.decode(token, first.key, algorithms=["RS256"]) == {"sub": "test"}
+    jwks_client.fetch_data.assert_called_once()
+
+
+def test_signing_key_is_fetched_again_after_lifespan(jwks_client, mock_clock):
+    jwks_client.get_signing_key("key-1")
+
+    mock_clock["now"] += 360
+    jwks_client.get_signing_key("key-1")
+
+    assert jwks_client.fetch_data.call_count == 2
+
+
+def test_unknown_kid_refetches_at_most_once_per_interval(
+    jwks_client, mock_clock, signing_keys
+):
+    jwks_client.get_signing_key("key-1")
+
+    mock_clock["now"] += 30
+    with pytest.raises(PyJWKClientError):
+        jwks_client.get_signing_key("key-2")
+    with pytest.raises(PyJWKClientError):
+        jwks_client.get_signing_key("key-2")
+    assert jwks_client.fetch_data.call_count == 2
+
+    jwks_client.fetch_data.return_value = {
+        "keys": [signing_keys["key-1"][1], signing_keys["key-2"][1]]
+    }
+    mock_clock["now"] += 30
+    assert jwks_client.get_signing_key("key-2").key_id == "key-2"
+    assert jwks_client.fetch_data.call_count == 3
+
+
+def test_get_jwks_client_returns_one_client_per_url():
+    client = get_jwks_client(MOCK_JWKS_URL)
+
+    assert get_jwks_client(MOCK_JWKS_URL) is client
+    assert get_jwks_client("https://localhost/other_jwks_url") is not client
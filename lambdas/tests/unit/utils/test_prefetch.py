@@ -0,0 +1,46 @@
+import threading
+import time
+
+from utils.prefetch import prefetch_in_order
+
+
+def test_prefetch_in_order_yields_results_in_order_when_fetches_finish_out_of_order():
+    def slow_early_fetches(index):
+        time.sleep(0.01 * (8 - index))
+        return index
+
+    actual = list(prefetch_in_order(slow_early_fetches, [(i,) for i in range(8)], 4))
+
+    assert actual == list(range(8))
+
+
+def test_prefetch_in_order_limits_fetches_in_flight():
+    lock = threading.Lock()
+    started = 0
+    in_flight = 0
+    max_in_flight = 0
+
+    def track_in_flight(index):
+        nonlocal started, in_flight, max_in_flight
+        with lock:
+            started += 1
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return index
+
+    results = prefetch_in_order(track_in_flight, [(i,) for i in range(10)], 3)
+    assert next(results) == 0
+    time.sleep(0.05)
+
+    assert started == 4
+    assert len(list(results)) == 9
+    assert max_in_flight == 3
+
+
+def test_prefetch_in_order_passes_each_tuple_as_arguments():
+    actual = list(prefetch_in_order(lambda a, b: a + b, [(1, 2), (3, 4)], 2))
+
+    assert actual == [3, 7]
@@ -0,0 +1,112 @@
+import pytest
+from utils.rate_limiter import AdaptiveConcurrencyLimiter, TokenBucketRateLimiter
+
+
+@pytest.fixture
+def mock_clock(mocker):
+    clock = {"now": 1000.0}
+
+    def sleep(seconds):
+        clock["now"] += seconds
+
+    mocker.patch("utils.rate_limiter.time.monotonic", side_effect=lambda: clock["now"])
+    mock_sleep = mocker.patch("utils.rate_limiter.time.sleep", side_effect=sleep)
+    yield mock_sleep
+
+
+def test_acquire_does_not_wait_while_tokens_are_available(mock_clock):
+    rate_limiter = TokenBucketRateLimiter(rate_per_second=5)
+
+    for _ in range(5):
+        assert rate_limiter.acquire() == 0
+
+    mock_clock.assert_not_called()
+
+
+def test_acquire_waits_for_next_token_once_bucket_is_empty(mock_clock):
+    rate_limiter = TokenBucketRateLimiter(rate_per_second=5)
+    for _ in range(5):
+        rate_limiter.acquire()
+
+    waited = rate_limiter.acquire()
+
+    assert waited == pytest.approx(0.2)
+    assert rate_limiter.total_wait_seconds == pytest.approx(0.2)
+
+
+def test_acquire_zero_waits_until_consumed_debt_is_repaid(mock_clock):
+    rate_limiter = TokenBucketRateLimiter(rate_per_second=10)
+    rate_limiter.consume(30)
+
+    waited = rate_limiter.acquire(0)
+
+    assert waited == pytest.approx(2.0)
+
+
+def test_rate_limiter_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucketRateLimiter(rate_per_second=0)
+
+
+def test_adaptive_limiter_increases_by_one_per_round_of_successes():
+    limiter = AdaptiveConcurrencyLimiter(initial_concurrency=4, max_concurrency=8)
+
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.concurrency == 4
+
+    for _ in range(2):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.concurrency == 5
+    assert limiter.in_flight == 0
+
+
+def test_adaptive_limiter_does_not_exceed_max_concurrency():
+    limiter = AdaptiveConcurrencyLimiter(initial_concurrency=2, max_concurrency=2)
+
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release()
+
+    assert limiter.concurrency == 2
+
+
+def test_adaptive_limiter_halves_once_per_cooldown_on_throttles(mock_clock, mocker):
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_concurrency=16, max_concurrency=32, decrease_cooldown_seconds=1.0
+    )
+
+    for _ in range(3):
+        limiter.acquire()
+    for _ in range(3):
+        limiter.release(throttled=True)
+
+    assert limiter.concurrency == 8
+    assert limiter.throttles == 3
+
+    mocker.patch("utils.rate_limiter.time.monotonic", return_value=1002.0)
+    limiter.acquire()
+    limiter.release(throttled=True)
+
+    assert limiter.concurrency == 4
+
+
+def test_adaptive_limiter_does_not_drop_below_min_concurrency(mock_clock, mocker):
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_concurrency=2,
+        max_concurrency=4,
+        min_concurrency=2,
+        decrease_cooldown_seconds=0,
+    )
+
+    limiter.acquire()
+    limiter.release(throttled=True)
+
+    assert limiter.concurrency == 2
+
+
+def test_adaptive_limiter_rejects_invalid_limits():
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(initial_concurrency=10, max_concurrency=5)
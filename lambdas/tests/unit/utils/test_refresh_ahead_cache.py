@@ -0,0 +1,90 @@
+import pytest
+from utils.refresh_ahead_cache import RefreshAheadCache
+
+
+@pytest.fixture
+def mock_clock(mocker):
+    clock = {"now": 1000.0}
+    mocker.patch("time.monotonic", side_effect=lambda: clock["now"])
+    yield clock
+
+
+@pytest.fixture
+def cache():
+    cache = RefreshAheadCache(refresh_interval_seconds=45, max_staleness_seconds=300)
+    yield cache
+    cache.clear()
+
+
+def test_get_fetches_once_within_refresh_interval(mocker, mock_clock, cache):
+    fetch = mocker.MagicMock(return_value=("first", "1"))
+
+    assert cache.get(fetch) == "first"
+    mock_clock["now"] += 44
+    assert cache.get(fetch) == "first"
+
+    fetch.assert_called_once_with(None)
+
+
+def test_get_returns_stale_value_while_refreshing_in_background(
+    mocker, mock_clock, cache
+):
+    fetch = mocker.MagicMock(side_effect=[("first", "1"), ("second", "2")])
+    cache.get(fetch)
+
+    mock_clock["now"] += 45
+    assert cache.get(fetch) == "first"
+    cache.refresh_thread.join()
+
+    assert cache.get(fetch) == "second"
+    fetch.assert_called_with("1")
+    assert cache.refreshes == 2
+
+
+def test_unchanged_version_keeps_value_and_restarts_interval(mocker, mock_clock, cache):
+    fetch = mocker.MagicMock(side_effect=[("first", "1"), None])
+    cache.get(fetch)
+
+    mock_clock["now"] += 45
+    cache.get(fetch)
+    cache.refresh_thread.join()
+
+    assert cache.get(fetch) == "first"
+    assert cache.age() == 0
+    assert fetch.call_count == 2
+
+
+def test_failed_background_refresh_keeps_value_and_retries(mocker, mock_clock, cache):
+    fetch = mocker.MagicMock(
+        side_effect=[("first", "1"), ConnectionError("refused"), ("second", "2")]
+    )
+    cache.get(fetch)
+
+    mock_clock["now"] += 45
+    cache.get(fetch)
+    cache.refresh_thread.join()
+    assert cache.get(fetch) == "first"
+    cache.refresh_thread.join()
+
+    assert cache.get(fetch) == "second"
+
+
+def test_value_older_than_max_staleness_is_refreshed_before_returning(
+    mocker, mock_clock, cache
+):
+    fetch = mocker.MagicMock(side_effect=[("first", "1"), ("second", "2")])
+    cache.get(fetch)
+
+    mock_clock["now"] += 300
+
+    assert cache.get(fetch) == "second"
+
+
+def test_disabled_cache_fetches_every_time(mocker):
+    cache = RefreshAheadCache(refresh_interval_seconds=0)
+    fetch = mocker.MagicMock(return_value=("value", "1"))
+
+    cache.get(fetch)
+    cache.get(fetch)
+
+    assert fetch.call_count == 2
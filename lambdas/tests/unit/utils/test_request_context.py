@@ -0,0 +1,46 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from utils.request_context import RequestContext, map_in_request_context
+
+
+@pytest.fixture
+def context():
+    yield RequestContext()
+
+
+def test_value_set_in_a_copied_context_does_not_leak(context):
+    context.patient_nhs_no = "9000000009"
+    tasks_started = threading.Barrier(2)
+
+    def read_own_nhs_number(nhs_number):
+        context.patient_nhs_no = nhs_number
+        tasks_started.wait(timeout=5)
+        return context.patient_nhs_no
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        actual = map_in_request_context(
+            executor, read_own_nhs_number, ["9000000017", "9000000025"]
+        )
+
+    assert actual == ["9000000017", "9000000025"]
+    assert context.patient_nhs_no == "9000000009"
+
+
+def test_threads_without_a_copied_context_see_main_thread_values(context):
+    context.request_id = "test-request-id"
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        actual = executor.submit(lambda: context.request_id).result()
+
+    assert actual == "test-request-id"
+
+
+def test_unset_attribute_raises_attribute_error(context):
+    context.auth_ssm_prefix = "/auth/password/"
+    del context.auth_ssm_prefix
+
+    assert getattr(context, "auth_ssm_prefix", None) is None
+    with pytest.raises(AttributeError):
+        context.authorization
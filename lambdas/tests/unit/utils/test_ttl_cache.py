@@ -0,0 +1,78 @@
+import pytest
+from utils.ttl_cache import TtlCache
+
+
+@pytest.fixture
+def mock_clock(mocker):
+    clock = {"now": 1000.0}
+    mocker.patch("utils.ttl_cache.time.monotonic", side_effect=lambda: clock["now"])
+    yield clock
+
+
+def test_get_returns_value_until_ttl_expires(mock_clock):
+    cache = TtlCache(ttl_seconds=10)
+    cache.put("key", "value")
+
+    mock_clock["now"] += 9
+    assert cache.get("key") == "value"
+
+    mock_clock["now"] += 1
+    assert cache.get("key") is None
+    assert cache.metrics.hits == 1
+    assert cache.metrics.misses == 1
+
+
+def test_put_uses_shorter_ttl_for_the_entry(mock_clock):
+    cache = TtlCache(ttl_seconds=10)
+    cache.put("short", "value", ttl_seconds=2)
+    cache.put("capped", "value", ttl_seconds=60)
+
+    mock_clock["now"] += 5
+    assert cache.get("short") is None
+    assert cache.get("capped") == "value"
+
+    mock_clock["now"] += 5
+    assert cache.get("capped") is None
+
+
+def test_put_with_expired_ttl_removes_entry(mock_clock):
+    cache = TtlCache(ttl_seconds=10)
+    cache.put("key", "value")
+
+    cache.put("key", "new value", ttl_seconds=-1)
+
+    assert cache.get("key") is None
+
+
+def test_put_evicts_least_recently_used_entry(mock_clock):
+    cache = TtlCache(ttl_seconds=10, max_entries=2)
+    cache.put("first", 1)
+    cache.put("second", 2)
+    cache.get("first")
+
+    cache.put("third", 3)
+
+    assert cache.get("second") is None
+    assert cache.get("first") == 1
+    assert cache.metrics.evictions == 1
+
+
+def test_disabled_cache_never_returns_values(mock_clock):
+    cache = TtlCache(ttl_seconds=0)
+    cache.put("key", "value")
+
+    assert not cache.enabled
+    assert cache.get("key", "default") == "default"
+
+
+def test_invalidate_and_clear_remove_entries(mock_clock):
+    cache = TtlCache(ttl_seconds=10)
+    cache.put("first", 1)
+    cache.put("second", 2)
+
+    cache.invalidate("first")
+    assert cache.get("first") is None
+
+    cache.clear()
+    assert cache.get("second") is None
+    assert cache.metrics.misses == 1
@@ -1,6 +1,7 @@
 import pytest
 from services.mock_pds_service import MockPdsApiService
 from services.pds_api_service import PdsApiService
+from services.pds_response_cache import CachedPatientSearch
 from utils.exceptions import InvalidNhsNumberException
 from utils.utilities import (
     camelize_dict,
@@ -65,6 +66,30 @@ def test_get_pds_service_returns_stubbed_pds_when_unset():
     assert isinstance(response, MockPdsApiService)
 
 
+def test_get_pds_service_wraps_service_in_cache_when_requested():
+    response = get_pds_service(use_cache=True)
+
+    assert isinstance(response, CachedPatientSearch)
+    assert isinstance(response.pds_service, MockPdsApiService)
+
+
+def test_get_pds_service_does_not_create_cache_when_not_requested(mocker):
+    mock_pds_response_cache = mocker.patch("utils.utilities.PdsResponseCache")
+
+    response = get_pds_service()
+
+    assert isinstance(response, MockPdsApiService)
+    mock_pds_response_cache.assert_not_called()
+
+
+def test_get_pds_service_does_not_cache_when_cache_disabled(monkeypatch):
+    monkeypatch.setenv("PDS_CACHE_TTL_SECONDS", "0")
+
+    response = get_pds_service(use_cache=True)
+
+    assert isinstance(response, MockPdsApiService)
+
+
 @pytest.mark.parametrize(
     "stub_value",
     [
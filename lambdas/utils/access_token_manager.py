@@ -0,0 +1,88 @@
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+@dataclass
+class AccessToken:
+    value: str
+    expires_at: float = math.inf
+    response: dict = field(default_factory=dict)
+
+    def is_usable(self, margin_seconds: float) -> bool:
+        return bool(self.value) and self.expires_at - time.time() > margin_seconds
+
+
+class AccessTokenManager:
+    """
+    Keeps an access token in memory for the life of a warm container, so that
+    callers neither read it from storage nor mint a new one on every request.
+
+    A token is replaced once it is within refresh_margin_seconds of expiring, or
+    after invalidate() is called with it (e.g. following a 401). Refreshes are
+    single-flight: while one thread refreshes, the others wait for its result
+    instead of minting tokens of their own. A refresh first tries load_token, in
+    case another process has already stored a newer token, and only then calls
+    fetch_token; a minted token is passed to store_token.
+    """
+
+    def __init__(self, refresh_margin_seconds: float = 10):
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.access_token: Optional[AccessToken] = None
+        self.rejected_token_value: Optional[str] = None
+        self.refreshes = 0
+        self.lock = threading.Lock()
+
+    def get_access_token(
+        self,
+        fetch_token: Callable[[], AccessToken],
+        load_token: Optional[Callable[[], Optional[AccessToken]]] = None,
+        store_token: Optional[Callable[[AccessToken], None]] = None,
+    ) -> str:
+        access_token = self.access_token
+        if access_token and access_token.is_usable(self.refresh_margin_seconds):
+            return access_token.value
+
+        with self.lock:
+            access_token = self.access_token
+            if access_token and access_token.is_usable(self.refresh_margin_seconds):
+                return access_token.value
+
+            stored_token = load_token() if load_token else None
+            if (
+                stored_token
+                and stored_token.value != self.rejected_token_value
+                and stored_token.is_usable(self.refresh_margin_seconds)
+            ):
+                self.access_token = stored_token
+                return stored_token.value
+
+            access_token = fetch_token()
+            self.refreshes += 1
+            if store_token and (
+                stored_token is None or access_token.value != stored_token.value
+            ):
+                store_token(access_token)
+            self.access_token = access_token
+            return access_token.value
+
+    def invalidate(self, token_value: Optional[str] = None):
+        """
+        Forgets the current token, or only the given one so that a caller holding
+        a token rejected by the API does not discard a token that another thread
+        has refreshed in the meantime. A rejected token is not loaded again.
+        """
+        with self.lock:
+            self.rejected_token_value = token_value
+            if token_value is None or (
+                self.access_token and self.access_token.value == token_value
+            ):
+                self.access_token = None
+
+    def clear(self):
+        with self.lock:
+            self.access_token = None
+            self.rejected_token_value = None
+            self.refreshes = 0
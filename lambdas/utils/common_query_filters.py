@@ -48,6 +48,13 @@ def get_doc_status_preliminary_filter(filter_builder: DynamoQueryFilterBuilder):
     return doc_status_filter_expression & filter_not_deleted
 
 
+def get_missing_file_size_filter(filter_builder: DynamoQueryFilterBuilder):
+    filter_builder.add_condition("FileSize", AttributeOperator.NOT_EXISTS)
+    missing_file_size_filter_expression = filter_builder.build()
+    filter_upload_complete = get_upload_complete_filter(filter_builder)
+    return missing_file_size_filter_expression & filter_upload_complete
+
+
 NotDeleted = get_not_deleted_filter(DynamoQueryFilterBuilder())
 
 UploadCompleted = get_upload_complete_filter(DynamoQueryFilterBuilder())
@@ -59,3 +66,5 @@ CleanFiles = get_clean_files_filter(DynamoQueryFilterBuilder())
 CurrentStatusFile = get_current_files_filter(DynamoQueryFilterBuilder())
 
 PreliminaryStatus = get_doc_status_preliminary_filter(DynamoQueryFilterBuilder())
+
+MissingFileSize = get_missing_file_size_filter(DynamoQueryFilterBuilder())
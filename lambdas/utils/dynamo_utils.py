@@ -1,5 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterator, Optional
 
 import inflection
 from enums.dynamo_filter import AttributeOperator
@@ -147,3 +148,52 @@ def parse_dynamo_record(dynamodb_record: Dict[str, Any]) -> Dict[str, Any]:
             case _:
                 raise ValueError(f"Unsupported DynamoDB type for key {key}: {value}")
     return result
+
+
+def iter_paginated_items(
+    fetch_page: Callable[[Optional[dict]], dict],
+    max_items: Optional[int] = None,
+    prefetch: bool = False,
+) -> Iterator[list[dict]]:
+    """
+    Yields the Items of each page of a paginated dynamo query or scan.
+        :param fetch_page: Called with the ExclusiveStartKey of the page to fetch
+            (None for the first page), returns the raw dynamo response
+        :param max_items: Stop once this many items have been yielded, the last
+            page is truncated to fit
+        :param prefetch: Fetch the next page on a background thread while the
+            caller processes the current one
+
+    Pages are only requested as the caller iterates, so a caller that stops
+    early (e.g. any(...) or next(...)) does not read the rest of the results.
+
+    example usage:
+        pages = iter_paginated_items(
+            lambda start_key: dynamo_service.query_table_by_index(
+                ..., exclusive_start_key=start_key
+            )
+        )
+    """
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    items_remaining = max_items
+    try:
+        response = fetch_page(None)
+        while True:
+            next_start_key = response.get("LastEvaluatedKey")
+            next_page = None
+            if executor and next_start_key:
+                next_page = executor.submit(fetch_page, next_start_key)
+
+            items = response["Items"]
+            if items_remaining is not None:
+                items = items[:items_remaining]
+                items_remaining -= len(items)
+            if items:
+                yield items
+
+            if items_remaining == 0 or not next_start_key:
+                return
+            response = next_page.result() if next_page else fetch_page(next_start_key)
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
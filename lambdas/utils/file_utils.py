@@ -1,5 +1,6 @@
 import csv
 from io import BytesIO, TextIOWrapper
+from typing import BinaryIO, Iterator
 
 
 def convert_csv_dictionary_to_bytes(
@@ -20,3 +21,16 @@ def convert_csv_dictionary_to_bytes(
     csv_buffer.close()
 
     return result
+
+
+def stream_csv_rows(
+    binary_stream: BinaryIO, encoding: str = "utf-8-sig", errors: str = "strict"
+) -> Iterator[dict]:
+    """
+    Yields the rows of a CSV as dictionaries, decoding the stream (e.g. an S3
+    object body) incrementally rather than reading it into memory first.
+    """
+    with TextIOWrapper(
+        binary_stream, encoding=encoding, errors=errors, newline=""
+    ) as text_stream:
+        yield from csv.DictReader(text_stream)
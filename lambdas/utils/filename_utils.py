@@ -1,5 +1,6 @@
 import datetime
 import os
+from typing import Optional
 
 from regex import regex
 from utils.audit_logging_setup import LoggingService
@@ -7,6 +8,28 @@ from utils.exceptions import InvalidFileNameException
 
 logger = LoggingService(__name__)
 
+NHS_NUMBER_PATTERN = regex.compile(r"(?<!\d)((?:[^\d_]*\d){10})(?!\d)(.*)")
+PATIENT_NAME_PATTERN = regex.compile(r".*?([\p{L}][^\d]*[\p{L}])(.*)", regex.IGNORECASE)
+DATE_PATTERN = regex.compile(
+    r"(\D+\d{1,2})[^\w\d]*(\w{3,}|\d{1,2})[^\w\d]*(\d{4})(?!\d)(.*)"
+)
+DOCUMENT_PATH_PATTERN = regex.compile(r"(.*[/])*((\d+)[^0-9]*of[^0-9]*(\d+)(.*))")
+DOCUMENT_NUMBER_PATTERN = regex.compile(r"[^0-9]*(\d+)[^0-9]*of[^0-9]*(\d+)(.*)")
+LLOYD_GEORGE_RECORD_PATTERN = regex.compile(
+    r".*?ll[oO0οՕ〇]yd.*?ge[oO0οՕ〇]rge.*?rec[oO0οՕ〇]rd(.*)", regex.IGNORECASE
+)
+FILE_EXTENSION_PATTERN = regex.compile(r"(\.([^.]*))$")
+DIGIT_PATTERN = regex.compile(r"\d")
+DIGITS_PATTERN = regex.compile(r"\d+")
+
+# A file name that already follows the Lloyd George naming convention, e.g.
+# folder_path/1of2_Lloyd_George_Record_[Joe Bloggs]_[9000000009]_[25-12-2019].pdf
+LG_VALID_FILE_NAME_PATTERN = regex.compile(
+    r"((?:.*/)?)(\d+)of(\d+)_Lloyd_George_Record_"
+    r"\[(\p{L}[^\d\[\]/]*\p{L})\]_\[(\d{10})\]_\[(\d{2})-(\d{2})-(\d{4})\]"
+    r"(\.[^.\d/]*)"
+)
+
 
 def extract_page_number(filename: str) -> int:
     """
@@ -87,6 +110,56 @@ def assemble_lg_valid_file_name_full_path(
     )
 
 
+def match_lg_valid_file_name_full_path(file_path: str) -> Optional[str]:
+    """
+    Parses a file path that already follows the Lloyd George naming convention
+    with a single combined expression.
+
+    Args:
+        file_path (str): The full file path.
+
+    Returns:
+        Optional[str]: The assembled file path, identical to the one produced by
+        running the individual extract_* functions, or None if the file path does
+        not follow the convention and needs the individual functions instead.
+
+    Example:
+        file_path=folder_path/01of02_Lloyd_George_Record_[Joe Bloggs]_[9000000009]_[25-12-2019].pdf
+        match_lg_valid_file_name_full_path(file_path) ->
+        folder_path/1of2_Lloyd_George_Record_[Joe Bloggs]_[9000000009]_[25-12-2019].pdf
+    """
+    expression_result = LG_VALID_FILE_NAME_PATTERN.fullmatch(file_path)
+    if expression_result is None:
+        return None
+
+    (
+        file_path_prefix,
+        first_document_number,
+        second_document_number,
+        patient_name,
+        nhs_number,
+        day,
+        month,
+        year,
+        file_extension,
+    ) = expression_result.groups()
+
+    try:
+        date_object = datetime.date(year=int(year), month=int(month), day=int(day))
+    except ValueError:
+        return None
+
+    return assemble_lg_valid_file_name_full_path(
+        file_path_prefix,
+        int(first_document_number),
+        int(second_document_number),
+        patient_name,
+        nhs_number,
+        date_object,
+        file_extension,
+    )
+
+
 def extract_document_path(
     file_path: str,
 ) -> tuple[str, str]:
@@ -125,14 +198,13 @@ def extract_nhs_number_from_bulk_upload_file_name(
     Raises:
         InvalidFileNameException: If the NHS number is invalid or not found.
     """
-    nhs_number_expression = r"(?<!\d)((?:[^\d_]*\d){10})(?!\d)(.*)"
-    expression_result = regex.search(rf"{nhs_number_expression}", file_path)
+    expression_result = NHS_NUMBER_PATTERN.search(file_path)
 
     if expression_result is None:
         logger.info("Failed to find NHS number in file name")
         raise InvalidFileNameException("Invalid NHS number")
 
-    nhs_number = "".join(regex.findall(r"\d", expression_result.group(1)))
+    nhs_number = "".join(DIGIT_PATTERN.findall(expression_result.group(1)))
     remaining_file_path = expression_result.group(2)
 
     return nhs_number, remaining_file_path
@@ -153,10 +225,7 @@ def extract_patient_name_from_bulk_upload_file_name(
     Raises:
         InvalidFileNameException: If the patient name is invalid or not found.
     """
-    document_number_expression = r".*?([\p{L}][^\d]*[\p{L}])(.*)"
-    expression_result = regex.search(
-        rf"{document_number_expression}", file_path, regex.IGNORECASE
-    )
+    expression_result = PATIENT_NAME_PATTERN.search(file_path)
 
     if expression_result is None:
         logger.info("Failed to find the patient name in the file name")
@@ -181,14 +250,13 @@ def extract_date_from_bulk_upload_file_name(file_path):
     Raises:
         InvalidFileNameException: If the date is invalid or not found.
     """
-    date_expression = r"(\D+\d{1,2})[^\w\d]*(\w{3,}|\d{1,2})[^\w\d]*(\d{4})(?!\d)(.*)"
-    expression_result = regex.search(date_expression, file_path)
+    expression_result = DATE_PATTERN.search(file_path)
 
     if not expression_result:
         raise InvalidFileNameException("Could not find a valid date in the filename")
 
     try:
-        day_str = "".join(regex.findall(r"\d+", expression_result.group(1)))
+        day_str = "".join(DIGITS_PATTERN.findall(expression_result.group(1)))
         month_part = expression_result.group(2)
         year_str = expression_result.group(3)
         remaining_file_path = expression_result.group(4)
@@ -196,7 +264,7 @@ def extract_date_from_bulk_upload_file_name(file_path):
         if month_part.isalpha():
             month = datetime.datetime.strptime(month_part, "%b").month
         else:
-            month = int("".join(regex.findall(r"\d+", month_part)))
+            month = int("".join(DIGITS_PATTERN.findall(month_part)))
 
         day = int(day_str)
         year = int(year_str)
@@ -227,9 +295,7 @@ def extract_document_path_for_lloyd_george_record(
         file_path=folder_path/1of2_Lloyd_George_Record.pdf
         extract_document_path_for_lloyd_george_record(file_path) -> folder_path/, 1of2_Lloyd_George_Record.pdf
     """
-    document_number_expression = r"(.*[/])*((\d+)[^0-9]*of[^0-9]*(\d+)(.*))"
-
-    expression_result = regex.search(rf"{document_number_expression}", file_path)
+    expression_result = DOCUMENT_PATH_PATTERN.search(file_path)
 
     if expression_result is None:
         logger.info("Failed to find the document path in file name")
@@ -264,8 +330,7 @@ def extract_document_number_bulk_upload_file_name(
         extract_document_number_bulk_upload_file_name(file_path) ->
         1, 2, _Lloyd_George_Record_[Joe Bloggs]_[123456789]_[25-12-2019].pdf
     """
-    document_number_expression = r"[^0-9]*(\d+)[^0-9]*of[^0-9]*(\d+)(.*)"
-    expression_result = regex.search(rf"{document_number_expression}", file_path)
+    expression_result = DOCUMENT_NUMBER_PATTERN.search(file_path)
 
     if expression_result is None:
         logger.info("Failed to find the document number in file name")
@@ -297,8 +362,7 @@ def extract_lloyd_george_record_from_bulk_upload_file_name(
         file_path=1of2_Lloyd_George_Record_[Joe Bloggs]_[123456789]_[25-12-2019].pdf
         extract_lloyd_george_record_from_bulk_upload_file_name(file_path) -> _[Joe Bloggs]_[123456789]_[25-12-2019].pdf
     """
-    _expression = r".*?ll[oO0οՕ〇]yd.*?ge[oO0οՕ〇]rge.*?rec[oO0οՕ〇]rd(.*)"
-    lloyd_george_record = regex.search(rf"{_expression}", file_path, regex.IGNORECASE)
+    lloyd_george_record = LLOYD_GEORGE_RECORD_PATTERN.search(file_path)
     if lloyd_george_record is None:
         logger.info("Failed to extract Lloyd George Record from file name")
         raise InvalidFileNameException("Invalid Lloyd_George_Record separator")
@@ -323,8 +387,7 @@ def extract_file_extension_from_bulk_upload_file_name(
     Raises:
         InvalidFileNameException: If the file extension is invalid or not found.
     """
-    file_extension_expression = r"(\.([^.]*))$"
-    expression_result = regex.search(rf"{file_extension_expression}", file_path)
+    expression_result = FILE_EXTENSION_PATTERN.search(file_path)
 
     if expression_result is None:
         logger.info("Failed to find a file extension")
@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+from typing import Optional
+
+import jwt
+from jwt import PyJWK, PyJWKClientError
+from utils.ttl_cache import TtlCache
+
+
+class CachingJWKClient(jwt.PyJWKClient):
+    """
+    PyJWKClient that keeps each signing key for lifespan_seconds, so that a
+    client held for the life of a warm container only fetches the JWKS document
+    when it sees a kid it does not know.
+
+    Refetches for an unknown kid are at most one per
+    min_refetch_interval_seconds, so tokens with made up kids cannot make every
+    request fetch the JWKS document; inside that interval an unknown kid is
+    rejected straight away.
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        lifespan_seconds: int = 360,
+        min_refetch_interval_seconds: int = 30,
+    ):
+        super().__init__(uri, cache_jwk_set=False)
+        self.signing_keys = TtlCache(ttl_seconds=lifespan_seconds)
+        self.min_refetch_interval_seconds = min_refetch_interval_seconds
+        self.last_refetch: Optional[float] = None
+        self.refetch_lock = threading.Lock()
+
+    def get_signing_key(self, kid: str) -> PyJWK:
+        signing_key = self.signing_keys.get(kid)
+        if signing_key is not None:
+            return signing_key
+
+        with self.refetch_lock:
+            signing_key = self.signing_keys.get(kid)
+            if signing_key is None:
+                signing_key = self.refetch_signing_key(kid)
+        return signing_key
+
+    def refetch_signing_key(self, kid: str) -> PyJWK:
+        now = time.monotonic()
+        if (
+            self.last_refetch is not None
+            and now - self.last_refetch < self.min_refetch_interval_seconds
+        ):
+            raise PyJWKClientError(
+                f'Unable to find a signing key that matches: "{kid}"'
+            )
+
+        self.last_refetch = now
+        signing_keys = self.get_signing_keys(refresh=True)
+        for signing_key in signing_keys:
+            self.signing_keys.put(signing_key.key_id, signing_key)
+
+        signing_key = self.match_kid(signing_keys, kid)
+        if not signing_key:
+            raise PyJWKClientError(
+                f'Unable to find a signing key that matches: "{kid}"'
+            )
+        return signing_key
+
+
+jwks_clients: dict[str, CachingJWKClient] = {}
+jwks_clients_lock = threading.Lock()
+
+
+def get_jwks_client(jwks_url: str) -> CachingJWKClient:
+    with jwks_clients_lock:
+        if jwks_url not in jwks_clients:
+            jwks_clients[jwks_url] = CachingJWKClient(
+                jwks_url,
+                lifespan_seconds=int(
+                    os.environ.get("OIDC_JWKS_CACHE_LIFESPAN_SECONDS", 360)
+                ),
+                min_refetch_interval_seconds=int(
+                    os.environ.get("OIDC_JWKS_MIN_REFETCH_INTERVAL_SECONDS", 30)
+                ),
+            )
+        return jwks_clients[jwks_url]
@@ -0,0 +1,26 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+def prefetch_in_order(
+    fetch: Callable[..., T], arguments: Iterable[tuple], max_in_flight: int
+) -> Iterator[T]:
+    """
+    Yields fetch(*args) for each args in arguments, in order, while running up to
+    max_in_flight fetches ahead of the result being consumed on a thread pool.
+    No new fetch is started until the caller takes the oldest result, so a slow
+    consumer holds back the fetches rather than letting their results pile up.
+    """
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        pending_fetches = deque()
+
+        for args in arguments:
+            pending_fetches.append(executor.submit(fetch, *args))
+            if len(pending_fetches) > max_in_flight:
+                yield pending_fetches.popleft().result()
+
+        while pending_fetches:
+            yield pending_fetches.popleft().result()
@@ -0,0 +1,110 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe token bucket shared by every worker that holds a reference to it.
+
+    acquire() blocks until the requested tokens are available. consume() records
+    usage that is only known after a call has been made (e.g. DynamoDB consumed
+    capacity), which can leave the bucket in debt; acquire(0) then just waits
+    until that debt has been paid back.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: Optional[float] = None):
+        if rate_per_second <= 0:
+            raise ValueError("rate_per_second must be greater than zero")
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity if capacity is not None else rate_per_second
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.total_wait_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        required = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= required:
+                    self.tokens -= tokens
+                    self.total_wait_seconds += waited
+                    return waited
+                wait_time = (required - self.tokens) / self.rate_per_second
+            time.sleep(wait_time)
+            waited += wait_time
+
+    def consume(self, tokens: float):
+        with self.lock:
+            self._refill()
+            self.tokens -= tokens
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_second)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Thread-safe limit on the number of calls in flight, tuned by additive increase
+    and multiplicative decrease. Every successful call raises the limit by
+    1/limit, i.e. by one per full round of calls, up to max_concurrency. A
+    throttled call halves the limit, down to min_concurrency, at most once per
+    decrease_cooldown_seconds so that a burst of throttles from calls already in
+    flight only counts once.
+    """
+
+    def __init__(
+        self,
+        initial_concurrency: int,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        decrease_cooldown_seconds: float = 1.0,
+    ):
+        if not 1 <= min_concurrency <= initial_concurrency <= max_concurrency:
+            raise ValueError(
+                "Concurrency limits must satisfy 1 <= min <= initial <= max"
+            )
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.decrease_cooldown_seconds = decrease_cooldown_seconds
+        self.limit = float(initial_concurrency)
+        self.in_flight = 0
+        self.throttles = 0
+        self.last_decrease = None
+        self.condition = threading.Condition()
+
+    @property
+    def concurrency(self) -> int:
+        return int(self.limit)
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= self.concurrency:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool = False):
+        with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                self.throttles += 1
+                self._decrease()
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def _decrease(self):
+        now = time.monotonic()
+        if (
+            self.last_decrease is not None
+            and now - self.last_decrease < self.decrease_cooldown_seconds
+        ):
+            return
+        self.last_decrease = now
+        self.limit = max(self.min_concurrency, self.limit / 2)
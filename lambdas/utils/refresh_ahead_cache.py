@@ -0,0 +1,107 @@
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from utils.audit_logging_setup import LoggingService
+
+logger = LoggingService(__name__)
+
+# fetch is given the version currently held and returns the new value and its
+# version, or None when the version has not changed since the last fetch
+FetchVersionedValue = Callable[[Optional[str]], Optional[tuple[Any, Optional[str]]]]
+
+
+class RefreshAheadCache:
+    """
+    Holds a single value that changes rarely, such as a configuration document,
+    for the life of a warm lambda container.
+
+    Only the first get() waits for fetch. Once the value is older than
+    refresh_interval_seconds it is still returned while a background thread
+    fetches it again, so callers do not wait on refreshes; if the refresh fails
+    the old value is kept and the next get() tries again. A lambda container is
+    frozen between invocations, so a background refresh may not finish until a
+    later one: a value older than max_staleness_seconds is refreshed before it is
+    returned instead. A refresh_interval_seconds of 0 disables the cache, so
+    every get() fetches.
+    """
+
+    def __init__(
+        self,
+        refresh_interval_seconds: float,
+        max_staleness_seconds: Optional[float] = None,
+    ):
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.max_staleness_seconds = max(
+            max_staleness_seconds or 0, refresh_interval_seconds
+        )
+        self.value: Any = None
+        self.version: Optional[str] = None
+        self.refreshed_at: Optional[float] = None
+        self.refreshes = 0
+        self.refresh_thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.refresh_interval_seconds > 0
+
+    def age(self) -> float:
+        if self.refreshed_at is None:
+            return float("inf")
+        return time.monotonic() - self.refreshed_at
+
+    def get(self, fetch: FetchVersionedValue) -> Any:
+        if not self.enabled:
+            return fetch(None)[0]
+
+        value, age = self.value, self.age()
+        if age < self.refresh_interval_seconds:
+            return value
+        if age < self.max_staleness_seconds:
+            self.start_background_refresh(fetch)
+            return value
+
+        with self.lock:
+            if self.age() >= self.max_staleness_seconds:
+                self.refresh(fetch)
+            return self.value
+
+    def refresh(self, fetch: FetchVersionedValue):
+        result = fetch(self.version)
+        self.refreshes += 1
+        if result is not None:
+            self.value, self.version = result
+        self.refreshed_at = time.monotonic()
+
+    def start_background_refresh(self, fetch: FetchVersionedValue):
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            self.refresh_thread = threading.Thread(
+                target=self.background_refresh, args=(fetch,), daemon=True
+            )
+            self.refresh_thread.start()
+        except Exception:
+            self.lock.release()
+            raise
+
+    def background_refresh(self, fetch: FetchVersionedValue):
+        try:
+            self.refresh(fetch)
+        except Exception as e:
+            logger.warning(
+                f"Background refresh failed, keeping the cached value: {str(e)}"
+            )
+        finally:
+            self.lock.release()
+
+    def clear(self):
+        if self.refresh_thread is not None:
+            self.refresh_thread.join()
+        with self.lock:
+            self.value = None
+            self.version = None
+            self.refreshed_at = None
+            self.refreshes = 0
+            self.refresh_thread = None
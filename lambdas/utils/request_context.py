@@ -1,21 +1,71 @@
-from contextvars import ContextVar
-from typing import Any
+import threading
+from concurrent.futures import Executor
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable
+
+_UNSET = object()
 
 
 class RequestContext:
+    """
+    Holds details of the request being handled, such as the correlation id and
+    the patient NHS number, that are added to log lines and audit records.
+
+    Each attribute is kept in a ContextVar, so a task run with
+    contextvars.copy_context().run can set its own values, e.g. the NHS number
+    of the patient it is processing, without changing them for the tasks that
+    run alongside it. Values set on the main thread are also the defaults for
+    other threads, so pool threads started without a copied context still see
+    the handler's correlation id and authorisation.
+    """
+
     def __init__(self) -> None:
-        self._data = dict()
+        object.__setattr__(self, "_context_vars", {})
+        object.__setattr__(self, "_defaults", {})
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _get_context_var(self, name: str) -> ContextVar:
+        with self._lock:
+            if name not in self._context_vars:
+                self._context_vars[name] = ContextVar(name, default=_UNSET)
+            return self._context_vars[name]
 
-    def __set__(self, instance, value):
-        if instance not in self._data:
-            self._data[instance] = ContextVar(instance)
-        self._data[instance].set(value)
+    def __setattr__(self, name: str, value: Any) -> None:
+        self._get_context_var(name).set(value)
+        if threading.current_thread() is threading.main_thread():
+            self._defaults[name] = value
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        value = self._get_context_var(name).get()
+        if value is _UNSET:
+            value = self._defaults.get(name, _UNSET)
+        if value is _UNSET:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        return value
+
+    def __delattr__(self, name: str) -> None:
+        self._get_context_var(name).set(_UNSET)
+        if threading.current_thread() is threading.main_thread():
+            self._defaults.pop(name, None)
 
     def __getitem__(self, __name: str) -> Any:
-        context_var = self._data.get(__name)
-        if isinstance(context_var, ContextVar):
-            return context_var.get(None)
-        return None
+        return getattr(self, __name, None)
 
 
 request_context = RequestContext()
+
+
+def map_in_request_context(executor: Executor, fn: Callable, *iterables) -> list:
+    """
+    Like executor.map, but each call runs in a copy of the caller's context, so
+    log lines from the pool threads carry the caller's request context, e.g. the
+    NHS number of the patient that a bulk upload worker is processing.
+    """
+    futures = [
+        executor.submit(copy_context().run, fn, *args) for args in zip(*iterables)
+    ]
+    return [future.result() for future in futures]
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+
+
+@dataclass
+class CacheMetrics:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class TtlCache:
+    """
+    Thread-safe in-memory cache for values that are expensive to fetch and only
+    change occasionally, meant to live for as long as a warm lambda container.
+
+    Entries expire ttl_seconds after they are put, unless put() is given a
+    shorter ttl for that entry. When max_entries is set the least recently used
+    entries are evicted first. A ttl_seconds of 0 disables the cache, so every
+    get() is a miss.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self.metrics = CacheMetrics()
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() >= entry[1]:
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.metrics.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.metrics.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl_seconds = (
+            self.ttl_seconds
+            if ttl_seconds is None
+            else min(ttl_seconds, self.ttl_seconds)
+        )
+        if ttl_seconds <= 0:
+            self.invalidate(key)
+            return
+
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + ttl_seconds)
+            self.entries.move_to_end(key)
+            while self.max_entries and len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.metrics.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.metrics = CacheMetrics()
@@ -12,6 +12,7 @@ from services.mock_pds_service import MockPdsApiService
 from services.mock_virus_scan_service import MockVirusScanService
 from services.patient_search_service import PatientSearch
 from services.pds_api_service import PdsApiService
+from services.pds_response_cache import CachedPatientSearch, PdsResponseCache
 from services.virus_scan_result_service import VirusScanService
 from utils.exceptions import InvalidNhsNumberException
 
@@ -67,16 +68,22 @@ def create_reference_id() -> str:
     return str(uuid.uuid4())
 
 
-def get_pds_service() -> PatientSearch:
+def get_pds_service(use_cache: bool = False) -> PatientSearch:
     if os.getenv("PDS_FHIR_IS_STUBBED") in ["False", "false"]:
         ssm_service = SSMService()
         auth_service = NhsOauthService(ssm_service)
-        return PdsApiService(ssm_service, auth_service)
+        pds_service = PdsApiService(ssm_service, auth_service)
     else:
-        return MockPdsApiService(
+        pds_service = MockPdsApiService(
             always_pass_mock=os.getenv("BYPASS_PDS", "false").lower() == "true"
         )
 
+    if use_cache:
+        pds_response_cache = PdsResponseCache()
+        if pds_response_cache.enabled:
+            return CachedPatientSearch(pds_service, pds_response_cache)
+    return pds_service
+
 
 def get_virus_scan_service():
     if os.getenv("VIRUS_SCAN_STUB") in ["False", "false"]:
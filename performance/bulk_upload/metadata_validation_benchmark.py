@@ -0,0 +1,145 @@
+"""
+Benchmark metadata filename validation
+
+Measures MetadataGeneralPreprocessor.generate_renaming_map over the metadata
+that gen_lg_pdfs.py produces for the 500 and 8000 patient input datasets (three
+files per patient). The batch run parses each FILEPATH with the combined Lloyd
+George expression; the row by row run validates every file name with the
+individual extract_* functions. Both runs must produce the same renaming map.
+
+Usage:
+- Install the lambda requirements (lambdas/requirements)
+- Run the script from the repository root:
+  `python performance/bulk_upload/metadata_validation_benchmark.py`
+- Optionally pass the datasets and the number of repeats:
+  `python performance/bulk_upload/metadata_validation_benchmark.py --datasets 500_ODS_A20047.csv --repeats 5`
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../lambdas")
+)
+os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-2")
+
+from services.bulk_upload.metadata_general_preprocessor import (  # noqa: E402
+    MetadataGeneralPreprocessor,
+)
+from services.bulk_upload_metadata_preprocessor_service import (  # noqa: E402
+    MetadataPreprocessorService,
+)
+from utils.audit_logging_setup import LoggingService  # noqa: E402
+
+INPUT_DATASETS_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "lloyd_george_pdf_generator/input_datasets",
+)
+DEFAULT_DATASETS = ["500_ODS_A20047.csv", "8000_ODS_H81109.csv"]
+TOTAL_PAGES = 3
+
+
+class RowByRowPreprocessor(MetadataGeneralPreprocessor):
+    def validate_metadata_row(self, metadata_row: dict):
+        return MetadataPreprocessorService.validate_metadata_row(self, metadata_row)
+
+
+def format_date_of_birth(date_of_birth: str) -> str:
+    for date_format in ["%d/%m/%Y", "%Y%m%d"]:
+        try:
+            return datetime.strptime(date_of_birth, date_format).strftime("%d-%m-%Y")
+        except ValueError:
+            continue
+    return date_of_birth
+
+
+def build_metadata_rows(dataset_path: str) -> list[dict]:
+    metadata_rows = []
+    with open(dataset_path, newline="") as dataset:
+        for patient in csv.DictReader(dataset):
+            given_name = patient["GIVEN_NAME"]
+            if patient["OTHER_GIVEN_NAME"]:
+                given_name += " " + patient["OTHER_GIVEN_NAME"]
+            nhs_number = patient["NHS_NUMBER"]
+            date_of_birth = format_date_of_birth(patient["DATE_OF_BIRTH"])
+
+            for page in range(1, TOTAL_PAGES + 1):
+                metadata_rows.append(
+                    {
+                        "FILEPATH": (
+                            f"/{nhs_number}/{page}of{TOTAL_PAGES}_Lloyd_George_Record_"
+                            f"[{given_name} {patient['FAMILY_NAME']}]_"
+                            f"[{nhs_number}]_[{date_of_birth}].pdf"
+                        ),
+                        "PAGE COUNT": str(page),
+                        "GP-PRACTICE-CODE": "",
+                        "NHS-NO": nhs_number,
+                        "SECTION": "LG",
+                        "SUB-SECTION": "",
+                        "SCAN-DATE": "01/01/2023",
+                        "SCAN-ID": "NEC",
+                        "USER-ID": "NEC",
+                        "UPLOAD": "26/11/2023",
+                    }
+                )
+    return metadata_rows
+
+
+def silence_logging():
+    null_stream = open(os.devnull, "w")
+    for logging_service in LoggingService._instances.values():
+        for handler in logging_service.logger.handlers:
+            handler.setStream(null_stream)
+
+
+def time_renaming_map(
+    service: MetadataPreprocessorService, metadata_rows: list[dict], repeats: int
+):
+    best = None
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = service.generate_renaming_map(metadata_rows)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_benchmark(datasets: list[str], repeats: int):
+    silence_logging()
+    batch_service = MetadataGeneralPreprocessor(practice_directory="A20047")
+    row_by_row_service = RowByRowPreprocessor(practice_directory="A20047")
+
+    print(f"Best of {repeats} runs")
+    print(
+        f"{'dataset':>22} {'rows':>7} {'rejected':>9} "
+        f"{'row by row':>11} {'batch':>8} {'speedup':>8}"
+    )
+    for dataset in datasets:
+        metadata_rows = build_metadata_rows(
+            os.path.join(INPUT_DATASETS_DIRECTORY, dataset)
+        )
+        row_by_row_seconds, expected = time_renaming_map(
+            row_by_row_service, metadata_rows, repeats
+        )
+        batch_seconds, actual = time_renaming_map(batch_service, metadata_rows, repeats)
+        if actual != expected:
+            raise AssertionError(f"Batch validation differs for {dataset}")
+
+        print(
+            f"{dataset:>22} {len(metadata_rows):>7} {len(actual[1]):>9} "
+            f"{row_by_row_seconds:>10.3f}s {batch_seconds:>7.3f}s "
+            f"{row_by_row_seconds / batch_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--datasets", nargs="+", default=DEFAULT_DATASETS)
+    parser.add_argument("--repeats", type=int, default=3)
+    arguments = parser.parse_args()
+    run_benchmark(arguments.datasets, arguments.repeats)
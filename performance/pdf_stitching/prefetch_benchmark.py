@@ -0,0 +1,93 @@
+"""
+Benchmark PDF stitching part prefetch
+
+Measures the end-to-end time of PdfStitchingService.process_stitching for Lloyd
+George records of 10, 50 and 200 parts. S3 is replaced with a fake that copies a
+single page PDF to disk after a fixed per-request latency, so the results show
+how much of the GET latency the prefetch window hides.
+
+Usage:
+- Install the lambda requirements (lambdas/requirements)
+- Run the script from the repository root:
+  `python performance/pdf_stitching/prefetch_benchmark.py`
+- Optionally pass the per-request latency in milliseconds and the download
+  concurrencies to compare:
+  `python performance/pdf_stitching/prefetch_benchmark.py --latency-ms 80 --concurrency 1 5 10`
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from pikepdf import Pdf
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../lambdas")
+)
+os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-2")
+
+from services.pdf_stitching_service import PdfStitchingService  # noqa: E402
+
+PART_COUNTS = [10, 50, 200]
+
+
+class FakeS3Service:
+    def __init__(self, source_pdf_path: str, latency_in_seconds: float):
+        self.source_pdf_path = source_pdf_path
+        self.latency_in_seconds = latency_in_seconds
+
+    def download_file(self, s3_bucket_name: str, file_key: str, download_path: str):
+        time.sleep(self.latency_in_seconds)
+        shutil.copyfile(self.source_pdf_path, download_path)
+
+
+class NullUploadPdfStitchingService(PdfStitchingService):
+    def upload_stitched_file(self, stitched_pdf: Pdf) -> int:
+        with tempfile.TemporaryFile() as output:
+            stitched_pdf.save(output)
+            return output.tell()
+
+
+def create_single_page_pdf(directory: str) -> str:
+    path = os.path.join(directory, "part.pdf")
+    with Pdf.new() as pdf:
+        pdf.add_blank_page()
+        pdf.save(path)
+    return path
+
+
+def run_benchmark(latency_in_ms: int, concurrencies: list[int]):
+    with tempfile.TemporaryDirectory() as directory:
+        fake_s3_service = FakeS3Service(
+            source_pdf_path=create_single_page_pdf(directory),
+            latency_in_seconds=latency_in_ms / 1000,
+        )
+        service = NullUploadPdfStitchingService()
+        service.s3_service = fake_s3_service
+
+        print(f"Per-request latency: {latency_in_ms}ms")
+        print(f"{'parts':>6} {'concurrency':>12} {'seconds':>9} {'speedup':>8}")
+        for part_count in PART_COUNTS:
+            keys = [f"9000000009/part-{index}" for index in range(part_count)]
+            baseline = None
+            for concurrency in concurrencies:
+                service.max_concurrent_downloads = concurrency
+                start = time.perf_counter()
+                service.process_stitching(s3_object_keys=keys)
+                elapsed = time.perf_counter() - start
+                baseline = baseline or elapsed
+                print(
+                    f"{part_count:>6} {concurrency:>12} {elapsed:>9.2f} "
+                    f"{baseline / elapsed:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency-ms", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 10, 20])
+    arguments = parser.parse_args()
+    run_benchmark(arguments.latency_ms, arguments.concurrency)